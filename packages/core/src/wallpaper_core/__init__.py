@@ -3,7 +3,9 @@
 from wallpaper_core.config.schema import (
     BackendSettings,
     CoreSettings,
+    EncodingSettings,
     ExecutionSettings,
+    LimitSettings,
     OutputSettings,
     ProcessingSettings,
     Verbosity,
@@ -21,7 +23,9 @@ __all__ = [
     "__version__",
     # Config
     "CoreSettings",
+    "EncodingSettings",
     "ExecutionSettings",
+    "LimitSettings",
     "OutputSettings",
     "ProcessingSettings",
     "BackendSettings",
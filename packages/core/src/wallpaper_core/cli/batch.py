@@ -7,231 +7,192 @@ from typing import Annotated
 
 import typer
 
-from wallpaper_core.cli.process import _resolve_chain_commands, _resolve_command
-from wallpaper_core.config.schema import ItemType, Verbosity
+from wallpaper_core.cli.process import (
+    _SIZE_HELP,
+    _in_process_steps,
+    _output_files,
+    _parse_sizes,
+)
+from wallpaper_core.config.schema import CoreSettings, ItemType, Verbosity
+from wallpaper_core.console.output import RichOutput
 from wallpaper_core.console.progress import BatchProgress
 from wallpaper_core.dry_run import CoreDryRun
 from wallpaper_core.effects.schema import EffectsConfig
-from wallpaper_core.engine.batch import BatchGenerator
-from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.batch import (
+    BatchGenerator,
+    item_chain,
+    item_names,
+    item_output_path,
+)
+from wallpaper_core.engine.cancel import cancel_on_signals
+from wallpaper_core.engine.plan import build_plan
+from wallpaper_core.engine.plugins import command_only_error
+from wallpaper_core.engine.variants import OutputGeometry
 
 app = typer.Typer(help="Batch generate effects")
 
+_PLAN_OUT_HELP = "Write the execution plan as JSON instead of running it"
+_RESUME_HELP = "Skip items the journal records as done whose outputs are intact"
+_RETRY_FAILED_HELP = "Run only the items the journal records as failed"
+
+# Item types generated by each batch command
+_BATCH_ITEM_TYPES = {
+    "effects": [ItemType.EFFECT],
+    "composites": [ItemType.COMPOSITE],
+    "presets": [ItemType.PRESET],
+    "all": list(ItemType),
+}
+
 
 def _get_batch_generator(
-    ctx: typer.Context, parallel: bool, strict: bool
+    ctx: typer.Context,
+    parallel: bool,
+    strict: bool,
+    geometries: list[OutputGeometry] | None = None,
+    resume: bool = False,
+    retry_failed: bool = False,
 ) -> BatchGenerator:
     """Create BatchGenerator with settings."""
-    settings = ctx.obj["settings"]
-    # CLI flags override settings
+    return _batch_generator(
+        ctx.obj["settings"],
+        ctx.obj["config"],
+        ctx.obj["output"],
+        parallel,
+        strict,
+        geometries,
+        resume,
+        retry_failed,
+    )
+
+
+def _batch_generator(
+    settings: CoreSettings,
+    config: EffectsConfig,
+    output: RichOutput | None,
+    parallel: bool | None = None,
+    strict: bool | None = None,
+    geometries: list[OutputGeometry] | None = None,
+    resume: bool = False,
+    retry_failed: bool = False,
+) -> BatchGenerator:
+    """Create BatchGenerator from settings (flags given override them)."""
     use_parallel = parallel if parallel is not None else settings.execution.parallel
     use_strict = strict if strict is not None else settings.execution.strict
     max_workers = settings.execution.max_workers
 
     return BatchGenerator(
-        config=ctx.obj["config"],
-        output=ctx.obj["output"],
+        config=config,
+        output=output,
         parallel=use_parallel,
         strict=use_strict,
         max_workers=max_workers,
+        geometries=geometries,
+        encoding=settings.encoding,
+        limits=settings.limits,
+        temp_dir=settings.processing.temp_dir,
+        pipeline=settings.processing.pipeline,
+        optimize=settings.processing.optimize,
+        fuse_pointwise=settings.processing.fuse_pointwise,
+        clut_dir=settings.processing.clut_dir,
+        cascade_blurs=settings.processing.cascade_blurs,
+        blur_tolerance=settings.processing.blur_tolerance,
+        backend=settings.backend.backend,
+        workers=settings.execution.workers,
+        resume=resume,
+        retry_failed=retry_failed,
+        manifest=settings.output.manifest,
     )
 
 
-def _resolve_batch_items(
-    config: EffectsConfig,
+def _dry_run_items(
+    generator: BatchGenerator,
     batch_type: str,
     input_file: Path,
     output_dir: Path,
     flat: bool,
+    explicit_output: bool = False,
 ) -> list[dict[str, str]]:
-    """Resolve all batch items with their output paths and commands."""
-    suffix = input_file.suffix or ".png"
-    image_name = input_file.stem
-    chain_executor = ChainExecutor(config, None)
+    """Describe each batch item from the plan the generator would run.
 
-    items: list[dict[str, str]] = []
+    Items that fail validation, or that an in-process backend renders, get
+    a note instead of commands.
 
-    # Collect items based on batch_type
-    item_groups: list[tuple[str, ItemType, str | None]] = (
-        []
-    )  # (name, type, subdir_for_single_type)
-    if batch_type in ("effects", "all"):
-        for name in config.effects:
-            item_groups.append(
-                (
-                    name,
-                    ItemType.EFFECT,
-                    (
-                        ItemType.EFFECT.subdir_name
-                        if batch_type != "all" or not flat
-                        else None
-                    ),
-                )
-            )
-    if batch_type in ("composites", "all"):
-        for name in config.composites:
-            item_groups.append(
-                (
-                    name,
-                    ItemType.COMPOSITE,
-                    (
-                        ItemType.COMPOSITE.subdir_name
-                        if batch_type != "all" or not flat
-                        else None
-                    ),
-                )
-            )
-    if batch_type in ("presets", "all"):
-        for name in config.presets:
-            item_groups.append(
-                (
-                    name,
-                    ItemType.PRESET,
-                    (
-                        ItemType.PRESET.subdir_name
-                        if batch_type != "all" or not flat
-                        else None
-                    ),
-                )
+    Raises:
+        ValueError: If the batch cannot be planned
+    """
+    config = generator.config
+    item_types = _BATCH_ITEM_TYPES[batch_type]
+    keys = [(name, t) for t in item_types for name in item_names(config, t)]
+    notes = {
+        (name, item_type): [f"# Invalid {item_type.value} '{name}': {error}"]
+        for (name, item_type), errors in generator.chain_executor.validator.check_items(
+            keys
+        ).items()
+        for error in errors[:1]
+    }
+    for name, item_type in keys:
+        chain = item_chain(config, name, item_type)
+        if (name, item_type) in notes or not chain:
+            continue
+        backend = generator.in_process_backend(name, item_type)
+        error = command_only_error(config, chain)
+        if backend is not None:
+            notes[(name, item_type)] = _in_process_steps(
+                generator.chain_executor, chain, backend.name
             )
+        elif error is not None:
+            notes[(name, item_type)] = [f"# Cannot run: {error}"]
 
-    for name, item_type, single_type_subdir in item_groups:
-        # Compute the output path mirroring BatchGenerator._get_output_path logic
-        if batch_type == "all":
-            # generate_all: base_dir = output_dir / image_name
-            base_dir = output_dir / image_name
-            if flat:
-                out_path = base_dir / f"{name}{suffix}"
-            else:
-                out_path = base_dir / item_type.subdir_name / f"{name}{suffix}"
-        else:
-            # generate_batch: base_dir varies based on flat/subdir settings
-            base_dir = output_dir / image_name
-            if not flat and single_type_subdir:
-                base_dir = base_dir / single_type_subdir
-            out_path = base_dir / f"{name}{suffix}"
+    plan = generator.plan(
+        input_file, output_dir, item_types, flat, explicit_output, notes
+    )
+    commands: dict[tuple[str, ItemType], list[str]] = {}
+    for job in plan.jobs:
+        commands.setdefault((job.item, job.item_type), []).append(job.command)
 
-        # Resolve command(s)
+    items: list[dict[str, str]] = []
+    for name, item_type in keys:
+        output_path = item_output_path(
+            config,
+            generator.encoding,
+            plan.output_dir,
+            name,
+            item_type,
+            input_file,
+            flat,
+        )
+        note = notes.get((name, item_type))
+        item = {
+            "name": name,
+            "type": item_type.value,
+            "output_path": ", ".join(
+                str(path) for path in _output_files(output_path, generator.geometries)
+            ),
+            "command": (
+                "\n".join(note)
+                if note is not None
+                else " && ".join(commands.get((name, item_type), []))
+            ),
+        }
         if item_type == ItemType.EFFECT:
-            effect_def = config.effects.get(name)
-            if effect_def is not None:
-                params = chain_executor._get_params_with_defaults(name, {})
-                cmd = _resolve_command(effect_def.command, input_file, out_path, params)
-                param_str = (
-                    "  ".join(f"{k}={v}" for k, v in params.items())
-                    if params
-                    else "\u2014"
-                )
-            else:
-                cmd = f"# Unknown effect: {name}"
-                param_str = "\u2014"
-            items.append(
-                {
-                    "name": name,
-                    "type": item_type.value,
-                    "output_path": str(out_path),
-                    "command": cmd,
-                    "params": param_str,
-                }
+            params = generator.chain_executor._get_params_with_defaults(name, {})
+            item["params"] = (
+                "  ".join(f"{k}={v}" for k, v in params.items()) or "\u2014"
             )
-
         elif item_type == ItemType.COMPOSITE:
-            composite_def = config.composites.get(name)
-            if composite_def is not None:
-                chain_cmds = _resolve_chain_commands(
-                    composite_def.chain,
-                    config,
-                    input_file,
-                    out_path,
-                )
-                cmd = " && ".join(chain_cmds)
-                chain_str = " -> ".join(s.effect for s in composite_def.chain)
-            else:
-                cmd = f"# Unknown composite: {name}"
-                chain_str = "\u2014"
-            items.append(
-                {
-                    "name": name,
-                    "type": item_type.value,
-                    "output_path": str(out_path),
-                    "command": cmd,
-                    "params": chain_str,
-                }
+            chain = item_chain(config, name, item_type)
+            item["params"] = (
+                " -> ".join(step.effect for step in chain) if chain else "\u2014"
             )
-
-        elif item_type == ItemType.PRESET:
-            preset_def = config.presets.get(name)
-            if preset_def is not None:
-                if preset_def.composite:
-                    composite_def = config.composites.get(preset_def.composite)
-                    if composite_def is not None:
-                        chain_cmds = _resolve_chain_commands(
-                            composite_def.chain,
-                            config,
-                            input_file,
-                            out_path,
-                        )
-                        cmd = " && ".join(chain_cmds)
-                    else:
-                        cmd = f"# Unknown composite: {preset_def.composite}"
-                    items.append(
-                        {
-                            "name": name,
-                            "type": item_type.value,
-                            "output_path": str(out_path),
-                            "command": cmd,
-                            "preset_type": "composite",
-                            "target": preset_def.composite,
-                        }
-                    )
-                elif preset_def.effect:
-                    effect_def = config.effects.get(preset_def.effect)
-                    if effect_def is not None:
-                        params = chain_executor._get_params_with_defaults(
-                            preset_def.effect,
-                            preset_def.params,
-                        )
-                        cmd = _resolve_command(
-                            effect_def.command,
-                            input_file,
-                            out_path,
-                            params,
-                        )
-                    else:
-                        cmd = f"# Unknown effect: {preset_def.effect}"
-                    items.append(
-                        {
-                            "name": name,
-                            "type": item_type.value,
-                            "output_path": str(out_path),
-                            "command": cmd,
-                            "preset_type": "effect",
-                            "target": preset_def.effect,
-                        }
-                    )
-                else:
-                    items.append(
-                        {
-                            "name": name,
-                            "type": item_type.value,
-                            "output_path": str(out_path),
-                            "command": f"# Preset '{name}' has no effect or composite",
-                            "preset_type": "\u2014",
-                            "target": "\u2014",
-                        }
-                    )
-            else:
-                items.append(
-                    {
-                        "name": name,
-                        "type": item_type.value,
-                        "output_path": str(out_path),
-                        "command": f"# Unknown preset: {name}",
-                        "preset_type": "\u2014",
-                        "target": "\u2014",
-                    }
-                )
-
+        else:
+            preset = config.presets[name]
+            item["preset_type"] = (
+                "composite"
+                if preset.composite
+                else "effect" if preset.effect else "\u2014"
+            )
+            item["target"] = preset.composite or preset.effect or "\u2014"
+        items.append(item)
     return items
 
 
@@ -245,18 +206,50 @@ def _run_batch(
     flat: bool,
     dry_run: bool = False,
     explicit_output: bool = False,
+    sizes: list[str] | None = None,
+    plan_out: Path | None = None,
+    resume: bool = False,
+    retry_failed: bool = False,
 ) -> None:
     """Run batch generation."""
     output = ctx.obj["output"]
     config = ctx.obj["config"]
+    geometries = _parse_sizes(output, sizes)
 
-    if dry_run:
+    if plan_out is not None:
         settings = ctx.obj["settings"]
-        use_parallel = parallel if parallel is not None else settings.execution.parallel
-        use_strict = strict if strict is not None else settings.execution.strict
-        max_workers = settings.execution.max_workers or None
+        try:
+            plan = build_plan(
+                config,
+                input_file,
+                output_dir,
+                _BATCH_ITEM_TYPES[batch_type],
+                flat,
+                explicit_output,
+                settings.encoding,
+                settings.limits,
+                optimize=settings.processing.optimize,
+                fuse_pointwise=settings.processing.fuse_pointwise,
+                geometries=geometries,
+                cascade_blurs=settings.processing.cascade_blurs,
+                blur_tolerance=settings.processing.blur_tolerance,
+            )
+        except ValueError as e:
+            output.error(str(e))
+            raise typer.Exit(1) from e
+        plan.write(plan_out)
+        output.success(f"Wrote plan with {len(plan.jobs)} jobs to {plan_out}")
+        raise typer.Exit(0)
 
-        items = _resolve_batch_items(config, batch_type, input_file, output_dir, flat)
+    if dry_run:
+        generator = _get_batch_generator(ctx, parallel, strict, geometries)
+        try:
+            items = _dry_run_items(
+                generator, batch_type, input_file, output_dir, flat, explicit_output
+            )
+        except ValueError as e:
+            output.error(str(e))
+            raise typer.Exit(1) from e
 
         if output.verbosity == Verbosity.QUIET:
             for item in items:
@@ -267,9 +260,9 @@ def _run_batch(
                 input_path=input_file,
                 output_dir=output_dir,
                 items=items,
-                parallel=use_parallel,
-                max_workers=max_workers,
-                strict=use_strict,
+                parallel=generator.parallel,
+                max_workers=generator.max_workers,
+                strict=generator.strict,
             )
 
         raise typer.Exit(0)
@@ -278,7 +271,9 @@ def _run_batch(
         output.error(f"Input file not found: {input_file}")
         raise typer.Exit(1)
 
-    generator = _get_batch_generator(ctx, parallel, strict)
+    generator = _get_batch_generator(
+        ctx, parallel, strict, geometries, resume, retry_failed
+    )
 
     # Determine total count
     if batch_type == "effects":
@@ -296,7 +291,10 @@ def _run_batch(
 
     output.info(f"Generating {total} {batch_type}...")
 
-    with BatchProgress(total, f"Generating {batch_type}") as progress:
+    with (
+        cancel_on_signals(generator.cancel_token),
+        BatchProgress(total, f"Generating {batch_type}") as progress,
+    ):
         result = method(
             input_file,
             output_dir,
@@ -306,11 +304,20 @@ def _run_batch(
         )
 
     output.newline()
+    if result.skipped:
+        output.info(f"Skipped {result.skipped} {batch_type} recorded in the journal")
+    if result.cancelled:
+        output.warning(
+            f"Cancelled: {result.succeeded}/{result.total} {batch_type} completed"
+        )
+        raise typer.Exit(130)
     if result.success:
         output.success(f"Generated {result.succeeded}/{result.total} {batch_type}")
         output.info(f"Output: {result.output_dir}")
     else:
         output.error(f"Failed: {result.failed}/{result.total} {batch_type} failed")
+        if result.timed_out:
+            output.error(f"{result.timed_out} timed out")
         if strict:
             raise typer.Exit(1)
 
@@ -330,10 +337,20 @@ def batch_effects(
     parallel: Annotated[bool, typer.Option("--parallel/--sequential")] = True,
     strict: Annotated[bool, typer.Option("--strict/--no-strict")] = True,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
     ] = False,
+    plan_out: Annotated[
+        Path | None, typer.Option("--plan-out", help=_PLAN_OUT_HELP)
+    ] = None,
+    resume: Annotated[bool, typer.Option("--resume", help=_RESUME_HELP)] = False,
+    retry_failed: Annotated[
+        bool, typer.Option("--retry-failed", help=_RETRY_FAILED_HELP)
+    ] = False,
 ) -> None:
     """Generate all effects for an image.
 
@@ -342,8 +359,6 @@ def batch_effects(
         wallpaper-core batch effects input.jpg -o /custom/output
         wallpaper-core batch effects input.jpg --flat
     """
-    from wallpaper_core.config.schema import CoreSettings
-
     settings: CoreSettings = ctx.obj["settings"]
 
     # Resolve output_dir
@@ -361,6 +376,10 @@ def batch_effects(
         flat,
         dry_run,
         explicit_output,
+        size,
+        plan_out,
+        resume,
+        retry_failed,
     )
 
 
@@ -379,10 +398,20 @@ def batch_composites(
     parallel: Annotated[bool, typer.Option("--parallel/--sequential")] = True,
     strict: Annotated[bool, typer.Option("--strict/--no-strict")] = True,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
     ] = False,
+    plan_out: Annotated[
+        Path | None, typer.Option("--plan-out", help=_PLAN_OUT_HELP)
+    ] = None,
+    resume: Annotated[bool, typer.Option("--resume", help=_RESUME_HELP)] = False,
+    retry_failed: Annotated[
+        bool, typer.Option("--retry-failed", help=_RETRY_FAILED_HELP)
+    ] = False,
 ) -> None:
     """Generate all composites for an image.
 
@@ -391,8 +420,6 @@ def batch_composites(
         wallpaper-core batch composites input.jpg -o /custom/output
         wallpaper-core batch composites input.jpg --flat
     """
-    from wallpaper_core.config.schema import CoreSettings
-
     settings: CoreSettings = ctx.obj["settings"]
 
     # Resolve output_dir
@@ -410,6 +437,10 @@ def batch_composites(
         flat,
         dry_run,
         explicit_output,
+        size,
+        plan_out,
+        resume,
+        retry_failed,
     )
 
 
@@ -428,10 +459,20 @@ def batch_presets(
     parallel: Annotated[bool, typer.Option("--parallel/--sequential")] = True,
     strict: Annotated[bool, typer.Option("--strict/--no-strict")] = True,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
     ] = False,
+    plan_out: Annotated[
+        Path | None, typer.Option("--plan-out", help=_PLAN_OUT_HELP)
+    ] = None,
+    resume: Annotated[bool, typer.Option("--resume", help=_RESUME_HELP)] = False,
+    retry_failed: Annotated[
+        bool, typer.Option("--retry-failed", help=_RETRY_FAILED_HELP)
+    ] = False,
 ) -> None:
     """Generate all presets for an image.
 
@@ -440,8 +481,6 @@ def batch_presets(
         wallpaper-core batch presets input.jpg -o /custom/output
         wallpaper-core batch presets input.jpg --flat
     """
-    from wallpaper_core.config.schema import CoreSettings
-
     settings: CoreSettings = ctx.obj["settings"]
 
     # Resolve output_dir
@@ -459,6 +498,10 @@ def batch_presets(
         flat,
         dry_run,
         explicit_output,
+        size,
+        plan_out,
+        resume,
+        retry_failed,
     )
 
 
@@ -477,10 +520,20 @@ def batch_all(
     parallel: Annotated[bool, typer.Option("--parallel/--sequential")] = True,
     strict: Annotated[bool, typer.Option("--strict/--no-strict")] = True,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
     ] = False,
+    plan_out: Annotated[
+        Path | None, typer.Option("--plan-out", help=_PLAN_OUT_HELP)
+    ] = None,
+    resume: Annotated[bool, typer.Option("--resume", help=_RESUME_HELP)] = False,
+    retry_failed: Annotated[
+        bool, typer.Option("--retry-failed", help=_RETRY_FAILED_HELP)
+    ] = False,
 ) -> None:
     """Generate all effects, composites, and presets for an image.
 
@@ -488,9 +541,8 @@ def batch_all(
         wallpaper-core batch all input.jpg
         wallpaper-core batch all input.jpg -o /custom/output
         wallpaper-core batch all input.jpg --flat
+        wallpaper-core batch all input.jpg --resume
     """
-    from wallpaper_core.config.schema import CoreSettings
-
     settings: CoreSettings = ctx.obj["settings"]
 
     # Resolve output_dir
@@ -508,4 +560,8 @@ def batch_all(
         flat,
         dry_run,
         explicit_output,
+        size,
+        plan_out,
+        resume,
+        retry_failed,
     )
@@ -0,0 +1,76 @@
+"""Export-lut command for writing a chain's color lookup table as .cube."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from wallpaper_core.config.schema import CoreSettings, ItemType
+from wallpaper_core.console.output import RichOutput
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import item_chain
+from wallpaper_core.engine.clut import ClutCache, clut_ops, cube_text
+from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.optimize import ChainOptimizer
+from wallpaper_core.engine.params import ParameterValidator
+
+
+def export_lut(
+    ctx: typer.Context,
+    name: Annotated[str, typer.Argument(help="Effect, composite or preset name")],
+    output_file: Annotated[
+        Path, typer.Option("-o", "--output", help="Output .cube file")
+    ],
+    item_type: Annotated[
+        ItemType, typer.Option("-t", "--type", help="Item type of NAME")
+    ] = ItemType.COMPOSITE,
+) -> None:
+    """Write the color lookup table of a pointwise chain as a .cube file.
+
+    Every step of the (optimized) chain must be a pointwise color effect,
+    i.e. declare traits kind pointwise or reduction. The table is the same
+    cached HALD CLUT that processing applies with -hald-clut.
+
+    Examples:
+        wallpaper-core export-lut blackwhite-brightness80 -o bw-dim.cube
+        wallpaper-core export-lut -t effect sepia -o sepia.cube
+    """
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+    config: EffectsConfig = ctx.obj["config"]
+
+    validator = ParameterValidator(config)
+    errors = validator.check_item(name, item_type)
+    chain = item_chain(config, name, item_type)
+    if errors or chain is None:
+        for error in errors or [f"Unknown {item_type.value}: {name}"]:
+            output.error(error)
+        raise typer.Exit(1)
+
+    optimizer = ChainOptimizer(config, settings.processing.optimize, validator)
+    try:
+        ops = clut_ops(config, optimizer.optimize(chain).steps)
+    except ValueError as e:
+        output.error(f"Cannot export {item_type.value} '{name}' as a LUT: {e}")
+        raise typer.Exit(1) from e
+
+    cache = ClutCache(
+        CommandExecutor(output, limits=settings.limits), settings.processing.clut_dir
+    )
+    result = cache.ensure(ops)
+    if not result.success:
+        output.error(f"CLUT generation failed: {result.stderr.strip()}")
+        raise typer.Exit(1)
+    try:
+        samples = cache.read_samples(ops)
+        text = cube_text(samples, cache.level, name)
+    except ValueError as e:
+        output.error(str(e))
+        raise typer.Exit(1) from e
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_text(text)
+    size = cache.level * cache.level
+    output.success(f"Wrote {size}x{size}x{size} LUT: {output_file}")
@@ -15,7 +15,16 @@ from layered_effects.errors import (
 )
 from layered_settings import configure, get_config
 from layered_settings.constants import APP_NAME
-from wallpaper_core.cli import batch, process, show
+from wallpaper_core.cli import (
+    batch,
+    lut,
+    map_images,
+    plan,
+    process,
+    show,
+    sweep,
+    worker,
+)
 from wallpaper_core.config.schema import CoreSettings, Verbosity
 from wallpaper_core.console.output import RichOutput
 from wallpaper_core.effects import get_package_effects_file
@@ -47,6 +56,11 @@ app = typer.Typer(
 app.add_typer(process.app, name="process")
 app.add_typer(batch.app, name="batch")
 app.add_typer(show.app, name="show")
+app.command("run-plan")(plan.run_plan)
+app.command("worker")(worker.worker)
+app.command("sweep")(sweep.sweep)
+app.command("export-lut")(lut.export_lut)
+app.command("map")(map_images.map_images)
 
 
 def _get_verbosity(quiet: bool, verbose: int) -> Verbosity:
@@ -0,0 +1,189 @@
+"""Map command for applying one effect, composite or preset to many images."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from wallpaper_core.cli.path_utils import resolve_output_path
+from wallpaper_core.cli.process import _FORMAT_HELP, _chain_executor, _with_format
+from wallpaper_core.config.schema import CoreSettings, ItemType, Verbosity
+from wallpaper_core.console.output import RichOutput
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import item_chain
+from wallpaper_core.engine.cancel import cancel_on_signals
+from wallpaper_core.engine.encoding import output_suffix, resolve_item_encoding
+from wallpaper_core.engine.stages import StagedExecutor, StagedResult
+
+_WORKERS_HELP = "{} stage workers (default: settings; 0 = CPU count)"
+
+
+def _select_item(
+    output: RichOutput,
+    effect: str | None,
+    composite: str | None,
+    preset: str | None,
+) -> tuple[str, ItemType]:
+    """Get the one item given with -e, -c or -p, exiting otherwise."""
+    given = [
+        (name, item_type)
+        for name, item_type in (
+            (effect, ItemType.EFFECT),
+            (composite, ItemType.COMPOSITE),
+            (preset, ItemType.PRESET),
+        )
+        if name is not None
+    ]
+    if len(given) != 1:
+        output.error("Give exactly one of --effect, --composite or --preset")
+        raise typer.Exit(1)
+    return given[0]
+
+
+def _report_stages(output: RichOutput, result: StagedResult) -> None:
+    """Show how busy each stage was, to tune its worker count."""
+    for stage in result.stages:
+        output.verbose(
+            f"{stage.name}: {stage.workers} workers, {stage.items} images, "
+            f"{stage.utilization(result.duration):.0%} busy, "
+            f"waited {stage.starved:.2f}s for input, "
+            f"{stage.blocked:.2f}s for the next stage"
+        )
+
+
+def map_images(
+    ctx: typer.Context,
+    input_files: Annotated[list[Path], typer.Argument(help="Input image files")],
+    effect: Annotated[
+        str | None, typer.Option("-e", "--effect", help="Effect to apply")
+    ] = None,
+    composite: Annotated[
+        str | None, typer.Option("-c", "--composite", help="Composite to apply")
+    ] = None,
+    preset: Annotated[
+        str | None, typer.Option("-p", "--preset", help="Preset to apply")
+    ] = None,
+    output_dir: Annotated[
+        Path | None,
+        typer.Option("-o", "--output-dir", help="Output directory (default: settings)"),
+    ] = None,
+    output_format: Annotated[
+        str | None, typer.Option("-f", "--format", help=_FORMAT_HELP)
+    ] = None,
+    decoders: Annotated[
+        int | None,
+        typer.Option("--decoders", help=_WORKERS_HELP.format("Decode"), min=1),
+    ] = None,
+    appliers: Annotated[
+        int | None,
+        typer.Option("--appliers", help=_WORKERS_HELP.format("Effect"), min=0),
+    ] = None,
+    encoders: Annotated[
+        int | None,
+        typer.Option("--encoders", help=_WORKERS_HELP.format("Encode"), min=0),
+    ] = None,
+    queue_size: Annotated[
+        int | None,
+        typer.Option("--queue-size", help="Images waiting between stages", min=1),
+    ] = None,
+    strict: Annotated[
+        bool | None,
+        typer.Option("--strict/--no-strict", help="Stop on first failure"),
+    ] = None,
+    dry_run: Annotated[
+        bool,
+        typer.Option("--dry-run", help="Show the outputs without executing"),
+    ] = False,
+) -> None:
+    """Apply one effect, composite or preset to many images.
+
+    Images are decoded, transformed and encoded in separate stages running
+    at the same time, so encoding one image overlaps the effects of the
+    next. Queues between the stages keep memory bounded. Outputs go where
+    `process` would write them; -v reports how busy each stage was.
+
+    Examples:
+        wallpaper-core map -e blur photos/*.jpg
+        wallpaper-core map -c blur-brightness80 -f webp -o /out a.jpg b.jpg
+        wallpaper-core -v map -p dark_blur --encoders 8 photos/*.png
+    """
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+    config: EffectsConfig = ctx.obj["config"]
+
+    name, item_type = _select_item(output, effect, composite, preset)
+    chain = item_chain(config, name, item_type)
+    if chain is None:
+        output.error(f"Unknown {item_type.value}: {name}")
+        raise typer.Exit(1)
+
+    profile = _with_format(
+        resolve_item_encoding(config, settings.encoding, name, item_type),
+        output_format,
+    )
+    base_dir = output_dir or settings.output.default_dir
+    jobs = [
+        (
+            input_file,
+            resolve_output_path(
+                base_dir,
+                input_file,
+                name,
+                item_type,
+                suffix=output_suffix(input_file, profile),
+            ),
+        )
+        for input_file in input_files
+    ]
+    outputs = [path for _, path in jobs]
+    if len(set(outputs)) < len(outputs):
+        output.error("Inputs with the same file name would overwrite each other")
+        raise typer.Exit(1)
+
+    if dry_run:
+        if output.verbosity != Verbosity.QUIET:
+            output.info(f"Would apply {item_type.value} {name} to {len(jobs)} images")
+        for input_file, path in jobs:
+            output.console.print(
+                f"{input_file} -> {path}", markup=False, highlight=False, soft_wrap=True
+            )
+        raise typer.Exit(0)
+
+    missing = [str(path) for path in input_files if not path.exists()]
+    if missing:
+        output.error(f"Input file not found: {', '.join(missing)}")
+        raise typer.Exit(1)
+
+    stages = settings.stages
+    chain_executor = _chain_executor(
+        settings,
+        config,
+        output,
+        encoding=_with_format(settings.encoding, output_format),
+    )
+    staged = StagedExecutor(
+        chain_executor,
+        decoders=decoders or stages.decoders,
+        appliers=stages.appliers if appliers is None else appliers,
+        encoders=stages.encoders if encoders is None else encoders,
+        queue_size=queue_size or stages.queue_size,
+        strict=settings.execution.strict if strict is None else strict,
+    )
+
+    output.info(f"Applying {item_type.value} {name} to {len(jobs)} images...")
+    with cancel_on_signals(chain_executor.executor.cancel_token):
+        result = staged.execute(chain, jobs)
+    _report_stages(output, result)
+
+    if not result.success:
+        output.error(f"Failed: {result.failed}/{result.total} images failed")
+        for input_name, item in result.results.items():
+            if not item.success and not item.cancelled:
+                output.error(f"{input_name}: {item.stderr.strip()}")
+        raise typer.Exit(1)
+    if result.cancelled:
+        output.warning(f"Cancelled: {result.succeeded}/{result.total} images")
+        raise typer.Exit(130)
+    output.success(f"Processed {result.succeeded} images in {result.duration:.1f}s")
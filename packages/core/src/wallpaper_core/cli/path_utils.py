@@ -3,6 +3,7 @@
 from pathlib import Path
 
 from wallpaper_core.config.schema import ItemType
+from wallpaper_core.engine.variants import OutputGeometry, variant_output_path
 
 
 def resolve_output_path(
@@ -12,6 +13,8 @@ def resolve_output_path(
     item_type: ItemType,
     flat: bool = False,
     explicit_output: bool = False,
+    geometry: OutputGeometry | None = None,
+    suffix: str | None = None,
 ) -> Path:
     """Resolve output file path using standardized structure.
 
@@ -22,6 +25,8 @@ def resolve_output_path(
         item_type: Type of item (ItemType enum)
         flat: If True, skip type subdirectory
         explicit_output: If True, user specified output directory explicitly
+        geometry: Output size variant (adds an @WIDTHxHEIGHT filename suffix)
+        suffix: Output file suffix (defaults to the input file's suffix)
 
     Returns:
         Path: Resolved output file path
@@ -30,6 +35,7 @@ def resolve_output_path(
         - explicit_output=True, flat=True: output_dir/item_name.ext
         - explicit_output=False, flat=True: output_dir/input_stem/item_name.ext
         - flat=False: output_dir/input_stem/type_subdir/item_name.ext
+        - geometry set: item_name@WIDTHxHEIGHT.ext in the same directory
 
     Examples:
         >>> resolve_output_path(
@@ -48,7 +54,7 @@ def resolve_output_path(
         ... )
         Path('/out/blur.jpg')
     """
-    suffix = input_file.suffix or ".png"
+    suffix = suffix or input_file.suffix or ".png"
 
     # Determine base directory based on flat mode and explicit output
     # Explicit output + flat: files directly in output_dir
@@ -56,6 +62,10 @@ def resolve_output_path(
     base_dir = output_dir if flat and explicit_output else output_dir / input_file.stem
 
     if flat:
-        return base_dir / f"{item_name}{suffix}"
+        output_path = base_dir / f"{item_name}{suffix}"
     else:
-        return base_dir / item_type.subdir_name / f"{item_name}{suffix}"
+        output_path = base_dir / item_type.subdir_name / f"{item_name}{suffix}"
+
+    if geometry is not None:
+        return variant_output_path(output_path, geometry)
+    return output_path
@@ -0,0 +1,126 @@
+"""Run-plan command for executing saved execution plans."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from wallpaper_core.config.schema import CoreSettings, Verbosity
+from wallpaper_core.console.output import RichOutput
+from wallpaper_core.console.progress import BatchProgress
+from wallpaper_core.engine.cancel import cancel_on_signals
+from wallpaper_core.engine.plan import ExecutionPlan, PlanExecutor
+from wallpaper_core.engine.queue import JobQueue
+
+
+def _parse_shard(output: RichOutput, shard: str) -> tuple[int, int]:
+    """Parse a K/N shard option, exiting with an error if it is invalid."""
+    try:
+        index, parts = (int(value) for value in shard.split("/"))
+    except ValueError:
+        index, parts = 0, 0
+    if parts < 1 or not 1 <= index <= parts:
+        output.error(f"Invalid shard '{shard}' (expected K/N with 1 <= K <= N)")
+        raise typer.Exit(1)
+    return index, parts
+
+
+def run_plan(
+    ctx: typer.Context,
+    plan_file: Annotated[Path, typer.Argument(help="Plan written by --plan-out")],
+    shard: Annotated[
+        str | None,
+        typer.Option("--shard", help="Run only part K of N of the plan (e.g. 2/4)"),
+    ] = None,
+    parallel: Annotated[bool, typer.Option("--parallel/--sequential")] = True,
+    strict: Annotated[bool, typer.Option("--strict/--no-strict")] = True,
+    dry_run: Annotated[
+        bool,
+        typer.Option("--dry-run", help="Show the plan's commands without executing"),
+    ] = False,
+    queue: Annotated[
+        Path | None,
+        typer.Option(
+            "--queue",
+            help="Add the jobs to a shared queue database for 'worker' to run",
+        ),
+    ] = None,
+) -> None:
+    """Execute a plan written by 'batch ... --plan-out'.
+
+    Examples:
+        wallpaper-core batch all input.jpg --plan-out plan.json
+        wallpaper-core run-plan plan.json
+        wallpaper-core run-plan plan.json --shard 1/2   # on machine one
+        wallpaper-core run-plan plan.json --shard 2/2   # on machine two
+        wallpaper-core run-plan plan.json --queue /nfs/queue.db
+    """
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+
+    try:
+        plan = ExecutionPlan.read(plan_file)
+    except (OSError, ValueError) as e:
+        output.error(f"Cannot read plan {plan_file}: {e}")
+        raise typer.Exit(1) from e
+
+    if shard is not None:
+        index, parts = _parse_shard(output, shard)
+        plan = plan.split(parts)[index - 1]
+
+    items = plan.items()
+    if dry_run:
+        if output.verbosity == Verbosity.QUIET:
+            for job in plan.jobs:
+                output.console.print(job.command, markup=False, highlight=False)
+        else:
+            output.info(
+                f"Would run {len(plan.jobs)} jobs for {len(items)} items "
+                f"(estimated cost {plan.cost:.1f})"
+            )
+            for job in plan.jobs:
+                after = (
+                    f" (after {', '.join(job.depends_on)})" if job.depends_on else ""
+                )
+                output.info(f"[bold]{job.id}[/bold]{after}")
+                output.console.print(f"  {job.command}", markup=False, highlight=False)
+        raise typer.Exit(0)
+
+    if queue is not None:
+        try:
+            plan_id = JobQueue(queue).add_plan(plan, settings.queue.max_attempts)
+        except (OSError, sqlite3.Error) as e:
+            output.error(f"Cannot write queue {queue}: {e}")
+            raise typer.Exit(1) from e
+        output.success(f"Queued {len(plan.jobs)} jobs as plan {plan_id} in {queue}")
+        raise typer.Exit(0)
+
+    if not plan.input_path.exists():
+        output.error(f"Input file not found: {plan.input_path}")
+        raise typer.Exit(1)
+
+    executor = PlanExecutor(output, parallel, strict, settings.execution.max_workers)
+    output.info(f"Running {len(plan.jobs)} jobs for {len(items)} items...")
+
+    with (
+        cancel_on_signals(executor.cancel_token),
+        BatchProgress(len(items), "Running plan") as progress,
+    ):
+        result = executor.execute(plan, progress)
+
+    output.newline()
+    if result.cancelled:
+        output.warning(f"Cancelled: {result.succeeded}/{result.total} items completed")
+        raise typer.Exit(130)
+    if result.success:
+        output.success(f"Generated {result.succeeded}/{result.total} items")
+        output.info(f"Output: {result.output_dir}")
+    else:
+        output.error(f"Failed: {result.failed}/{result.total} items failed")
+        if result.timed_out:
+            output.error(f"{result.timed_out} timed out")
+        if strict:
+            raise typer.Exit(1)
@@ -2,20 +2,54 @@
 
 from __future__ import annotations
 
+import sys
+from collections.abc import Callable
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any
 
 import typer
 
 from wallpaper_core.cli.path_utils import resolve_output_path
-from wallpaper_core.config.schema import CoreSettings, ItemType, Verbosity
+from wallpaper_core.config.schema import (
+    CoreSettings,
+    EncodingSettings,
+    ItemType,
+    Verbosity,
+)
 from wallpaper_core.dry_run import CoreDryRun
-from wallpaper_core.effects.schema import ChainStep, EffectsConfig
-from wallpaper_core.engine.chain import ChainExecutor
-from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.effects.schema import ChainStep, Effect, EffectsConfig
+from wallpaper_core.engine.batch import item_chain
+from wallpaper_core.engine.cancel import CancelToken, cancel_on_signals
+from wallpaper_core.engine.chain import INTERMEDIATE_FORMAT, ChainExecutor
+from wallpaper_core.engine.encoding import (
+    apply_encoding,
+    output_suffix,
+    resolve_item_encoding,
+)
+from wallpaper_core.engine.executor import CommandExecutor, ExecutionResult
+from wallpaper_core.engine.memory import DEFAULT_FORMAT, MemoryExecutor
+from wallpaper_core.engine.optimize import ChainOptimizer, describe_step
+from wallpaper_core.engine.params import ParameterValidator
+from wallpaper_core.engine.plan import PlanItem, plan_items
+from wallpaper_core.engine.variants import (
+    OutputGeometry,
+    VariantExecutor,
+    parse_geometries,
+    variant_output_path,
+)
+
+if TYPE_CHECKING:
+    from wallpaper_core.config.schema import LimitSettings
+    from wallpaper_core.console.output import RichOutput
 
 app = typer.Typer(help="Process a single image with effects")
 
+# Input/output argument meaning stdin/stdout
+STREAM = "-"
+
+# Stand-in input name used to name output files for stdin input
+STDIN_NAME = "stdin"
+
 
 def _resolve_command(
     command_template: str,
@@ -34,56 +68,359 @@ def _resolve_command(
     return command
 
 
-def _resolve_chain_commands(
-    chain: list[ChainStep],
+def _in_process_call(effect: Effect, params: dict[str, Any]) -> str | None:
+    """Describe a Python or expression effect where a command would be shown.
+
+    Returns:
+        The description, or None for command effects
+    """
+    args = ", ".join(f"{name}={value!r}" for name, value in params.items())
+    if effect.python:
+        return f"# python: {effect.python}(pixels{', ' if args else ''}{args})"
+    if effect.expression:
+        return f"# expression: {effect.expression}" + (f" ({args})" if args else "")
+    return None
+
+
+def _effect_render(
+    executor: CommandExecutor,
+    chain_executor: ChainExecutor,
+    effect: str,
+    params: dict[str, Any],
+) -> Callable[[Path, Path], ExecutionResult]:
+    """Render callable for one effect (in-process effects run as a chain)."""
+    if chain_executor.config.effects[effect].in_process:
+        step = ChainStep(effect=effect, params=params)
+        return lambda source, target: chain_executor.execute_chain(
+            [step], source, target
+        )
+    return lambda source, target: executor.execute(
+        chain_executor.encoded_command(effect, target) or "",
+        source,
+        target,
+        params,
+        chain_executor.effect_limits(effect),
+    )
+
+
+def _chain_executor(
+    settings: CoreSettings,
     config: EffectsConfig,
-    input_path: Path,
-    output_path: Path,
+    output: RichOutput | None = None,
+    cancel_token: CancelToken | None = None,
+    encoding: EncodingSettings | None = None,
+) -> ChainExecutor:
+    """Create the ChainExecutor process commands run items with.
+
+    Args:
+        settings: Settings the executor is configured from
+        config: Effects configuration
+        output: Output for progress and debug messages
+        cancel_token: Token that cancels the executor's commands
+        encoding: Encoding replacing the settings' one (e.g. with a
+            --format override)
+
+    Returns:
+        ChainExecutor
+    """
+    return ChainExecutor(
+        config,
+        output,
+        encoding or settings.encoding,
+        cancel_token,
+        settings.limits,
+        settings.processing.temp_dir,
+        settings.processing.pipeline,
+        settings.processing.optimize,
+        settings.processing.fuse_pointwise,
+        settings.processing.clut_dir,
+        settings.backend.backend,
+    )
+
+
+def _in_process_steps(
+    chain_executor: ChainExecutor, chain: list[ChainStep], backend: str
 ) -> list[str]:
-    """Resolve all commands in a chain without executing them."""
-    chain_executor = ChainExecutor(config, None)
-    commands = []
-    output_suffix = output_path.suffix or ".png"
+    """Describe the steps of a chain an in-process backend renders."""
+    lines = []
+    for step in chain_executor.optimizer.optimize(chain).steps:
+        params = chain_executor._get_params_with_defaults(step.effect, step.params)
+        call = _in_process_call(chain_executor.config.effects[step.effect], params)
+        lines.append(call or f"# {backend}: {describe_step(step)}")
+    return lines
 
-    for i, step in enumerate(chain):
-        is_last = i == len(chain) - 1
 
-        # Determine input for this step
-        if i == 0:
-            step_input = input_path
-        else:
-            step_input = Path(f"<temp/step_{i - 1}{output_suffix}>")
+def _planned_commands(
+    chain_executor: ChainExecutor,
+    name: str,
+    item_type: ItemType,
+    chain: list[ChainStep],
+    input_file: Path,
+    output_file: Path,
+    geometries: list[OutputGeometry] | None = None,
+) -> list[str]:
+    """Commands a process command runs for an item, from its execution plan.
 
-        # Determine output for this step
-        if is_last:
-            step_output = output_path
-        else:
-            step_output = Path(f"<temp/step_{i}{output_suffix}>")
+    An effect (alone or in a preset) runs as its command unless it runs
+    in-process; chains run in the backend that supports them. Steps an
+    in-process backend renders are described instead.
+    """
+    config = chain_executor.config
+    single = item_type == ItemType.EFFECT or (
+        item_type == ItemType.PRESET and not config.presets[name].composite
+    )
+    if not single or config.effects[chain[0].effect].in_process:
+        backend = chain_executor.backend_for(chain)
+        if backend.capabilities.in_process:
+            return _in_process_steps(chain_executor, chain, backend.name)
+    try:
+        plan = plan_items(
+            chain_executor,
+            input_file,
+            output_file.parent,
+            [PlanItem(name, item_type, chain, output_file)],
+            chain_executor.executor.binary,
+            geometries,
+        )
+    except ValueError as e:
+        return [f"# Cannot resolve: {e}"]
+    return [job.command for job in plan.jobs]
+
+
+def _parse_sizes(output: RichOutput, sizes: list[str] | None) -> list[OutputGeometry]:
+    """Parse --size options, exiting with an error on invalid geometry."""
+    try:
+        return parse_geometries(sizes or [])
+    except ValueError as e:
+        output.error(str(e))
+        raise typer.Exit(1) from e
+
+
+def _output_files(output_file: Path, geometries: list[OutputGeometry]) -> list[Path]:
+    """List the files a process command will create."""
+    if not geometries:
+        return [output_file]
+    return [variant_output_path(output_file, g) for g in geometries]
+
+
+def _execute_item(
+    render: Callable[[Path, Path], ExecutionResult],
+    input_file: Path,
+    output_file: Path,
+    geometries: list[OutputGeometry],
+    output: RichOutput,
+    encoding: EncodingSettings | None = None,
+    cancel_token: CancelToken | None = None,
+    limits: LimitSettings | None = None,
+    temp_dir: Path | None = None,
+) -> ExecutionResult:
+    """Run a render callable, deriving size variants when requested.
+
+    SIGINT/SIGTERM cancel the token while the item runs, so an interrupted
+    command is killed and its partial output removed.
+    """
+    token = cancel_token or CancelToken()
+    with cancel_on_signals(token):
+        if not geometries:
+            return render(input_file, output_file)
+        executor = CommandExecutor(output, cancel_token=token, limits=limits)
+        return VariantExecutor(executor, output, temp_dir).execute(
+            render, input_file, output_file, geometries, encoding
+        )
 
-        effect_def = config.effects.get(step.effect)
-        if effect_def is None:
-            commands.append(f"# Unknown effect: {step.effect}")
-            continue
 
-        params = chain_executor._get_params_with_defaults(step.effect, step.params)
-        resolved = _resolve_command(effect_def.command, step_input, step_output, params)
-        commands.append(resolved)
+def _exit_if_cancelled(output: RichOutput, result: ExecutionResult) -> None:
+    """Exit with the conventional SIGINT status if the run was cancelled."""
+    if result.cancelled:
+        output.warning("Cancelled")
+        raise typer.Exit(130)
+
+
+def _is_stream(path: Path | None) -> bool:
+    """Check if an input/output argument is "-" (stdin/stdout)."""
+    return path is not None and str(path) == STREAM
+
+
+def _with_format(
+    profile: EncodingSettings, output_format: str | None
+) -> EncodingSettings:
+    """Apply a --format override to an item's encoding profile."""
+    if output_format is None:
+        return profile
+    return profile.merged(EncodingSettings(format=output_format))
+
+
+def _explain_chain(ctx: typer.Context, name: str, item_type: ItemType) -> None:
+    """Show how the chain optimizer rewrites an item, then exit."""
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+    config: EffectsConfig = ctx.obj["config"]
+
+    validator = ParameterValidator(config)
+    errors = validator.check_item(name, item_type)
+    chain = item_chain(config, name, item_type)
+    if errors or chain is None:
+        for error in errors or [f"Unknown {item_type.value}: {name}"]:
+            output.error(error)
+        raise typer.Exit(1)
+
+    mode = settings.processing.optimize
+    result = ChainOptimizer(config, mode, validator).optimize(chain)
+    output.info(f"Chain of {item_type.value} '{name}' (optimize: {mode})")
+    output.info(f"  Original:  {' -> '.join(describe_step(s) for s in chain)}")
+    output.info(f"  Optimized: {' -> '.join(describe_step(s) for s in result.steps)}")
+    if result.changed:
+        for rewrite in result.rewrites:
+            output.info(f"    - {rewrite}")
+    else:
+        output.info("    (no rewrites apply)")
+    output.info(
+        f"  Estimated cost: {result.cost_before:.1f} -> {result.cost_after:.1f} "
+        f"({result.savings:.0%} less)"
+    )
+    raise typer.Exit(0)
+
+
+def _stream_item(
+    ctx: typer.Context,
+    name: str,
+    item_type: ItemType,
+    input_file: Path,
+    output_dir: Path | None,
+    output_format: str | None,
+    params: dict[str, str | int],
+    flat: bool,
+    geometries: list[OutputGeometry],
+    dry_run: bool,
+) -> None:
+    """Process an item with stdin input and/or stdout output.
+
+    The image never touches disk: it is piped through magick's stdin and
+    stdout, with chain intermediates passed between steps in memory.
+    """
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+    config: EffectsConfig = ctx.obj["config"]
+    from_stdin = _is_stream(input_file)
+    to_stdout = _is_stream(output_dir)
+
+    if geometries:
+        output.error("--size cannot be combined with '-' input or output")
+        raise typer.Exit(1)
+
+    chain = item_chain(config, name, item_type)
+    if chain is None:
+        output.error(f"Unknown {item_type.value}: {name}")
+        raise typer.Exit(1)
+
+    profile = _with_format(
+        resolve_item_encoding(config, settings.encoding, name, item_type),
+        output_format,
+    )
+    source = Path(STDIN_NAME) if from_stdin else input_file
+    output_file: Path | None = None
+    if to_stdout:
+        fmt = profile.format or source.suffix.lstrip(".").lower() or DEFAULT_FORMAT
+    else:
+        output_file = resolve_output_path(
+            output_dir=output_dir or settings.output.default_dir,
+            input_file=source,
+            item_name=name,
+            item_type=item_type,
+            flat=flat,
+            explicit_output=False,
+            suffix=output_suffix(source, profile),
+        )
+        fmt = output_file.suffix.lstrip(".")
 
-    return commands
+    if dry_run:
+        chain_executor = ChainExecutor(config, None, settings.encoding)
+        output.info(f"Would apply {item_type.value}: {name}")
+        output.info(f"Input: {'<stdin>' if from_stdin else input_file}")
+        output.info(f"Output: {output_file or f'<stdout> ({fmt})'}")
+        for i, step in enumerate(chain):
+            is_last = i == len(chain) - 1
+            step_params = dict(step.params)
+            if item_type == ItemType.EFFECT:
+                step_params.update(params)
+            step_params = chain_executor._get_params_with_defaults(
+                step.effect, step_params
+            )
+            call = _in_process_call(config.effects[step.effect], step_params)
+            if call is not None:
+                output.console.print(call, markup=False)
+                continue
+            template = config.effects[step.effect].command
+            if is_last:
+                template = apply_encoding(template, profile, Path(f"stdout.{fmt}"))
+            target = fmt if is_last else INTERMEDIATE_FORMAT
+            output.console.print(
+                _resolve_command(
+                    template,
+                    Path(STREAM),
+                    Path(f"{target}:{STREAM}"),
+                    step_params,
+                )
+            )
+        raise typer.Exit(0)
+
+    if to_stdout:
+        output.use_stderr()
+    if from_stdin:
+        data = sys.stdin.buffer.read()
+    elif input_file.exists():
+        data = input_file.read_bytes()
+    else:
+        output.error(f"Input file not found: {input_file}")
+        raise typer.Exit(1)
+
+    cancel_token = CancelToken()
+    executor = MemoryExecutor(
+        config,
+        output,
+        settings.encoding,
+        settings.limits,
+        cancel_token,
+        settings.backend.backend,
+        settings.processing.fuse_pointwise,
+        settings.processing.clut_dir,
+    )
+    output.verbose(f"Applying {item_type.value} '{name}' to {source}")
+    with cancel_on_signals(cancel_token):
+        result = executor.apply(data, name, item_type, fmt, dict(params))
+
+    _exit_if_cancelled(output, result)
+    if not result.success:
+        output.error(f"Failed: {result.stderr}")
+        raise typer.Exit(1)
+
+    if output_file is None:
+        sys.stdout.buffer.write(result.data)
+        sys.stdout.buffer.flush()
+    else:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_bytes(result.data)
+        output.success(f"Created {output_file}")
+
+
+_SIZE_HELP = "Output size WIDTHxHEIGHT (repeatable; effect runs once at the largest)"
+_INPUT_HELP = "Input image file ('-' reads stdin)"
+_OUTPUT_HELP = "Output directory (uses settings default; '-' writes stdout)"
+_FORMAT_HELP = "Output format, e.g. png, jpg, webp (default: encoding profile)"
+_EXPLAIN_HELP = "Show how the chain optimizer rewrites the chain, without running it"
 
 
 @app.command("effect")
 def apply_effect(
     ctx: typer.Context,
-    input_file: Annotated[Path, typer.Argument(help="Input image file")],
+    input_file: Annotated[Path, typer.Argument(help=_INPUT_HELP)],
     effect: Annotated[str, typer.Option("-e", "--effect", help="Effect to apply")],
     output_dir: Annotated[
         Path | None,
-        typer.Option(
-            "-o",
-            "--output-dir",
-            help="Output directory (uses settings default if not specified)",
-        ),
+        typer.Option("-o", "--output-dir", help=_OUTPUT_HELP),
+    ] = None,
+    output_format: Annotated[
+        str | None, typer.Option("-f", "--format", help=_FORMAT_HELP)
     ] = None,
     blur: Annotated[str | None, typer.Option("--blur", help="Blur geometry")] = None,
     brightness: Annotated[int | None, typer.Option("--brightness")] = None,
@@ -93,6 +430,9 @@ def apply_effect(
     color: Annotated[str | None, typer.Option("--color")] = None,
     opacity: Annotated[int | None, typer.Option("--opacity")] = None,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
@@ -103,6 +443,7 @@ def apply_effect(
     Examples:
         wallpaper-core process effect input.jpg --effect blur
         wallpaper-core process effect input.jpg -o /out --effect blur --flat
+        cat input.jpg | wallpaper-core process effect - -e blur -o - -f png > out.png
     """
     settings: CoreSettings = ctx.obj["settings"]
     output = ctx.obj["output"]
@@ -115,6 +456,10 @@ def apply_effect(
     # Resolve output file path
     # Note: Process commands always use explicit_output=False to maintain
     # image stem subdirectory for organization
+    profile = _with_format(
+        resolve_item_encoding(config, settings.encoding, effect, ItemType.EFFECT),
+        output_format,
+    )
     output_file = resolve_output_path(
         output_dir=output_dir,
         input_file=input_file,
@@ -122,7 +467,9 @@ def apply_effect(
         item_type=ItemType.EFFECT,
         flat=flat,
         explicit_output=False,
+        suffix=output_suffix(input_file, profile),
     )
+    geometries = _parse_sizes(output, size)
 
     # Build params from CLI options
     params: dict[str, str | int] = {}
@@ -141,12 +488,28 @@ def apply_effect(
     if opacity is not None:
         params["opacity"] = opacity
 
+    if _is_stream(input_file) or _is_stream(output_dir):
+        _stream_item(
+            ctx,
+            effect,
+            ItemType.EFFECT,
+            input_file,
+            output_dir,
+            output_format,
+            params,
+            flat,
+            geometries,
+            dry_run,
+        )
+        return
+
     if dry_run:
         dry = CoreDryRun(console=output.console)
 
         output.info(f"Would apply effect: {effect}")
         output.info(f"Input: {input_file}")
-        output.info(f"Output: {output_file}")
+        for path in _output_files(output_file, geometries):
+            output.info(f"Output: {path}")
 
         # Validation checks (non-fatal in dry-run mode)
         checks = dry.validate_core(
@@ -157,19 +520,24 @@ def apply_effect(
             config=config,
         )
 
-        # Resolve command if effect exists
+        # Resolve commands if effect exists
         effect_def = config.effects.get(effect)
         if effect_def is not None:
-            chain_executor = ChainExecutor(config, None)
-            final_params = chain_executor._get_params_with_defaults(effect, params)
-            resolved = _resolve_command(
-                effect_def.command, input_file, output_file, final_params
+            commands = _planned_commands(
+                _chain_executor(settings, config),
+                effect,
+                ItemType.EFFECT,
+                [ChainStep(effect=effect, params=params)],
+                input_file,
+                output_file,
+                geometries,
             )
         else:
-            resolved = f"# Cannot resolve: unknown effect '{effect}'"
+            commands = [f"# Cannot resolve: unknown effect '{effect}'"]
 
         if output.verbosity == Verbosity.QUIET:
-            output.console.print(resolved)
+            for cmd in commands:
+                output.console.print(cmd)
         else:
             dry.render_process(
                 item_name=effect,
@@ -177,8 +545,9 @@ def apply_effect(
                 input_path=input_file,
                 output_path=output_file,
                 params=params,
-                resolved_command=resolved,
-                command_template=effect_def.command if effect_def else None,
+                resolved_command=commands[0],
+                chain_commands=commands if len(commands) > 1 else None,
+                command_template=(effect_def.command or None) if effect_def else None,
             )
             dry.render_validation(checks)
 
@@ -196,15 +565,35 @@ def apply_effect(
         raise typer.Exit(1)
 
     # Execute
-    executor = CommandExecutor(output)
-    chain_executor = ChainExecutor(config, output)
+    cancel_token = CancelToken()
+    executor = CommandExecutor(
+        output, cancel_token=cancel_token, limits=settings.limits
+    )
+    chain_executor = _chain_executor(settings, config, output, cancel_token)
+    errors = chain_executor.validator.check_params(effect, params)
+    if errors:
+        for error in errors:
+            output.error(f"Invalid parameter: {error}")
+        raise typer.Exit(1)
     final_params = chain_executor._get_params_with_defaults(effect, params)
 
     output.verbose(f"Applying effect '{effect}' to {input_file}")
-    result = executor.execute(effect_def.command, input_file, output_file, final_params)
+    result = _execute_item(
+        _effect_render(executor, chain_executor, effect, final_params),
+        input_file,
+        output_file,
+        geometries,
+        output,
+        profile,
+        cancel_token,
+        settings.limits,
+        settings.processing.temp_dir,
+    )
 
+    _exit_if_cancelled(output, result)
     if result.success:
-        output.success(f"Created {output_file}")
+        for path in _output_files(output_file, geometries):
+            output.success(f"Created {path}")
     else:
         output.error(f"Failed: {result.stderr}")
         raise typer.Exit(1)
@@ -213,32 +602,40 @@ def apply_effect(
 @app.command("composite")
 def apply_composite(
     ctx: typer.Context,
-    input_file: Annotated[Path, typer.Argument(help="Input image file")],
+    input_file: Annotated[Path, typer.Argument(help=_INPUT_HELP)],
     composite: Annotated[str, typer.Option("-c", "--composite", help="Composite")],
     output_dir: Annotated[
         Path | None,
-        typer.Option(
-            "-o",
-            "--output-dir",
-            help="Output directory (uses settings default if not specified)",
-        ),
+        typer.Option("-o", "--output-dir", help=_OUTPUT_HELP),
+    ] = None,
+    output_format: Annotated[
+        str | None, typer.Option("-f", "--format", help=_FORMAT_HELP)
     ] = None,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
     ] = False,
+    explain: Annotated[bool, typer.Option("--explain", help=_EXPLAIN_HELP)] = False,
 ) -> None:
     """Apply a composite effect (chain) to an image.
 
     Examples:
         wallpaper-core process composite input.jpg --composite blur-brightness80
         wallpaper-core process composite input.jpg -o /out --composite my-comp --flat
+        wallpaper-core process composite input.jpg -c my-comp -o - -f jpg > out.jpg
+        wallpaper-core process composite input.jpg -c my-comp --explain
     """
     settings: CoreSettings = ctx.obj["settings"]
     output = ctx.obj["output"]
     config = ctx.obj["config"]
 
+    if explain:
+        _explain_chain(ctx, composite, ItemType.COMPOSITE)
+
     # Resolve output_dir
     if output_dir is None:
         output_dir = settings.output.default_dir
@@ -246,6 +643,10 @@ def apply_composite(
     # Resolve output file path
     # Note: Process commands always use explicit_output=False to maintain
     # image stem subdirectory for organization
+    profile = _with_format(
+        resolve_item_encoding(config, settings.encoding, composite, ItemType.COMPOSITE),
+        output_format,
+    )
     output_file = resolve_output_path(
         output_dir=output_dir,
         input_file=input_file,
@@ -253,14 +654,32 @@ def apply_composite(
         item_type=ItemType.COMPOSITE,
         flat=flat,
         explicit_output=False,
+        suffix=output_suffix(input_file, profile),
     )
+    geometries = _parse_sizes(output, size)
+
+    if _is_stream(input_file) or _is_stream(output_dir):
+        _stream_item(
+            ctx,
+            composite,
+            ItemType.COMPOSITE,
+            input_file,
+            output_dir,
+            output_format,
+            {},
+            flat,
+            geometries,
+            dry_run,
+        )
+        return
 
     if dry_run:
         dry = CoreDryRun(console=output.console)
 
         output.info(f"Would apply composite: {composite}")
         output.info(f"Input: {input_file}")
-        output.info(f"Output: {output_file}")
+        for path in _output_files(output_file, geometries):
+            output.info(f"Output: {path}")
 
         checks = dry.validate_core(
             input_path=input_file,
@@ -272,11 +691,14 @@ def apply_composite(
 
         composite_def = config.composites.get(composite)
         if composite_def is not None:
-            chain_commands = _resolve_chain_commands(
+            chain_commands = _planned_commands(
+                _chain_executor(settings, config),
+                composite,
+                ItemType.COMPOSITE,
                 composite_def.chain,
-                config,
                 input_file,
                 output_file,
+                geometries,
             )
         else:
             chain_commands = [f"# Cannot resolve: unknown composite '{composite}'"]
@@ -312,12 +734,26 @@ def apply_composite(
         output.error(f"Unknown composite: {composite}")
         raise typer.Exit(1)
 
-    chain_executor = ChainExecutor(config, output)
+    cancel_token = CancelToken()
+    chain_executor = _chain_executor(settings, config, output, cancel_token)
     output.verbose(f"Applying composite '{composite}' to {input_file}")
-    result = chain_executor.execute_chain(composite_def.chain, input_file, output_file)
+    chain = composite_def.chain
+    result = _execute_item(
+        lambda source, target: chain_executor.execute_chain(chain, source, target),
+        input_file,
+        output_file,
+        geometries,
+        output,
+        profile,
+        cancel_token,
+        settings.limits,
+        settings.processing.temp_dir,
+    )
 
+    _exit_if_cancelled(output, result)
     if result.success:
-        output.success(f"Created {output_file}")
+        for path in _output_files(output_file, geometries):
+            output.success(f"Created {path}")
     else:
         output.error(f"Failed: {result.stderr}")
         raise typer.Exit(1)
@@ -326,32 +762,40 @@ def apply_composite(
 @app.command("preset")
 def apply_preset(
     ctx: typer.Context,
-    input_file: Annotated[Path, typer.Argument(help="Input image file")],
+    input_file: Annotated[Path, typer.Argument(help=_INPUT_HELP)],
     preset: Annotated[str, typer.Option("-p", "--preset", help="Preset name")],
     output_dir: Annotated[
         Path | None,
-        typer.Option(
-            "-o",
-            "--output-dir",
-            help="Output directory (uses settings default if not specified)",
-        ),
+        typer.Option("-o", "--output-dir", help=_OUTPUT_HELP),
+    ] = None,
+    output_format: Annotated[
+        str | None, typer.Option("-f", "--format", help=_FORMAT_HELP)
     ] = None,
     flat: Annotated[bool, typer.Option("--flat", help="Flat output structure")] = False,
+    size: Annotated[
+        list[str] | None, typer.Option("--size", "-s", help=_SIZE_HELP)
+    ] = None,
     dry_run: Annotated[
         bool,
         typer.Option("--dry-run", help="Show what would be done without executing"),
     ] = False,
+    explain: Annotated[bool, typer.Option("--explain", help=_EXPLAIN_HELP)] = False,
 ) -> None:
     """Apply a preset to an image.
 
     Examples:
         wallpaper-core process preset input.jpg --preset dark_blur
         wallpaper-core process preset input.jpg -o /out --preset my-preset --flat
+        curl -s URL | wallpaper-core process preset - -p dim -o - -f png | viewer
+        wallpaper-core process preset input.jpg -p dark_blur --explain
     """
     settings: CoreSettings = ctx.obj["settings"]
     output = ctx.obj["output"]
     config = ctx.obj["config"]
 
+    if explain:
+        _explain_chain(ctx, preset, ItemType.PRESET)
+
     # Resolve output_dir
     if output_dir is None:
         output_dir = settings.output.default_dir
@@ -359,6 +803,10 @@ def apply_preset(
     # Resolve output file path
     # Note: Process commands always use explicit_output=False to maintain
     # image stem subdirectory for organization
+    profile = _with_format(
+        resolve_item_encoding(config, settings.encoding, preset, ItemType.PRESET),
+        output_format,
+    )
     output_file = resolve_output_path(
         output_dir=output_dir,
         input_file=input_file,
@@ -366,14 +814,32 @@ def apply_preset(
         item_type=ItemType.PRESET,
         flat=flat,
         explicit_output=False,
+        suffix=output_suffix(input_file, profile),
     )
+    geometries = _parse_sizes(output, size)
+
+    if _is_stream(input_file) or _is_stream(output_dir):
+        _stream_item(
+            ctx,
+            preset,
+            ItemType.PRESET,
+            input_file,
+            output_dir,
+            output_format,
+            {},
+            flat,
+            geometries,
+            dry_run,
+        )
+        return
 
     if dry_run:
         dry = CoreDryRun(console=output.console)
 
         output.info(f"Would apply preset: {preset}")
         output.info(f"Input: {input_file}")
-        output.info(f"Output: {output_file}")
+        for path in _output_files(output_file, geometries):
+            output.info(f"Output: {path}")
 
         checks = dry.validate_core(
             input_path=input_file,
@@ -384,38 +850,39 @@ def apply_preset(
         )
 
         preset_def = config.presets.get(preset)
+        chain = item_chain(config, preset, ItemType.PRESET)
         resolved = ""
         chain_commands = None
 
         if preset_def is not None:
             if preset_def.composite:
-                composite_def = config.composites.get(preset_def.composite)
-                if composite_def is not None:
-                    chain_commands = _resolve_chain_commands(
-                        composite_def.chain,
-                        config,
+                if chain is not None:
+                    chain_commands = _planned_commands(
+                        _chain_executor(settings, config),
+                        preset,
+                        ItemType.PRESET,
+                        chain,
                         input_file,
                         output_file,
+                        geometries,
                     )
-                    chain_str = " -> ".join(s.effect for s in composite_def.chain)
-                    resolved = f"chain: {chain_str}"
+                    resolved = f"chain: {' -> '.join(s.effect for s in chain)}"
                 else:
                     composite_name = preset_def.composite
                     resolved = f"# Cannot resolve: unknown composite '{composite_name}'"
             elif preset_def.effect:
-                effect_def = config.effects.get(preset_def.effect)
-                if effect_def is not None:
-                    chain_executor = ChainExecutor(config, None)
-                    final_params = chain_executor._get_params_with_defaults(
-                        preset_def.effect,
-                        preset_def.params,
-                    )
-                    resolved = _resolve_command(
-                        effect_def.command,
+                if chain is not None:
+                    commands = _planned_commands(
+                        _chain_executor(settings, config),
+                        preset,
+                        ItemType.PRESET,
+                        chain,
                         input_file,
                         output_file,
-                        final_params,
+                        geometries,
                     )
+                    resolved = commands[0]
+                    chain_commands = commands if len(commands) > 1 else None
                 else:
                     resolved = f"# Cannot resolve: unknown effect '{preset_def.effect}'"
             else:
@@ -453,8 +920,11 @@ def apply_preset(
         output.error(f"Unknown preset: {preset}")
         raise typer.Exit(1)
 
-    chain_executor = ChainExecutor(config, output)
-    executor = CommandExecutor(output)
+    cancel_token = CancelToken()
+    chain_executor = _chain_executor(settings, config, output, cancel_token)
+    executor = CommandExecutor(
+        output, cancel_token=cancel_token, limits=settings.limits
+    )
 
     output.verbose(f"Applying preset '{preset}' to {input_file}")
 
@@ -463,8 +933,17 @@ def apply_preset(
         if composite_def is None:
             output.error(f"Preset references unknown composite: {preset_def.composite}")
             raise typer.Exit(1)
-        result = chain_executor.execute_chain(
-            composite_def.chain, input_file, output_file
+        chain = composite_def.chain
+        result = _execute_item(
+            lambda source, target: chain_executor.execute_chain(chain, source, target),
+            input_file,
+            output_file,
+            geometries,
+            output,
+            profile,
+            cancel_token,
+            settings.limits,
+            settings.processing.temp_dir,
         )
     elif preset_def.effect:
         effect_def = config.effects.get(preset_def.effect)
@@ -474,13 +953,26 @@ def apply_preset(
         params = chain_executor._get_params_with_defaults(
             preset_def.effect, preset_def.params
         )
-        result = executor.execute(effect_def.command, input_file, output_file, params)
+        effect_name = preset_def.effect
+        result = _execute_item(
+            _effect_render(executor, chain_executor, effect_name, params),
+            input_file,
+            output_file,
+            geometries,
+            output,
+            profile,
+            cancel_token,
+            settings.limits,
+            settings.processing.temp_dir,
+        )
     else:
         output.error(f"Preset '{preset}' has no effect or composite defined")
         raise typer.Exit(1)
 
+    _exit_if_cancelled(output, result)
     if result.success:
-        output.success(f"Created {output_file}")
+        for path in _output_files(output_file, geometries):
+            output.success(f"Created {path}")
     else:
         output.error(f"Failed: {result.stderr}")
         raise typer.Exit(1)
@@ -0,0 +1,164 @@
+"""Sweep command for rendering an effect over a grid of parameter values."""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from wallpaper_core.cli.process import _FORMAT_HELP, _with_format
+from wallpaper_core.config.schema import CoreSettings, ItemType, Verbosity
+from wallpaper_core.console.output import RichOutput
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.cancel import cancel_on_signals
+from wallpaper_core.engine.encoding import output_suffix, resolve_item_encoding
+from wallpaper_core.engine.sweep import SweepExecutor, SweepPoint, build_grid
+
+_PARAM_HELP = (
+    "Values to sweep as NAME=LIST or NAME=START:STOP[:STEP] "
+    "(repeatable, e.g. -p blur=0x2,0x4,0x8 -p brightness=-40:0:10)"
+)
+
+# Sub-directory of <output-dir>/<image-stem> holding sweeps
+SWEEP_SUBDIR = "sweeps"
+
+# File name stem of the contact sheet
+CONTACT_SHEET_NAME = "contact-sheet"
+
+
+def _parse_specs(output: RichOutput, params: list[str]) -> dict[str, str]:
+    """Split NAME=SPEC options, exiting with an error if one is malformed."""
+    specs: dict[str, str] = {}
+    for option in params:
+        name, sep, spec = option.partition("=")
+        if not sep or not name.strip() or not spec.strip():
+            output.error(f"Invalid sweep parameter '{option}' (expected NAME=VALUES)")
+            raise typer.Exit(1)
+        specs[name.strip()] = spec.strip()
+    return specs
+
+
+def _build_points(
+    output: RichOutput, config: EffectsConfig, effect: str, specs: dict[str, str]
+) -> list[SweepPoint]:
+    """Build the sweep grid, exiting with every validation error."""
+    try:
+        return build_grid(config, effect, specs)
+    except ValueError as e:
+        output.error(f"Invalid sweep: {e}")
+        raise typer.Exit(1) from e
+
+
+def sweep(
+    ctx: typer.Context,
+    input_file: Annotated[Path, typer.Argument(help="Input image file")],
+    effect: Annotated[str, typer.Option("-e", "--effect", help="Effect to sweep")],
+    param: Annotated[list[str], typer.Option("-p", "--param", help=_PARAM_HELP)],
+    output_dir: Annotated[
+        Path | None,
+        typer.Option("-o", "--output-dir", help="Output directory (default: settings)"),
+    ] = None,
+    output_format: Annotated[
+        str | None, typer.Option("-f", "--format", help=_FORMAT_HELP)
+    ] = None,
+    contact_sheet: Annotated[
+        bool,
+        typer.Option("--contact-sheet", help="Also write a labelled grid of results"),
+    ] = False,
+    columns: Annotated[
+        int | None,
+        typer.Option("--columns", help="Contact sheet tiles per row", min=1),
+    ] = None,
+    tile: Annotated[
+        int,
+        typer.Option("--tile", help="Contact sheet tile size in pixels", min=16),
+    ] = 320,
+    dry_run: Annotated[
+        bool,
+        typer.Option("--dry-run", help="Show the commands without executing"),
+    ] = False,
+) -> None:
+    """Render an effect for every combination of parameter values.
+
+    Outputs are named after their parameters, so rerunning a sweep
+    overwrites the same files. Effects that are a single magick command are
+    rendered in one process from a single decode of the input.
+
+    Examples:
+        wallpaper-core sweep input.jpg -e blur -p blur=0x2,0x4,0x8
+        wallpaper-core sweep input.jpg -e brightness -p brightness=-40:40:20
+        wallpaper-core sweep input.jpg -e blur -p blur=0x2,0x8 --contact-sheet
+    """
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+    config: EffectsConfig = ctx.obj["config"]
+
+    points = _build_points(output, config, effect, _parse_specs(output, param))
+    profile = _with_format(
+        resolve_item_encoding(config, settings.encoding, effect, ItemType.EFFECT),
+        output_format,
+    )
+    suffix = output_suffix(input_file, profile)
+    sweep_dir = (
+        (output_dir or settings.output.default_dir)
+        / input_file.stem
+        / SWEEP_SUBDIR
+        / effect
+    )
+    sheet_path = sweep_dir / f"{CONTACT_SHEET_NAME}{suffix}"
+    grid_columns = columns or math.ceil(math.sqrt(len(points)))
+
+    executor = SweepExecutor(
+        config,
+        output,
+        encoding=profile,
+        limits=settings.limits,
+        max_workers=settings.execution.max_workers,
+    )
+
+    if dry_run:
+        commands = executor.commands(points, input_file, sweep_dir, suffix)
+        if output.verbosity != Verbosity.QUIET:
+            output.info(f"Would render {len(points)} points of effect: {effect}")
+            for point, path in zip(
+                points, executor.output_paths(points, sweep_dir, suffix), strict=True
+            ):
+                output.info(f"Output: {path}  ({point.label})")
+            if contact_sheet:
+                output.info(f"Contact sheet: {sheet_path}")
+        for command in commands:
+            output.console.print(command, markup=False, highlight=False, soft_wrap=True)
+        raise typer.Exit(0)
+
+    if not input_file.exists():
+        output.error(f"Input file not found: {input_file}")
+        raise typer.Exit(1)
+
+    output.info(f"Sweeping {effect} over {len(points)} points...")
+    with cancel_on_signals(executor.executor.cancel_token):
+        result = executor.execute(points, input_file, sweep_dir, suffix)
+
+    if result.cancelled:
+        output.warning(f"Cancelled: {result.succeeded}/{result.total} points")
+        raise typer.Exit(130)
+    if not result.success:
+        output.error(f"Failed: {result.failed}/{result.total} points failed")
+        # A single-process sweep fails every point with the same error
+        for message in dict.fromkeys(
+            item.stderr.strip() for item in result.results.values() if not item.success
+        ):
+            output.error(message)
+        raise typer.Exit(1)
+    output.success(f"Rendered {result.succeeded} points")
+    output.info(f"Output: {sweep_dir}")
+
+    if contact_sheet:
+        sheet = executor.contact_sheet(
+            points, sweep_dir, suffix, sheet_path, grid_columns, tile
+        )
+        if not sheet.success:
+            output.error(f"Contact sheet failed: {sheet.stderr.strip()}")
+            raise typer.Exit(1)
+        output.info(f"Contact sheet: {sheet_path}")
@@ -0,0 +1,85 @@
+"""Worker command for running jobs from a shared queue."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from wallpaper_core.config.schema import CoreSettings
+from wallpaper_core.console.output import RichOutput
+from wallpaper_core.engine.cancel import cancel_on_signals
+from wallpaper_core.engine.queue import JobQueue, QueueWorker
+
+
+def worker(
+    ctx: typer.Context,
+    queue_file: Annotated[
+        Path, typer.Argument(help="Queue database written by 'run-plan --queue'")
+    ],
+    worker_id: Annotated[
+        str | None,
+        typer.Option("--id", help="Worker id recorded on leases (default host:pid)"),
+    ] = None,
+    follow: Annotated[
+        bool,
+        typer.Option("--follow", help="Keep waiting for new jobs once drained"),
+    ] = False,
+    max_jobs: Annotated[
+        int,
+        typer.Option("--max-jobs", help="Exit after this many jobs (0 = no limit)"),
+    ] = 0,
+) -> None:
+    """Claim and run jobs from a shared queue until it is drained.
+
+    Start any number of workers, on one machine or on several machines that
+    mount the same storage. Each job is leased to one worker and its lease
+    renewed while it runs; jobs of a worker that dies are re-queued once the
+    lease expires.
+
+    Examples:
+        wallpaper-core batch all input.jpg --plan-out plan.json
+        wallpaper-core run-plan plan.json --queue /nfs/queue.db
+        wallpaper-core worker /nfs/queue.db   # on every machine
+    """
+    settings: CoreSettings = ctx.obj["settings"]
+    output: RichOutput = ctx.obj["output"]
+
+    if not queue_file.exists():
+        output.error(f"Queue not found: {queue_file}")
+        raise typer.Exit(1)
+
+    try:
+        queue = JobQueue(queue_file)
+        runner = QueueWorker(
+            queue,
+            worker_id,
+            output,
+            lease_seconds=settings.queue.lease_seconds,
+            poll_interval=settings.queue.poll_interval,
+            follow=follow,
+            max_jobs=max_jobs,
+        )
+        output.info(f"Worker {runner.worker_id} taking jobs from {queue_file}")
+        with cancel_on_signals(runner.cancel_token):
+            result = runner.run()
+        counts = queue.counts()
+    except sqlite3.Error as e:
+        output.error(f"Queue error: {e}")
+        raise typer.Exit(1) from e
+
+    if result.cancelled:
+        output.warning(f"Cancelled after {result.succeeded} jobs")
+        raise typer.Exit(130)
+    output.success(
+        f"Ran {result.succeeded} jobs ({result.failed} failed, "
+        f"{result.retried} retried)"
+    )
+    output.info(
+        f"Queue: {counts['done']} done, {counts['failed']} failed, "
+        f"{counts['pending'] + counts['running']} remaining"
+    )
+    if result.failed:
+        raise typer.Exit(1)
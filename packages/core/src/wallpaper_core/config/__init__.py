@@ -6,8 +6,10 @@ from layered_settings import SchemaRegistry
 from wallpaper_core.config.schema import (
     BackendSettings,
     CoreSettings,
+    EncodingSettings,
     ExecutionSettings,
     ItemType,
+    LimitSettings,
     OutputSettings,
     ProcessingSettings,
     Verbosity,
@@ -22,7 +24,9 @@ SchemaRegistry.register(
 
 __all__ = [
     "CoreSettings",
+    "EncodingSettings",
     "ExecutionSettings",
+    "LimitSettings",
     "ItemType",
     "OutputSettings",
     "ProcessingSettings",
@@ -1,8 +1,11 @@
 """Pydantic schemas for core settings."""
 
+from __future__ import annotations
+
 import shutil
 from enum import Enum, IntEnum
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -39,6 +42,13 @@ class ExecutionSettings(BaseModel):
         description="Max parallel workers (0=auto based on CPU count)",
         ge=0,
     )
+    workers: Literal["threads", "processes"] = Field(
+        default="threads",
+        description=(
+            "Run items of the numpy backend in worker processes sharing one "
+            "decoded input (processes) or on threads"
+        ),
+    )
 
 
 class OutputSettings(BaseModel):
@@ -54,6 +64,10 @@ class OutputSettings(BaseModel):
         ),  # nosec B108 - configurable default path
         description="Default output directory when -o/--output-dir not specified",
     )
+    manifest: bool = Field(
+        default=True,
+        description="Write manifest.json (hashes, params, timings) with batch output",
+    )
 
 
 class ProcessingSettings(BaseModel):
@@ -61,10 +75,41 @@ class ProcessingSettings(BaseModel):
 
     temp_dir: Path | None = Field(
         default=None,
-        description="Temp directory for intermediate files (None=system default)",
+        description="Temp directory for intermediate files (None=/dev/shm or system)",
+    )
+    pipeline: bool = Field(
+        default=False,
+        description="Connect chain steps with OS pipes so they run concurrently",
+    )
+    optimize: Literal["off", "safe", "approximate"] = Field(
+        default="safe",
+        description=(
+            "Chain optimizer: off, safe (rounding-level differences only) or "
+            "approximate (also merges steps that may clip differently)"
+        ),
+    )
+    fuse_pointwise: bool = Field(
+        default=False,
+        description=(
+            "Apply runs of pointwise effects as one color lookup table "
+            "(approximate, opt-in)"
+        ),
+    )
+    clut_dir: Path | None = Field(
+        default=None,
+        description="Color lookup table cache (None=user cache directory)",
+    )
+    cascade_blurs: bool = Field(
+        default=False,
+        description="Derive the blurs of a batch from each other (opt-in)",
+    )
+    blur_tolerance: float = Field(
+        default=0.0,
+        ge=0,
+        description="Share of sigma a downscaled pixel may cover (0=exact blurs)",
     )
 
-    @field_validator("temp_dir", mode="before")
+    @field_validator("temp_dir", "clut_dir", mode="before")
     @classmethod
     def convert_str_to_path(cls, v: str | Path | None) -> Path | None:
         """Convert string to Path if needed."""
@@ -82,6 +127,134 @@ class BackendSettings(BaseModel):
         or "magick",
         description="Path to ImageMagick binary (auto-detects magick or convert)",
     )
+    backend: Literal["magick", "numpy", "wand"] = Field(
+        default="magick",
+        description=(
+            "Effect backend: magick, numpy to run chains of built-in effects "
+            "in-process, or wand to run magick operators in-process with "
+            "libMagickWand (both fall back to magick per chain)"
+        ),
+    )
+
+
+class EncodingSettings(BaseModel):
+    """Output encoding profile.
+
+    Every field is optional; unset fields keep ImageMagick's encoder
+    defaults. Profiles are layered: the global [core.encoding] section
+    first, then the `encoding` blocks of the effects an item applies.
+    """
+
+    format: str | None = Field(
+        default=None,
+        description="Output format/extension, e.g. png, jpg, webp (None=input format)",
+    )
+    quality: int | None = Field(
+        default=None, description="JPEG/WebP quality (1-100)", ge=1, le=100
+    )
+    png_compression_level: int | None = Field(
+        default=None, description="PNG zlib compression level (0-9)", ge=0, le=9
+    )
+    png_compression_filter: int | None = Field(
+        default=None, description="PNG row filter type (0-9)", ge=0, le=9
+    )
+    webp_method: int | None = Field(
+        default=None,
+        description="WebP method, 0=fastest to 6=smallest",
+        ge=0,
+        le=6,
+    )
+    strip_metadata: bool | None = Field(
+        default=None, description="Strip EXIF/ICC/comment metadata from outputs"
+    )
+    single_channel: bool | None = Field(
+        default=None,
+        description=(
+            "Write results whose pixels are all gray as single-channel images "
+            "(false = always keep every channel)"
+        ),
+    )
+
+    @field_validator("format", mode="before")
+    @classmethod
+    def normalize_format(cls, v: str | None) -> str | None:
+        """Normalize format names (".JPEG" -> "jpg")."""
+        if v is None:
+            return v
+        fmt = str(v).lower().lstrip(".")
+        return "jpg" if fmt == "jpeg" else fmt
+
+    def merged(self, override: EncodingSettings | None) -> EncodingSettings:
+        """Return a copy with the override's explicitly set fields applied."""
+        if override is None:
+            return self.model_copy()
+        return self.model_copy(update=override.model_dump(exclude_none=True))
+
+
+class LimitSettings(BaseModel):
+    """Per-job execution limits for effect processes.
+
+    Every field is optional; unset fields mean no limit. The wall-clock
+    timeout is enforced by the executor, the others are kernel rlimits
+    applied in the child process. Limits are layered like encoding
+    profiles: [core.limits] first, then the effect's `limits` block.
+    """
+
+    timeout: float | None = Field(
+        default=None, description="Wall-clock seconds per command", gt=0
+    )
+    cpu_seconds: int | None = Field(
+        default=None, description="CPU time per command (RLIMIT_CPU)", ge=1
+    )
+    memory_mb: int | None = Field(
+        default=None, description="Address space in MiB (RLIMIT_AS)", ge=1
+    )
+    output_file_mb: int | None = Field(
+        default=None,
+        description="Largest file a command may write (RLIMIT_FSIZE)",
+        ge=1,
+    )
+
+    def merged(self, override: LimitSettings | None) -> LimitSettings:
+        """Return a copy with the override's explicitly set fields applied."""
+        if override is None:
+            return self.model_copy()
+        return self.model_copy(update=override.model_dump(exclude_none=True))
+
+
+class QueueSettings(BaseModel):
+    """Shared job queue settings for `wallpaper-core worker`."""
+
+    lease_seconds: float = Field(
+        default=60.0,
+        description="Seconds a claimed job stays leased without a heartbeat",
+        gt=0,
+    )
+    max_attempts: int = Field(
+        default=3, description="Attempts per job before it is marked failed", ge=1
+    )
+    poll_interval: float = Field(
+        default=1.0, description="Seconds between polls of an idle queue", gt=0
+    )
+
+
+class StageSettings(BaseModel):
+    """Stage workers and queues for `wallpaper-core map`."""
+
+    decoders: int = Field(default=1, description="Workers reading inputs", ge=1)
+    appliers: int = Field(
+        default=0,
+        description="Workers running effects (0=auto based on CPU count)",
+        ge=0,
+    )
+    encoders: int = Field(
+        default=0,
+        description="Workers encoding outputs (0=auto based on CPU count)",
+        ge=0,
+    )
+    queue_size: int = Field(
+        default=2, description="Images waiting between two stages", ge=1
+    )
 
 
 class CoreSettings(BaseModel):
@@ -92,3 +265,7 @@ class CoreSettings(BaseModel):
     output: OutputSettings = Field(default_factory=OutputSettings)
     processing: ProcessingSettings = Field(default_factory=ProcessingSettings)
     backend: BackendSettings = Field(default_factory=BackendSettings)
+    encoding: EncodingSettings = Field(default_factory=EncodingSettings)
+    limits: LimitSettings = Field(default_factory=LimitSettings)
+    queue: QueueSettings = Field(default_factory=QueueSettings)
+    stages: StageSettings = Field(default_factory=StageSettings)
@@ -22,6 +22,10 @@ class RichOutput:
         self.error_console = Console(stderr=True)
         self.verbosity = verbosity
 
+    def use_stderr(self) -> None:
+        """Send all messages to stderr (stdout is carrying image data)."""
+        self.console = self.error_console
+
     def error(self, msg: str) -> None:
         """Print error message (always shown)."""
         self.error_console.print(f"[red]✗ Error:[/red] {msg}")
@@ -0,0 +1,226 @@
+"""Per-pixel expressions: the safe arithmetic language of expression effects.
+
+An effect with `expression:` instead of `command:` in effects.yaml gives
+its per-pixel math as a Python-syntax arithmetic expression, e.g.
+
+    expression: "clamp(c * gain + (luminance - 0.5) * mix_amount)"
+
+Names available to an expression:
+
+- r, g, b: the pixel's red, green and blue values (0..1)
+- c: the value of the channel being computed
+- luminance: the pixel's Rec. 709 luminance
+- x, y: the pixel's column and row; w, h: the image width and height
+- pi, e, and the effect's parameters by name
+
+Arithmetic (+ - * / // % **), comparisons, and/or/not and
+`a if condition else b` are allowed, as are the functions in FUNCTIONS.
+Conditions are true when nonzero. One expression computes every channel
+(usually through c); a tuple of three computes red, green and blue.
+
+This module only parses and checks expressions, so loading effects.yaml
+rejects anything else (attributes, subscripts, strings, lambdas, unknown
+names or functions) without NumPy. engine.expression compiles them.
+"""
+
+from __future__ import annotations
+
+import ast
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+# Names bound to pixel values, per pixel
+PIXEL_NAMES = ("r", "g", "b", "c", "luminance")
+
+# Names bound to pixel coordinates, per pixel
+COORDINATE_NAMES = ("x", "y")
+
+# Names bound to one value per image or constant
+CONSTANT_NAMES = ("w", "h", "pi", "e")
+
+# Functions and their (minimum, maximum) number of arguments
+FUNCTIONS: dict[str, tuple[int, int | None]] = {
+    "abs": (1, 1),
+    "sqrt": (1, 1),
+    "exp": (1, 1),
+    "log": (1, 1),
+    "sin": (1, 1),
+    "cos": (1, 1),
+    "tan": (1, 1),
+    "atan": (1, 1),
+    "floor": (1, 1),
+    "ceil": (1, 1),
+    "pow": (2, 2),
+    "atan2": (2, 2),
+    "hypot": (2, 2),
+    "step": (2, 2),
+    "min": (2, None),
+    "max": (2, None),
+    "clamp": (1, 3),
+    "mix": (3, 3),
+    "smoothstep": (3, 3),
+}
+
+# Longest expression accepted, to bound parsing and compiling
+MAX_LENGTH = 2000
+
+# Largest number accepted (float32 holds up to about 3.4e38)
+MAX_NUMBER = 1e30
+
+# Deepest nesting of operations accepted (compiling and evaluating recurse)
+MAX_DEPTH = 100
+
+_OPERATORS = (
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+    ast.Not,
+    ast.And,
+    ast.Or,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+_NODES = (
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Call,
+    ast.Name,
+    ast.Constant,
+    ast.Load,
+    *_OPERATORS,
+)
+
+
+class ExpressionError(ValueError):
+    """An expression is not a safe arithmetic expression."""
+
+
+@dataclass(frozen=True)
+class ParsedExpression:
+    """A checked expression.
+
+    Attributes:
+        text: The expression as written
+        components: One node computing every channel, or three computing
+            red, green and blue
+    """
+
+    text: str
+    components: tuple[ast.expr, ...]
+
+
+def expression_names(node: ast.AST) -> set[str]:
+    """Names a node reads (function names excluded)."""
+    callees = _callees(node)
+    return {
+        child.id
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and id(child) not in callees
+    }
+
+
+def _callees(node: ast.AST) -> set[int]:
+    """ids of the Name nodes called as functions within a node."""
+    return {id(child.func) for child in ast.walk(node) if isinstance(child, ast.Call)}
+
+
+def expression_cost(node: ast.AST) -> int:
+    """Number of operations a node evaluates (one array pass each)."""
+    operations = ast.BinOp | ast.UnaryOp | ast.BoolOp | ast.Compare | ast.IfExp
+    return sum(isinstance(child, operations | ast.Call) for child in ast.walk(node))
+
+
+def parse_expression(text: str, parameters: Iterable[str] = ()) -> ParsedExpression:
+    """Parse an expression and check it only uses what is allowed.
+
+    Args:
+        text: Expression source
+        parameters: Names of the effect's parameters
+
+    Returns:
+        The parsed expression
+
+    Raises:
+        ExpressionError: If it does not parse, is too long, or uses
+            anything but allowed names, functions, numbers and operators
+    """
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"expression is longer than {MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(text.strip(), mode="eval").body
+    except (SyntaxError, ValueError, RecursionError) as e:
+        raise ExpressionError(f"invalid expression: {e}") from None
+
+    params = set(parameters)
+    reserved = params.intersection(
+        (*PIXEL_NAMES, *COORDINATE_NAMES, *CONSTANT_NAMES, *FUNCTIONS)
+    )
+    if reserved:
+        raise ExpressionError(
+            f"parameter '{sorted(reserved)[0]}' shadows an expression name"
+        )
+
+    if isinstance(tree, ast.Tuple):
+        if len(tree.elts) != 3:
+            raise ExpressionError("a tuple needs three expressions: red, green, blue")
+        components = tuple(tree.elts)
+    else:
+        components = (tree,)
+
+    allowed = {*PIXEL_NAMES, *COORDINATE_NAMES, *CONSTANT_NAMES, *params}
+    for component in components:
+        if _depth(component) > MAX_DEPTH:
+            raise ExpressionError(f"expression is nested deeper than {MAX_DEPTH}")
+        callees = _callees(component)
+        for node in ast.walk(component):
+            _check_node(node, allowed, callees)
+    return ParsedExpression(text=text, components=components)
+
+
+def _depth(node: ast.AST) -> int:
+    """Nesting depth of a node's tree."""
+    depth = 0
+    level = [node]
+    while level:
+        depth += 1
+        level = [child for parent in level for child in ast.iter_child_nodes(parent)]
+    return depth
+
+
+def _check_node(node: ast.AST, allowed: set[str], callees: set[int]) -> None:
+    """Raise ExpressionError unless one node is allowed."""
+    if not isinstance(node, _NODES):
+        raise ExpressionError(f"{type(node).__name__} is not allowed in expressions")
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, int | float):
+            raise ExpressionError(f"{node.value!r} is not a number")
+        if abs(node.value) > MAX_NUMBER:
+            raise ExpressionError(f"{node.value} is too large")
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name):
+            raise ExpressionError("only functions can be called, by name")
+        if node.func.id not in FUNCTIONS:
+            raise ExpressionError(f"unknown function '{node.func.id}'")
+        if node.keywords:
+            raise ExpressionError(f"{node.func.id}() takes no keyword arguments")
+        low, high = FUNCTIONS[node.func.id]
+        count = len(node.args)
+        if count < low or (high is not None and count > high):
+            raise ExpressionError(f"wrong number of arguments for {node.func.id}()")
+    elif isinstance(node, ast.Name) and node.id not in allowed:
+        if id(node) in callees:
+            return
+        raise ExpressionError(f"unknown name '{node.id}'")
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from wallpaper_core.config.schema import EncodingSettings, LimitSettings
+from wallpaper_core.effects.expression import parse_expression
 
 
 class ParameterType(BaseModel):
@@ -47,20 +50,119 @@ class ParameterDefinition(BaseModel):
     )
 
 
+class EffectTraits(BaseModel):
+    """What an effect does to pixels, used to optimize chains.
+
+    Every field is optional; an effect without traits is never rewritten
+    or moved.
+    """
+
+    kind: Literal["pointwise", "reduction", "spatial"] | None = Field(
+        default=None,
+        description=(
+            "pointwise: each output pixel depends only on the same input pixel; "
+            "reduction: a linear per-pixel reduction to one channel (grayscale); "
+            "spatial: a linear filter applied to each channel independently"
+        ),
+    )
+    identity: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Parameter values that make the effect a no-op",
+    )
+    idempotent: bool = Field(
+        default=False, description="Applying the effect twice equals applying it once"
+    )
+    involution: bool = Field(
+        default=False, description="Applying the effect twice restores the input"
+    )
+    merge: dict[str, Literal["add", "multiply_percent"]] = Field(
+        default_factory=dict,
+        description=(
+            "How two consecutive steps combine each parameter into one step "
+            "(approximate where the first step clips)"
+        ),
+    )
+    cost: float = Field(
+        default=1.0, description="Relative cost of one pass over the image", gt=0
+    )
+    gaussian: str | None = Field(
+        default=None,
+        description=(
+            "Parameter holding a RADIUSxSIGMA Gaussian blur geometry; blurs of "
+            "one source are then derived from each other (see engine.cascade)"
+        ),
+    )
+
+
 class Effect(BaseModel):
-    """Atomic effect definition (single ImageMagick command).
+    """Atomic effect definition (ImageMagick command, Python function or expression).
 
     Defines a single transformation that can be applied to an image.
-    Parameters can use variables that will be substituted in the command.
+    Parameters can use variables that will be substituted in the command,
+    are passed to the Python function as keyword arguments, or are names
+    in the expression.
     """
 
     description: str = Field(description="Human-readable description of the effect")
     command: str = Field(
-        description="Shell command template with $INPUT, $OUTPUT, and params"
+        default="",
+        description="Shell command template with $INPUT, $OUTPUT, and params",
+    )
+    python: str | None = Field(
+        default=None,
+        description=(
+            "Python function run in-process instead of a command: "
+            "'module:function', or the name of an entry point in the "
+            "wallpaper_core.effects group (see engine.plugins)"
+        ),
+        pattern=r"^[A-Za-z_][\w.-]*(:[A-Za-z_][\w.]*)?$",
+    )
+    expression: str | None = Field(
+        default=None,
+        description=(
+            "Per-pixel arithmetic expression compiled to NumPy instead of a "
+            "command (see effects.expression)"
+        ),
     )
     parameters: dict[str, ParameterDefinition] = Field(
         default_factory=dict, description="Effect parameters keyed by name"
     )
+    encoding: EncodingSettings | None = Field(
+        default=None,
+        description="Encoding overrides applied when this effect is in an item",
+    )
+    limits: LimitSettings | None = Field(
+        default=None,
+        description="Execution limit overrides for this effect's command",
+    )
+    traits: EffectTraits | None = Field(
+        default=None, description="Optimizer hints (see EffectTraits)"
+    )
+
+    @model_validator(mode="after")
+    def check_runner(self) -> Effect:
+        """Require a command, a Python function or a valid expression.
+
+        A function or expression wins over a command: a layer can turn a
+        command effect into one of them, and the merged command is then
+        dropped, so nothing runs or pattern-matches it.
+        """
+        if self.python and self.expression:
+            raise ValueError("effect has both a python function and an expression")
+        if self.expression:
+            parse_expression(self.expression, self.parameters)
+        if self.python or self.expression:
+            self.command = ""
+        elif not self.command.strip():
+            raise ValueError(
+                "effect needs a command, a python function or an expression"
+            )
+        return self
+
+    @property
+    def in_process(self) -> bool:
+        """Whether the effect runs in-process (a function or an expression)."""
+        return bool(self.python or self.expression)
 
 
 class ChainStep(BaseModel):
@@ -1,7 +1,61 @@
 """Engine module for executing effects."""
 
+from wallpaper_core.engine.async_batch import AsyncBatchGenerator
+from wallpaper_core.engine.async_executor import (
+    AsyncChainExecutor,
+    AsyncCommandExecutor,
+)
+from wallpaper_core.engine.backend import (
+    BackendCapabilities,
+    BackendError,
+    ImageBackend,
+)
 from wallpaper_core.engine.batch import BatchGenerator, BatchResult
-from wallpaper_core.engine.chain import ChainExecutor
-from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.cancel import CancelToken
+from wallpaper_core.engine.cascade import BlurCascade
+from wallpaper_core.engine.chain import ChainExecutor, MagickBackend
+from wallpaper_core.engine.clut import ClutCache
+from wallpaper_core.engine.executor import BytesResult, CommandExecutor
+from wallpaper_core.engine.manifest import OutputManifest
+from wallpaper_core.engine.memory import MemoryExecutor
+from wallpaper_core.engine.optimize import ChainOptimizer
+from wallpaper_core.engine.plan import ExecutionPlan, PlanExecutor, build_plan
+from wallpaper_core.engine.probe import ImageInfo, ImageProber
+from wallpaper_core.engine.queue import JobQueue, QueueWorker
+from wallpaper_core.engine.stages import StagedExecutor, StagedResult
+from wallpaper_core.engine.sweep import SweepExecutor, SweepPoint
+from wallpaper_core.engine.variants import OutputGeometry, VariantExecutor
 
-__all__ = ["CommandExecutor", "ChainExecutor", "BatchGenerator", "BatchResult"]
+__all__ = [
+    "CommandExecutor",
+    "ChainExecutor",
+    "ImageBackend",
+    "BackendCapabilities",
+    "BackendError",
+    "MagickBackend",
+    "ChainOptimizer",
+    "ClutCache",
+    "BatchGenerator",
+    "BatchResult",
+    "BlurCascade",
+    "CancelToken",
+    "AsyncCommandExecutor",
+    "AsyncChainExecutor",
+    "AsyncBatchGenerator",
+    "BytesResult",
+    "MemoryExecutor",
+    "OutputManifest",
+    "ExecutionPlan",
+    "PlanExecutor",
+    "build_plan",
+    "ImageInfo",
+    "ImageProber",
+    "JobQueue",
+    "QueueWorker",
+    "StagedExecutor",
+    "StagedResult",
+    "SweepExecutor",
+    "SweepPoint",
+    "OutputGeometry",
+    "VariantExecutor",
+]
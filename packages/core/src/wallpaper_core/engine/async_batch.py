@@ -0,0 +1,257 @@
+"""Asyncio-native batch generator."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.engine.async_executor import (
+    AsyncChainExecutor,
+    AsyncCommandExecutor,
+)
+from wallpaper_core.engine.batch import (
+    BatchResult,
+    batch_base_dir,
+    item_chain,
+    item_names,
+    item_output_path,
+)
+from wallpaper_core.engine.executor import ExecutionResult
+
+if TYPE_CHECKING:
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.effects.schema import EffectsConfig
+
+
+class AsyncBatchGenerator:
+    """Generate multiple effects in batch on the asyncio event loop.
+
+    Every item is a task; an executor-wide semaphore bounds how many
+    magick processes run at once. Results can be awaited as a BatchResult
+    or consumed as they complete with iter_results().
+    """
+
+    def __init__(
+        self,
+        config: EffectsConfig,
+        output: RichOutput | None = None,
+        strict: bool = True,
+        max_concurrency: int = 0,
+        encoding: EncodingSettings | None = None,
+        limits: LimitSettings | None = None,
+        temp_dir: Path | None = None,
+    ) -> None:
+        """Initialize AsyncBatchGenerator.
+
+        Args:
+            config: Effects configuration
+            output: RichOutput for logging
+            strict: Cancel the remaining items on the first failure
+            max_concurrency: Max commands running at once (0 = CPU count)
+            encoding: Global encoding profile (layered with per-effect ones)
+            limits: Global per-command limits (layered with per-effect ones)
+            temp_dir: Directory for intermediates (None = /dev/shm or system)
+        """
+        self.config = config
+        self.output = output
+        self.strict = strict
+        self.encoding = encoding
+        self.executor = AsyncCommandExecutor(
+            output, limits=limits, max_concurrency=max_concurrency
+        )
+        self.chain_executor = AsyncChainExecutor(
+            config, self.executor, output, encoding, limits, temp_dir
+        )
+
+    async def generate_all_effects(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        flat: bool = False,
+        explicit_output: bool = False,
+    ) -> BatchResult:
+        """Generate all atomic effects with default params."""
+        return await self._collect(
+            input_path, output_dir, [ItemType.EFFECT], flat, explicit_output
+        )
+
+    async def generate_all_composites(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        flat: bool = False,
+        explicit_output: bool = False,
+    ) -> BatchResult:
+        """Generate all composite effects."""
+        return await self._collect(
+            input_path, output_dir, [ItemType.COMPOSITE], flat, explicit_output
+        )
+
+    async def generate_all_presets(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        flat: bool = False,
+        explicit_output: bool = False,
+    ) -> BatchResult:
+        """Generate all presets."""
+        return await self._collect(
+            input_path, output_dir, [ItemType.PRESET], flat, explicit_output
+        )
+
+    async def generate_all(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        flat: bool = False,
+        explicit_output: bool = False,
+    ) -> BatchResult:
+        """Generate all effects, composites, and presets."""
+        return await self._collect(
+            input_path, output_dir, list(ItemType), flat, explicit_output
+        )
+
+    async def iter_results(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        item_types: list[ItemType] | None = None,
+        flat: bool = False,
+        explicit_output: bool = False,
+    ) -> AsyncIterator[tuple[str, ExecutionResult]]:
+        """Run items concurrently and yield (name, result) as each completes.
+
+        Closing the iterator early cancels the items still queued or
+        running, which kills their magick processes. Wrap it in
+        contextlib.aclosing() to make that happen as soon as the loop is
+        left with break; cancelling the consuming task always does.
+
+        Args:
+            input_path: Input image
+            output_dir: Output directory
+            item_types: Item types to generate (None = all)
+            flat: Omit type subdirectories
+            explicit_output: output_dir was given explicitly (flat layout
+                then writes straight into it)
+
+        Yields:
+            Item name and its ExecutionResult, in completion order
+        """
+        item_types = item_types if item_types is not None else list(ItemType)
+        base_dir = self.base_dir(
+            input_path, output_dir, item_types, flat, explicit_output
+        )
+
+        items = [(name, t) for t in item_types for name in self._names(t)]
+        if self.strict:
+            # A strict batch with an item that is bound to fail never starts
+            invalid = self.chain_executor.planner.validator.check_items(items)
+            for (name, item_type), errors in invalid.items():
+                yield name, ExecutionResult(
+                    success=False,
+                    command="",
+                    stdout="",
+                    stderr=f"Invalid {item_type.value}: {'; '.join(errors)}",
+                    return_code=1,
+                )
+            if invalid:
+                return
+
+        tasks: dict[asyncio.Task[ExecutionResult], str] = {}
+        for name, item_type in items:
+            output_path = item_output_path(
+                self.config,
+                self.encoding,
+                base_dir,
+                name,
+                item_type,
+                input_path,
+                flat,
+            )
+            task = asyncio.create_task(
+                self._process_item(name, item_type, input_path, output_path)
+            )
+            tasks[task] = name
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    yield tasks[task], result
+                    if self.strict and not result.success:
+                        if self.output:
+                            self.output.error(f"'{tasks[task]}' failed")
+                        return
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def base_dir(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        item_types: list[ItemType],
+        flat: bool,
+        explicit_output: bool = False,
+    ) -> Path:
+        """Get the base directory, matching BatchGenerator's layout."""
+        return batch_base_dir(input_path, output_dir, item_types, flat, explicit_output)
+
+    async def _collect(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        item_types: list[ItemType],
+        flat: bool,
+        explicit_output: bool,
+    ) -> BatchResult:
+        """Run a batch and gather every result into a BatchResult."""
+        result = BatchResult(
+            total=sum(len(self._names(t)) for t in item_types),
+            output_dir=self.base_dir(
+                input_path, output_dir, item_types, flat, explicit_output
+            ),
+        )
+
+        async for name, exec_result in self.iter_results(
+            input_path, output_dir, item_types, flat, explicit_output
+        ):
+            result.results[name] = exec_result
+            if exec_result.success:
+                result.succeeded += 1
+            else:
+                result.failed += 1
+        return result
+
+    def _names(self, item_type: ItemType) -> list[str]:
+        """Names of every configured item of a type."""
+        return item_names(self.config, item_type)
+
+    async def _process_item(
+        self,
+        name: str,
+        item_type: ItemType,
+        input_path: Path,
+        output_path: Path,
+    ) -> ExecutionResult:
+        """Render a single item as a chain of effect commands."""
+        chain = item_chain(self.config, name, item_type)
+        if chain is None:
+            return ExecutionResult(
+                success=False,
+                command="",
+                stdout="",
+                stderr=f"Unknown {item_type.value}: {name}",
+                return_code=1,
+            )
+        return await self.chain_executor.execute_chain(chain, input_path, output_path)
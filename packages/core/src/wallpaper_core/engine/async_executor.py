@@ -0,0 +1,257 @@
+"""Asyncio-native executors for effect commands and chains."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import signal
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wallpaper_core.engine.cancel import (
+    TERMINATE_GRACE_PERIOD,
+    remove_partial_output,
+    signal_process_group,
+)
+from wallpaper_core.engine.chain import (
+    ChainExecutor,
+    chain_step_failure,
+    chain_success,
+)
+from wallpaper_core.engine.executor import ExecutionResult, substitute_command
+from wallpaper_core.engine.limits import CPU_LIMIT_EXIT_CODES, rlimit_command
+from wallpaper_core.engine.plugins import command_only_error
+from wallpaper_core.engine.tempdir import resolve_temp_dir
+
+if TYPE_CHECKING:
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+
+# Shell used to run effect command templates
+SHELL = "/bin/sh"
+
+
+class AsyncCommandExecutor:
+    """Execute effect commands as asyncio subprocesses.
+
+    No thread is held per command: processes are awaited on the event loop
+    and a semaphore caps how many run at once, so any number of jobs can be
+    queued. Cancelling the awaiting task terminates the command's process
+    group and removes its partial output before CancelledError propagates.
+    """
+
+    def __init__(
+        self,
+        output: RichOutput | None = None,
+        binary: str | None = None,
+        limits: LimitSettings | None = None,
+        max_concurrency: int = 0,
+    ) -> None:
+        """Initialize AsyncCommandExecutor.
+
+        Args:
+            output: RichOutput instance for logging
+            binary: ImageMagick binary (auto-detect magick/convert if None)
+            limits: Default time-out and rlimits for every command
+            max_concurrency: Max commands running at once (0 = CPU count)
+        """
+        self.output = output
+        self.limits = limits
+        self.binary = (
+            binary or shutil.which("magick") or shutil.which("convert") or "magick"
+        )
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def execute(
+        self,
+        command_template: str,
+        input_path: Path,
+        output_path: Path,
+        params: dict[str, str | int | float] | None = None,
+        limits: LimitSettings | None = None,
+    ) -> ExecutionResult:
+        """Execute a single magick command once a concurrency slot is free.
+
+        Args:
+            command_template: Command template with variables
+            input_path: Path to input image
+            output_path: Path to output image
+            params: Parameter values
+            limits: Limits for this command (defaults to the executor's)
+
+        Returns:
+            ExecutionResult with success status and details
+        """
+        limits = limits if limits is not None else self.limits
+        timeout = limits.timeout if limits is not None else None
+        command = substitute_command(
+            command_template, input_path, output_path, params, self.binary
+        )
+
+        async with self._semaphore:
+            if self.output:
+                self.output.command(command)
+
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            start_time = time.time()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    SHELL,
+                    "-c",
+                    rlimit_command(command, limits),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+            except Exception as e:
+                return ExecutionResult(
+                    success=False,
+                    command=command,
+                    stdout="",
+                    stderr=str(e),
+                    return_code=-1,
+                    duration=time.time() - start_time,
+                )
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except TimeoutError:
+                signal_process_group(process.pid, signal.SIGKILL)
+                await process.wait()
+                remove_partial_output(output_path)
+                return ExecutionResult(
+                    success=False,
+                    command=command,
+                    stdout="",
+                    stderr=f"Timed out after {timeout:g}s",
+                    return_code=-1,
+                    duration=time.time() - start_time,
+                    timed_out=True,
+                )
+            except asyncio.CancelledError:
+                await _stop_process_group(process)
+                remove_partial_output(output_path)
+                raise
+
+        duration = time.time() - start_time
+        return_code = process.returncode if process.returncode is not None else -1
+
+        if return_code in CPU_LIMIT_EXIT_CODES:
+            remove_partial_output(output_path)
+            return ExecutionResult(
+                success=False,
+                command=command,
+                stdout="",
+                stderr="CPU time limit exceeded",
+                return_code=-1,
+                duration=duration,
+                timed_out=True,
+            )
+
+        return ExecutionResult(
+            success=return_code == 0,
+            command=command,
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace"),
+            return_code=return_code,
+            duration=duration,
+        )
+
+
+class AsyncChainExecutor:
+    """Execute chains of effects on an AsyncCommandExecutor."""
+
+    def __init__(
+        self,
+        config: EffectsConfig,
+        executor: AsyncCommandExecutor | None = None,
+        output: RichOutput | None = None,
+        encoding: EncodingSettings | None = None,
+        limits: LimitSettings | None = None,
+        temp_dir: Path | None = None,
+    ) -> None:
+        """Initialize AsyncChainExecutor.
+
+        Args:
+            config: Effects configuration
+            executor: Executor shared with other chains (its semaphore caps
+                the total number of running commands)
+            output: RichOutput instance for logging
+            encoding: Global encoding profile for final outputs
+            limits: Global limits (layered with per-effect ones for each step)
+            temp_dir: Directory for intermediates (None = /dev/shm or system)
+        """
+        self.output = output
+        self.executor = executor or AsyncCommandExecutor(output, limits=limits)
+        # Step planning is shared with the synchronous executor
+        self.planner = ChainExecutor(
+            config, output, encoding, limits=limits, temp_dir=temp_dir
+        )
+
+    async def execute_chain(
+        self,
+        chain: list[ChainStep],
+        input_path: Path,
+        output_path: Path,
+    ) -> ExecutionResult:
+        """Execute a chain of effects, one awaited command per step.
+
+        Args:
+            chain: List of chain steps
+            input_path: Path to input image
+            output_path: Path to final output
+
+        Returns:
+            ExecutionResult for the chain
+        """
+        error = self.planner.check_chain(chain)
+        if error is not None:
+            return error
+        python = command_only_error(self.planner.config, chain)
+        if python is not None:
+            return ExecutionResult(
+                success=False, command="", stdout="", stderr=python, return_code=1
+            )
+
+        with tempfile.TemporaryDirectory(
+            dir=resolve_temp_dir(self.planner.temp_dir, input_path)
+        ) as temp_dir:
+            steps = self.planner.plan_chain(
+                chain, input_path, output_path, Path(temp_dir)
+            )
+            total_duration = 0.0
+
+            for i, step in enumerate(steps):
+                result = await self.executor.execute(
+                    step.command,
+                    step.input_path,
+                    step.output_path,
+                    step.params,
+                    step.limits,
+                )
+                total_duration += result.duration
+
+                # The previous intermediate has been consumed
+                if step.input_path != input_path:
+                    step.input_path.unlink(missing_ok=True)
+
+                if not result.success:
+                    return chain_step_failure(i, step, result, total_duration)
+
+        return chain_success(chain, total_duration)
+
+
+async def _stop_process_group(process: asyncio.subprocess.Process) -> None:
+    """SIGTERM a command's process group, escalating to SIGKILL."""
+    signal_process_group(process.pid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), TERMINATE_GRACE_PERIOD)
+    except TimeoutError:
+        signal_process_group(process.pid, signal.SIGKILL)
+        await process.wait()
@@ -0,0 +1,339 @@
+"""Backends: what loads, transforms and saves the images of a chain.
+
+ChainExecutor and MemoryExecutor run every chain through a backend:
+
+- magick (MagickBackend in engine.chain): one ImageMagick process per
+  step. Always available, and runs any effect command.
+- numpy (engine.native): built-in effects as NumPy array operations.
+- wand (engine.wand): ImageMagick's own operators, run in-process by
+  libMagickWand.
+
+The in-process backends are optional. They are imported on first use (see
+load_backend), and a chain they cannot run (see ImageBackend.supports)
+falls back to magick as a whole.
+
+A backend implements load, apply_effect and save on its own image type;
+run and run_file compose them into a whole chain, and turn BackendError
+into a failed result.
+"""
+
+from __future__ import annotations
+
+import importlib
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar, Literal
+
+from wallpaper_core.engine.encoding import apply_encoding, merge_effect_encodings
+from wallpaper_core.engine.executor import BytesResult, ExecutionResult
+
+if TYPE_CHECKING:
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.effects.schema import ChainStep
+    from wallpaper_core.engine.chain import ChainExecutor
+
+BackendName = Literal["magick", "numpy", "wand"]
+
+# Encodes a chain's result (encoder options are inserted before $OUTPUT)
+ENCODE_COMMAND = 'magick "$INPUT" "$OUTPUT"'
+
+# In-process backends: module, class, and what to install when the import
+# fails
+IN_PROCESS_BACKENDS: dict[str, tuple[str, str, str]] = {
+    "numpy": (
+        "wallpaper_core.engine.native",
+        "NativeBackend",
+        "NumPy (pip install 'wallpaper-core[numpy]')",
+    ),
+    "wand": (
+        "wallpaper_core.engine.wand",
+        "WandBackend",
+        "libMagickWand (ImageMagick's C library)",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class BackendCapabilities:
+    """What a backend can do, for picking one and for reports."""
+
+    in_process: bool
+    """Steps run without starting processes"""
+
+    shares_inputs: bool
+    """Decoded inputs are reused by later chains (e.g. batch items)"""
+
+    any_command: bool
+    """Runs every effect command, not only recognised operators"""
+
+
+class BackendError(Exception):
+    """A backend could not load, transform or save an image."""
+
+    def __init__(self, message: str, result: ExecutionResult | None = None) -> None:
+        """Initialize BackendError.
+
+        Args:
+            message: What failed
+            result: Result of the command that failed, if one ran
+        """
+        super().__init__(message)
+        self.result = result
+
+
+class ImageBackend[ImageT](ABC):
+    """Loads, transforms and saves images of one representation."""
+
+    name: ClassVar[str]
+    label: ClassVar[str]
+    capabilities: ClassVar[BackendCapabilities]
+
+    def __init__(self, chain_executor: ChainExecutor) -> None:
+        """Initialize the backend.
+
+        Args:
+            chain_executor: Executor whose config, encoding, limits and
+                command executor the backend uses
+        """
+        self.chain_executor = chain_executor
+        self.config = chain_executor.config
+        self.executor = chain_executor.executor
+
+    @abstractmethod
+    def supports(self, steps: list[ChainStep]) -> bool:
+        """Check if the backend can run every step of an optimized chain."""
+
+    @abstractmethod
+    def load(self, data: bytes) -> ImageT:
+        """Decode an encoded image.
+
+        Raises:
+            BackendError: If the data cannot be decoded
+        """
+
+    def load_file(self, path: Path) -> ImageT:
+        """Decode an image file.
+
+        Raises:
+            BackendError: If the file cannot be read or decoded
+        """
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            raise BackendError(f"Cannot read {path}: {e}") from e
+        return self.load(data)
+
+    @abstractmethod
+    def apply_effect(self, image: ImageT, step: ChainStep) -> ImageT:
+        """Apply one chain step, returning a new image.
+
+        Raises:
+            BackendError: If the step fails
+        """
+
+    def apply_chain(self, image: ImageT, steps: list[ChainStep]) -> ImageT:
+        """Apply steps in order, releasing the images between them.
+
+        Raises:
+            BackendError: If a step fails or the run is cancelled
+        """
+        current = image
+        try:
+            for i, step in enumerate(steps):
+                if self.executor.cancel_token.cancelled:
+                    cancelled = self.executor._cancelled_result(self.name, 0.0)
+                    raise BackendError("Cancelled", cancelled)
+                try:
+                    result = self.apply_effect(current, step)
+                except BackendError as e:
+                    raise BackendError(
+                        f"step {i + 1} ({step.effect}): {e}", e.result
+                    ) from e
+                if current is not image:
+                    self.release(current)
+                current = result
+        except BackendError:
+            if current is not image:
+                self.release(current)
+            raise
+        return current
+
+    @abstractmethod
+    def save(self, image: ImageT, output_format: str, encode_command: str) -> bytes:
+        """Encode an image.
+
+        Args:
+            image: Image to encode
+            output_format: ImageMagick format (e.g. "png")
+            encode_command: ENCODE_COMMAND with encoder options applied
+
+        Raises:
+            BackendError: If the image cannot be encoded
+        """
+
+    def save_file(self, image: ImageT, output_path: Path, encode_command: str) -> None:
+        """Encode an image to a file (its suffix selects the format).
+
+        Raises:
+            BackendError: If the image cannot be encoded or written
+        """
+        data = self.save(image, output_path.suffix.lstrip(".") or "png", encode_command)
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_bytes(data)
+        except OSError as e:
+            raise BackendError(f"Cannot write {output_path}: {e}") from e
+
+    def release(self, image: ImageT) -> None:  # noqa: B027
+        """Free an image the backend no longer needs (default: nothing)."""
+
+    def run(
+        self, chain: list[ChainStep], data: bytes, output_format: str
+    ) -> BytesResult:
+        """Apply a chain to an encoded image.
+
+        Args:
+            chain: Chain to run (optimized first)
+            data: Encoded input image
+            output_format: ImageMagick format to encode to
+
+        Returns:
+            BytesResult carrying the encoded output on success
+        """
+        steps = self.chain_executor.optimizer.optimize(chain).steps
+        command = self.encode_command(chain, Path(f"stdout.{output_format}"))
+        start = time.time()
+        try:
+            image = self.load(data)
+            encoded = self._transform(
+                image, steps, lambda out: self.save(out, output_format, command)
+            )
+        except BackendError as e:
+            return BytesResult(**vars(self.failure(e, time.time() - start)))
+        result = chain_success(chain, time.time() - start)
+        return BytesResult(**vars(result), data=encoded)
+
+    def run_file(
+        self, chain: list[ChainStep], input_path: Path, output_path: Path
+    ) -> ExecutionResult:
+        """Apply a chain to an image file and write the result to a file.
+
+        Args:
+            chain: Chain to run (optimized first)
+            input_path: Input image
+            output_path: Output image (its suffix selects the format)
+
+        Returns:
+            ExecutionResult of the whole chain
+        """
+        start = time.time()
+        try:
+            image = self.load_file(input_path)
+        except BackendError as e:
+            return self.failure(e, time.time() - start)
+        result = self.render_file(chain, image, output_path)
+        result.duration = time.time() - start
+        return result
+
+    def render_file(
+        self, chain: list[ChainStep], image: ImageT, output_path: Path
+    ) -> ExecutionResult:
+        """Apply a chain to a loaded image and write the result to a file.
+
+        The image is released afterwards.
+
+        Args:
+            chain: Chain to run (optimized first)
+            image: Loaded input image
+            output_path: Output image (its suffix selects the format)
+
+        Returns:
+            ExecutionResult of the chain
+        """
+        steps = self.chain_executor.optimizer.optimize(chain).steps
+        command = self.encode_command(chain, output_path)
+        start = time.time()
+        try:
+            self._transform(
+                image, steps, lambda out: self.save_file(out, output_path, command)
+            )
+        except BackendError as e:
+            return self.failure(e, time.time() - start)
+        return chain_success(chain, time.time() - start)
+
+    def encode_command(self, chain: list[ChainStep], output_path: Path) -> str:
+        """ENCODE_COMMAND with the chain's encoding profile applied."""
+        profile = merge_effect_encodings(
+            self.config, self.chain_executor.encoding, [s.effect for s in chain]
+        )
+        return apply_encoding(ENCODE_COMMAND, profile, output_path)
+
+    def failure(self, error: BackendError, duration: float) -> ExecutionResult:
+        """Build the result of a chain the backend failed to run."""
+        result = error.result
+        return ExecutionResult(
+            success=False,
+            command=result.command if result else self.name,
+            stdout=result.stdout if result else "",
+            stderr=f"{self.label} backend failed: {error}",
+            return_code=result.return_code if result else 1,
+            duration=duration,
+            cancelled=result.cancelled if result else False,
+            timed_out=result.timed_out if result else False,
+        )
+
+    def _transform[T](
+        self, image: ImageT, steps: list[ChainStep], save: Callable[[ImageT], T]
+    ) -> T:
+        """Apply steps to a loaded image and save the result, then free both."""
+        output = image
+        try:
+            output = self.apply_chain(image, steps)
+            return save(output)
+        finally:
+            if output is not image:
+                self.release(output)
+            self.release(image)
+
+
+def chain_success(chain: list[ChainStep], duration: float) -> ExecutionResult:
+    """Build the result of a chain whose steps all succeeded."""
+    return ExecutionResult(
+        success=True,
+        command=f"chain: {' -> '.join(s.effect for s in chain)}",
+        stdout="",
+        stderr="",
+        return_code=0,
+        duration=duration,
+    )
+
+
+def load_backend(
+    name: str, chain_executor: ChainExecutor, output: RichOutput | None = None
+) -> ImageBackend[Any] | None:
+    """Create an in-process backend.
+
+    Args:
+        name: Backend name (a key of IN_PROCESS_BACKENDS)
+        chain_executor: Executor the backend works for
+        output: RichOutput instance for the warning
+
+    Returns:
+        The backend, or None (with a warning) if its dependency is missing;
+        chains then run with magick
+    """
+    module_name, class_name, requirement = IN_PROCESS_BACKENDS[name]
+    try:
+        module = importlib.import_module(module_name)
+        backend: ImageBackend[Any] = getattr(module, class_name)(chain_executor)
+    except (ImportError, OSError) as e:
+        if output:
+            output.warning(
+                f'backend = "{name}" needs {requirement}: {e}; '
+                "running effects with magick"
+            )
+        return None
+    return backend
@@ -2,19 +2,56 @@
 
 from __future__ import annotations
 
+import contextlib
+import tempfile
+from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import ChainStep
+from wallpaper_core.engine.cancel import CancelToken
+from wallpaper_core.engine.cascade import (
+    ENCODE_COMMAND,
+    BlurCascade,
+    CascadeSource,
+    blur_groups,
+)
 from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.encoding import (
+    apply_encoding,
+    output_suffix,
+    resolve_item_encoding,
+)
 from wallpaper_core.engine.executor import CommandExecutor, ExecutionResult
+from wallpaper_core.engine.journal import (
+    JOURNAL_NAME,
+    BatchJournal,
+    JournalEntry,
+    file_sha256,
+)
+from wallpaper_core.engine.manifest import OutputManifest, recipe_hash
+from wallpaper_core.engine.probe import ImageInfo, ImageProber
+from wallpaper_core.engine.tempdir import resolve_temp_dir
+from wallpaper_core.engine.variants import (
+    OutputGeometry,
+    VariantExecutor,
+    variant_output_path,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Collection
+
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
     from wallpaper_core.console.output import RichOutput
     from wallpaper_core.console.progress import BatchProgress
     from wallpaper_core.effects.schema import EffectsConfig
+    from wallpaper_core.engine.backend import BackendName, ImageBackend
+    from wallpaper_core.engine.optimize import OptimizeMode
+    from wallpaper_core.engine.plan import ExecutionPlan
+    from wallpaper_core.engine.workers import SharedInput, WorkerMode
 
 
 @dataclass
@@ -26,12 +63,106 @@ class BatchResult:
     failed: int = 0
     results: dict[str, ExecutionResult] = field(default_factory=dict)
     output_dir: Path | None = None
+    cancelled: bool = False
+    input_info: ImageInfo | None = None
 
     @property
     def success(self) -> bool:
         """Check if all operations succeeded."""
         return self.failed == 0
 
+    @property
+    def timed_out(self) -> int:
+        """Number of items stopped by a time limit."""
+        return sum(1 for r in self.results.values() if r.timed_out)
+
+    @property
+    def skipped(self) -> int:
+        """Number of items skipped because the journal shows them done."""
+        return sum(1 for r in self.results.values() if r.skipped)
+
+
+@dataclass
+class _BatchRecords:
+    """Journal and manifest of one batch output directory."""
+
+    journal: BatchJournal | None = None
+    manifest: OutputManifest | None = None
+    input_hash: str = ""
+
+
+def item_output_path(
+    config: EffectsConfig,
+    encoding: EncodingSettings | None,
+    base_dir: Path,
+    name: str,
+    item_type: ItemType,
+    input_path: Path,
+    flat: bool,
+) -> Path:
+    """Get the output path of a batch item (suffix follows its encoding)."""
+    profile = resolve_item_encoding(config, encoding, name, item_type)
+    suffix = output_suffix(input_path, profile)
+    if flat:
+        return base_dir / f"{name}{suffix}"
+    return base_dir / item_type.subdir_name / f"{name}{suffix}"
+
+
+def batch_base_dir(
+    input_path: Path,
+    output_dir: Path,
+    item_types: list[ItemType],
+    flat: bool,
+    explicit_output: bool = False,
+) -> Path:
+    """Get the directory a batch writes into.
+
+    Flat output goes straight into output_dir when it was given
+    explicitly, or for multi-type batches (as with generate_all);
+    everything else goes into output_dir/<image-stem>.
+    """
+    if flat and (explicit_output or len(item_types) > 1):
+        return output_dir
+    return output_dir / input_path.stem
+
+
+def item_names(config: EffectsConfig, item_type: ItemType) -> list[str]:
+    """Names of every configured item of a type."""
+    if item_type == ItemType.EFFECT:
+        return list(config.effects)
+    if item_type == ItemType.COMPOSITE:
+        return list(config.composites)
+    return list(config.presets)
+
+
+def item_chain(
+    config: EffectsConfig, name: str, item_type: ItemType
+) -> list[ChainStep] | None:
+    """Express an effect, composite or preset as a chain of effect steps.
+
+    Args:
+        config: Effects configuration
+        name: Item name
+        item_type: Item type
+
+    Returns:
+        Chain steps, or None if the item (or what it references) is unknown
+    """
+    if item_type == ItemType.EFFECT:
+        return [ChainStep(effect=name)] if name in config.effects else None
+    if item_type == ItemType.COMPOSITE:
+        composite = config.composites.get(name)
+        return list(composite.chain) if composite is not None else None
+    if item_type == ItemType.PRESET:
+        preset = config.presets.get(name)
+        if preset is None:
+            return None
+        if preset.composite:
+            return item_chain(config, preset.composite, ItemType.COMPOSITE)
+        if preset.effect and preset.effect in config.effects:
+            return [ChainStep(effect=preset.effect, params=preset.params)]
+    return None
+
 
 class BatchGenerator:
     """Generate multiple effects in batch."""
@@ -43,6 +174,24 @@ class BatchGenerator:
         parallel: bool = True,
         strict: bool = True,
         max_workers: int = 0,
+        geometries: list[OutputGeometry] | None = None,
+        encoding: EncodingSettings | None = None,
+        cancel_token: CancelToken | None = None,
+        limits: LimitSettings | None = None,
+        temp_dir: Path | None = None,
+        pipeline: bool = False,
+        optimize: OptimizeMode = "safe",
+        fuse_pointwise: bool = False,
+        clut_dir: Path | None = None,
+        cascade_blurs: bool = False,
+        blur_tolerance: float = 0.0,
+        backend: BackendName = "magick",
+        workers: WorkerMode = "threads",
+        journal: bool = True,
+        resume: bool = False,
+        retry_failed: bool = False,
+        manifest: bool = True,
+        probe: bool = True,
     ) -> None:
         """Initialize BatchGenerator.
 
@@ -52,14 +201,142 @@ class BatchGenerator:
             parallel: Run in parallel (True) or sequential (False)
             strict: Abort on first failure
             max_workers: Max parallel workers (0 = auto)
+            geometries: Output sizes to derive from each item (None = as-is)
+            encoding: Global encoding profile (layered with per-effect ones)
+            cancel_token: Token that aborts the batch and its running commands
+            limits: Global per-command limits (layered with per-effect ones)
+            temp_dir: Directory for intermediates (None = /dev/shm or system)
+            pipeline: Connect chain steps with OS pipes (see ChainExecutor)
+            optimize: Chain optimizer mode (see ChainOptimizer)
+            fuse_pointwise: Apply runs of pointwise effects as one color
+                lookup table (see engine.clut)
+            clut_dir: CLUT cache directory (None = user cache directory)
+            cascade_blurs: Derive the Gaussian blurs items start with from
+                each other (see engine.cascade)
+            blur_tolerance: Share of sigma a downscaled pixel may cover when
+                approximating large blurs (0 = exact)
+            backend: In-process backend for the chains it supports (see
+                engine.backend); one that shares decoded inputs also runs
+                single effects, so every item starts from one decode
+            workers: "processes" renders the items the NumPy backend runs
+                in worker processes sharing one decoded input (see
+                engine.workers); other items still run on threads
+            journal: Record finished items in the output directory's journal
+            resume: Skip journaled items whose outputs are still intact
+            retry_failed: Run only the items the journal records as failed
+            manifest: Write manifest.json describing every output
+            probe: Check the input's header before starting any command
         """
         self.config = config
         self.output = output
         self.parallel = parallel
         self.strict = strict
         self.max_workers = max_workers if max_workers > 0 else None
-        self.executor = CommandExecutor(output)
-        self.chain_executor = ChainExecutor(config, output)
+        self.geometries = geometries or []
+        self.encoding = encoding
+        self.cancel_token = cancel_token or CancelToken()
+        # A strict failure aborts the run through this token, leaving the
+        # caller's token (and the generator's later runs) untouched
+        self._run_token = CancelToken(self.cancel_token)
+        self.executor = CommandExecutor(
+            output, cancel_token=self._run_token, limits=limits
+        )
+        self.chain_executor = ChainExecutor(
+            config,
+            output,
+            encoding,
+            cancel_token=self._run_token,
+            limits=limits,
+            temp_dir=temp_dir,
+            pipeline=pipeline,
+            optimize=optimize,
+            fuse_pointwise=fuse_pointwise,
+            clut_dir=clut_dir,
+            backend=backend,
+        )
+        self.variant_executor = VariantExecutor(self.executor, output, temp_dir)
+        self.workers = workers
+        self.cascade_blurs = cascade_blurs
+        self.blur_tolerance = blur_tolerance
+        self.journal = journal or resume or retry_failed
+        self.resume = resume
+        self.retry_failed = retry_failed
+        self.manifest = manifest
+        self.prober = ImageProber(self.executor.binary) if probe else None
+
+    def cancel(self) -> None:
+        """Abort the batch, killing in-flight commands.
+
+        Safe to call from another thread or a signal handler. Interrupted
+        items are reported as cancelled and their partial outputs removed.
+        """
+        self.cancel_token.cancel()
+
+    def plan(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        item_types: list[ItemType],
+        flat: bool = False,
+        explicit_output: bool = False,
+        exclude: Collection[tuple[str, ItemType]] = (),
+    ) -> ExecutionPlan:
+        """Plan the commands this generator would run, without running them.
+
+        The plan follows this generator's encoding, limits, optimizer, CLUT
+        cache, size variants and blur cascades (see engine.plan).
+
+        Args:
+            input_path: Input image
+            output_dir: Output directory
+            item_types: Item types to include, in order
+            flat: Omit type subdirectories
+            explicit_output: output_dir was given explicitly
+            exclude: Items to leave out (e.g. those run in-process)
+
+        Raises:
+            ValueError: If an item is invalid or has in-process effects
+        """
+        from wallpaper_core.engine.plan import build_plan
+
+        cluts = self.chain_executor.cluts
+        return build_plan(
+            self.config,
+            input_path,
+            output_dir,
+            item_types,
+            flat,
+            explicit_output,
+            self.encoding,
+            self.chain_executor.limits,
+            self.executor.binary,
+            self.chain_executor.optimizer.mode,
+            cluts is not None,
+            cluts.directory if cluts is not None else None,
+            self.geometries,
+            self.cascade_blurs,
+            self.blur_tolerance,
+            exclude,
+        )
+
+    def in_process_backend(
+        self, name: str, item_type: ItemType
+    ) -> ImageBackend[Any] | None:
+        """The in-process backend that renders an item.
+
+        Returns:
+            The backend, or None if the item runs as magick commands
+        """
+        chain = item_chain(self.config, name, item_type)
+        if not chain:
+            return None
+        single = item_type == ItemType.EFFECT or (
+            item_type == ItemType.PRESET and not self.config.presets[name].composite
+        )
+        if single and not self._step_in_chain(chain[0]):
+            return None
+        backend = self.chain_executor.backend_for(chain)
+        return backend if backend.capabilities.in_process else None
 
     def generate_all_effects(
         self,
@@ -156,12 +433,7 @@ class BatchGenerator:
             base_dir = output_dir if flat else output_dir / image_name
 
         # Process items
-        if self.parallel:
-            result = self._process_parallel(input_path, base_dir, items, flat, progress)
-        else:
-            result = self._process_sequential(
-                input_path, base_dir, items, flat, progress
-            )
+        result = self._process(input_path, base_dir, items, flat, progress)
 
         result.output_dir = base_dir
         return result
@@ -190,16 +462,107 @@ class BatchGenerator:
             base_dir = output_dir / image_name
         flat = subdir is None
 
-        if self.parallel:
-            result = self._process_parallel(input_path, base_dir, items, flat, progress)
-        else:
-            result = self._process_sequential(
-                input_path, base_dir, items, flat, progress
-            )
+        result = self._process(input_path, base_dir, items, flat, progress)
 
         result.output_dir = base_dir
         return result
 
+    def _process(
+        self,
+        input_path: Path,
+        base_dir: Path,
+        items: list[tuple[str, ItemType]],
+        flat: bool,
+        progress: BatchProgress | None,
+    ) -> BatchResult:
+        """Process items, keeping the output directory's records up to date."""
+        # Re-arm after a previous run's strict abort (a cancelled
+        # cancel_token keeps the run token cancelled)
+        self._run_token.reset()
+        info = None
+        if self.prober is not None:
+            # A corrupt input would otherwise fail once per item
+            try:
+                info = self.prober.probe(input_path)
+            except ValueError as e:
+                return self._reject(items, str(e))
+
+        # Items that are guaranteed to fail never start; in strict mode
+        # neither does the rest of the batch
+        invalid = self.chain_executor.validator.check_items(items)
+        if invalid and self.strict:
+            result = BatchResult(total=len(items))
+            self._fail_invalid(result, invalid)
+            for name, item_type in items:
+                if (name, item_type) not in invalid:
+                    result.results[name] = self._failed_result(
+                        f"Not run: {len(invalid)} invalid items in a strict batch"
+                    )
+                    result.failed += 1
+            return result
+
+        records = self._open_records(base_dir, input_path)
+        process = self._process_parallel if self.parallel else self._process_sequential
+        valid = [item for item in items if item not in invalid]
+        try:
+            with (
+                self._blur_sources(input_path, valid, info) as blurs,
+                self._shared_input(input_path, valid, blurs) as shared,
+            ):
+                result = process(
+                    input_path,
+                    base_dir,
+                    valid,
+                    flat,
+                    progress,
+                    records,
+                    blurs,
+                    shared,
+                )
+            result.total += len(invalid)
+            self._fail_invalid(result, invalid)
+            result.input_info = info
+            return result
+        finally:
+            # Written even for failed or cancelled batches, so the manifest
+            # always describes what is on disk
+            if records.manifest is not None and base_dir.exists():
+                records.manifest.write()
+
+    def _reject(self, items: list[tuple[str, ItemType]], error: str) -> BatchResult:
+        """Fail every item of a batch whose input cannot be used."""
+        if self.output:
+            self.output.error(error)
+        result = BatchResult(total=len(items), failed=len(items))
+        for name, _ in items:
+            result.results[name] = self._failed_result(f"Invalid input: {error}")
+        return result
+
+    def _fail_invalid(
+        self,
+        result: BatchResult,
+        invalid: dict[tuple[str, ItemType], list[str]],
+    ) -> None:
+        """Record items that failed validation in a batch result."""
+        for (name, item_type), errors in invalid.items():
+            message = "; ".join(errors)
+            if self.output:
+                self.output.error(f"{item_type} '{name}' is invalid: {message}")
+            result.results[name] = self._failed_result(
+                f"Invalid {item_type.value}: {message}"
+            )
+            result.failed += 1
+
+    def _failed_result(self, error: str) -> ExecutionResult:
+        """Result of an item that failed without running a command."""
+        return ExecutionResult(
+            success=False,
+            command="",
+            stdout="",
+            stderr=error,
+            return_code=1,
+        )
+
     def _process_sequential(
         self,
         input_path: Path,
@@ -207,19 +570,37 @@ class BatchGenerator:
         items: list[tuple[str, ItemType]],
         flat: bool,
         progress: BatchProgress | None,
+        records: _BatchRecords,
+        blurs: dict[tuple[str, ItemType], CascadeSource],
+        shared: SharedInput | None = None,
     ) -> BatchResult:
         """Process items sequentially."""
         result = BatchResult(total=len(items))
 
         for name, item_type in items:
+            if self._run_token.cancelled:
+                result.cancelled = True
+                break
             output_path = self._get_output_path(
                 base_dir, name, item_type, input_path, flat
             )
-            exec_result = self._process_item(name, item_type, input_path, output_path)
+            exec_result = self._run_item(
+                records,
+                name,
+                item_type,
+                input_path,
+                output_path,
+                blurs.get((name, item_type)),
+                shared,
+            )
             result.results[name] = exec_result
 
             if exec_result.success:
                 result.succeeded += 1
+            elif exec_result.cancelled:
+                result.failed += 1
+                result.cancelled = True
+                break
             else:
                 result.failed += 1
                 if self.strict:
@@ -241,6 +622,9 @@ class BatchGenerator:
         items: list[tuple[str, ItemType]],
         flat: bool,
         progress: BatchProgress | None,
+        records: _BatchRecords,
+        blurs: dict[tuple[str, ItemType], CascadeSource],
+        shared: SharedInput | None = None,
     ) -> BatchResult:
         """Process items in parallel."""
         result = BatchResult(total=len(items))
@@ -252,11 +636,14 @@ class BatchGenerator:
                     base_dir, name, item_type, input_path, flat
                 )
                 future = executor.submit(
-                    self._process_item,
+                    self._run_item,
+                    records,
                     name,
                     item_type,
                     input_path,
                     output_path,
+                    blurs.get((name, item_type)),
+                    shared,
                 )
                 futures[future] = (name, item_type)
 
@@ -268,14 +655,18 @@ class BatchGenerator:
 
                     if exec_result.success:
                         result.succeeded += 1
+                    elif exec_result.cancelled:
+                        result.failed += 1
+                        result.cancelled = True
                     else:
                         result.failed += 1
                         if self.strict:
                             if self.output:
                                 self.output.error(f"{item_type} '{name}' failed")
-                            # Cancel remaining futures
+                            # Cancel queued futures and kill running commands
                             for f in futures:
                                 f.cancel()
+                            self._run_token.cancel()
                             break
 
                     if progress:
@@ -315,11 +706,320 @@ class BatchGenerator:
         Returns:
             Complete output path including filename
         """
-        suffix = input_path.suffix or ".png"
-        if flat:
-            return base_dir / f"{name}{suffix}"
+        return item_output_path(
+            self.config, self.encoding, base_dir, name, item_type, input_path, flat
+        )
+
+    def _open_records(self, base_dir: Path, input_path: Path) -> _BatchRecords:
+        """Open the journal and manifest of a batch output directory."""
+        records = _BatchRecords()
+        if self.journal or self.manifest:
+            with contextlib.suppress(OSError):
+                records.input_hash = file_sha256(input_path)
+        if self.journal:
+            records.journal = BatchJournal(base_dir / JOURNAL_NAME)
+        if self.manifest:
+            records.manifest = OutputManifest.load(
+                base_dir, input_path, records.input_hash
+            )
+        return records
+
+    def _recipe(
+        self, name: str, item_type: ItemType
+    ) -> tuple[str, list[dict[str, Any]]]:
+        """Hash of everything that determines an item's output, and its steps."""
+        steps = [
+            {
+                "effect": step.effect,
+                "params": self.chain_executor._get_params_with_defaults(
+                    step.effect, step.params
+                ),
+            }
+            for step in item_chain(self.config, name, item_type) or []
+        ]
+        commands = [
+            self.config.effects[step["effect"]].command
+            for step in steps
+            if step["effect"] in self.config.effects
+        ]
+        encoding = resolve_item_encoding(self.config, self.encoding, name, item_type)
+        recipe = {
+            "steps": steps,
+            "commands": commands,
+            "encoding": encoding.model_dump(exclude_none=True),
+            "sizes": [str(g) for g in self.geometries],
+        }
+        return recipe_hash(recipe), steps
+
+    def _item_outputs(self, output_path: Path) -> list[Path]:
+        """Files an item writes (one per size variant, if any)."""
+        if self.geometries:
+            return [variant_output_path(output_path, g) for g in self.geometries]
+        return [output_path]
+
+    def _should_skip(
+        self,
+        entry: JournalEntry | None,
+        outputs: list[Path],
+        recipe: str,
+        input_hash: str,
+    ) -> bool:
+        """Decide from an item's journal entry whether to skip it.
+
+        --retry-failed alone runs only items whose last run failed; --resume
+        skips items made from the same input with the same recipe (see
+        _recipe) whose recorded outputs still match their content hash.
+        """
+        if self.retry_failed and not self.resume:
+            return entry is None or entry.done
+        return (
+            self.resume
+            and entry is not None
+            and entry.done
+            and entry.recipe == recipe
+            and entry.input_hash == input_hash
+            and set(entry.outputs) == {str(path) for path in outputs}
+            and entry.verify()
+        )
+
+    def _run_item(
+        self,
+        records: _BatchRecords,
+        name: str,
+        item_type: ItemType,
+        input_path: Path,
+        output_path: Path,
+        blur: CascadeSource | None = None,
+        shared: SharedInput | None = None,
+    ) -> ExecutionResult:
+        """Process an item unless the journal says to skip it, then record it."""
+        journal, manifest = records.journal, records.manifest
+        outputs = self._item_outputs(output_path)
+        command_hash, steps = (
+            self._recipe(name, item_type)
+            if journal is not None or manifest is not None
+            else ("", [])
+        )
+        if journal is not None and self._should_skip(
+            journal.get(output_path), outputs, command_hash, records.input_hash
+        ):
+            if self.output:
+                self.output.debug(f"Skipping {item_type} '{name}' (journaled)")
+            return ExecutionResult(
+                success=True,
+                command="journal: skipped",
+                stdout="",
+                stderr="",
+                return_code=0,
+                skipped=True,
+            )
+
+        chain = item_chain(self.config, name, item_type) if shared else None
+        if blur is not None:
+            result = self._render_from_cascade(blur, name, item_type, output_path)
+        elif shared is not None and chain is not None and shared.supports(chain):
+            result = shared.render(chain, output_path)
+        else:
+            result = self._process_item(name, item_type, input_path, output_path)
+        if not result.success:
+            if manifest is not None:
+                manifest.discard(outputs)
+            # Interrupted items are neither done nor failed; a resume reruns them
+            if journal is not None and not result.cancelled:
+                journal.record_failed(
+                    output_path, name, item_type.value, result.stderr, result.duration
+                )
+            return result
+
+        # Hash each output once for both records
+        digests = {
+            str(path): file_sha256(path)
+            for path in outputs
+            if (journal is not None or manifest is not None) and path.exists()
+        }
+        if journal is not None:
+            journal.record_done(
+                output_path,
+                name,
+                item_type.value,
+                digests,
+                result.duration,
+                command_hash,
+                records.input_hash,
+            )
+        if manifest is not None:
+            sizes: list[OutputGeometry | None] = list(self.geometries) or [None]
+            for path, geometry in zip(outputs, sizes, strict=True):
+                if str(path) not in digests:
+                    continue
+                manifest.record(
+                    path,
+                    digests[str(path)],
+                    name,
+                    item_type,
+                    command_hash,
+                    steps,
+                    result.duration,
+                    self._output_size(path, geometry),
+                )
+        return result
+
+    def _output_size(
+        self, path: Path, geometry: OutputGeometry | None
+    ) -> tuple[int, int] | None:
+        """Dimensions of an output, from its geometry or its header."""
+        if geometry is not None:
+            return geometry.width, geometry.height
+        if self.prober is None:
+            return None
+        try:
+            info = self.prober.probe(path)
+        except ValueError:
+            return None
+        return info.width, info.height
+
+    @contextlib.contextmanager
+    def _blur_sources(
+        self,
+        input_path: Path,
+        items: list[tuple[str, ItemType]],
+        info: ImageInfo | None,
+    ) -> Iterator[dict[tuple[str, ItemType], CascadeSource]]:
+        """Set up blur cascades for items starting with a blur of the input.
+
+        Yields:
+            The cascade each such item reads from; the cascades'
+            intermediates are removed afterwards
+        """
+        if not self.cascade_blurs or self.geometries:
+            # Size variants blur a prescaled copy of the input instead
+            yield {}
+            return
+
+        # Items an in-process backend renders decode the input once anyway
+        chains: dict[tuple[str, ItemType], list[ChainStep]] = {}
+        for name, item_type in items:
+            chain = item_chain(self.config, name, item_type)
+            if chain and self.in_process_backend(name, item_type) is None:
+                chains[(name, item_type)] = self.chain_executor.optimizer.optimize(
+                    chain
+                ).steps
+        groups = blur_groups(self.config, chains)
+        if not groups:
+            yield {}
+            return
+
+        with tempfile.TemporaryDirectory(
+            dir=resolve_temp_dir(self.chain_executor.temp_dir, input_path)
+        ) as work_dir:
+            sources: dict[tuple[str, ItemType], CascadeSource] = {}
+            for effect, sigmas in groups.items():
+                cascade = BlurCascade(
+                    self.chain_executor,
+                    effect,
+                    list(sigmas.values()),
+                    input_path,
+                    Path(work_dir) / effect,
+                    info,
+                    self.blur_tolerance,
+                )
+                if self.output:
+                    self.output.debug(
+                        f"Blur cascade for {len(sigmas)} items: sigmas "
+                        + ", ".join(f"{stage.sigma:g}" for stage in cascade.stages)
+                    )
+                for key, sigma in sigmas.items():
+                    sources[key] = CascadeSource(cascade, sigma, chains[key][1:])
+            yield sources
+
+    @contextlib.contextmanager
+    def _shared_input(
+        self,
+        input_path: Path,
+        items: list[tuple[str, ItemType]],
+        blurs: dict[tuple[str, ItemType], CascadeSource],
+    ) -> Iterator[SharedInput | None]:
+        """Start NumPy worker processes if any item can use them.
+
+        Yields:
+            The decoded input shared with the workers, or None when the
+            batch runs on threads only
+        """
+        backend = self.chain_executor.backend
+        if (
+            self.workers != "processes"
+            or self.geometries
+            or backend is None
+            or backend.name != "numpy"
+        ):
+            yield None
+            return
+
+        from wallpaper_core.engine.backend import BackendError
+        from wallpaper_core.engine.native import NativeBackend
+        from wallpaper_core.engine.workers import SharedInput
+
+        assert isinstance(backend, NativeBackend)  # nosec: checked by name
+        chains = [
+            item_chain(self.config, name, item_type)
+            for name, item_type in items
+            if (name, item_type) not in blurs
+        ]
+        if not any(
+            chain and self.chain_executor.backend_for(chain) is backend
+            for chain in chains
+        ):
+            yield None
+            return
+
+        with contextlib.ExitStack() as stack:
+            shared: SharedInput | None = None
+            try:
+                shared = stack.enter_context(
+                    SharedInput.open(
+                        self.chain_executor, backend, input_path, self.max_workers
+                    )
+                )
+            except BackendError as e:
+                # The items then fail (or fall back) on the batch's threads
+                if self.output:
+                    self.output.warning(f"Not using worker processes: {e}")
+            yield shared
+
+    def _render_from_cascade(
+        self,
+        blur: CascadeSource,
+        name: str,
+        item_type: ItemType,
+        output_path: Path,
+    ) -> ExecutionResult:
+        """Render an item from the cascade stage holding its leading blur."""
+        stage = blur.cascade.render(blur.sigma)
+        if not stage.success:
+            return ExecutionResult(
+                success=False,
+                command=stage.command,
+                stdout=stage.stdout,
+                stderr=f"Blur cascade failed: {stage.stderr}",
+                return_code=stage.return_code,
+                duration=stage.duration,
+                cancelled=stage.cancelled,
+                timed_out=stage.timed_out,
+            )
+
+        source = blur.cascade.stage(blur.sigma).path
+        if blur.rest:
+            result = self.chain_executor.execute_chain(blur.rest, source, output_path)
         else:
-            return base_dir / item_type.subdir_name / f"{name}{suffix}"
+            profile = resolve_item_encoding(self.config, self.encoding, name, item_type)
+            result = self.executor.execute(
+                apply_encoding(ENCODE_COMMAND, profile, output_path),
+                source,
+                output_path,
+                limits=self.chain_executor.effect_limits(blur.cascade.effect),
+            )
+        result.duration += stage.duration
+        return result
 
     def _process_item(
         self,
@@ -328,7 +1028,27 @@ class BatchGenerator:
         input_path: Path,
         output_path: Path,
     ) -> ExecutionResult:
-        """Process a single item."""
+        """Process a single item, deriving size variants if requested."""
+        if self.geometries:
+            return self.variant_executor.execute(
+                lambda source, target: self._render_item(
+                    name, item_type, source, target
+                ),
+                input_path,
+                output_path,
+                self.geometries,
+                resolve_item_encoding(self.config, self.encoding, name, item_type),
+            )
+        return self._render_item(name, item_type, input_path, output_path)
+
+    def _render_item(
+        self,
+        name: str,
+        item_type: ItemType,
+        input_path: Path,
+        output_path: Path,
+    ) -> ExecutionResult:
+        """Render a single item to one output path."""
         if item_type == ItemType.EFFECT:
             return self._process_effect(name, input_path, output_path)
         elif item_type == ItemType.COMPOSITE:
@@ -357,8 +1077,34 @@ class BatchGenerator:
                 stderr=f"Unknown effect: {name}",
                 return_code=1,
             )
-        params = self.chain_executor._get_params_with_defaults(name, {})
-        return self.executor.execute(effect.command, input_path, output_path, params)
+        return self._process_step(ChainStep(effect=name), input_path, output_path)
+
+    def _process_step(
+        self, step: ChainStep, input_path: Path, output_path: Path
+    ) -> ExecutionResult:
+        """Process one effect with its parameters."""
+        if self._step_in_chain(step):
+            return self.chain_executor.execute_chain([step], input_path, output_path)
+        effect = self.config.effects[step.effect]
+        params = self.chain_executor._get_params_with_defaults(step.effect, step.params)
+        command = self.chain_executor.encoded_command(step.effect, output_path)
+        return self.executor.execute(
+            command or effect.command,
+            input_path,
+            output_path,
+            params,
+            self.chain_executor.effect_limits(step.effect),
+        )
+
+    def _step_in_chain(self, step: ChainStep) -> bool:
+        """Whether one effect runs through the chain executor, not as a command.
+
+        In-process effects always do; so does every effect when the backend
+        shares decoded inputs, so all items start from one decode.
+        """
+        backend = self.chain_executor.backend
+        shared = backend is not None and backend.capabilities.shares_inputs
+        return shared or self.config.effects[step.effect].in_process
 
     def _process_composite(
         self, name: str, input_path: Path, output_path: Path
@@ -405,11 +1151,10 @@ class BatchGenerator:
                     stderr=f"Unknown effect: {preset.effect}",
                     return_code=1,
                 )
-            params = self.chain_executor._get_params_with_defaults(
-                preset.effect, preset.params
-            )
-            return self.executor.execute(
-                effect.command, input_path, output_path, params
+            return self._process_step(
+                ChainStep(effect=preset.effect, params=preset.params),
+                input_path,
+                output_path,
             )
         else:
             return ExecutionResult(
@@ -0,0 +1,168 @@
+"""Cooperative cancellation for running effect processes."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import signal
+import subprocess  # nosec: only used for process handles
+import threading
+import weakref
+from collections.abc import Iterator
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+# Seconds to wait after SIGTERM before escalating to SIGKILL
+TERMINATE_GRACE_PERIOD = 2.0
+
+
+class CancelToken:
+    """Shared cancellation state for the executors of one run.
+
+    Executors register every child process they spawn (each in its own
+    process group). Cancelling the token terminates all registered process
+    groups; executors then remove the partial outputs of interrupted jobs
+    and refuse to start new ones.
+
+    A token created with a parent is also cancelled with it, but can be
+    cancelled (and reset) on its own without touching the parent.
+    """
+
+    def __init__(self, parent: CancelToken | None = None) -> None:
+        """Initialize CancelToken.
+
+        Args:
+            parent: Token whose cancellation also cancels this one
+        """
+        self._event = threading.Event()
+        self._lock = threading.RLock()
+        self._processes: set[subprocess.Popen[Any]] = set()
+        self._parent = parent
+        self._children: weakref.WeakSet[CancelToken] = weakref.WeakSet()
+        if parent is not None:
+            with parent._lock:
+                parent._children.add(self)
+            if parent.cancelled:
+                self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check if cancellation was requested (here or on the parent)."""
+        return self._event.is_set() or (
+            self._parent is not None and self._parent.cancelled
+        )
+
+    def wait(self, timeout: float) -> bool:
+        """Block until cancellation or the timeout; True if cancelled."""
+        return self._event.wait(timeout) or self.cancelled
+
+    def reset(self) -> None:
+        """Clear a cancellation requested on this token alone.
+
+        A cancelled parent keeps the token cancelled.
+        """
+        self._event.clear()
+
+    def register(self, process: subprocess.Popen[Any]) -> None:
+        """Track a running child process.
+
+        If the token is already cancelled the process is terminated
+        immediately, closing the race between spawn and cancel.
+        """
+        with self._lock:
+            self._processes.add(process)
+        if self.cancelled:
+            _terminate_group(process)
+
+    def unregister(self, process: subprocess.Popen[Any]) -> None:
+        """Stop tracking a finished child process."""
+        with self._lock:
+            self._processes.discard(process)
+
+    def running(self) -> int:
+        """Number of tracked child processes."""
+        with self._lock:
+            return len(self._processes)
+
+    def cancel(self) -> None:
+        """Request cancellation and terminate all running process groups."""
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes)
+            children = list(self._children)
+        for child in children:
+            child.cancel()
+        for process in processes:
+            _terminate_group(process)
+        for process in processes:
+            try:
+                process.wait(timeout=TERMINATE_GRACE_PERIOD)
+            except subprocess.TimeoutExpired:
+                kill_process_group(process)
+
+
+def remove_partial_output(output_path: Path) -> None:
+    """Remove an output file left behind by an interrupted job."""
+    with contextlib.suppress(OSError):
+        output_path.unlink(missing_ok=True)
+
+
+def _signal_group(process: subprocess.Popen[Any], sig: signal.Signals) -> None:
+    """Send a signal to a child's process group (falls back to the child)."""
+    # pid <= 0 would address the caller's own process group
+    if process.poll() is not None or process.pid <= 0:
+        return
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        with contextlib.suppress(OSError):
+            process.send_signal(sig)
+
+
+def signal_process_group(pid: int, sig: signal.Signals) -> None:
+    """Send a signal to a process group, ignoring groups that are gone."""
+    # pid <= 0 would address the caller's own process group
+    if pid <= 0:
+        return
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        os.killpg(pid, sig)
+
+
+def _terminate_group(process: subprocess.Popen[Any]) -> None:
+    """Ask a child's process group to exit."""
+    _signal_group(process, signal.SIGTERM)
+
+
+def kill_process_group(process: subprocess.Popen[Any]) -> None:
+    """Force a child's process group to exit."""
+    _signal_group(process, signal.SIGKILL)
+
+
+@contextlib.contextmanager
+def cancel_on_signals(token: CancelToken) -> Iterator[None]:
+    """Cancel the token on SIGINT/SIGTERM while the block runs.
+
+    The first signal cancels cooperatively; the default handlers are
+    restored at that point so a second Ctrl-C interrupts immediately.
+    Signal handlers can only be installed from the main thread; elsewhere
+    this is a no-op.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+
+    def _handler(_signum: int, _frame: FrameType | None) -> None:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        token.cancel()
+
+    for sig in previous:
+        signal.signal(sig, _handler)
+    try:
+        yield
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
@@ -0,0 +1,243 @@
+"""Blur cascades: blurs of one source derived from each other.
+
+Gaussian blurs compose: blurring with sigma a and then with sigma b equals
+one blur with sigma sqrt(a² + b²). When several items of a batch start by
+blurring the same input, the smallest blur is computed from the input and
+each larger one from the previous result, blurring only by the missing
+sqrt(b² - a²). Items asking for the same sigma share one result. The cost
+of a blur grows with its sigma, so the cascade costs about as much as its
+largest blur instead of the sum of all of them.
+
+Large blurs can also be approximated at reduced size: downscale by a
+factor f, blur with sigma / f, and scale back up. The blur tolerance is the
+share of sigma one reduced pixel may cover (f = sigma * tolerance, used
+when at least 2); 0 keeps every blur exact.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from wallpaper_core.engine.chain import INTERMEDIATE_FORMAT, ChainExecutor
+from wallpaper_core.engine.executor import (
+    ExecutionResult,
+    simple_ops,
+    substitute_command,
+)
+from wallpaper_core.engine.params import params_with_defaults
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+    from wallpaper_core.engine.probe import ImageInfo
+
+# RADIUSxSIGMA; radius 0 lets ImageMagick size the kernel from sigma
+_GEOMETRY = re.compile(r"^0*x(?P<sigma>\d+(?:\.\d+)?)$")
+
+# Sigmas closer than this are the same blur
+_SIGMA_EPSILON = 1e-6
+
+# Re-encodes a cascade stage as an item's output
+ENCODE_COMMAND = 'magick "$INPUT" "$OUTPUT"'
+
+
+def gaussian_sigma(config: EffectsConfig, step: ChainStep) -> float | None:
+    """Get the sigma of a step that is a cascadable Gaussian blur.
+
+    Returns:
+        The step's sigma, or None if the effect does not declare a
+        `gaussian` trait, sets its own encoding, or the geometry has an
+        explicit radius (a truncated kernel does not compose exactly)
+    """
+    effect = config.effects.get(step.effect)
+    if effect is None or effect.traits is None or effect.traits.gaussian is None:
+        return None
+    if effect.encoding is not None:
+        return None
+    param = effect.traits.gaussian
+    definition = effect.parameters.get(param)
+    value = step.params.get(param, definition.default if definition else None)
+    match = _GEOMETRY.match(str(value)) if value is not None else None
+    return float(match.group("sigma")) if match else None
+
+
+def blur_groups[K: Hashable](
+    config: EffectsConfig, chains: dict[K, list[ChainStep]]
+) -> dict[str, dict[K, float]]:
+    """Group items whose chains start with a Gaussian blur of the input.
+
+    Args:
+        config: Effects configuration
+        chains: Optimized chain of each item
+
+    Returns:
+        Sigma of each item, per blur effect, for effects that at least two
+        items start with
+    """
+    groups: dict[str, dict[K, float]] = {}
+    for key, chain in chains.items():
+        sigma = gaussian_sigma(config, chain[0]) if chain else None
+        if sigma is not None and sigma > 0:
+            groups.setdefault(chain[0].effect, {})[key] = sigma
+    return {effect: items for effect, items in groups.items() if len(items) >= 2}
+
+
+def downscale_factor(sigma: float, tolerance: float) -> int:
+    """Factor a blur of sigma may be computed at (1 = full size)."""
+    factor = int(sigma * tolerance)
+    return factor if factor >= 2 else 1
+
+
+@dataclass
+class BlurStage:
+    """One blurred version of the source, rendered from the previous one."""
+
+    sigma: float
+    increment: float
+    path: Path
+    result: ExecutionResult | None = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class CascadeSource:
+    """How a batch item uses a blur cascade."""
+
+    cascade: BlurCascade
+    sigma: float
+    rest: list[ChainStep]
+
+
+class BlurCascade:
+    """Blurred versions of one input, each rendered on first use."""
+
+    def __init__(
+        self,
+        chain_executor: ChainExecutor,
+        effect: str,
+        sigmas: list[float],
+        input_path: Path,
+        work_dir: Path,
+        info: ImageInfo | None = None,
+        tolerance: float = 0.0,
+    ) -> None:
+        """Initialize BlurCascade.
+
+        Args:
+            chain_executor: Executor whose config, limits and command
+                executor the stages use
+            effect: Blur effect (declares the `gaussian` trait)
+            sigmas: Sigmas to provide
+            input_path: Source image
+            work_dir: Directory for the blurred intermediates
+            info: Source dimensions (required for downscaled blurs)
+            tolerance: Blur tolerance (see module docstring)
+        """
+        self.chain_executor = chain_executor
+        self.effect = effect
+        self.input_path = input_path
+        self.info = info
+        self.tolerance = tolerance
+        self.stages: list[BlurStage] = []
+        previous = 0.0
+        for sigma in sorted(set(sigmas)):
+            if sigma - previous < _SIGMA_EPSILON:
+                continue
+            self.stages.append(
+                BlurStage(
+                    sigma=sigma,
+                    increment=math.sqrt(sigma**2 - previous**2),
+                    path=work_dir / f"blur_{len(self.stages)}.{INTERMEDIATE_FORMAT}",
+                )
+            )
+            previous = sigma
+
+    @property
+    def cost(self) -> float:
+        """Sum of the sigmas the cascade blurs by (a blur costs ~ sigma)."""
+        return sum(stage.increment for stage in self.stages)
+
+    def stage(self, sigma: float) -> BlurStage:
+        """The stage providing a sigma.
+
+        Raises:
+            KeyError: If the cascade was not built for the sigma
+        """
+        for stage in self.stages:
+            if abs(stage.sigma - sigma) < _SIGMA_EPSILON:
+                return stage
+        raise KeyError(sigma)
+
+    def render(self, sigma: float) -> ExecutionResult:
+        """Make sure the stage for a sigma (and those before it) exist.
+
+        Safe to call from several threads: each stage is rendered once, and
+        callers needing a stage that is being rendered wait for it.
+
+        Returns:
+            The failure of the first stage that failed, else a success
+            whose duration covers the stages this call rendered
+        """
+        target = self.stage(sigma)
+        duration = 0.0
+        source = self.input_path
+        for stage in self.stages:
+            with stage.lock:
+                if stage.result is None:
+                    stage.result = self._render_stage(stage, source)
+                    duration += stage.result.duration
+            if not stage.result.success:
+                return stage.result
+            if stage is target:
+                break
+            source = stage.path
+        return ExecutionResult(
+            success=True,
+            command=f"blur cascade: sigma {sigma:g}",
+            stdout="",
+            stderr="",
+            return_code=0,
+            duration=duration,
+        )
+
+    def command(self, stage: BlurStage) -> tuple[str, dict[str, Any]]:
+        """Command template and parameters that render a stage."""
+        executor = self.chain_executor
+        effect = executor.config.effects[self.effect]
+        param = effect.traits.gaussian if effect.traits else None
+        assert param is not None  # nosec: checked by gaussian_sigma
+        params = params_with_defaults(executor.config, self.effect, {})
+
+        factor = downscale_factor(stage.increment, self.tolerance)
+        if factor > 1 and self.info is not None:
+            params[param] = f"0x{stage.increment / factor:.6g}"
+            ops = simple_ops(
+                substitute_command(
+                    effect.command, "$INPUT", "$OUTPUT", params, "magick"
+                )
+            )
+            if ops is not None:
+                width, height = self.info.width, self.info.height
+                small = f"{math.ceil(width / factor)}x{math.ceil(height / factor)}!"
+                return (
+                    f'magick "$INPUT" -resize {small} {ops} '
+                    f'-resize {width}x{height}! "$OUTPUT"',
+                    {},
+                )
+        params[param] = f"0x{stage.increment:.6g}"
+        return effect.command, params
+
+    def _render_stage(self, stage: BlurStage, source: Path) -> ExecutionResult:
+        command, params = self.command(stage)
+        return self.chain_executor.executor.execute(
+            command,
+            source,
+            stage.path,
+            params,
+            self.chain_executor.effect_limits(self.effect),
+        )
@@ -3,33 +3,152 @@
 from __future__ import annotations
 
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from wallpaper_core.engine.executor import CommandExecutor, ExecutionResult
+from wallpaper_core.engine.backend import (
+    IN_PROCESS_BACKENDS,
+    BackendCapabilities,
+    BackendError,
+    BackendName,
+    ImageBackend,
+    chain_success,
+    load_backend,
+)
+from wallpaper_core.engine.clut import ClutCache, ClutStep, clut_ops, fusible_runs
+from wallpaper_core.engine.encoding import (
+    INTERMEDIATE_FORMAT,
+    apply_encoding,
+    merge_effect_encodings,
+)
+from wallpaper_core.engine.executor import (
+    BytesResult,
+    CommandExecutor,
+    ExecutionResult,
+    pipeline_failure,
+    substitute_command,
+)
+from wallpaper_core.engine.limits import effect_limits
+from wallpaper_core.engine.optimize import ChainOptimizer, OptimizeMode
+from wallpaper_core.engine.params import ParameterValidator, params_with_defaults
+from wallpaper_core.engine.plugins import python_effects
+from wallpaper_core.engine.tempdir import resolve_temp_dir
 
 if TYPE_CHECKING:
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
     from wallpaper_core.console.output import RichOutput
     from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+    from wallpaper_core.engine.cancel import CancelToken
+
+
+@dataclass
+class StepCommand:
+    """One resolved chain step: an effect command wired to its files."""
+
+    effect: str
+    command: str
+    input_path: Path
+    output_path: Path
+    params: dict[str, Any]
+    limits: LimitSettings
+    clut: ClutStep | None = None
+
+
+def can_pipe(producer: str, consumer: str) -> bool:
+    """Check if a step's output can be piped straight into the next step.
+
+    The producer must write $OUTPUT once (to stdout) and the consumer read
+    $INPUT once, since a pipe can be neither rewound nor read twice.
+    """
+    return producer.count("$OUTPUT") == 1 and consumer.count("$INPUT") == 1
+
+
+def pipeline_segments(steps: list[StepCommand]) -> list[list[StepCommand]]:
+    """Group consecutive steps that can be connected by pipes.
+
+    Example:
+        blur -> brightness -> (reads $INPUT twice) mask -> negate
+        gives [[blur, brightness], [mask, negate]]
+    """
+    segments = [[steps[0]]]
+    for previous, step in zip(steps, steps[1:], strict=False):
+        if can_pipe(previous.command, step.command):
+            segments[-1].append(step)
+        else:
+            segments.append([step])
+    return segments
+
+
+def chain_step_failure(
+    index: int, step: StepCommand, result: ExecutionResult, duration: float
+) -> ExecutionResult:
+    """Wrap the result of the chain step that failed."""
+    return ExecutionResult(
+        success=False,
+        command=result.command,
+        stdout=result.stdout,
+        stderr=f"Chain failed at step {index + 1} ({step.effect}): {result.stderr}",
+        return_code=result.return_code,
+        duration=duration,
+        cancelled=result.cancelled,
+        timed_out=result.timed_out,
+    )
 
 
 class ChainExecutor:
-    """Execute chains of effects using temp files."""
+    """Execute chains of effects using temp files or pipes."""
 
     def __init__(
         self,
         config: EffectsConfig,
         output: RichOutput | None = None,
+        encoding: EncodingSettings | None = None,
+        cancel_token: CancelToken | None = None,
+        limits: LimitSettings | None = None,
+        temp_dir: Path | None = None,
+        pipeline: bool = False,
+        optimize: OptimizeMode = "safe",
+        fuse_pointwise: bool = False,
+        clut_dir: Path | None = None,
+        backend: BackendName = "magick",
     ) -> None:
         """Initialize ChainExecutor.
 
         Args:
             config: Effects configuration
             output: RichOutput instance for logging
+            encoding: Global encoding profile for final outputs
+            cancel_token: Shared token used to abort running steps
+            limits: Global limits (layered with per-effect ones for each step)
+            temp_dir: Directory for intermediates (None = /dev/shm or system)
+            pipeline: Connect steps with OS pipes so they run concurrently
+            optimize: Chain optimizer mode (see ChainOptimizer)
+            fuse_pointwise: Apply runs of pointwise effects as one color
+                lookup table (see engine.clut)
+            clut_dir: CLUT cache directory (None = user cache directory)
+            backend: In-process backend for the chains it supports ("numpy"
+                or "wand"; see engine.backend); "magick" runs every step as
+                a process
         """
         self.config = config
         self.output = output
-        self.executor = CommandExecutor(output)
+        self.encoding = encoding
+        self.limits = limits
+        self.temp_dir = temp_dir
+        self.pipeline = pipeline
+        self.validator = ParameterValidator(config)
+        self.optimizer = ChainOptimizer(config, optimize, self.validator)
+        self.executor = CommandExecutor(
+            output, cancel_token=cancel_token, limits=limits
+        )
+        self.cluts = ClutCache(self.executor, clut_dir) if fuse_pointwise else None
+        self.magick = MagickBackend(self)
+        self.backend = (
+            load_backend(backend, self, output) if backend != "magick" else None
+        )
+        self._python_backend: ImageBackend[Any] | None = None
+        self._python_backend_loaded = False
 
     def execute_chain(
         self,
@@ -37,13 +156,24 @@ class ChainExecutor:
         input_path: Path,
         output_path: Path,
     ) -> ExecutionResult:
-        """Execute a chain of effects using temp files.
+        """Execute a chain of effects using temp files or pipes.
+
+        Chains the configured in-process backend supports run there (see
+        backend_for); all others run with magick.
 
-        Process flow:
+        Process flow (file mode):
         - step1: input -> temp1
-        - step2: temp1 -> temp2
+        - step2: temp1 -> temp2 (temp1 deleted)
         - ...
-        - stepN: tempN-1 -> output
+        - stepN: tempN-1 -> output (tempN-1 deleted)
+
+        In pipeline mode consecutive steps are connected by OS pipes
+        carrying MIFF instead, so decode, the middle steps and the final
+        encode overlap on different cores. Steps whose command cannot read
+        stdin or write stdout (see can_pipe) fall back to temp files.
+
+        Intermediates go to the configured temp dir, else /dev/shm when it
+        has room, else the system temp dir.
 
         Args:
             chain: List of chain steps
@@ -53,106 +183,400 @@ class ChainExecutor:
         Returns:
             ExecutionResult for the chain
         """
-        if not chain:
-            return ExecutionResult(
-                success=False,
-                command="",
-                stdout="",
-                stderr="Empty chain",
-                return_code=1,
-            )
+        error = self.check_chain(chain)
+        if error is not None:
+            return error
 
-        # Get output format from output path
-        output_suffix = output_path.suffix or ".png"
+        return self.backend_for(chain).run_file(chain, input_path, output_path)
 
+    def execute_files(
+        self,
+        chain: list[ChainStep],
+        input_path: Path,
+        output_path: Path,
+    ) -> ExecutionResult:
+        """Execute a checked chain as magick processes (see execute_chain)."""
         # Create temp directory for intermediate files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            current_input = input_path
+        with tempfile.TemporaryDirectory(
+            dir=resolve_temp_dir(self.temp_dir, input_path)
+        ) as temp_dir:
+            steps = self.plan_chain(chain, input_path, output_path, Path(temp_dir))
+            if self.pipeline:
+                segments = pipeline_segments(steps)
+            else:
+                segments = [[step] for step in steps]
             total_duration = 0.0
+            index = 0
 
-            for i, step in enumerate(chain):
-                is_last = i == len(chain) - 1
+            for segment in segments:
+                if self.output:
+                    names = " | ".join(step.effect for step in segment)
+                    self.output.debug(f"Chain step {index + 1}/{len(steps)}: {names}")
 
-                # Determine output for this step
-                if is_last:
-                    step_output = output_path
+                if len(segment) == 1:
+                    step = segment[0]
+                    results = [
+                        self.executor.execute(
+                            step.command,
+                            step.input_path,
+                            step.output_path,
+                            step.params,
+                            step.limits,
+                        )
+                    ]
                 else:
-                    step_output = temp_path / f"step_{i}{output_suffix}"
-
-                # Get effect definition
-                effect = self.config.effects.get(step.effect)
-                if effect is None:
-                    return ExecutionResult(
-                        success=False,
-                        command="",
-                        stdout="",
-                        stderr=f"Unknown effect in chain: {step.effect}",
-                        return_code=1,
+                    results = self._execute_segment(segment)
+
+                total_duration += max(result.duration for result in results)
+
+                # The previous intermediate has been consumed
+                if segment[0].input_path != input_path:
+                    segment[0].input_path.unlink(missing_ok=True)
+
+                failed = pipeline_failure(results)
+                if failed is not None:
+                    return chain_step_failure(
+                        index + failed,
+                        segment[failed],
+                        results[failed],
+                        total_duration,
                     )
+                index += len(segment)
 
-                # Merge default params with step params
-                params = self._get_params_with_defaults(step.effect, step.params)
+        return chain_success(chain, total_duration)
+
+    def backend_for(self, chain: list[ChainStep]) -> ImageBackend[Any]:
+        """Pick the backend that runs a chain.
 
-                # Execute step
+        Returns:
+            The NumPy backend for chains with Python effects (see
+            engine.plugins); else the in-process backend if one is
+            configured and supports every step of the optimized chain; else
+            magick
+        """
+        steps = self.optimizer.optimize(chain).steps
+        if python_effects(self.config, steps):
+            python = self.python_backend()
+            if python is not None:
                 if self.output:
-                    self.output.debug(f"Chain step {i + 1}/{len(chain)}: {step.effect}")
+                    names = " -> ".join(step.effect for step in steps)
+                    self.output.debug(f"Running {names} with numpy (Python effects)")
+                return python
+        if self.backend is None:
+            return self.magick
+        backend = self.backend if self.backend.supports(steps) else self.magick
+        if self.output:
+            names = " -> ".join(step.effect for step in steps)
+            fallback = f" (not supported by {self.backend.name})"
+            reason = fallback if backend is self.magick else ""
+            self.output.debug(f"Running {names} with {backend.name}{reason}")
+        return backend
 
-                result = self.executor.execute(
-                    effect.command,
-                    current_input,
-                    step_output,
-                    params,
-                )
+    def python_backend(self) -> ImageBackend[Any] | None:
+        """The NumPy backend Python effects run in (None without NumPy).
 
-                total_duration += result.duration
+        It is the configured backend if that is numpy, else one created on
+        first use.
+        """
+        if self.backend is not None and self.backend.name == "numpy":
+            return self.backend
+        if not self._python_backend_loaded:
+            self._python_backend_loaded = True
+            self._python_backend = load_backend("numpy", self)
+        return self._python_backend
 
-                if not result.success:
-                    error_msg = (
-                        f"Chain failed at step {i + 1} ({step.effect}): "
-                        f"{result.stderr}"
-                    )
-                    return ExecutionResult(
-                        success=False,
-                        command=result.command,
-                        stdout=result.stdout,
-                        stderr=error_msg,
-                        return_code=result.return_code,
-                        duration=total_duration,
-                    )
+    def _execute_segment(self, segment: list[StepCommand]) -> list[ExecutionResult]:
+        """Run planned steps as one pipeline from input file to output file."""
+        commands: list[tuple[str, LimitSettings | None]] = []
+        for i, step in enumerate(segment):
+            is_last = i == len(segment) - 1
+            command = substitute_command(
+                step.command,
+                step.input_path if i == 0 else "-",
+                step.output_path if is_last else f"{INTERMEDIATE_FORMAT}:-",
+                step.params,
+                self.executor.binary,
+            )
+            commands.append((command, step.limits))
+        return self.executor.execute_pipeline(commands, segment[-1].output_path)
 
-                # Next step uses this output as input
-                current_input = step_output
+    def check_chain(self, chain: list[ChainStep]) -> ExecutionResult | None:
+        """Return a failure result if the chain cannot run, else None.
 
+        Every step is checked (effects exist, parameters match their types,
+        NumPy is there for Python effects) before the first one runs, and
+        all problems are reported together.
+        """
+        errors = self.validator.check_chain(chain)
+        names = python_effects(self.config, chain)
+        if names and self.python_backend() is None:
+            requirement = IN_PROCESS_BACKENDS["numpy"][2]
+            errors.append(f"Python effect '{names[0]}' needs {requirement}")
+        if not errors:
+            return None
         return ExecutionResult(
-            success=True,
-            command=f"chain: {' -> '.join(s.effect for s in chain)}",
+            success=False,
+            command="",
             stdout="",
-            stderr="",
-            return_code=0,
-            duration=total_duration,
+            stderr="; ".join(errors),
+            return_code=1,
+        )
+
+    def plan_chain(
+        self,
+        chain: list[ChainStep],
+        input_path: Path,
+        output_path: Path,
+        temp_path: Path,
+        generate_cluts: bool = True,
+    ) -> list[StepCommand]:
+        """Resolve every step of a checked chain into a command to run.
+
+        Args:
+            chain: Chain steps (see check_chain)
+            input_path: Path to input image
+            output_path: Path to final output
+            temp_path: Directory for intermediate files
+            generate_cluts: Render missing color lookup tables now (else
+                steps may reference CLUTs that do not exist yet)
+
+        Returns:
+            One StepCommand per step of the optimized chain (runs of
+            pointwise steps fused into one), wired input to output
+        """
+        # Get output format from output path
+        output_suffix = output_path.suffix or ".png"
+
+        # Encoder options only apply to the final output. They follow the
+        # chain as written, even if the optimizer drops some of its steps.
+        profile = merge_effect_encodings(
+            self.config, self.encoding, [s.effect for s in chain]
         )
 
+        fused = self.fuse_chain(self.optimizer.optimize(chain).steps, generate_cluts)
+
+        steps: list[StepCommand] = []
+        current_input = input_path
+        for i, step in enumerate(fused):
+            is_last = i == len(fused) - 1
+            if is_last:
+                step_output = output_path
+            else:
+                step_output = temp_path / f"step_{i}{output_suffix}"
+
+            if isinstance(step, ClutStep):
+                command = step.command
+                params: dict[str, Any] = {}
+                limits = self.effect_limits(step.steps[0].effect)
+            else:
+                command = self.config.effects[step.effect].command
+                params = self._get_params_with_defaults(step.effect, step.params)
+                limits = self.effect_limits(step.effect)
+            if is_last:
+                command = apply_encoding(command, profile, output_path)
+
+            steps.append(
+                StepCommand(
+                    effect=step.effect,
+                    command=command,
+                    input_path=current_input,
+                    output_path=step_output,
+                    params=params,
+                    limits=limits,
+                    clut=step if isinstance(step, ClutStep) else None,
+                )
+            )
+            current_input = step_output
+        return steps
+
+    def fuse_chain(
+        self, chain: list[ChainStep], generate: bool = True
+    ) -> list[ChainStep | ClutStep]:
+        """Replace runs of pointwise steps with one CLUT lookup each.
+
+        A run whose CLUT cannot be generated keeps its steps.
+
+        Args:
+            chain: Optimized chain steps
+            generate: Render missing CLUTs (False = the caller does)
+
+        Returns:
+            The chain with every fusible run replaced by a ClutStep
+        """
+        if self.cluts is None:
+            return list(chain)
+        fused: list[ChainStep | ClutStep] = []
+        done = 0
+        for run in fusible_runs(self.config, chain):
+            fused.extend(chain[done : run.start])
+            steps = chain[run.start : run.stop]
+            ops = clut_ops(self.config, steps)
+            result = self.cluts.ensure(ops) if generate else None
+            if result is None or result.success:
+                fused.append(ClutStep(tuple(steps), ops, self.cluts.path(ops)))
+            else:
+                if self.output:
+                    self.output.warning(
+                        f"Running {len(steps)} steps separately, CLUT "
+                        f"generation failed: {result.stderr.strip()}"
+                    )
+                fused.extend(steps)
+            done = run.stop
+        fused.extend(chain[done:])
+        return fused
+
+    def encoded_command(self, effect_name: str, output_path: Path) -> str | None:
+        """Get an effect's command with its encoding profile applied.
+
+        Args:
+            effect_name: Effect to resolve
+            output_path: Final output path (selects the encoder)
+
+        Returns:
+            Command template, or None if the effect is unknown
+        """
+        effect = self.config.effects.get(effect_name)
+        if effect is None:
+            return None
+        profile = merge_effect_encodings(self.config, self.encoding, [effect_name])
+        return apply_encoding(effect.command, profile, output_path)
+
+    def effect_limits(self, effect_name: str) -> LimitSettings:
+        """Get the execution limits for one effect's command."""
+        return effect_limits(self.config, self.limits, effect_name)
+
     def _get_params_with_defaults(
         self,
         effect_name: str,
         override_params: dict[str, Any],
     ) -> dict[str, Any]:
         """Get parameters with defaults filled in."""
-        effect = self.config.effects.get(effect_name)
-        if effect is None:
-            return override_params
-
-        params = {}
-        for param_name, param_def in effect.parameters.items():
-            if param_name in override_params:
-                params[param_name] = override_params[param_name]
-            elif param_def.default is not None:
-                params[param_name] = param_def.default
+        return params_with_defaults(self.config, effect_name, override_params)
+
+
+class MagickBackend(ImageBackend[bytes]):
+    """One ImageMagick process per step (the default backend).
+
+    Images are encoded blobs: every step pipes its input to magick and
+    reads an INTERMEDIATE_FORMAT result back. run and run_file keep the
+    executors' own plans instead of the generic load/apply/save: chains
+    fuse pointwise runs into CLUTs, the last step encodes the output
+    itself, and files pass through temp files or pipes (execute_files).
+    """
+
+    name = "magick"
+    label = "magick"
+    capabilities = BackendCapabilities(
+        in_process=False, shares_inputs=False, any_command=True
+    )
+
+    def supports(self, steps: list[ChainStep]) -> bool:  # noqa: ARG002
+        """Check if the backend can run every step (always)."""
+        return True
+
+    def load(self, data: bytes) -> bytes:
+        """Keep the encoded image (every step decodes its input)."""
+        return data
+
+    def apply_effect(self, image: bytes, step: ChainStep) -> bytes:
+        """Run one step's command on a blob."""
+        executor = self.chain_executor
+        result = self.executor.execute_bytes(
+            self.config.effects[step.effect].command,
+            image,
+            INTERMEDIATE_FORMAT,
+            executor._get_params_with_defaults(step.effect, step.params),
+            executor.effect_limits(step.effect),
+        )
+        if not result.success:
+            raise BackendError(result.stderr, result)
+        return result.data
+
+    def save(self, image: bytes, output_format: str, encode_command: str) -> bytes:
+        """Encode a blob with the encode command."""
+        result = self.executor.execute_bytes(
+            encode_command, image, output_format, None, self.chain_executor.limits
+        )
+        if not result.success:
+            raise BackendError(result.stderr, result)
+        return result.data
+
+    def run(
+        self, chain: list[ChainStep], data: bytes, output_format: str
+    ) -> BytesResult:
+        """Apply a chain to an encoded image, one process per step.
+
+        Intermediates stay in memory as MIFF blobs; the last step writes
+        output_format with the encoding profile applied.
+        """
+        executor = self.chain_executor
+        profile = merge_effect_encodings(
+            self.config, executor.encoding, [s.effect for s in chain]
+        )
+        total_duration = 0.0
+        steps = executor.fuse_chain(executor.optimizer.optimize(chain).steps)
+        blob = data
+
+        for i, planned in enumerate(steps):
+            is_last = i == len(steps) - 1
+            if isinstance(planned, ClutStep):
+                command = planned.command
+                params: dict[str, Any] = {}
+                limits = executor.effect_limits(planned.steps[0].effect)
             else:
-                # Try to get default from parameter_types
-                param_type = self.config.parameter_types.get(param_def.type)
-                if param_type and param_type.default is not None:
-                    params[param_name] = param_type.default
+                command = self.config.effects[planned.effect].command
+                params = executor._get_params_with_defaults(
+                    planned.effect, planned.params
+                )
+                limits = executor.effect_limits(planned.effect)
+            if is_last:
+                # Encoder options are keyed on the output suffix
+                command = apply_encoding(
+                    command, profile, Path(f"stdout.{output_format}")
+                )
 
-        return params
+            if executor.output:
+                executor.output.debug(
+                    f"Chain step {i + 1}/{len(steps)}: {planned.effect}"
+                )
+
+            result = self.executor.execute_bytes(
+                command,
+                blob,
+                output_format if is_last else INTERMEDIATE_FORMAT,
+                params,
+                limits,
+            )
+            total_duration += result.duration
+
+            if not result.success:
+                return BytesResult(
+                    success=False,
+                    command=result.command,
+                    stdout=result.stdout,
+                    stderr=(
+                        f"Chain failed at step {i + 1} ({planned.effect}): "
+                        f"{result.stderr}"
+                    ),
+                    return_code=result.return_code,
+                    duration=total_duration,
+                    cancelled=result.cancelled,
+                    timed_out=result.timed_out,
+                )
+            blob = result.data
+
+        return BytesResult(
+            success=True,
+            command=f"chain: {' -> '.join(s.effect for s in steps)}",
+            stdout="",
+            stderr="",
+            return_code=0,
+            duration=total_duration,
+            data=blob,
+        )
+
+    def run_file(
+        self, chain: list[ChainStep], input_path: Path, output_path: Path
+    ) -> ExecutionResult:
+        """Apply a chain to an image file with temp files or pipes."""
+        return self.chain_executor.execute_files(chain, input_path, output_path)
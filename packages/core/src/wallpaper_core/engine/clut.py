@@ -0,0 +1,248 @@
+"""Color lookup tables: runs of pointwise color effects fused into one pass.
+
+Effects whose traits declare them `pointwise` (or a `reduction` such as
+grayscale) change each pixel's color independently of its neighbours, so
+any run of them is a single function from color to color. Applying that
+run to an identity HALD image gives a 3D color lookup table (CLUT); the
+whole run then becomes one `-hald-clut` over the real image.
+
+CLUTs are cached by a hash of the operators that produced them, so each
+distinct run is generated once. Level 8 (64 samples per channel, stored at
+16 bits) with trilinear interpolation keeps smooth adjustments within about
+one 8-bit level of running the steps one by one; hard thresholds fall
+between samples and can differ more.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from layered_settings.constants import APP_NAME
+from wallpaper_core.engine.executor import (
+    CommandExecutor,
+    ExecutionResult,
+    simple_ops,
+    substitute_command,
+)
+from wallpaper_core.engine.params import params_with_defaults
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+
+# HALD level: level**2 samples per channel in a level**3 x level**3 image
+HALD_LEVEL = 8
+
+# Effect kinds that are pure per-pixel color transforms
+FUSIBLE_KINDS = ("pointwise", "reduction")
+
+# Bump when the generated CLUT images change, so stale caches are not used
+_CLUT_VERSION = 1
+
+# Largest sample value of a 16-bit CLUT
+_MAX_SAMPLE = 65535
+
+
+def default_clut_dir() -> Path:
+    """Default CLUT cache directory ($XDG_CACHE_HOME or ~/.cache)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / APP_NAME / "cluts"
+
+
+def step_ops(config: EffectsConfig, step: ChainStep) -> str | None:
+    """Get the magick operators of a step that can be folded into a CLUT.
+
+    Returns:
+        The step's operators with parameters substituted, or None if the
+        effect is not declared pointwise or its command is not a single
+        magick call
+    """
+    effect = config.effects.get(step.effect)
+    if effect is None or effect.traits is None:
+        return None
+    if effect.traits.kind not in FUSIBLE_KINDS:
+        return None
+    params = params_with_defaults(config, step.effect, step.params)
+    return simple_ops(
+        substitute_command(effect.command, "$INPUT", "$OUTPUT", params, "magick")
+    )
+
+
+def fusible_runs(config: EffectsConfig, chain: list[ChainStep]) -> list[range]:
+    """Find runs of two or more consecutive steps that can share one CLUT.
+
+    Example:
+        blur -> blackwhite -> brightness -> vignette -> negate
+        gives [range(1, 3)]
+    """
+    runs: list[range] = []
+    start = None
+    for i, step in enumerate([*chain, None]):
+        fusible = step is not None and step_ops(config, step) is not None
+        if fusible and start is None:
+            start = i
+        elif not fusible and start is not None:
+            if i - start >= 2:
+                runs.append(range(start, i))
+            start = None
+    return runs
+
+
+def clut_ops(config: EffectsConfig, steps: Sequence[ChainStep]) -> str:
+    """Operators of every step of a run, in order.
+
+    Raises:
+        ValueError: If a step cannot be folded into a CLUT
+    """
+    ops: list[str] = []
+    for i, step in enumerate(steps, 1):
+        op = step_ops(config, step)
+        if op is None:
+            raise ValueError(
+                f"step {i} ({step.effect}) is not a pointwise color effect "
+                "(needs traits kind pointwise or reduction and a single "
+                "magick command)"
+            )
+        ops.append(op)
+    return " ".join(ops)
+
+
+def clut_command(ops: str) -> str:
+    """Command template rendering operators onto an identity HALD image.
+
+    Its $INPUT is identity_hald(); the CLUT is written as 16-bit RGB.
+    """
+    return f'magick "$INPUT" {ops} -type TrueColor -depth 16 "$OUTPUT"'
+
+
+def identity_hald(level: int = HALD_LEVEL) -> str:
+    """ImageMagick name of the identity HALD image (the $INPUT of a CLUT)."""
+    return f"hald:{level}"
+
+
+def cube_text(samples: Sequence[int], level: int, title: str) -> str:
+    """Render 16-bit HALD CLUT samples as an Adobe/Resolve .cube file.
+
+    HALD images and .cube files both list entries with red varying
+    fastest, then green, then blue, so samples map across in order.
+
+    Args:
+        samples: R, G, B values (0-65535) of every pixel in raster order
+        level: HALD level of the CLUT
+        title: Title stored in the file
+
+    Raises:
+        ValueError: If the number of samples does not match the level
+    """
+    size = level * level
+    if len(samples) != size**3 * 3:
+        raise ValueError(
+            f"expected {size**3 * 3} samples for HALD level {level}, "
+            f"got {len(samples)}"
+        )
+    lines = [
+        f'TITLE "{title}"',
+        f"LUT_3D_SIZE {size}",
+        "DOMAIN_MIN 0.0 0.0 0.0",
+        "DOMAIN_MAX 1.0 1.0 1.0",
+    ]
+    for i in range(0, len(samples), 3):
+        r, g, b = samples[i : i + 3]
+        lines.append(
+            f"{r / _MAX_SAMPLE:.6f} {g / _MAX_SAMPLE:.6f} {b / _MAX_SAMPLE:.6f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+@dataclass(frozen=True)
+class ClutStep:
+    """A run of pointwise chain steps replaced by one CLUT lookup."""
+
+    steps: tuple[ChainStep, ...]
+    ops: str
+    path: Path
+
+    @property
+    def effect(self) -> str:
+        """Label naming the fused effects, e.g. "clut[blackwhite+brightness]"."""
+        return f"clut[{'+'.join(step.effect for step in self.steps)}]"
+
+    @property
+    def command(self) -> str:
+        """Command template applying the CLUT to $INPUT."""
+        return f'magick "$INPUT" "{self.path}" -hald-clut "$OUTPUT"'
+
+
+class ClutCache:
+    """HALD CLUT images generated on first use and cached on disk."""
+
+    def __init__(
+        self,
+        executor: CommandExecutor,
+        directory: Path | None = None,
+        level: int = HALD_LEVEL,
+    ) -> None:
+        """Initialize ClutCache.
+
+        Args:
+            executor: Executor that renders missing CLUTs
+            directory: Cache directory (None = default_clut_dir())
+            level: HALD level of generated CLUTs
+        """
+        self.executor = executor
+        self.directory = directory or default_clut_dir()
+        self.level = level
+
+    def path(self, ops: str) -> Path:
+        """Cache file of the CLUT for a run's operators."""
+        key = f"v{_CLUT_VERSION} hald:{self.level} {ops}"
+        digest = hashlib.sha256(key.encode()).hexdigest()[:24]
+        return self.directory / f"{digest}.png"
+
+    def ensure(self, ops: str) -> ExecutionResult:
+        """Generate the CLUT for a run's operators unless it is cached.
+
+        The image is rendered to a private name and renamed into place, so
+        concurrent workers never read a half-written CLUT.
+
+        Returns:
+            Result of rendering the CLUT (successful and empty if cached)
+        """
+        path = self.path(ops)
+        if path.exists():
+            return ExecutionResult(
+                success=True, command="", stdout="", stderr="", return_code=0
+            )
+        partial = path.with_name(
+            f"{path.stem}.{os.getpid()}-{threading.get_ident()}.tmp{path.suffix}"
+        )
+        result = self.executor.execute(
+            clut_command(ops), Path(identity_hald(self.level)), partial
+        )
+        if result.success:
+            partial.replace(path)
+        else:
+            partial.unlink(missing_ok=True)
+        return result
+
+    def read_samples(self, ops: str) -> list[int]:
+        """Read a cached CLUT's 16-bit R, G, B samples in raster order.
+
+        Raises:
+            ValueError: If ImageMagick cannot decode the CLUT
+        """
+        path = self.path(ops)
+        result = self.executor.execute_bytes(
+            'magick "$INPUT" -depth 16 -endian MSB "$OUTPUT"',
+            path.read_bytes(),
+            "rgb",
+        )
+        if not result.success:
+            raise ValueError(f"Cannot read CLUT {path}: {result.stderr.strip()}")
+        data = result.data
+        return [int.from_bytes(data[i : i + 2], "big") for i in range(0, len(data), 2)]
@@ -0,0 +1,150 @@
+"""Output encoding profiles for effect commands."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wallpaper_core.config.schema import EncodingSettings, ItemType
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import EffectsConfig
+
+# Lossless, cheap-to-decode format for images passed between chain steps
+# (and size variants' source and master); never encoded with a profile
+INTERMEDIATE_FORMAT = "miff"
+
+
+def output_suffix(input_path: Path, profile: EncodingSettings | None) -> str:
+    """Get the output file suffix for an item.
+
+    Args:
+        input_path: Input image (its suffix is used when no format is set)
+        profile: Encoding profile for the item
+
+    Returns:
+        Suffix including the leading dot (e.g., ".webp")
+    """
+    if profile is not None and profile.format:
+        return f".{profile.format}"
+    return input_path.suffix or ".png"
+
+
+def encoding_options(profile: EncodingSettings | None, output_path: Path) -> str:
+    """Build ImageMagick encoder options for a profile.
+
+    Format-specific defines are only emitted for the matching output format.
+    Intermediates (INTERMEDIATE_FORMAT) get no options: the profile applies
+    to the final outputs made from them.
+
+    Args:
+        profile: Encoding profile (None = encoder defaults)
+        output_path: Output file (its suffix selects the encoder)
+
+    Returns:
+        Space-separated magick options, empty if nothing is set
+    """
+    fmt = output_path.suffix.lower().lstrip(".")
+    if profile is None or fmt == INTERMEDIATE_FORMAT:
+        return ""
+
+    options: list[str] = []
+
+    if profile.single_channel is not None:
+        # The encoder checks the pixels: only gray images lose channels
+        auto = "on" if profile.single_channel else "off"
+        options.append(f"-define colorspace:auto-grayscale={auto}")
+    if profile.strip_metadata:
+        options.append("-strip")
+    if profile.quality is not None and fmt != "png":
+        options.append(f"-quality {profile.quality}")
+    if fmt == "png":
+        if profile.png_compression_level is not None:
+            level = profile.png_compression_level
+            options.append(f"-define png:compression-level={level}")
+        if profile.png_compression_filter is not None:
+            png_filter = profile.png_compression_filter
+            options.append(f"-define png:compression-filter={png_filter}")
+    if fmt == "webp" and profile.webp_method is not None:
+        options.append(f"-define webp:method={profile.webp_method}")
+
+    return " ".join(options)
+
+
+def apply_encoding(
+    command_template: str, profile: EncodingSettings | None, output_path: Path
+) -> str:
+    """Insert encoder options right before the $OUTPUT placeholder.
+
+    Args:
+        command_template: Effect command template
+        profile: Encoding profile
+        output_path: Final output path
+
+    Returns:
+        Command template with encoder options applied
+    """
+    options = encoding_options(profile, output_path)
+    if not options:
+        return command_template
+
+    for placeholder in ('"$OUTPUT"', "$OUTPUT"):
+        index = command_template.rfind(placeholder)
+        if index != -1:
+            return f"{command_template[:index]}{options} {command_template[index:]}"
+    return command_template
+
+
+def resolve_item_encoding(
+    config: EffectsConfig,
+    base: EncodingSettings | None,
+    name: str,
+    item_type: ItemType,
+) -> EncodingSettings:
+    """Resolve the encoding profile for an effect, composite or preset.
+
+    The global profile is layered with the `encoding` block of every effect
+    the item applies, in chain order, so later steps win. single_channel
+    only lets the encoder drop channels of gray results, so it can carry
+    through steps that add color again.
+
+    Args:
+        config: Effects configuration
+        base: Global encoding settings
+        name: Item name
+        item_type: Item type
+
+    Returns:
+        Merged encoding profile
+    """
+    effect_names: list[str] = []
+    if item_type == ItemType.EFFECT:
+        effect_names = [name]
+    elif item_type == ItemType.COMPOSITE:
+        composite = config.composites.get(name)
+        if composite is not None:
+            effect_names = [step.effect for step in composite.chain]
+    elif item_type == ItemType.PRESET:
+        preset = config.presets.get(name)
+        if preset is not None and preset.composite:
+            return resolve_item_encoding(
+                config, base, preset.composite, ItemType.COMPOSITE
+            )
+        if preset is not None and preset.effect:
+            effect_names = [preset.effect]
+
+    return merge_effect_encodings(config, base, effect_names)
+
+
+def merge_effect_encodings(
+    config: EffectsConfig,
+    base: EncodingSettings | None,
+    effect_names: list[str],
+) -> EncodingSettings:
+    """Layer the encoding blocks of the given effects over a base profile."""
+    profile = base.model_copy() if base is not None else EncodingSettings()
+    for effect_name in effect_names:
+        effect = config.effects.get(effect_name)
+        if effect is not None:
+            profile = profile.merged(effect.encoding)
+    return profile
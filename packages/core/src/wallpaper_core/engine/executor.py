@@ -2,15 +2,36 @@
 
 from __future__ import annotations
 
+import contextlib
+import re
 import shutil
+import signal
 import subprocess  # nosec: necessary for command execution
+import tempfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
+
+from wallpaper_core.engine.cancel import (
+    CancelToken,
+    kill_process_group,
+    remove_partial_output,
+)
+from wallpaper_core.engine.limits import CPU_LIMIT_EXIT_CODES, rlimit_command
 
 if TYPE_CHECKING:
+    from wallpaper_core.config.schema import LimitSettings
     from wallpaper_core.console.output import RichOutput
 
+# Exit statuses of a pipeline stage killed because its consumer exited first
+BROKEN_PIPE_EXIT_CODES = {-signal.SIGPIPE, 128 + signal.SIGPIPE}
+
+# A command that is one magick call from $INPUT to $OUTPUT
+_SIMPLE_COMMAND = re.compile(r'^magick "\$INPUT" (?P<ops>.+) "\$OUTPUT"$')
+
+# Shell syntax that makes a command more than one magick call
+_SHELL_SYNTAX = re.compile(r"[|;&<>`]|\$\(")
+
 
 @dataclass
 class ExecutionResult:
@@ -22,21 +43,153 @@ class ExecutionResult:
     stderr: str
     return_code: int
     duration: float = 0.0
+    cancelled: bool = False
+    timed_out: bool = False
+    skipped: bool = False
+
+
+def substitute_command(
+    command_template: str,
+    input_path: Path | str,
+    output_path: Path | str,
+    params: dict[str, str | int | float] | None,
+    binary: str,
+) -> str:
+    """Substitute variables in an effect command template.
+
+    Substitutes:
+    - $INPUT: Input file path
+    - $OUTPUT: Output file path
+    - $PARAM_NAME: Parameter values (uppercase)
+
+    A leading 'magick' is replaced with the detected binary (supports
+    ImageMagick 6.x 'convert').
+
+    Args:
+        command_template: Command template with variables
+        input_path: Path to input image (or "-" for stdin)
+        output_path: Path to output image (or "<format>:-" for stdout)
+        params: Parameter values
+        binary: ImageMagick binary
+
+    Returns:
+        Shell command ready to run
+    """
+    # Build substitution map
+    substitutions = {
+        "INPUT": str(input_path),
+        "OUTPUT": str(output_path),
+    }
+
+    # Add parameters (uppercase keys)
+    for key, value in (params or {}).items():
+        substitutions[key.upper()] = str(value)
+
+    # Substitute variables in command
+    command = command_template
+    for key, value in substitutions.items():
+        command = command.replace(f'"${key}"', f'"{value}"')
+        command = command.replace(f"${key}", value)
+
+    return command.replace("magick ", f"{binary} ", 1)
+
+
+def simple_ops(command: str) -> str | None:
+    """Get the operators of a single `magick "$INPUT" ... "$OUTPUT"` call.
+
+    Such commands can be folded into a larger magick command (applied to a
+    clone of the input, or to a color lookup table).
+
+    Args:
+        command: Command template, with any parameters already substituted
+
+    Returns:
+        The operators between input and output, or None if the command is
+        anything else (another tool, shell syntax, several calls)
+    """
+    match = _SIMPLE_COMMAND.match(command.strip())
+    if match is None or _SHELL_SYNTAX.search(match.group("ops")):
+        return None
+    return match.group("ops")
+
+
+def magick_tool(binary: str, tool: str) -> list[str]:
+    """Invocation of an ImageMagick tool (identify, montage, ...).
+
+    ImageMagick 7 runs tools as `magick <tool>`; version 6 ships each tool
+    as its own binary next to `convert`.
+
+    Args:
+        binary: ImageMagick binary (magick or convert)
+        tool: Tool name
+
+    Returns:
+        Command prefix for the tool
+    """
+    if Path(binary).name.startswith("magick"):
+        return [binary, tool]
+    return [str(Path(binary).with_name(tool))]
+
+
+@dataclass
+class BytesResult(ExecutionResult):
+    """Result of a command run on an in-memory image."""
+
+    data: bytes = b""
+
+
+def pipeline_failure(results: list[ExecutionResult]) -> int | None:
+    """Find the stage that made a pipeline fail.
+
+    When one stage fails its neighbours usually fail too (a broken pipe
+    upstream, truncated input downstream). Limits and cancellation are
+    reported first, then the first stage that failed on its own.
+
+    Args:
+        results: One result per pipeline stage
+
+    Returns:
+        Index of the failing stage, or None if every stage succeeded
+    """
+    failed = [i for i, result in enumerate(results) if not result.success]
+    if not failed:
+        return None
+    for i in failed:
+        if results[i].timed_out or results[i].cancelled:
+            return i
+    for i in failed:
+        if results[i].return_code not in BROKEN_PIPE_EXIT_CODES:
+            return i
+    return failed[0]
+
+
+def _remove_output(output_path: Path | None) -> None:
+    """Remove an interrupted command's output file, if it writes one."""
+    if output_path is not None:
+        remove_partial_output(output_path)
 
 
 class CommandExecutor:
     """Execute shell commands for effects."""
 
     def __init__(
-        self, output: RichOutput | None = None, binary: str | None = None
+        self,
+        output: RichOutput | None = None,
+        binary: str | None = None,
+        cancel_token: CancelToken | None = None,
+        limits: LimitSettings | None = None,
     ) -> None:
         """Initialize CommandExecutor.
 
         Args:
             output: RichOutput instance for logging
             binary: ImageMagick binary (auto-detect magick/convert if None)
+            cancel_token: Shared token used to abort running commands
+            limits: Default time-out and rlimits for every command
         """
         self.output = output
+        self.cancel_token = cancel_token or CancelToken()
+        self.limits = limits
         self.binary = (
             binary or shutil.which("magick") or shutil.which("convert") or "magick"
         )
@@ -51,6 +204,7 @@ class CommandExecutor:
         input_path: Path,
         output_path: Path,
         params: dict[str, str | int | float] | None = None,
+        limits: LimitSettings | None = None,
     ) -> ExecutionResult:
         """Execute a single magick command.
 
@@ -64,32 +218,37 @@ class CommandExecutor:
             input_path: Path to input image
             output_path: Path to output image
             params: Parameter values
+            limits: Limits for this command (defaults to the executor's)
 
         Returns:
             ExecutionResult with success status and details
         """
-        import time
-
-        params = params or {}
+        command = substitute_command(
+            command_template, input_path, output_path, params, self.binary
+        )
+        return self.run(command, output_path, limits)
 
-        # Build substitution map
-        substitutions = {
-            "INPUT": str(input_path),
-            "OUTPUT": str(output_path),
-        }
+    def run(
+        self,
+        command: str,
+        output_path: Path,
+        limits: LimitSettings | None = None,
+    ) -> ExecutionResult:
+        """Execute an already substituted command (e.g. from a plan).
 
-        # Add parameters (uppercase keys)
-        for key, value in params.items():
-            substitutions[key.upper()] = str(value)
+        Args:
+            command: Shell command
+            output_path: Output image (its directory is created, and it is
+                removed if the command is interrupted)
+            limits: Limits for this command (defaults to the executor's)
 
-        # Substitute variables in command
-        command = command_template
-        for key, value in substitutions.items():
-            command = command.replace(f'"${key}"', f'"{value}"')
-            command = command.replace(f"${key}", value)
+        Returns:
+            ExecutionResult with success status and details
+        """
+        limits = limits if limits is not None else self.limits
 
-        # Replace 'magick' with detected binary (supports IM 6.x 'convert')
-        command = command.replace("magick ", f"{self.binary} ", 1)
+        if self.cancel_token.cancelled:
+            return self._cancelled_result(command, 0.0)
 
         if self.output:
             self.output.command(command)
@@ -97,35 +256,273 @@ class CommandExecutor:
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Execute command
+        result, _ = self._run(command, limits, output_path)
+        return result
+
+    def execute_bytes(
+        self,
+        command_template: str,
+        data: bytes,
+        output_format: str,
+        params: dict[str, str | int | float] | None = None,
+        limits: LimitSettings | None = None,
+    ) -> BytesResult:
+        """Execute a single magick command on an in-memory image.
+
+        $INPUT becomes "-" (the image is piped to stdin) and $OUTPUT becomes
+        "<format>:-" (the encoded result is read from stdout), so nothing
+        touches the filesystem.
+
+        Args:
+            command_template: Command template with variables
+            data: Encoded input image
+            output_format: ImageMagick format to write (e.g. "png", "miff")
+            params: Parameter values
+            limits: Limits for this command (defaults to the executor's)
+
+        Returns:
+            BytesResult carrying the encoded output on success
+        """
+        limits = limits if limits is not None else self.limits
+        command = substitute_command(
+            command_template, "-", f"{output_format}:-", params, self.binary
+        )
+
+        if self.cancel_token.cancelled:
+            return BytesResult(**vars(self._cancelled_result(command, 0.0)))
+
+        if self.output:
+            self.output.command(command)
+
+        result, stdout = self._run(command, limits, None, input_data=data)
+        return BytesResult(**vars(result), data=stdout if result.success else b"")
+
+    def execute_pipeline(
+        self,
+        commands: list[tuple[str, LimitSettings | None]],
+        output_path: Path,
+    ) -> list[ExecutionResult]:
+        """Run substituted commands connected stdout-to-stdin by OS pipes.
+
+        All stages run concurrently, each in its own process group with its
+        own limits. Time-outs count from the start of the pipeline; when one
+        stage times out every stage is killed.
+
+        Args:
+            commands: (shell command, limits) per stage, in pipe order
+            output_path: File written by the last stage (removed on failure)
+
+        Returns:
+            One ExecutionResult per stage (see pipeline_failure)
+        """
+        import time
+
+        if self.cancel_token.cancelled:
+            return [self._cancelled_result(command, 0.0) for command, _ in commands]
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        stage_limits = [
+            limits if limits is not None else self.limits for _, limits in commands
+        ]
+        timeouts = [
+            limits.timeout if limits is not None else None for limits in stage_limits
+        ]
+        processes: list[subprocess.Popen[bytes]] = []
+        timed_out: int | None = None
+
+        start_time = time.time()
+        with contextlib.ExitStack() as stack:
+            stdout_log = stack.enter_context(tempfile.TemporaryFile())
+            stderr_logs = [
+                stack.enter_context(tempfile.TemporaryFile()) for _ in commands
+            ]
+            upstream = None
+            try:
+                for i, (command, _) in enumerate(commands):
+                    if self.output:
+                        self.output.command(command)
+                    is_last = i == len(commands) - 1
+                    process = subprocess.Popen(
+                        rlimit_command(command, stage_limits[i]),
+                        shell=True,  # nosec B602: Required for executing user-defined effect commands
+                        stdin=upstream,
+                        stdout=stdout_log if is_last else subprocess.PIPE,
+                        stderr=stderr_logs[i],
+                        start_new_session=True,
+                    )
+                    processes.append(process)
+                    self.cancel_token.register(process)
+                    # Only the consumer may hold the read end, so a consumer
+                    # that exits early delivers SIGPIPE to its producer
+                    if upstream is not None:
+                        upstream.close()
+                    upstream = process.stdout
+
+                for i, process in enumerate(processes):
+                    timeout = timeouts[i]
+                    remaining = (
+                        None
+                        if timeout is None
+                        else max(0.0, start_time + timeout - time.time())
+                    )
+                    try:
+                        process.wait(timeout=remaining)
+                    except subprocess.TimeoutExpired:
+                        timed_out = i
+                        break
+            except Exception as e:
+                if upstream is not None:
+                    upstream.close()
+                for process in processes:
+                    kill_process_group(process)
+                    process.wait()
+                _remove_output(output_path)
+                duration = time.time() - start_time
+                return [
+                    ExecutionResult(False, command, "", str(e), -1, duration)
+                    for command, _ in commands
+                ]
+            finally:
+                if timed_out is not None:
+                    for process in processes:
+                        kill_process_group(process)
+                    for process in processes:
+                        process.wait()
+                for process in processes:
+                    self.cancel_token.unregister(process)
+            duration = time.time() - start_time
+
+            stdout_log.seek(0)
+            stdout = stdout_log.read().decode(errors="replace")
+            stderrs: list[str] = []
+            for log in stderr_logs:
+                log.seek(0)
+                stderrs.append(log.read().decode(errors="replace"))
+
+        results: list[ExecutionResult] = []
+        for i, process in enumerate(processes):
+            command = commands[i][0]
+            if i == timed_out:
+                result = self._timed_out_result(
+                    command, duration, f"Timed out after {timeouts[i]:g}s"
+                )
+            elif self.cancel_token.cancelled and process.returncode != 0:
+                result = self._cancelled_result(command, duration)
+            elif process.returncode in CPU_LIMIT_EXIT_CODES:
+                result = self._timed_out_result(
+                    command, duration, "CPU time limit exceeded"
+                )
+            else:
+                if self.output and stderrs[i]:
+                    self.output.debug(f"stderr: {stderrs[i]}")
+                result = ExecutionResult(
+                    success=process.returncode == 0,
+                    command=command,
+                    stdout=stdout if i == len(processes) - 1 else "",
+                    stderr=stderrs[i],
+                    return_code=process.returncode,
+                    duration=duration,
+                )
+            results.append(result)
+
+        if pipeline_failure(results) is not None:
+            _remove_output(output_path)
+        return results
+
+    def _run(
+        self,
+        command: str,
+        limits: LimitSettings | None,
+        output_path: Path | None,
+        input_data: bytes | None = None,
+    ) -> tuple[ExecutionResult, bytes]:
+        """Run a substituted command and collect its result.
+
+        Output is text unless input_data is given, in which case the data is
+        written to stdin and stdout is returned as raw bytes.
+
+        Args:
+            command: Shell command
+            limits: Time-out and rlimits to apply
+            output_path: Output file to remove if the command is interrupted
+            input_data: Bytes for stdin (switches to binary stdout)
+
+        Returns:
+            The result, and stdout bytes in binary mode (else b"")
+        """
+        import time
+
+        timeout = limits.timeout if limits is not None else None
+        binary_io = input_data is not None
+
+        # Execute command in its own process group so cancellation can
+        # terminate the shell and every magick child it started
         start_time = time.time()
         try:
-            result = subprocess.run(
-                command,
+            process: subprocess.Popen[Any] = subprocess.Popen(
+                rlimit_command(command, limits),
                 shell=True,  # nosec B602: Required for executing user-defined effect commands
-                capture_output=True,
-                text=True,
-                check=False,
+                stdin=subprocess.PIPE if binary_io else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=not binary_io,
+                start_new_session=True,
             )
+            self.cancel_token.register(process)
+            try:
+                stdout, stderr = process.communicate(input_data, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill_process_group(process)
+                process.communicate()
+                _remove_output(output_path)
+                return (
+                    self._timed_out_result(
+                        command,
+                        time.time() - start_time,
+                        f"Timed out after {timeout:g}s",
+                    ),
+                    b"",
+                )
+            finally:
+                self.cancel_token.unregister(process)
             duration = time.time() - start_time
 
-            if self.output and result.stdout:
-                self.output.debug(f"stdout: {result.stdout}")
-            if self.output and result.stderr:
-                self.output.debug(f"stderr: {result.stderr}")
+            if self.cancel_token.cancelled and process.returncode != 0:
+                _remove_output(output_path)
+                return self._cancelled_result(command, duration), b""
+
+            if process.returncode in CPU_LIMIT_EXIT_CODES:
+                _remove_output(output_path)
+                return (
+                    self._timed_out_result(
+                        command, duration, "CPU time limit exceeded"
+                    ),
+                    b"",
+                )
+
+            data = b""
+            if binary_io:
+                data, stdout = stdout, ""
+                stderr = stderr.decode(errors="replace")
 
-            return ExecutionResult(
-                success=result.returncode == 0,
+            if self.output and stdout:
+                self.output.debug(f"stdout: {stdout}")
+            if self.output and stderr:
+                self.output.debug(f"stderr: {stderr}")
+
+            result = ExecutionResult(
+                success=process.returncode == 0,
                 command=command,
-                stdout=result.stdout,
-                stderr=result.stderr,
-                return_code=result.returncode,
+                stdout=stdout,
+                stderr=stderr,
+                return_code=process.returncode,
                 duration=duration,
             )
+            return result, data
 
         except Exception as e:
             duration = time.time() - start_time
-            return ExecutionResult(
+            result = ExecutionResult(
                 success=False,
                 command=command,
                 stdout="",
@@ -133,3 +530,30 @@ class CommandExecutor:
                 return_code=-1,
                 duration=duration,
             )
+            return result, b""
+
+    def _cancelled_result(self, command: str, duration: float) -> ExecutionResult:
+        """Build the result for a command aborted by cancellation."""
+        return ExecutionResult(
+            success=False,
+            command=command,
+            stdout="",
+            stderr="Cancelled",
+            return_code=-1,
+            duration=duration,
+            cancelled=True,
+        )
+
+    def _timed_out_result(
+        self, command: str, duration: float, reason: str
+    ) -> ExecutionResult:
+        """Build the result for a command stopped by a time limit."""
+        return ExecutionResult(
+            success=False,
+            command=command,
+            stdout="",
+            stderr=reason,
+            return_code=-1,
+            duration=duration,
+            timed_out=True,
+        )
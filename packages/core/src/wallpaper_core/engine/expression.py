@@ -0,0 +1,378 @@
+"""Expression effects compiled to vectorized NumPy.
+
+effects.expression checks an effect's expression when effects.yaml loads;
+this module compiles its syntax tree once into nested NumPy array
+operations and evaluates them for whole images instead of per pixel, as
+ImageMagick's -fx does:
+
+- Images are evaluated in bands of rows of at most TILE_PIXELS pixels, so
+  temporaries stay small however large the image is.
+- One expression of c alone (e.g. `c ** gamma`) is the same curve for every
+  channel, baked into a table of LUT_SIZE samples, exact for 8- and 16-bit
+  input.
+- Other expressions that do not read x or y are baked into a CUBE_SIZE**3
+  color table with trilinear lookup. As with CLUTs (engine.clut), hard
+  thresholds between samples can differ.
+
+Gathers from tables are slow in NumPy, so tables are only baked for
+expressions that cost more than looking them up (_TABLE_COST and
+_CUBE_COST array operations), and only for images with more pixels than
+the table has samples. They are baked per image, since w, h and the
+parameters can change.
+"""
+
+from __future__ import annotations
+
+import ast
+import functools
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import numpy.typing as npt
+
+from wallpaper_core.effects.expression import (
+    COORDINATE_NAMES,
+    PIXEL_NAMES,
+    ExpressionError,
+    ParsedExpression,
+    expression_cost,
+    expression_names,
+    parse_expression,
+)
+from wallpaper_core.engine.backend import BackendError
+from wallpaper_core.engine.clut import HALD_LEVEL
+from wallpaper_core.engine.params import ParamValue, typed_params
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+
+Pixels = npt.NDArray[np.float32]
+
+# Pixels evaluated at once (about 4 MB per float32 temporary)
+TILE_PIXELS = 1 << 20
+
+# Samples of a one-channel table: 8- and 16-bit levels fall on samples
+LUT_SIZE = 65536
+
+# Samples per axis of a three-channel table, as for CLUTs
+CUBE_SIZE = HALD_LEVEL**2
+
+# Array operations (e.g. one subtraction over the image) a 1D and a 3D
+# table lookup cost, roughly: cheaper expressions are evaluated directly
+_TABLE_COST = 5
+_CUBE_COST = 64
+
+# Rec. 709 luminance weights, as ImageMagick's luminance
+_LUMINANCE = np.array([0.212656, 0.715158, 0.072186], dtype=np.float32)
+
+# Evaluates a compiled node for the names bound in an environment
+_Node = Callable[[dict[str, Any]], Any]
+
+
+def _truth(value: Any) -> Any:
+    """1.0 where a condition holds, else 0.0."""
+    return np.asarray(value, dtype=np.float32)
+
+
+def _clamp(value: Any, low: Any = 0.0, high: Any = 1.0) -> Any:
+    return np.clip(value, low, high)
+
+
+def _smoothstep(edge0: Any, edge1: Any, value: Any) -> Any:
+    t = np.clip((value - edge0) / (edge1 - edge0), 0.0, 1.0)
+    return t * t * (3 - 2 * t)
+
+
+_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "atan": np.arctan,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "pow": np.power,
+    "atan2": np.arctan2,
+    "hypot": np.hypot,
+    "step": lambda edge, value: _truth(value >= edge),
+    "min": lambda *values: functools.reduce(np.minimum, values),
+    "max": lambda *values: functools.reduce(np.maximum, values),
+    "clamp": _clamp,
+    "mix": lambda a, b, t: a + (b - a) * t,
+    "smoothstep": _smoothstep,
+}
+
+_BINARY: dict[type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+
+_COMPARE: dict[type[ast.cmpop], Callable[[Any, Any], Any]] = {
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+}
+
+
+def _compile(node: ast.expr) -> _Node:
+    """Turn a checked syntax tree into nested NumPy calls."""
+    if isinstance(node, ast.Constant):
+        constant = np.float32(float(node.value))  # type: ignore[arg-type]
+        return lambda _: constant
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda env: env[name]
+    if isinstance(node, ast.BinOp):
+        binary = _BINARY[type(node.op)]
+        left, right = _compile(node.left), _compile(node.right)
+        return lambda env: binary(left(env), right(env))
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda env: np.negative(operand(env))
+        if isinstance(node.op, ast.Not):
+            return lambda env: _truth(operand(env) == 0)
+        return operand
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        values = [_compile(value) for value in node.values]
+        return lambda env: _truth(
+            functools.reduce(combine, (value(env) != 0 for value in values))
+        )
+    if isinstance(node, ast.Compare):
+        operands = [_compile(node.left), *map(_compile, node.comparators)]
+        compares = [_COMPARE[type(op)] for op in node.ops]
+
+        def compare(env: dict[str, Any]) -> Any:
+            values = [operand(env) for operand in operands]
+            return _truth(
+                functools.reduce(
+                    np.logical_and,
+                    (
+                        f(a, b)
+                        for f, a, b in zip(compares, values, values[1:], strict=False)
+                    ),
+                )
+            )
+
+        return compare
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = map(_compile, (node.test, node.body, node.orelse))
+        return lambda env: np.where(test(env) != 0, body(env), orelse(env))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        function = _FUNCTIONS[node.func.id]
+        args = [_compile(arg) for arg in node.args]
+        return lambda env: function(*(arg(env) for arg in args))
+    raise ExpressionError(f"cannot compile {type(node).__name__}")
+
+
+# Writes one band's new colors into a target view
+_Lookup = Callable[[Pixels, int, Pixels], object]
+
+
+class CompiledExpression:
+    """An expression compiled for evaluation over whole images."""
+
+    def __init__(self, parsed: ParsedExpression) -> None:
+        """Compile the expression.
+
+        Args:
+            parsed: Expression checked by effects.expression.parse_expression
+        """
+        self.text = parsed.text
+        self.nodes = [_compile(component) for component in parsed.components]
+        self.names = frozenset[str]().union(*map(expression_names, parsed.components))
+        self.cost = sum(map(expression_cost, parsed.components))
+        self.pointwise = not self.names & set(COORDINATE_NAMES)
+        # One expression of c alone is the same curve for every channel
+        self.curve = len(self.nodes) == 1 and not self.names & (
+            {*PIXEL_NAMES, *COORDINATE_NAMES} - {"c"}
+        )
+
+    def __call__(self, pixels: Pixels, params: dict[str, float]) -> Pixels:
+        """Evaluate the expression for every pixel.
+
+        Args:
+            pixels: (height, width, 3 or 4) float32 values in 0..1; alpha
+                is kept
+            params: Numeric parameter values by name
+
+        Returns:
+            New pixels, clipped to 0..1 (NaN becomes 0)
+        """
+        height, width = pixels.shape[:2]
+        constants: dict[str, Any] = {
+            "w": np.float32(width),
+            "h": np.float32(height),
+            "pi": np.float32(np.pi),
+            "e": np.float32(np.e),
+        }
+        constants.update({name: np.float32(v) for name, v in params.items()})
+        result = np.empty_like(pixels, dtype=np.float32)
+        if pixels.shape[2] == 4:
+            result[..., 3] = pixels[..., 3]
+
+        rows = max(TILE_PIXELS // max(width, 1), 1)
+        with np.errstate(all="ignore"):
+            lookup = self._lookup(constants, height * width)
+            for top in range(0, height, rows):
+                target = result[top : top + rows, :, :3]
+                lookup(pixels[top : top + rows], top, target)
+                np.fmax(target, 0.0, out=target)
+                np.minimum(target, 1.0, out=target)
+        return result
+
+    def _lookup(self, constants: dict[str, Any], pixel_count: int) -> _Lookup:
+        """Pick how an image is computed: directly, or through a baked table."""
+        if self.curve and self.cost >= _TABLE_COST and pixel_count > LUT_SIZE:
+            samples = np.linspace(0.0, 1.0, LUT_SIZE, dtype=np.float32)
+            curve = self._bake(constants, np.repeat(samples[:, np.newaxis], 3, 1))
+            return _curve_lookup(np.ascontiguousarray(curve[:, 0]))
+        if self.pointwise and self.cost > _CUBE_COST and pixel_count > CUBE_SIZE**3:
+            axis = np.linspace(0.0, 1.0, CUBE_SIZE, dtype=np.float32)
+            grid = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1)
+            cube = self._bake(constants, grid.reshape(-1, 3)).reshape(grid.shape)
+            return lambda band, _, target: trilinear(cube, band[..., :3], target)
+        return lambda band, top, target: self._evaluate(band, top, constants, target)
+
+    def _bake(self, constants: dict[str, Any], colors: Pixels) -> Pixels:
+        """Evaluate the expression for a list of (n, 3) colors."""
+        table = np.empty((1, *colors.shape), dtype=np.float32)
+        self._evaluate(colors[np.newaxis], 0, constants, table)
+        baked: Pixels = table[0]
+        return baked
+
+    def _evaluate(
+        self, band: Pixels, top: int, constants: dict[str, Any], target: Pixels
+    ) -> None:
+        """Evaluate the expression for a band of rows starting at row top."""
+        names = {
+            **constants,
+            "r": band[..., 0:1],
+            "g": band[..., 1:2],
+            "b": band[..., 2:3],
+        }
+        if "luminance" in self.names:
+            names["luminance"] = (band[..., :3] @ _LUMINANCE)[..., np.newaxis]
+        if "x" in self.names:
+            columns = np.arange(band.shape[1], dtype=np.float32)
+            names["x"] = columns[np.newaxis, :, np.newaxis]
+        if "y" in self.names:
+            rows = np.arange(top, top + band.shape[0], dtype=np.float32)
+            names["y"] = rows[:, np.newaxis, np.newaxis]
+        if len(self.nodes) == 1:
+            target[...] = self.nodes[0]({**names, "c": band[..., :3]})
+            return
+        for index, node in enumerate(self.nodes):
+            channel = slice(index, index + 1)
+            target[..., channel] = node({**names, "c": band[..., channel]})
+
+
+def _curve_lookup(curve: Pixels) -> _Lookup:
+    """Look every channel up in a table of LUT_SIZE samples."""
+    last = len(curve) - 1
+
+    def lookup(band: Pixels, _: int, target: Pixels) -> None:
+        levels = band[..., :3] * np.float32(last)
+        levels += np.float32(0.5)
+        target[...] = np.take(curve, levels.astype(np.intp), mode="clip")
+
+    return lookup
+
+
+def trilinear(cube: Pixels, rgb: Pixels, out: Pixels | None = None) -> Pixels:
+    """Look colors up in an (n, n, n, channels) table between its samples.
+
+    Args:
+        cube: Table of output colors indexed by red, green and blue sample
+        rgb: (..., 3) colors in 0..1
+        out: Array to write the (..., channels) result into
+
+    Returns:
+        The interpolated colors
+    """
+    size = cube.shape[0]
+    scaled = np.clip(rgb, 0.0, 1.0) * np.float32(size - 1)
+    base = np.minimum(scaled.astype(np.intp), size - 2)
+    fraction = (scaled - base).astype(np.float32)
+    index = (base[..., 0] * size + base[..., 1]) * size + base[..., 2]
+    # Flat tables per channel: take() on 1D arrays is the fastest gather
+    tables = np.moveaxis(cube, -1, 0).reshape(cube.shape[-1], -1)
+    if out is None:
+        out = np.empty((*rgb.shape[:-1], cube.shape[-1]), dtype=np.float32)
+    for channel, table in enumerate(np.ascontiguousarray(tables)):
+        out[..., channel] = _interpolate(table, index, fraction, size)
+    return out
+
+
+def _interpolate(table: Pixels, index: Any, fraction: Pixels, size: int) -> Pixels:
+    """Trilinear interpolation in one channel's flattened table."""
+    fr, fg, fb = fraction[..., 0], fraction[..., 1], fraction[..., 2]
+
+    def along_b(offset: int) -> Pixels:
+        low: Pixels = table.take(index + offset)
+        low += (table.take(index + (offset + 1)) - low) * fb
+        return low
+
+    def along_g(offset: int) -> Pixels:
+        low = along_b(offset)
+        low += (along_b(offset + size) - low) * fg
+        return low
+
+    low = along_g(0)
+    low += (along_g(size * size) - low) * fr
+    return low
+
+
+@functools.lru_cache(maxsize=64)
+def compile_expression(text: str, parameters: tuple[str, ...]) -> CompiledExpression:
+    """Parse and compile an expression (cached per text and parameters).
+
+    Raises:
+        ExpressionError: If the expression is not allowed
+    """
+    return CompiledExpression(parse_expression(text, parameters))
+
+
+def _numbers(params: dict[str, ParamValue]) -> dict[str, float]:
+    """Parameter values as numbers, as expressions need them."""
+    numbers = {}
+    for name, value in params.items():
+        try:
+            numbers[name] = float(value)
+        except ValueError:
+            raise ValueError(f"parameter '{name}' is not a number: {value}") from None
+    return numbers
+
+
+def expression_op(
+    config: EffectsConfig, step: ChainStep, text: str
+) -> Callable[[Pixels], Pixels]:
+    """Wrap the expression of an expression effect as a NumPy operation.
+
+    The expression is compiled, and the parameters converted, when the
+    operation first runs.
+    """
+
+    def op(pixels: Pixels) -> Pixels:
+        parameters = tuple(config.effects[step.effect].parameters)
+        try:
+            compiled = compile_expression(text, parameters)
+            params = _numbers(typed_params(config, step.effect, step.params))
+        except ValueError as e:
+            raise BackendError(str(e)) from e
+        return compiled(pixels, params)
+
+    return op
@@ -0,0 +1,159 @@
+"""Append-only completion journal for resumable batches."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+# Journal file written into each batch output directory
+JOURNAL_NAME = ".wallpaper-journal.jsonl"
+
+
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file's contents."""
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+@dataclass
+class JournalEntry:
+    """Outcome of one batch item, as recorded in the journal."""
+
+    output: str  # the item's output path (variants are listed in outputs)
+    item: str
+    item_type: str
+    status: str  # "done" or "failed"
+    outputs: dict[str, str] = field(default_factory=dict)  # path -> sha256
+    duration: float = 0.0
+    error: str = ""
+    timestamp: float = field(default_factory=time.time)
+    recipe: str = ""  # recipe hash of the item (see manifest.recipe_hash)
+    input_hash: str = ""  # sha256 of the input the outputs were made from
+
+    @property
+    def done(self) -> bool:
+        """Check if the item completed successfully."""
+        return self.status == "done"
+
+    def verify(self) -> bool:
+        """Check that every recorded output still exists unchanged."""
+        if not self.outputs:
+            return False
+        for path, digest in self.outputs.items():
+            try:
+                if file_sha256(Path(path)) != digest:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+class BatchJournal:
+    """Crash-safe record of finished batch items.
+
+    Each finished item appends one JSON line that is flushed and fsynced
+    before the next item is reported, so a batch killed at any point
+    (OOM, reboot, Ctrl-C) leaves a journal of everything it completed. A
+    line torn by the crash is ignored on load. Later entries for the same
+    output win.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize BatchJournal and load existing entries.
+
+        Args:
+            path: Journal file (created on the first record)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, JournalEntry] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Read the entries already in the journal file."""
+        try:
+            lines = self.path.read_text().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                entry = JournalEntry(**json.loads(line))
+            except (ValueError, TypeError):
+                continue  # torn write from an interrupted run
+            self._entries[entry.output] = entry
+
+    def get(self, output_path: Path) -> JournalEntry | None:
+        """Latest entry for an item's output path, if any."""
+        with self._lock:
+            return self._entries.get(str(output_path))
+
+    def record_done(
+        self,
+        output_path: Path,
+        item: str,
+        item_type: str,
+        digests: dict[str, str],
+        duration: float,
+        recipe: str = "",
+        input_hash: str = "",
+    ) -> None:
+        """Record a completed item with the content hash of each output file.
+
+        Args:
+            output_path: Item output path (the journal key)
+            item: Item name
+            item_type: Item type
+            digests: SHA-256 of each file the item wrote, by path
+            duration: Seconds the item took
+            recipe: Hash of how the item was made (commands, parameters,
+                encoding, sizes)
+            input_hash: SHA-256 of the input image
+        """
+        self._append(
+            JournalEntry(
+                str(output_path),
+                item,
+                item_type,
+                "done",
+                digests,
+                duration,
+                recipe=recipe,
+                input_hash=input_hash,
+            )
+        )
+
+    def record_failed(
+        self,
+        output_path: Path,
+        item: str,
+        item_type: str,
+        error: str,
+        duration: float,
+    ) -> None:
+        """Record a failed item."""
+        self._append(
+            JournalEntry(
+                str(output_path),
+                item,
+                item_type,
+                "failed",
+                duration=duration,
+                error=error,
+            )
+        )
+
+    def _append(self, entry: JournalEntry) -> None:
+        """Durably append one entry."""
+        line = json.dumps(asdict(entry)) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[entry.output] = entry
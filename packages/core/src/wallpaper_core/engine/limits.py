@@ -0,0 +1,76 @@
+"""Resource limits for effect processes."""
+
+from __future__ import annotations
+
+import signal
+from typing import TYPE_CHECKING
+
+from wallpaper_core.config.schema import LimitSettings
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import EffectsConfig
+
+_MIB = 1024 * 1024
+# Unit of `ulimit -f` in POSIX shells
+_BLOCK = 512
+
+# Exit statuses of a command killed for exceeding RLIMIT_CPU: the child
+# itself (negative signal number) or the shell reporting it (128 + signal)
+CPU_LIMIT_EXIT_CODES = frozenset({-signal.SIGXCPU, 128 + signal.SIGXCPU})
+
+
+def effect_limits(
+    config: EffectsConfig, base: LimitSettings | None, effect_name: str
+) -> LimitSettings:
+    """Layer an effect's `limits` block over the global limits.
+
+    Args:
+        config: Effects configuration
+        base: Global limits
+        effect_name: Effect whose command is about to run
+
+    Returns:
+        Merged limits
+    """
+    limits = base.model_copy() if base is not None else LimitSettings()
+    effect = config.effects.get(effect_name)
+    if effect is not None:
+        limits = limits.merged(effect.limits)
+    return limits
+
+
+def rlimit_command(command: str, limits: LimitSettings | None) -> str:
+    """Prefix a shell command with ulimit calls applying kernel rlimits.
+
+    The shell sets the limits before it starts any of the command's
+    processes, which inherit them. (A Popen preexec_fn would do the same
+    between fork and exec, but is unsafe in threaded programs.) If a limit
+    cannot be set, the shell exits with status 1 without running the
+    command.
+
+    The hard CPU limit is set one second above the soft one, so the child
+    first gets SIGXCPU (reported as a time-out) before SIGKILL.
+
+    Args:
+        command: Shell command to run
+        limits: Limits to apply
+
+    Returns:
+        The command, prefixed if any rlimit is set
+    """
+    if limits is None:
+        return command
+
+    calls: list[str] = []
+    if limits.cpu_seconds is not None:
+        # Soft first: a hard limit below the current soft one is rejected
+        calls.append(f"ulimit -S -t {limits.cpu_seconds}")
+        calls.append(f"ulimit -H -t {limits.cpu_seconds + 1}")
+    if limits.memory_mb is not None:
+        calls.append(f"ulimit -v {limits.memory_mb * _MIB // 1024}")
+    if limits.output_file_mb is not None:
+        calls.append(f"ulimit -f {limits.output_file_mb * _MIB // _BLOCK}")
+
+    if not calls:
+        return command
+    return " && ".join(calls) + " || exit 1\n" + command
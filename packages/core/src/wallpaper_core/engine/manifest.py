@@ -0,0 +1,198 @@
+"""Output manifest: what a batch produced, how, and from which input."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from wallpaper_core.config.schema import ItemType
+
+# Manifest file written into each batch output directory
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def recipe_hash(recipe: Any) -> str:
+    """Hex SHA-256 of a JSON-serializable description of how an item is made.
+
+    Args:
+        recipe: Commands, parameters and encoding of an item
+
+    Returns:
+        Hash that changes whenever the recipe does
+    """
+    data = json.dumps(recipe, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+class ManifestEntry(BaseModel):
+    """One output file of a batch."""
+
+    item: str
+    item_type: ItemType
+    command_hash: str = Field(description="Hash of the item's resolved recipe")
+    params: list[dict[str, Any]] = Field(
+        default_factory=list, description="Effect and parameters of each step"
+    )
+    input_hash: str = Field(description="SHA-256 of the input image")
+    sha256: str = Field(description="SHA-256 of the output file")
+    size: int = Field(description="Output size in bytes")
+    mtime_ns: int = Field(description="Output modification time (ns)")
+    width: int | None = None
+    height: int | None = None
+    duration: float = Field(default=0.0, description="Seconds to produce the item")
+    created: float = Field(default_factory=time.time)
+
+    def matches(self, path: Path) -> bool:
+        """Check that a file still has the recorded size and mtime.
+
+        A stat, not a re-hash: cheap enough to run over a whole library.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+
+class OutputManifest(BaseModel):
+    """Manifest of every output under one batch output directory.
+
+    Entries are keyed by their path relative to the output directory and
+    survive later batches into the same directory: new outputs replace
+    their entry, failed items lose theirs. Recording is thread-safe, so
+    parallel batch workers can share one manifest.
+    """
+
+    version: int = MANIFEST_VERSION
+    input_path: Path
+    input_hash: str
+    entries: dict[str, ManifestEntry] = Field(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _root: Path = PrivateAttr(default=Path())
+
+    @classmethod
+    def load(cls, root: Path, input_path: Path, input_hash: str) -> OutputManifest:
+        """Load the manifest of an output directory, or start a new one.
+
+        Entries recorded for a different input are dropped, since their
+        outputs are about to be overwritten.
+
+        Args:
+            root: Batch output directory
+            input_path: Input image of the batch
+            input_hash: SHA-256 of the input image
+
+        Returns:
+            The manifest
+        """
+        try:
+            manifest = cls.read(root / MANIFEST_NAME)
+        except (OSError, ValueError):
+            manifest = cls(input_path=input_path, input_hash=input_hash)
+            manifest._root = root
+            return manifest
+        if manifest.input_hash != input_hash:
+            manifest.entries.clear()
+        manifest.input_path = input_path
+        manifest.input_hash = input_hash
+        return manifest
+
+    @classmethod
+    def read(cls, path: Path) -> OutputManifest:
+        """Read a manifest written by write().
+
+        Entry paths are relative to the directory holding the file.
+
+        Raises:
+            ValueError: If the file is not a valid manifest of this version
+        """
+        manifest = cls.model_validate_json(path.read_text())
+        if manifest.version != MANIFEST_VERSION:
+            raise ValueError(
+                f"Unsupported manifest version {manifest.version} "
+                f"(expected {MANIFEST_VERSION})"
+            )
+        manifest._root = path.parent
+        return manifest
+
+    @property
+    def root(self) -> Path:
+        """Directory the entry paths are relative to."""
+        return self._root
+
+    def record(
+        self,
+        path: Path,
+        digest: str,
+        item: str,
+        item_type: ItemType,
+        command_hash: str,
+        params: list[dict[str, Any]],
+        duration: float,
+        size: tuple[int, int] | None = None,
+    ) -> None:
+        """Add or replace the entry of one output file.
+
+        Args:
+            path: Output file
+            digest: SHA-256 of the output file
+            item: Item that produced it
+            item_type: Item type
+            command_hash: Hash of the item's recipe
+            params: Effect and parameters of each step
+            duration: Seconds the item took
+            size: (width, height) if known without decoding the file
+        """
+        stat = path.stat()
+        width, height = size if size else (None, None)
+        entry = ManifestEntry(
+            item=item,
+            item_type=item_type,
+            command_hash=command_hash,
+            params=params,
+            input_hash=self.input_hash,
+            sha256=digest,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            width=width,
+            height=height,
+            duration=duration,
+        )
+        with self._lock:
+            self.entries[self._key(path)] = entry
+
+    def discard(self, paths: list[Path]) -> None:
+        """Remove the entries of outputs that are no longer valid."""
+        with self._lock:
+            for path in paths:
+                self.entries.pop(self._key(path), None)
+
+    def get(self, path: Path) -> ManifestEntry | None:
+        """Entry of an output file, if any."""
+        with self._lock:
+            return self.entries.get(self._key(path))
+
+    def write(self) -> None:
+        """Atomically write the manifest into its output directory."""
+        path = self._root / MANIFEST_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = self.model_dump_json(indent=2) + "\n"
+        temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp.write_text(data)
+        temp.replace(path)
+
+    def _key(self, path: Path) -> str:
+        """Entry key of a file: its POSIX path relative to the root."""
+        try:
+            return path.relative_to(self._root).as_posix()
+        except ValueError:
+            return path.as_posix()
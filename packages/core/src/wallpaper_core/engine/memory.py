@@ -0,0 +1,166 @@
+"""In-memory image processing (bytes in, bytes out)."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import ChainStep
+from wallpaper_core.engine.batch import item_chain
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.encoding import merge_effect_encodings
+from wallpaper_core.engine.executor import BytesResult
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.effects.schema import EffectsConfig
+    from wallpaper_core.engine.backend import BackendName
+    from wallpaper_core.engine.cancel import CancelToken
+
+# Output format when neither the caller nor the encoding profile sets one
+DEFAULT_FORMAT = "png"
+
+ImageData = bytes | bytearray | memoryview | BinaryIO
+
+
+class MemoryExecutor:
+    """Apply effects, composites and presets to in-memory images.
+
+    With the magick backend every step pipes its input to magick on stdin
+    ("-") and reads the result from stdout ("<format>:-"); intermediates
+    stay in memory as MIFF blobs, so no file is written or read apart from
+    cached color lookup tables (see engine.clut). In-process backends run
+    the chains they support on decoded images (see engine.backend).
+    """
+
+    def __init__(
+        self,
+        config: EffectsConfig,
+        output: RichOutput | None = None,
+        encoding: EncodingSettings | None = None,
+        limits: LimitSettings | None = None,
+        cancel_token: CancelToken | None = None,
+        backend: BackendName = "magick",
+        fuse_pointwise: bool = False,
+        clut_dir: Path | None = None,
+    ) -> None:
+        """Initialize MemoryExecutor.
+
+        Args:
+            config: Effects configuration
+            output: RichOutput instance for logging
+            encoding: Global encoding profile for final outputs
+            limits: Global limits (layered with per-effect ones for each step)
+            cancel_token: Shared token used to abort running steps
+            backend: In-process backend for the chains it supports (see
+                engine.backend)
+            fuse_pointwise: Apply runs of pointwise effects as one color
+                lookup table (see engine.clut)
+            clut_dir: CLUT cache directory (None = user cache directory)
+        """
+        self.config = config
+        self.output = output
+        self.encoding = encoding
+        self.chain_executor = ChainExecutor(
+            config,
+            output,
+            encoding,
+            cancel_token,
+            limits,
+            fuse_pointwise=fuse_pointwise,
+            clut_dir=clut_dir,
+            backend=backend,
+        )
+        self.executor = self.chain_executor.executor
+
+    def apply(
+        self,
+        data: ImageData,
+        name: str,
+        item_type: ItemType = ItemType.EFFECT,
+        output_format: str | None = None,
+        params: dict[str, Any] | None = None,
+    ) -> BytesResult:
+        """Apply an effect, composite or preset to an encoded image.
+
+        Args:
+            data: Encoded input image (bytes-like or binary file object)
+            name: Item name
+            item_type: Item type
+            output_format: Output format (None = encoding profile, else png)
+            params: Parameter overrides (effects only)
+
+        Returns:
+            BytesResult with the encoded output in `data`
+        """
+        chain = item_chain(self.config, name, item_type)
+        if chain is None:
+            return _failure(f"Unknown {item_type.value}: {name}")
+        if params and item_type == ItemType.EFFECT:
+            chain = [ChainStep(effect=name, params=params)]
+        return self.apply_chain(data, chain, output_format)
+
+    def apply_chain(
+        self,
+        data: ImageData,
+        chain: list[ChainStep],
+        output_format: str | None = None,
+    ) -> BytesResult:
+        """Apply a chain of effects to an encoded image.
+
+        Args:
+            data: Encoded input image (bytes-like or binary file object)
+            chain: List of chain steps
+            output_format: Output format (None = encoding profile, else png)
+
+        Returns:
+            BytesResult with the encoded output in `data`
+        """
+        error = self.chain_executor.check_chain(chain)
+        if error is not None:
+            return BytesResult(**vars(error))
+
+        for step in chain:
+            effect = self.config.effects[step.effect]
+            if not effect.in_process and not is_streamable(effect.command):
+                return _failure(
+                    f"Effect '{step.effect}' cannot run in memory: its command "
+                    "must use $INPUT and $OUTPUT exactly once"
+                )
+
+        profile = merge_effect_encodings(
+            self.config, self.encoding, [s.effect for s in chain]
+        )
+        fmt = output_format or profile.format or DEFAULT_FORMAT
+        backend = self.chain_executor.backend_for(chain)
+        return backend.run(chain, _read(data), fmt)
+
+
+def is_streamable(command_template: str) -> bool:
+    """Check if a command can read stdin and write stdout.
+
+    Stdin can only be consumed once, so the command must reference $INPUT
+    (and $OUTPUT) exactly once.
+    """
+    return command_template.count("$INPUT") == 1 and (
+        command_template.count("$OUTPUT") == 1
+    )
+
+
+def _read(data: ImageData) -> bytes:
+    """Get the bytes of a bytes-like object or binary file object."""
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, bytearray | memoryview):
+        return bytes(data)
+    return data.read()
+
+
+def _failure(message: str) -> BytesResult:
+    """Build a failure result for a chain that cannot start."""
+    return BytesResult(
+        success=False, command="", stdout="", stderr=message, return_code=1
+    )
@@ -0,0 +1,551 @@
+"""NumPy backend: chains of built-in effects run in-process.
+
+Instead of one magick process per step, with an encode and decode of the
+intermediate between every two steps, the input is decoded once to PAM
+(portable arbitrary map: a small header followed by raw samples), every
+step runs as a vectorized NumPy operation on float32 pixels in [0, 1], and
+the result is encoded once. ImageMagick is still the codec, so every input
+and output format keeps working.
+
+Steps are recognised by their magick operators after parameter
+substitution (see simple_ops), not by effect name, so an effects.yaml that
+redefines `blur` with another command runs that command. A chain runs
+natively only if every step has an implementation; otherwise the whole
+chain falls back to magick.
+
+Implementations follow ImageMagick's definitions (edge virtual pixels for
+the blur, HSL for -modulate, the background color white for -vignette);
+the parity tests check them against ImageMagick within PARITY_TOLERANCE.
+
+Python effects (see engine.plugins) and expression effects (see
+engine.expression) are NumPy operations too. Chains that contain one
+always run here; their steps without an implementation then
+run their magick command on the pixels, piped as PAM.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import re
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from wallpaper_core.engine.backend import (
+    BackendCapabilities,
+    BackendError,
+    ImageBackend,
+)
+from wallpaper_core.engine.executor import simple_ops, substitute_command
+from wallpaper_core.engine.expression import expression_op
+from wallpaper_core.engine.memory import is_streamable
+from wallpaper_core.engine.params import params_with_defaults, typed_params
+from wallpaper_core.engine.plugins import PluginError, load_function
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+
+Pixels = npt.NDArray[np.float32]
+NativeOp = Callable[[Pixels], Pixels]
+
+# Pixels and the PAM MAXVAL to encode them with (keeps the input's depth)
+NativeImage = tuple[Pixels, int]
+
+# Decodes any input to 8- or 16-bit RGB(A) PAM on stdout
+DECODE_COMMAND = 'magick "$INPUT" -colorspace sRGB "$OUTPUT"'
+
+# Mean absolute difference per channel (0-1) the parity tests accept
+PARITY_TOLERANCE = 0.02
+
+# Kernels with more taps than this are applied with an FFT
+_DIRECT_TAPS = 61
+
+# Kernel radius in sigmas when the geometry leaves it to ImageMagick
+_RADIUS_SIGMAS = 3.5
+
+_PAM_HEADER = re.compile(rb"^P7\n(?P<fields>.*?)ENDHDR\n", re.DOTALL)
+
+_Factory = Callable[[dict[str, str]], NativeOp]
+_OPERATORS: list[tuple[re.Pattern[str], _Factory]] = []
+
+
+def _operator(pattern: str) -> Callable[[_Factory], _Factory]:
+    """Register the implementation of a magick operator sequence."""
+
+    def register(factory: _Factory) -> _Factory:
+        _OPERATORS.append((re.compile(f"^{pattern}$"), factory))
+        return factory
+
+    return register
+
+
+def native_op(ops: str) -> NativeOp | None:
+    """Get the NumPy implementation of magick operators.
+
+    Args:
+        ops: Operators with parameters substituted, e.g. '-blur "0x8"'
+
+    Returns:
+        A function from pixels to pixels, or None if there is none
+    """
+    unquoted = ops.replace('"', "").strip()
+    for pattern, factory in _OPERATORS:
+        match = pattern.match(unquoted)
+        if match is not None:
+            return factory(match.groupdict())
+    return None
+
+
+def step_op(config: EffectsConfig, step: ChainStep) -> NativeOp | None:
+    """Get the NumPy implementation of a chain step, if it has one."""
+    effect = config.effects.get(step.effect)
+    if effect is None:
+        return None
+    if effect.python:
+        return python_op(config, step, effect.python)
+    if effect.expression:
+        return expression_op(config, step, effect.expression)
+    params = params_with_defaults(config, step.effect, step.params)
+    ops = simple_ops(
+        substitute_command(effect.command, "$INPUT", "$OUTPUT", params, "magick")
+    )
+    return native_op(ops) if ops is not None else None
+
+
+def python_op(config: EffectsConfig, step: ChainStep, spec: str) -> NativeOp:
+    """Wrap the function of a Python effect as a NumPy operation.
+
+    The function is imported, and the parameters converted, when the
+    operation first runs.
+    """
+
+    def op(pixels: Pixels) -> Pixels:
+        try:
+            function = load_function(spec)
+            params = typed_params(config, step.effect, step.params)
+        except (PluginError, ValueError) as e:
+            raise BackendError(str(e)) from e
+        view = pixels.view()
+        view.flags.writeable = False
+        try:
+            result = function(view, **params)
+        except Exception as e:
+            raise BackendError(f"{spec} raised {type(e).__name__}: {e}") from e
+        return _python_pixels(result, spec)
+
+    return op
+
+
+def _python_pixels(result: object, spec: str) -> Pixels:
+    """Check and normalize what a Python effect returned."""
+    if not isinstance(result, np.ndarray):
+        raise BackendError(f"{spec} returned {type(result).__name__}, not an array")
+    if result.ndim != 3 or result.shape[2] not in (3, 4) or 0 in result.shape:
+        raise BackendError(
+            f"{spec} returned shape {result.shape}, not (height, width, 3 or 4)"
+        )
+    pixels = np.nan_to_num(result.astype(np.float32, copy=False))
+    return np.ascontiguousarray(np.clip(pixels, 0.0, 1.0))
+
+
+def chain_ops(config: EffectsConfig, chain: list[ChainStep]) -> list[NativeOp] | None:
+    """Get the NumPy implementation of every step, or None if one has none."""
+    ops = [step_op(config, step) for step in chain]
+    if any(op is None for op in ops):
+        return None
+    return [op for op in ops if op is not None]
+
+
+# ============================================================================
+# PAM codec
+# ============================================================================
+
+
+def decode_pam(data: bytes) -> tuple[Pixels, int]:
+    """Decode a PAM image to float32 RGB or RGBA pixels.
+
+    Grayscale images are expanded to RGB.
+
+    Returns:
+        Pixels of shape (height, width, 3 or 4), and the MAXVAL to encode
+        the result with (keeps the input's bit depth)
+
+    Raises:
+        ValueError: If the data is not an 8- or 16-bit PAM image
+    """
+    match = _PAM_HEADER.match(data)
+    if match is None:
+        raise ValueError("not a PAM image")
+    fields: dict[str, str] = {}
+    for line in match.group("fields").decode("ascii").splitlines():
+        key, _, value = line.partition(" ")
+        if key and not key.startswith("#"):
+            fields[key] = value.strip()
+    try:
+        width, height = int(fields["WIDTH"]), int(fields["HEIGHT"])
+        depth, maxval = int(fields["DEPTH"]), int(fields["MAXVAL"])
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"invalid PAM header: {e}") from e
+    if depth not in (1, 2, 3, 4) or maxval not in (255, 65535):
+        raise ValueError(f"unsupported PAM image: depth {depth}, maxval {maxval}")
+
+    dtype = np.dtype(">u2") if maxval > 255 else np.dtype("u1")
+    count = width * height * depth
+    body = data[match.end() :]
+    if len(body) < count * dtype.itemsize:
+        raise ValueError("truncated PAM image")
+    samples = np.frombuffer(body, dtype, count).reshape(height, width, depth)
+    pixels = samples.astype(np.float32) / np.float32(maxval)
+    if depth <= 2:
+        gray = pixels[..., :1]
+        pixels = np.concatenate([gray, gray, gray, pixels[..., 1:]], axis=2)
+    return pixels, maxval
+
+
+def encode_pam(pixels: Pixels, maxval: int = 255) -> bytes:
+    """Encode float RGB or RGBA pixels as an 8- or 16-bit PAM image."""
+    height, width, depth = pixels.shape
+    tupltype = "RGB_ALPHA" if depth == 4 else "RGB"
+    header = (
+        f"P7\nWIDTH {width}\nHEIGHT {height}\nDEPTH {depth}\n"
+        f"MAXVAL {maxval}\nTUPLTYPE {tupltype}\nENDHDR\n"
+    )
+    dtype = np.dtype(">u2") if maxval > 255 else np.dtype("u1")
+    samples = np.rint(np.clip(pixels, 0.0, 1.0) * maxval).astype(dtype)
+    return header.encode("ascii") + samples.tobytes()
+
+
+def pixel_difference(a: Pixels, b: Pixels) -> tuple[float, float]:
+    """Mean and largest absolute difference between two images (0-1).
+
+    Raises:
+        ValueError: If the images differ in size
+    """
+    if a.shape[:2] != b.shape[:2]:
+        raise ValueError(f"image sizes differ: {a.shape[:2]} != {b.shape[:2]}")
+    diff = np.abs(a[..., :3] - b[..., :3])
+    return float(diff.mean()), float(diff.max())
+
+
+# ============================================================================
+# Operations
+# ============================================================================
+
+
+def _rgb(pixels: Pixels, rgb: Pixels) -> Pixels:
+    """Replace the color channels of pixels, keeping any alpha channel."""
+    if pixels.shape[2] == 3:
+        return rgb.astype(np.float32, copy=False)
+    return np.concatenate([rgb, pixels[..., 3:]], axis=2).astype(np.float32)
+
+
+def gaussian_kernel(sigma: float, radius: int = 0) -> npt.NDArray[np.float64]:
+    """Normalized 1D Gaussian kernel (radius 0 = sized from sigma)."""
+    if radius <= 0:
+        radius = max(1, math.ceil(_RADIUS_SIGMAS * sigma))
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel: npt.NDArray[np.float64] = np.exp(-(x**2) / (2 * sigma**2))
+    return kernel / kernel.sum()
+
+
+def _convolve_axis(
+    pixels: Pixels, kernel: npt.NDArray[np.float64], axis: int
+) -> Pixels:
+    """Convolve along one axis, repeating the edge pixels (ImageMagick's
+    default virtual pixels)."""
+    radius = len(kernel) // 2
+    # Work along the first axis of a contiguous copy, which is much faster
+    # than striding across rows
+    moved = np.ascontiguousarray(np.moveaxis(pixels, axis, 0))
+    size = moved.shape[0]
+    padded = np.concatenate(
+        [np.repeat(moved[:1], radius, 0), moved, np.repeat(moved[-1:], radius, 0)]
+    )
+    if len(kernel) <= _DIRECT_TAPS:
+        # The kernel is symmetric: add each pair of taps before weighting it
+        out = padded[radius : radius + size] * np.float32(kernel[radius])
+        pair = np.empty_like(out)
+        for i in range(1, radius + 1):
+            np.add(
+                padded[radius - i : radius - i + size],
+                padded[radius + i : radius + i + size],
+                out=pair,
+            )
+            pair *= np.float32(kernel[radius + i])
+            out += pair
+    else:
+        n = padded.shape[0] + len(kernel) - 1
+        spectrum = np.fft.rfft(padded, n, axis=0)
+        spectrum *= np.fft.rfft(kernel, n).reshape((-1,) + (1,) * (padded.ndim - 1))
+        full = np.fft.irfft(spectrum, n, axis=0)
+        out = full[len(kernel) - 1 : len(kernel) - 1 + size].astype(np.float32)
+    return np.moveaxis(out, 0, axis)
+
+
+def gaussian_blur(pixels: Pixels, sigma: float, radius: int = 0) -> Pixels:
+    """Separable Gaussian blur of every channel."""
+    if sigma <= 0:
+        return pixels
+    kernel = gaussian_kernel(sigma, radius)
+    return _convolve_axis(_convolve_axis(pixels, kernel, 0), kernel, 1)
+
+
+def brightness_contrast(pixels: Pixels, brightness: float, contrast: float) -> Pixels:
+    """ImageMagick's -brightness-contrast: a line through mid-gray."""
+    slope = max(0.0, math.tan(math.pi * (contrast / 100 + 1) / 4))
+    intercept = brightness / 100 + ((100 - brightness) / 200) * (1 - slope)
+    rgb = pixels[..., :3] * np.float32(slope) + np.float32(intercept)
+    return _rgb(pixels, np.clip(rgb, 0.0, 1.0))
+
+
+def _to_hsl(rgb: Pixels) -> tuple[Pixels, Pixels, Pixels]:
+    """RGB to hue (0-1), saturation and lightness, as ImageMagick does."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    high, low = rgb.max(axis=2), rgb.min(axis=2)
+    chroma = high - low
+    lightness = (high + low) / 2
+    safe = np.where(chroma > 0, chroma, 1)
+    hue = np.where(
+        high == r,
+        (g - b) / safe + np.where(g < b, 6, 0),
+        np.where(high == g, 2 + (b - r) / safe, 4 + (r - g) / safe),
+    )
+    hue = np.where(chroma > 0, hue / 6, 0)
+    denominator = np.where(lightness <= 0.5, 2 * lightness, 2 - 2 * lightness)
+    saturation = np.where(chroma > 0, chroma / np.maximum(denominator, 1e-12), 0)
+    return (
+        hue.astype(np.float32),
+        saturation.astype(np.float32),
+        lightness.astype(np.float32),
+    )
+
+
+def _from_hsl(hue: Pixels, saturation: Pixels, lightness: Pixels) -> Pixels:
+    """Hue (0-1), saturation and lightness back to RGB."""
+    chroma = np.where(lightness <= 0.5, 2 * lightness, 2 - 2 * lightness) * saturation
+    low = lightness - chroma / 2
+    h = (hue - np.floor(hue)) * 6
+    x = chroma * (1 - np.abs(h - 2 * np.floor(h / 2) - 1))
+    sector = np.floor(h).astype(np.int8) % 6
+    zero = np.zeros_like(chroma)
+    r = np.choose(sector, [chroma, x, zero, zero, x, chroma])
+    g = np.choose(sector, [x, chroma, chroma, x, zero, zero])
+    b = np.choose(sector, [zero, zero, x, chroma, chroma, x])
+    return (np.stack([r, g, b], axis=2) + low[..., None]).astype(np.float32)
+
+
+def modulate(
+    pixels: Pixels, brightness: float, saturation: float, hue: float
+) -> Pixels:
+    """ImageMagick's -modulate in its default HSL colorspace."""
+    h, s, lum = _to_hsl(pixels[..., :3])
+    h = h + ((hue - 100) % 200) / 200
+    rgb = _from_hsl(h, s * np.float32(saturation / 100), lum * (brightness / 100))
+    return _rgb(pixels, np.clip(rgb, 0.0, 1.0))
+
+
+def _contrast_stretch(rgb: Pixels, black: float, white: float) -> Pixels:
+    """Stretch each channel between two of its quantiles (-normalize)."""
+    flat = rgb.reshape(-1, 3)
+    low, high = np.quantile(flat, [black, white], axis=0)
+    span = np.where(high > low, high - low, 1)
+    stretched: Pixels = np.clip((rgb - low) / span, 0.0, 1.0)
+    return stretched.astype(np.float32)
+
+
+def _sigmoidal_contrast(rgb: Pixels) -> Pixels:
+    """ImageMagick's -contrast: an S-curve on the HSB brightness."""
+    value = rgb.max(axis=2)
+    target = value + 0.5 * (0.5 * (np.sin(np.pi * (value - 0.5)) + 1) - value)
+    scale = np.where(value > 0, np.clip(target, 0, 1) / np.maximum(value, 1e-12), 0)
+    return (rgb * scale[..., None]).astype(np.float32)
+
+
+def sepia_tone(pixels: Pixels, threshold: float) -> Pixels:
+    """ImageMagick's -sepia-tone (threshold 0-1)."""
+    rgb = pixels[..., :3]
+    intensity = rgb @ np.array([0.212656, 0.715158, 0.072186], np.float32)
+    t = np.float32(threshold)
+    red = np.where(intensity > t, 1, intensity + 1 - t)
+    green = np.where(intensity > 7 * t / 6, 1, intensity + 1 - 7 * t / 6)
+    blue = np.where(intensity < t / 6, 0, intensity - t / 6)
+    green = np.maximum(green, t / 7)
+    blue = np.maximum(blue, t / 7)
+    toned = np.clip(np.stack([red, green, blue], axis=2), 0, 1).astype(np.float32)
+    # ImageMagick then normalizes (0.15% / 99.95%) and raises contrast
+    return _rgb(pixels, _sigmoidal_contrast(_contrast_stretch(toned, 0.0015, 0.9995)))
+
+
+@functools.lru_cache(maxsize=8)
+def vignette_mask(width: int, height: int, sigma: float, radius: int = 0) -> Pixels:
+    """Blurred ellipse mask of -vignette (1 = image, 0 = background).
+
+    The ellipse is inset by 10% of each dimension on every side, the
+    default offsets of -vignette. Cached, since batches apply the same
+    vignette to many images of one size.
+    """
+    y, x = np.ogrid[:height, :width]
+    rx, ry = 0.4 * width, 0.4 * height
+    inside = ((x + 0.5 - width / 2) / rx) ** 2 + ((y + 0.5 - height / 2) / ry) ** 2
+    mask = (inside <= 1).astype(np.float32)[..., None]
+    blurred = gaussian_blur(mask, sigma, radius)
+    blurred.flags.writeable = False
+    return blurred
+
+
+def vignette(pixels: Pixels, sigma: float, radius: int = 0) -> Pixels:
+    """ImageMagick's -vignette over the default white background.
+
+    Like ImageMagick, the result is flattened, so any alpha is dropped.
+    """
+    height, width = pixels.shape[:2]
+    mask = vignette_mask(width, height, sigma, radius)
+    return (pixels[..., :3] * mask + (1 - mask)).astype(np.float32)
+
+
+def colorize(pixels: Pixels, color: str, opacity: float) -> Pixels:
+    """ImageMagick's -fill COLOR -colorize OPACITY% (opacity 0-1)."""
+    fill = np.array(
+        [int(color[i : i + 2], 16) / 255 for i in (1, 3, 5)], dtype=np.float32
+    )
+    o = np.float32(opacity)
+    return _rgb(pixels, pixels[..., :3] * (1 - o) + fill * o)
+
+
+# ============================================================================
+# Operator table
+# ============================================================================
+
+_NUMBER = r"-?\d+(?:\.\d+)?"
+
+
+@_operator(r"-blur (?P<radius>\d+)x(?P<sigma>\d+(?:\.\d+)?)")
+def _blur(m: dict[str, str]) -> NativeOp:
+    sigma, radius = float(m["sigma"]), int(m["radius"])
+    return lambda pixels: gaussian_blur(pixels, sigma, radius)
+
+
+@_operator(r"-grayscale Average")
+def _grayscale(_: dict[str, str]) -> NativeOp:
+    def apply(pixels: Pixels) -> Pixels:
+        gray = pixels[..., :3].mean(axis=2, keepdims=True)
+        return _rgb(pixels, np.repeat(gray, 3, axis=2))
+
+    return apply
+
+
+@_operator(r"(?:-channel RGB )?-negate(?: \+channel)?")
+def _negate(_: dict[str, str]) -> NativeOp:
+    return lambda pixels: _rgb(pixels, 1 - pixels[..., :3])
+
+
+@_operator(
+    rf"-brightness-contrast (?P<brightness>{_NUMBER})(?:x(?P<contrast>{_NUMBER}))?%?"
+)
+def _brightness_contrast(m: dict[str, str]) -> NativeOp:
+    brightness, contrast = float(m["brightness"]), float(m["contrast"] or 0)
+    return lambda pixels: brightness_contrast(pixels, brightness, contrast)
+
+
+@_operator(rf"-modulate (?P<b>{_NUMBER})(?:,(?P<s>{_NUMBER}))?(?:,(?P<h>{_NUMBER}))?")
+def _modulate(m: dict[str, str]) -> NativeOp:
+    b, s, h = float(m["b"]), float(m["s"] or 100), float(m["h"] or 100)
+    return lambda pixels: modulate(pixels, b, s, h)
+
+
+@_operator(rf"-sepia-tone (?P<threshold>{_NUMBER})%")
+def _sepia(m: dict[str, str]) -> NativeOp:
+    threshold = float(m["threshold"]) / 100
+    return lambda pixels: sepia_tone(pixels, threshold)
+
+
+@_operator(r"-vignette (?P<radius>\d+)x(?P<sigma>\d+(?:\.\d+)?)")
+def _vignette(m: dict[str, str]) -> NativeOp:
+    sigma, radius = float(m["sigma"]), int(m["radius"])
+    return lambda pixels: vignette(pixels, sigma, radius)
+
+
+@_operator(rf"-fill (?P<color>#[0-9a-fA-F]{{6}}) -colorize (?P<opacity>{_NUMBER})%")
+def _colorize(m: dict[str, str]) -> NativeOp:
+    color, opacity = m["color"], float(m["opacity"]) / 100
+    return lambda pixels: colorize(pixels, color, opacity)
+
+
+# ============================================================================
+# Backend
+# ============================================================================
+
+
+class NativeBackend(ImageBackend[NativeImage]):
+    """Decode once, run NumPy operations, encode once."""
+
+    name = "numpy"
+    label = "NumPy"
+    capabilities = BackendCapabilities(
+        in_process=True, shares_inputs=False, any_command=False
+    )
+
+    def supports(self, steps: list[ChainStep]) -> bool:
+        """Check if every step has a NumPy implementation."""
+        return chain_ops(self.config, steps) is not None
+
+    def load(self, data: bytes) -> NativeImage:
+        """Decode an image with ImageMagick to PAM, then to pixels."""
+        decoded = self.executor.execute_bytes(
+            DECODE_COMMAND, data, "pam", None, self.chain_executor.limits
+        )
+        if not decoded.success:
+            raise BackendError(decoded.stderr, decoded)
+        try:
+            return decode_pam(decoded.data)
+        except ValueError as e:
+            raise BackendError(f"Cannot decode image: {e}") from e
+
+    def apply_effect(self, image: NativeImage, step: ChainStep) -> NativeImage:
+        """Run a step's NumPy operation, or else its magick command on PAM."""
+        op = step_op(self.config, step)
+        pixels, maxval = image
+        if op is not None:
+            return op(pixels), maxval
+        return self._run_command(pixels, maxval, step)
+
+    def _run_command(self, pixels: Pixels, maxval: int, step: ChainStep) -> NativeImage:
+        """Run a step's command in magick (chains with Python effects only)."""
+        command = self.config.effects[step.effect].command
+        if not is_streamable(command):
+            raise BackendError(
+                "its command must use $INPUT and $OUTPUT exactly once to run "
+                "in a chain with Python effects"
+            )
+        result = self.executor.execute_bytes(
+            command,
+            encode_pam(pixels, maxval),
+            "pam",
+            self.chain_executor._get_params_with_defaults(step.effect, step.params),
+            self.chain_executor.effect_limits(step.effect),
+        )
+        if not result.success:
+            raise BackendError(result.stderr, result)
+        try:
+            return decode_pam(result.data)
+        except ValueError as e:
+            raise BackendError(f"Cannot decode step output: {e}") from e
+
+    def save(
+        self, image: NativeImage, output_format: str, encode_command: str
+    ) -> bytes:
+        """Encode pixels as PAM at the input's depth, then with ImageMagick."""
+        pixels, maxval = image
+        encoded = self.executor.execute_bytes(
+            encode_command,
+            encode_pam(pixels, maxval),
+            output_format,
+            None,
+            self.chain_executor.limits,
+        )
+        if not encoded.success:
+            raise BackendError(encoded.stderr, encoded)
+        return encoded.data
@@ -0,0 +1,270 @@
+"""Chain optimizer: rewrite composite chains into cheaper equivalent ones.
+
+Rewrites are driven by the `traits` each effect declares in effects.yaml;
+effects without traits are left alone and act as barriers.
+
+Safe rewrites change the output by at most one quantization level per
+channel (from rounding in a different order):
+
+- identity: drop steps whose parameters make them a no-op
+- idempotent: collapse repeats of an idempotent effect into one
+- involution: drop pairs of an effect that undoes itself
+- reorder: run a channel reduction before the spatial filter preceding it,
+  so the filter works on one channel instead of three
+
+Approximate rewrites may also differ where the first of two steps clips:
+
+- merge: combine consecutive steps of the same effect into one
+
+A chain rewritten to nothing becomes one no-op step (an effect with its
+identity parameters), which still writes the output.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal
+
+from wallpaper_core.effects.schema import ChainStep, EffectTraits
+from wallpaper_core.engine.params import ParameterValidator, params_with_defaults
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import EffectsConfig
+
+OptimizeMode = Literal["off", "safe", "approximate"]
+
+# Cost of running any step (process start, decode, encode), in the same
+# units as EffectTraits.cost
+STEP_OVERHEAD = 1.0
+
+# Share of the work left for pointwise and spatial steps on a one-channel image
+GRAY_FACTOR = 1 / 3
+
+
+@dataclass
+class ChainOptimization:
+    """A chain before and after optimization."""
+
+    original: list[ChainStep]
+    steps: list[ChainStep]
+    rewrites: list[str] = field(default_factory=list)
+    cost_before: float = 0.0
+    cost_after: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        """Whether any rewrite was applied."""
+        return bool(self.rewrites)
+
+    @property
+    def savings(self) -> float:
+        """Estimated share of the chain's cost saved (0-1)."""
+        if self.cost_before <= 0:
+            return 0.0
+        return 1 - self.cost_after / self.cost_before
+
+
+def describe_step(step: ChainStep) -> str:
+    """Short form of a step, e.g. "blur(blur=0x8)"."""
+    if not step.params:
+        return step.effect
+    params = ", ".join(f"{k}={v}" for k, v in step.params.items())
+    return f"{step.effect}({params})"
+
+
+class ChainOptimizer:
+    """Rewrite chains using the traits declared on their effects."""
+
+    def __init__(
+        self,
+        config: EffectsConfig,
+        mode: OptimizeMode = "safe",
+        validator: ParameterValidator | None = None,
+    ) -> None:
+        """Initialize ChainOptimizer.
+
+        Args:
+            config: Effects configuration
+            mode: "off", "safe" or "approximate" (see module docstring)
+            validator: Validator used to normalize parameter values
+        """
+        self.config = config
+        self.mode = mode
+        self.validator = validator or ParameterValidator(config)
+
+    def optimize(self, chain: list[ChainStep]) -> ChainOptimization:
+        """Rewrite a chain until no rule applies.
+
+        Args:
+            chain: Validated chain steps
+
+        Returns:
+            The rewritten chain with the rewrites applied and cost estimates
+        """
+        steps = [self._resolved(step) for step in chain]
+        result = ChainOptimization(
+            original=list(chain), steps=list(steps), cost_before=self.cost(steps)
+        )
+        if self.mode != "off":
+            changed = True
+            while changed:
+                changed = (
+                    self._drop_identities(result)
+                    or self._collapse_pairs(result)
+                    or self._reorder(result)
+                    or (self.mode == "approximate" and self._merge(result))
+                )
+        if not result.steps and steps:
+            # Everything cancelled out; one step still has to write the output
+            self._pass_through(result, steps)
+        result.cost_after = self.cost(result.steps)
+        return result
+
+    def _pass_through(self, result: ChainOptimization, steps: list[ChainStep]) -> None:
+        """Replace an emptied chain with one step that leaves pixels alone.
+
+        That is the cheapest effect with identity parameters (brightness 0,
+        blur 0x0, ...), so the image is only decoded and encoded again. If
+        no effect declares any, the chain runs as written.
+        """
+        identities = [
+            ChainStep(effect=name, params=dict(effect.traits.identity))
+            for name, effect in self.config.effects.items()
+            if effect.traits is not None and effect.traits.identity
+        ]
+        if not identities:
+            result.steps = list(steps)
+            result.rewrites.clear()
+            return
+        step = self._resolved(min(identities, key=lambda s: self._traits(s).cost))
+        result.steps = [step]
+        result.rewrites.append(f"passed the image through with {describe_step(step)}")
+
+    def cost(self, steps: list[ChainStep]) -> float:
+        """Estimate the cost of running steps in order."""
+        total = 0.0
+        gray = False
+        for step in steps:
+            traits = self._traits(step)
+            total += STEP_OVERHEAD + traits.cost * (GRAY_FACTOR if gray else 1.0)
+            gray = gray or traits.kind == "reduction"
+        return total
+
+    def _traits(self, step: ChainStep) -> EffectTraits:
+        effect = self.config.effects.get(step.effect)
+        if effect is None or effect.traits is None:
+            return EffectTraits()
+        return effect.traits
+
+    def _resolved(self, step: ChainStep) -> ChainStep:
+        """Step with every parameter set, so steps can be compared."""
+        params = params_with_defaults(self.config, step.effect, step.params)
+        return ChainStep(effect=step.effect, params=params)
+
+    def _normalized(self, effect_name: str, name: str, value: Any) -> Any:
+        """Parameter value converted to its type (for comparisons)."""
+        definition = self.config.effects[effect_name].parameters.get(name)
+        if definition is None:
+            return value
+        try:
+            compiled = self.validator.compiled_type(definition.type)
+            return compiled.coerce(value) if compiled is not None else str(value)
+        except ValueError:
+            return value
+
+    def _same_params(self, a: ChainStep, b: ChainStep) -> bool:
+        if set(a.params) != set(b.params):
+            return False
+        return all(
+            self._normalized(a.effect, k, a.params[k])
+            == self._normalized(b.effect, k, b.params[k])
+            for k in a.params
+        )
+
+    def _is_identity(self, step: ChainStep) -> bool:
+        identity = self._traits(step).identity
+        return bool(identity) and all(
+            k in step.params
+            and self._normalized(step.effect, k, step.params[k])
+            == self._normalized(step.effect, k, v)
+            for k, v in identity.items()
+        )
+
+    def _drop_identities(self, result: ChainOptimization) -> bool:
+        for i, step in enumerate(result.steps):
+            if self._is_identity(step):
+                del result.steps[i]
+                result.rewrites.append(f"dropped no-op {describe_step(step)}")
+                return True
+        return False
+
+    def _collapse_pairs(self, result: ChainOptimization) -> bool:
+        steps = result.steps
+        for i in range(len(steps) - 1):
+            a, b = steps[i], steps[i + 1]
+            if a.effect != b.effect or not self._same_params(a, b):
+                continue
+            traits = self._traits(a)
+            if traits.idempotent:
+                del steps[i + 1]
+                result.rewrites.append(f"collapsed repeated {describe_step(a)}")
+                return True
+            if traits.involution:
+                del steps[i : i + 2]
+                result.rewrites.append(f"dropped {a.effect} applied twice")
+                return True
+        return False
+
+    def _reorder(self, result: ChainOptimization) -> bool:
+        steps = result.steps
+        for i in range(len(steps) - 1):
+            a, b = steps[i], steps[i + 1]
+            if (
+                self._traits(a).kind == "spatial"
+                and self._traits(b).kind == "reduction"
+            ):
+                steps[i], steps[i + 1] = b, a
+                result.rewrites.append(f"moved {b.effect} before {a.effect}")
+                return True
+        return False
+
+    def _merge(self, result: ChainOptimization) -> bool:
+        steps = result.steps
+        for i in range(len(steps) - 1):
+            a, b = steps[i], steps[i + 1]
+            merged = self._merged(a, b)
+            if merged is not None:
+                steps[i : i + 2] = [merged]
+                result.rewrites.append(
+                    f"merged {describe_step(a)} and {describe_step(b)} "
+                    f"into {describe_step(merged)}"
+                )
+                return True
+        return False
+
+    def _merged(self, a: ChainStep, b: ChainStep) -> ChainStep | None:
+        """Combine two steps of the same effect, or None if they cannot be."""
+        merge = self._traits(a).merge
+        if a.effect != b.effect or not merge or set(a.params) != set(b.params):
+            return None
+        params: dict[str, Any] = {}
+        for name in a.params:
+            x = self._normalized(a.effect, name, a.params[name])
+            y = self._normalized(b.effect, name, b.params[name])
+            op = merge.get(name)
+            if op is None:
+                if x != y:
+                    return None
+                params[name] = x
+            elif not isinstance(x, int | float) or not isinstance(y, int | float):
+                return None
+            elif op == "add":
+                params[name] = x + y
+            else:
+                value = x * y / 100
+                params[name] = round(value) if isinstance(x, int) else value
+        merged = ChainStep(effect=a.effect, params=params)
+        # Out-of-range results cannot be expressed as one step
+        if self.validator.check_params(a.effect, params):
+            return None
+        return merged
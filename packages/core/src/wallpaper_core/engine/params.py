@@ -0,0 +1,287 @@
+"""Effect parameter values checked against their parameter types."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import ParameterType
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+
+ParamValue = str | int | float
+
+# Built-in types a parameter may name instead of a parameter_types entry
+PRIMITIVE_TYPES = ("string", "integer", "float")
+
+
+@dataclass(frozen=True)
+class CompiledType:
+    """A parameter type with its pattern compiled, ready to check values."""
+
+    type: str
+    min: int | float | None = None
+    max: int | float | None = None
+    pattern: re.Pattern[str] | None = None
+
+    @classmethod
+    def compile(cls, param_type: ParameterType) -> CompiledType:
+        """Compile a parameter type.
+
+        Raises:
+            ValueError: If the type's pattern is not a valid regex
+        """
+        try:
+            pattern = re.compile(param_type.pattern) if param_type.pattern else None
+        except re.error as e:
+            raise ValueError(f"invalid pattern {param_type.pattern!r}: {e}") from e
+        return cls(param_type.type, param_type.min, param_type.max, pattern)
+
+    def coerce(self, raw: ParamValue) -> ParamValue:
+        """Convert a value to this type and check its constraints.
+
+        Args:
+            raw: Value as given on the command line or in a config
+
+        Returns:
+            The typed value
+
+        Raises:
+            ValueError: If the value has the wrong type, is out of range or
+                does not match the type's pattern
+        """
+        value: ParamValue
+        if self.type == "integer":
+            try:
+                value = int(raw)
+            except (TypeError, ValueError):
+                raise ValueError(f"'{raw}' is not an integer") from None
+            if isinstance(raw, float) and raw != value:
+                raise ValueError(f"'{raw}' is not an integer")
+        elif self.type == "float":
+            try:
+                value = float(raw)
+            except (TypeError, ValueError):
+                raise ValueError(f"'{raw}' is not a number") from None
+        else:
+            value = str(raw)
+
+        if isinstance(value, int | float):
+            if self.min is not None and value < self.min:
+                raise ValueError(f"{value} is below the minimum {self.min}")
+            if self.max is not None and value > self.max:
+                raise ValueError(f"{value} is above the maximum {self.max}")
+        if self.pattern is not None and not self.pattern.search(str(value)):
+            raise ValueError(f"'{value}' does not match {self.pattern.pattern}")
+        return value
+
+
+def parameter_type(
+    config: EffectsConfig, effect_name: str, param_name: str
+) -> ParameterType | None:
+    """Get the type of one effect parameter.
+
+    Returns:
+        The referenced parameter type (an unconstrained one for built-in
+        type names), or None if the type is not defined
+
+    Raises:
+        ValueError: If the effect or parameter does not exist
+    """
+    effect = config.effects.get(effect_name)
+    if effect is None:
+        raise ValueError(f"Unknown effect: {effect_name}")
+    definition = effect.parameters.get(param_name)
+    if definition is None:
+        known = ", ".join(effect.parameters) or "none"
+        raise ValueError(
+            f"Effect '{effect_name}' has no parameter '{param_name}' (known: {known})"
+        )
+    if definition.type in PRIMITIVE_TYPES:
+        return config.parameter_types.get(
+            definition.type, ParameterType(type=definition.type, default=None)
+        )
+    return config.parameter_types.get(definition.type)
+
+
+def params_with_defaults(
+    config: EffectsConfig, effect_name: str, override_params: dict[str, Any]
+) -> dict[str, Any]:
+    """Get an effect's parameters with defaults filled in.
+
+    Explicit values win, then the parameter's default, then the default of
+    its parameter type.
+    """
+    effect = config.effects.get(effect_name)
+    if effect is None:
+        return override_params
+
+    params = {}
+    for param_name, param_def in effect.parameters.items():
+        if param_name in override_params:
+            params[param_name] = override_params[param_name]
+        elif param_def.default is not None:
+            params[param_name] = param_def.default
+        else:
+            # Try to get default from parameter_types
+            param_type = config.parameter_types.get(param_def.type)
+            if param_type and param_type.default is not None:
+                params[param_name] = param_type.default
+
+    return params
+
+
+def typed_params(
+    config: EffectsConfig, effect_name: str, override_params: dict[str, Any]
+) -> dict[str, ParamValue]:
+    """Get an effect's parameters with defaults filled in, converted to their types.
+
+    Raises:
+        ValueError: If a value does not fit its parameter type
+    """
+    typed: dict[str, ParamValue] = {}
+    for name, value in params_with_defaults(
+        config, effect_name, override_params
+    ).items():
+        param_type = parameter_type(config, effect_name, name)
+        typed[name] = (
+            CompiledType.compile(param_type).coerce(value)
+            if param_type is not None
+            else value
+        )
+    return typed
+
+
+class ParameterValidator:
+    """Check parameters, chains and batch items before anything runs.
+
+    Each parameter type is compiled once per validator, and every check
+    returns all the problems it finds rather than stopping at the first, so
+    a whole batch can be rejected (or trimmed) before a process is spawned.
+    """
+
+    def __init__(self, config: EffectsConfig) -> None:
+        """Initialize ParameterValidator.
+
+        Args:
+            config: Effects configuration
+        """
+        self.config = config
+        self._types: dict[str, CompiledType | None] = {}
+        self._errors: dict[str, str] = {}
+
+    def compiled_type(self, type_name: str) -> CompiledType | None:
+        """Get a compiled parameter type (None = no constraints).
+
+        Raises:
+            ValueError: If the type's pattern is not a valid regex
+        """
+        if type_name in self._errors:
+            raise ValueError(self._errors[type_name])
+        if type_name not in self._types:
+            param_type = self.config.parameter_types.get(type_name)
+            try:
+                if param_type is not None:
+                    self._types[type_name] = CompiledType.compile(param_type)
+                elif type_name in PRIMITIVE_TYPES:
+                    self._types[type_name] = CompiledType(type_name)
+                else:
+                    self._types[type_name] = None
+            except ValueError as e:
+                self._errors[type_name] = f"parameter type '{type_name}': {e}"
+                raise ValueError(self._errors[type_name]) from e
+        return self._types[type_name]
+
+    def check_params(
+        self, effect_name: str, params: dict[str, Any], context: str = ""
+    ) -> list[str]:
+        """Check an effect's parameters, including the defaults it falls back to.
+
+        Args:
+            effect_name: Effect the parameters are for
+            params: Explicitly given parameters
+            context: Prefix for error messages (e.g. "step 2 (blur): ")
+
+        Returns:
+            Error messages (empty if the parameters are valid)
+        """
+        effect = self.config.effects.get(effect_name)
+        if effect is None:
+            return [f"{context}Unknown effect: {effect_name}"]
+
+        errors = [
+            f"{context}Effect '{effect_name}' has no parameter '{name}'"
+            for name in params
+            if name not in effect.parameters
+        ]
+        for name, value in params_with_defaults(
+            self.config, effect_name, params
+        ).items():
+            try:
+                compiled = self.compiled_type(effect.parameters[name].type)
+                if compiled is not None:
+                    compiled.coerce(value)
+            except ValueError as e:
+                errors.append(f"{context}{name}: {e}")
+        return errors
+
+    def check_chain(self, chain: list[ChainStep]) -> list[str]:
+        """Check every step of a chain.
+
+        Returns:
+            Error messages (empty if the chain can run)
+        """
+        if not chain:
+            return ["Empty chain"]
+        errors: list[str] = []
+        for i, step in enumerate(chain, 1):
+            if step.effect not in self.config.effects:
+                errors.append(f"Unknown effect in chain: {step.effect} (step {i})")
+                continue
+            context = f"step {i} ({step.effect}): " if len(chain) > 1 else ""
+            errors.extend(self.check_params(step.effect, step.params, context))
+        return errors
+
+    def check_item(self, name: str, item_type: ItemType) -> list[str]:
+        """Check an effect, composite or preset and everything it references.
+
+        Returns:
+            Error messages (empty if the item can run)
+        """
+        if item_type == ItemType.EFFECT:
+            if name not in self.config.effects:
+                return [f"Unknown effect: {name}"]
+            return self.check_params(name, {})
+        if item_type == ItemType.COMPOSITE:
+            composite = self.config.composites.get(name)
+            if composite is None:
+                return [f"Unknown composite: {name}"]
+            return self.check_chain(list(composite.chain))
+        if item_type == ItemType.PRESET:
+            preset = self.config.presets.get(name)
+            if preset is None:
+                return [f"Unknown preset: {name}"]
+            if preset.composite:
+                return self.check_item(preset.composite, ItemType.COMPOSITE)
+            if preset.effect:
+                return self.check_params(preset.effect, preset.params)
+            return [f"Preset '{name}' has no effect or composite"]
+        return [f"Unknown type: {item_type}"]
+
+    def check_items(
+        self, items: list[tuple[str, ItemType]]
+    ) -> dict[tuple[str, ItemType], list[str]]:
+        """Check batch items.
+
+        Returns:
+            Error messages of each invalid item (valid items are omitted)
+        """
+        errors: dict[tuple[str, ItemType], list[str]] = {}
+        for name, item_type in items:
+            item_errors = self.check_item(name, item_type)
+            if item_errors:
+                errors[(name, item_type)] = item_errors
+        return errors
@@ -0,0 +1,770 @@
+"""Serializable execution plans: resolve a batch once, run it later."""
+
+from __future__ import annotations
+
+import contextlib
+import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, Field
+
+from wallpaper_core.config.schema import ItemType, LimitSettings
+from wallpaper_core.engine.batch import (
+    BatchResult,
+    batch_base_dir,
+    item_chain,
+    item_names,
+    item_output_path,
+)
+from wallpaper_core.engine.cancel import CancelToken
+from wallpaper_core.engine.cascade import (
+    ENCODE_COMMAND,
+    BlurCascade,
+    CascadeSource,
+    blur_groups,
+)
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.clut import ClutStep, clut_command, identity_hald
+from wallpaper_core.engine.encoding import (
+    INTERMEDIATE_FORMAT,
+    apply_encoding,
+    encoding_options,
+    resolve_item_encoding,
+)
+from wallpaper_core.engine.executor import (
+    CommandExecutor,
+    ExecutionResult,
+    substitute_command,
+)
+from wallpaper_core.engine.plugins import command_only_error
+from wallpaper_core.engine.probe import ImageInfo, ImageProber
+from wallpaper_core.engine.variants import (
+    PRESCALE_COMMAND,
+    OutputGeometry,
+    build_variants_command,
+    master_geometry,
+    variant_output_path,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Collection
+
+    from wallpaper_core.config.schema import EncodingSettings
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.console.progress import BatchProgress
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+    from wallpaper_core.engine.optimize import OptimizeMode
+
+PLAN_VERSION = 1
+
+# Hidden directory of the output tree holding a plan's color lookup tables
+CLUT_SUBDIR = ".cluts"
+
+
+class PlanJob(BaseModel):
+    """One fully resolved command of an execution plan."""
+
+    id: str = Field(
+        description="Unique job id (<item-type>/<item>/<step>, clut/<hash> "
+        "or blur/<effect>/<stage>)"
+    )
+    item: str = Field(description="Effect, composite or preset the job belongs to")
+    item_type: ItemType
+    effect: str = Field(description="Effect applied by this command")
+    command: str = Field(description="Shell command, ready to run")
+    inputs: list[Path] = Field(default_factory=list)
+    outputs: list[Path] = Field(default_factory=list)
+    depends_on: list[str] = Field(
+        default_factory=list, description="Jobs that must succeed first"
+    )
+    cleanup: list[Path] = Field(
+        default_factory=list,
+        description="Intermediates removed once the job has run or been skipped",
+    )
+    limits: LimitSettings = Field(default_factory=LimitSettings)
+    cost: float = Field(
+        default=0.0, description="Estimated cost (megabytes of source decoded)"
+    )
+
+
+class ExecutionPlan(BaseModel):
+    """Every job of a batch, with its inputs, outputs and dependencies."""
+
+    version: int = PLAN_VERSION
+    input_path: Path
+    output_dir: Path
+    jobs: list[PlanJob] = Field(default_factory=list)
+    cleanup: list[Path] = Field(
+        default_factory=list,
+        description="Intermediates shared by several items, removed at the end",
+    )
+
+    @property
+    def cost(self) -> float:
+        """Total estimated cost of the plan."""
+        return sum(job.cost for job in self.jobs)
+
+    def items(self) -> dict[str, list[PlanJob]]:
+        """Jobs of each item, in plan order."""
+        items: dict[str, list[PlanJob]] = {}
+        for job in self.jobs:
+            items.setdefault(job.item, []).append(job)
+        return items
+
+    def split(self, parts: int) -> list[ExecutionPlan]:
+        """Split into independent plans of similar total cost.
+
+        Jobs linked by dependencies always stay in the same part. Groups
+        are assigned largest first to the least loaded part, so every
+        machine computing the split gets the same result.
+
+        Args:
+            parts: Number of plans to produce
+
+        Returns:
+            `parts` plans (some may be empty if there are few groups)
+        """
+        if parts < 1:
+            raise ValueError("parts must be at least 1")
+
+        parent = {job.id: job.id for job in self.jobs}
+
+        def find(job_id: str) -> str:
+            while parent[job_id] != job_id:
+                job_id = parent[job_id]
+            return job_id
+
+        for job in self.jobs:
+            for dependency in job.depends_on:
+                if dependency in parent:
+                    parent[find(job.id)] = find(dependency)
+
+        groups: dict[str, list[PlanJob]] = {}
+        for job in self.jobs:
+            groups.setdefault(find(job.id), []).append(job)
+
+        plans = [
+            self.model_copy(update={"jobs": [], "cleanup": []}, deep=True)
+            for _ in range(parts)
+        ]
+        ordered = sorted(
+            groups.values(), key=lambda jobs: sum(j.cost for j in jobs), reverse=True
+        )
+        for jobs in ordered:
+            target = min(plans, key=lambda plan: (plan.cost, len(plan.jobs)))
+            target.jobs.extend(jobs)
+        order = {job.id: i for i, job in enumerate(self.jobs)}
+        for plan in plans:
+            plan.jobs.sort(key=lambda job: order[job.id])
+            plan.cleanup = [
+                path
+                for path in self.cleanup
+                if any(path in out.parents for job in plan.jobs for out in job.outputs)
+            ]
+        return plans
+
+    def write(self, path: Path) -> None:
+        """Write the plan as JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.model_dump_json(indent=2) + "\n")
+
+    @classmethod
+    def read(cls, path: Path) -> ExecutionPlan:
+        """Read a plan written by write().
+
+        Raises:
+            ValueError: If the file is not a valid plan of this version
+        """
+        plan = cls.model_validate_json(path.read_text())
+        if plan.version != PLAN_VERSION:
+            raise ValueError(
+                f"Unsupported plan version {plan.version} (expected {PLAN_VERSION})"
+            )
+        return plan
+
+
+@dataclass(frozen=True)
+class PlanItem:
+    """An item to plan: its chain and the file it renders."""
+
+    name: str
+    item_type: ItemType
+    chain: list[ChainStep]
+    output_path: Path
+
+
+def build_plan(
+    config: EffectsConfig,
+    input_path: Path,
+    output_dir: Path,
+    item_types: list[ItemType],
+    flat: bool = False,
+    explicit_output: bool = False,
+    encoding: EncodingSettings | None = None,
+    limits: LimitSettings | None = None,
+    binary: str | None = None,
+    optimize: OptimizeMode = "safe",
+    fuse_pointwise: bool = False,
+    clut_dir: Path | None = None,
+    geometries: list[OutputGeometry] | None = None,
+    cascade_blurs: bool = False,
+    blur_tolerance: float = 0.0,
+    exclude: Collection[tuple[str, ItemType]] = (),
+) -> ExecutionPlan:
+    """Resolve a batch into an execution plan.
+
+    Output paths, commands and limits come from the same helpers that
+    BatchGenerator uses. Chains become one job per step; intermediates live
+    in a hidden `.<output-name>.work` directory next to the item's output,
+    since the machine running the plan may have a different temp dir. For
+    the same reason color lookup tables for fused pointwise steps are
+    rendered by jobs of the plan, by default into a hidden `.cluts`
+    directory of the output tree.
+
+    Args:
+        config: Effects configuration
+        input_path: Input image
+        output_dir: Output directory
+        item_types: Item types to include, in order
+        flat: Omit type subdirectories
+        explicit_output: output_dir was given explicitly
+        encoding: Global encoding profile
+        limits: Global per-command limits
+        binary: ImageMagick binary (auto-detected if None)
+        optimize: Chain optimizer mode (see ChainOptimizer)
+        fuse_pointwise: Apply runs of pointwise effects as one color lookup
+            table (see engine.clut)
+        clut_dir: Directory of the color lookup tables (None = `.cluts` in
+            the output tree)
+        geometries: Output sizes to derive from each item (None = as-is)
+        cascade_blurs: Derive the Gaussian blurs items start with from
+            each other (see engine.cascade)
+        blur_tolerance: Share of sigma a downscaled pixel may cover when
+            approximating large blurs (0 = exact)
+        exclude: Items to leave out of the plan
+
+    Returns:
+        The execution plan
+
+    Raises:
+        ValueError: Listing every item that references an unknown effect or
+            composite or has parameters that do not match their types
+    """
+    base_dir = batch_base_dir(input_path, output_dir, item_types, flat, explicit_output)
+    planner = ChainExecutor(
+        config,
+        None,
+        encoding,
+        limits=limits,
+        optimize=optimize,
+        fuse_pointwise=fuse_pointwise,
+        clut_dir=clut_dir or base_dir / CLUT_SUBDIR,
+    )
+    keys = [
+        (name, t)
+        for t in item_types
+        for name in item_names(config, t)
+        if (name, t) not in exclude
+    ]
+    invalid = planner.validator.check_items(keys)
+    if invalid:
+        raise ValueError(
+            "; ".join(
+                f"{item_type.value} '{name}': {'; '.join(errors)}"
+                for (name, item_type), errors in invalid.items()
+            )
+        )
+
+    items: list[PlanItem] = []
+    for name, item_type in keys:
+        chain = item_chain(config, name, item_type)
+        if chain is None:
+            raise ValueError(f"Cannot plan {item_type.value} '{name}'")
+        output_path = item_output_path(
+            config, encoding, base_dir, name, item_type, input_path, flat
+        )
+        items.append(PlanItem(name, item_type, chain, output_path))
+    return plan_items(
+        planner,
+        input_path,
+        base_dir,
+        items,
+        binary,
+        geometries,
+        cascade_blurs,
+        blur_tolerance,
+    )
+
+
+def plan_items(
+    planner: ChainExecutor,
+    input_path: Path,
+    output_dir: Path,
+    items: list[PlanItem],
+    binary: str | None = None,
+    geometries: list[OutputGeometry] | None = None,
+    cascade_blurs: bool = False,
+    blur_tolerance: float = 0.0,
+) -> ExecutionPlan:
+    """Resolve items into jobs, as BatchGenerator would run them.
+
+    Each item renders through its optimized chain, one job per step. With
+    geometries it renders a prescaled copy of the input to a master, which
+    one more job resamples to every size (see engine.variants). Otherwise,
+    with cascade_blurs, items starting with a Gaussian blur of the input
+    read it from jobs shared by the whole plan (see engine.cascade).
+
+    Args:
+        planner: Executor whose optimizer, encoding, limits and CLUT cache
+            the jobs follow (nothing is run)
+        input_path: Input image
+        output_dir: Directory the plan writes into
+        items: Items to plan, in order
+        binary: ImageMagick binary (auto-detected if None)
+        geometries: Output sizes to derive from each item (None = as-is)
+        cascade_blurs: Derive leading Gaussian blurs from each other
+        blur_tolerance: Share of sigma a downscaled pixel may cover
+
+    Returns:
+        The execution plan
+
+    Raises:
+        ValueError: If an item has Python or expression effects
+    """
+    for item in items:
+        python = command_only_error(planner.config, item.chain)
+        if python is not None:
+            raise ValueError(f"{item.item_type.value} '{item.name}': {python}")
+    binary = binary or CommandExecutor().binary
+    source_mb = input_path.stat().st_size / 1e6 if input_path.exists() else 0.0
+    limits = planner.limits or LimitSettings()
+    plan = ExecutionPlan(input_path=input_path, output_dir=output_dir)
+
+    blurs: dict[tuple[str, ItemType], CascadeSource] = {}
+    if cascade_blurs and not geometries:
+        # Size variants blur a prescaled copy of the input instead
+        blurs = _blur_sources(
+            planner, input_path, output_dir, items, blur_tolerance, binary
+        )
+        plan.cleanup = sorted(
+            {blur.cascade.stages[0].path.parent for blur in blurs.values()}
+        )
+
+    for item in items:
+        output_path = item.output_path
+        work_dir = output_path.with_name(f".{output_path.name}.work")
+        prefix = f"{item.item_type.value}/{item.name}"
+        profile = resolve_item_encoding(
+            planner.config, planner.encoding, item.name, item.item_type
+        )
+        jobs: list[PlanJob] = []
+        source, target, chain = input_path, output_path, item.chain
+        depends_on: list[str] = []
+
+        if geometries:
+            source = work_dir / f"source.{INTERMEDIATE_FORMAT}"
+            target = work_dir / f"master.{INTERMEDIATE_FORMAT}"
+            jobs.append(
+                PlanJob(
+                    id=f"{prefix}/prescale",
+                    item=item.name,
+                    item_type=item.item_type,
+                    effect="prescale",
+                    command=substitute_command(
+                        PRESCALE_COMMAND,
+                        input_path,
+                        source,
+                        {"geometry": str(master_geometry(geometries))},
+                        binary,
+                    ),
+                    inputs=[input_path],
+                    outputs=[source],
+                    limits=limits,
+                    cost=source_mb,
+                )
+            )
+
+        blur = blurs.get((item.name, item.item_type))
+        if blur is not None:
+            depends_on.append(_stage_job(plan, blur, item, binary, source_mb))
+            source = blur.cascade.stage(blur.sigma).path
+            chain = blur.rest
+            if not chain:
+                jobs.append(
+                    PlanJob(
+                        id=f"{prefix}/0",
+                        item=item.name,
+                        item_type=item.item_type,
+                        effect=blur.cascade.effect,
+                        command=substitute_command(
+                            apply_encoding(ENCODE_COMMAND, profile, target),
+                            source,
+                            target,
+                            {},
+                            binary,
+                        ),
+                        inputs=[source],
+                        outputs=[target],
+                        depends_on=depends_on,
+                        limits=planner.effect_limits(blur.cascade.effect),
+                        cost=source_mb,
+                    )
+                )
+
+        steps = (
+            planner.plan_chain(chain, source, target, work_dir, generate_cluts=False)
+            if chain
+            else []
+        )
+        for i, step in enumerate(steps):
+            step_depends = list(depends_on) if i == 0 else []
+            if step.clut is not None:
+                clut_job = _clut_job(plan, planner, step.clut, item, binary)
+                if clut_job is not None:
+                    step_depends.append(clut_job)
+            jobs.append(
+                PlanJob(
+                    id=f"{prefix}/{i}",
+                    item=item.name,
+                    item_type=item.item_type,
+                    effect=step.effect,
+                    command=substitute_command(
+                        step.command,
+                        step.input_path,
+                        step.output_path,
+                        step.params,
+                        binary,
+                    ),
+                    inputs=[step.input_path],
+                    outputs=[step.output_path],
+                    depends_on=step_depends,
+                    limits=step.limits,
+                    cost=source_mb,
+                )
+            )
+
+        if geometries:
+            jobs.append(
+                PlanJob(
+                    id=f"{prefix}/variants",
+                    item=item.name,
+                    item_type=item.item_type,
+                    effect="variants",
+                    command=substitute_command(
+                        build_variants_command(
+                            output_path,
+                            geometries,
+                            encoding_options(profile, output_path),
+                        ),
+                        target,
+                        variant_output_path(output_path, geometries[-1]),
+                        {},
+                        binary,
+                    ),
+                    inputs=[target],
+                    outputs=[variant_output_path(output_path, g) for g in geometries],
+                    limits=limits,
+                    cost=source_mb,
+                )
+            )
+
+        # Each job waits for the previous one and removes the intermediates
+        # it read; the last one also removes the work directory
+        for previous, job in zip([None, *jobs], jobs, strict=False):
+            if previous is not None:
+                job.depends_on.insert(0, previous.id)
+            job.cleanup = [path for path in job.inputs if path.parent == work_dir]
+        if any(path.parent == work_dir for job in jobs for path in job.outputs):
+            jobs[-1].cleanup.append(work_dir)
+        plan.jobs.extend(jobs)
+    return plan
+
+
+def _blur_sources(
+    planner: ChainExecutor,
+    input_path: Path,
+    output_dir: Path,
+    items: list[PlanItem],
+    tolerance: float,
+    binary: str,
+) -> dict[tuple[str, ItemType], CascadeSource]:
+    """Set up blur cascades for items starting with a blur of the input.
+
+    Stages live in a hidden `.<effect>.blurs` directory of the output tree.
+    """
+    chains = {
+        (item.name, item.item_type): planner.optimizer.optimize(item.chain).steps
+        for item in items
+        if item.chain
+    }
+    groups = blur_groups(planner.config, chains)
+    info: ImageInfo | None = None
+    if groups and tolerance > 0 and input_path.exists():
+        # Downscaled blurs need the input's dimensions
+        with contextlib.suppress(ValueError):
+            info = ImageProber(binary).probe(input_path)
+
+    sources: dict[tuple[str, ItemType], CascadeSource] = {}
+    for effect, sigmas in groups.items():
+        cascade = BlurCascade(
+            planner,
+            effect,
+            list(sigmas.values()),
+            input_path,
+            output_dir / f".{effect}.blurs",
+            info,
+            tolerance,
+        )
+        for key, sigma in sigmas.items():
+            sources[key] = CascadeSource(cascade, sigma, chains[key][1:])
+    return sources
+
+
+def _stage_job(
+    plan: ExecutionPlan,
+    blur: CascadeSource,
+    item: PlanItem,
+    binary: str,
+    cost: float,
+) -> str:
+    """Add the jobs rendering a cascade up to an item's stage, once per plan.
+
+    Each stage's job belongs to the first item that needs it, so items
+    sharing a cascade stay in the same shard.
+
+    Returns:
+        The id of the job rendering the item's stage
+    """
+    cascade = blur.cascade
+    target = cascade.stage(blur.sigma)
+    source = cascade.input_path
+    depends_on: list[str] = []
+    job_id = ""
+    for i, stage in enumerate(cascade.stages):
+        job_id = f"blur/{cascade.effect}/{i}"
+        if not any(job.id == job_id for job in plan.jobs):
+            command, params = cascade.command(stage)
+            plan.jobs.append(
+                PlanJob(
+                    id=job_id,
+                    item=item.name,
+                    item_type=item.item_type,
+                    effect=cascade.effect,
+                    command=substitute_command(
+                        command, source, stage.path, params, binary
+                    ),
+                    inputs=[source],
+                    outputs=[stage.path],
+                    depends_on=depends_on,
+                    limits=cascade.chain_executor.effect_limits(cascade.effect),
+                    cost=cost,
+                )
+            )
+        if stage is target:
+            break
+        source = stage.path
+        depends_on = [job_id]
+    return job_id
+
+
+def _clut_job(
+    plan: ExecutionPlan,
+    planner: ChainExecutor,
+    clut: ClutStep,
+    item: PlanItem,
+    binary: str,
+) -> str | None:
+    """Add the job rendering a color lookup table, once per plan.
+
+    The job belongs to the first item that needs the CLUT; items sharing
+    it depend on that job and so stay in the same shard.
+
+    Returns:
+        The job's id, or None if the CLUT is already cached
+    """
+    job_id = f"clut/{clut.path.stem}"
+    if any(job.id == job_id for job in plan.jobs):
+        return job_id
+    if clut.path.exists():
+        return None
+    assert planner.cluts is not None  # a ClutStep implies fusion is on
+    level = planner.cluts.level
+    plan.jobs.append(
+        PlanJob(
+            id=job_id,
+            item=item.name,
+            item_type=item.item_type,
+            effect="clut",
+            command=substitute_command(
+                clut_command(clut.ops),
+                identity_hald(level),
+                clut.path,
+                {},
+                binary,
+            ),
+            outputs=[clut.path],
+            limits=planner.limits or LimitSettings(),
+        )
+    )
+    return job_id
+
+
+def _remove(paths: list[Path]) -> None:
+    """Remove job intermediates (directories recursively)."""
+    for path in paths:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            with contextlib.suppress(OSError):
+                path.unlink(missing_ok=True)
+
+
+class PlanExecutor:
+    """Run the jobs of an execution plan in dependency order."""
+
+    def __init__(
+        self,
+        output: RichOutput | None = None,
+        parallel: bool = True,
+        strict: bool = True,
+        max_workers: int = 0,
+        cancel_token: CancelToken | None = None,
+    ) -> None:
+        """Initialize PlanExecutor.
+
+        Args:
+            output: RichOutput for logging
+            parallel: Run independent jobs concurrently
+            strict: Abort on the first failure
+            max_workers: Max parallel jobs (0 = auto)
+            cancel_token: Token that aborts the run and its running commands
+        """
+        self.output = output
+        self.parallel = parallel
+        self.strict = strict
+        self.max_workers = max_workers if max_workers > 0 else None
+        self.cancel_token = cancel_token or CancelToken()
+        self.executor = CommandExecutor(output, cancel_token=self.cancel_token)
+
+    def execute(
+        self, plan: ExecutionPlan, progress: BatchProgress | None = None
+    ) -> BatchResult:
+        """Run every job whose dependencies succeeded.
+
+        Jobs depending on a failed job are skipped (their intermediates are
+        still cleaned up) and their item is reported as failed. The plan's
+        shared intermediates are removed once every job has finished.
+
+        Args:
+            plan: Plan to run
+            progress: Progress bar advanced once per finished item
+
+        Returns:
+            BatchResult with one result per item
+        """
+        items = plan.items()
+        result = BatchResult(total=len(items), output_dir=plan.output_dir)
+        remaining = {name: len(jobs) for name, jobs in items.items()}
+        durations = dict.fromkeys(items, 0.0)
+        status: dict[str, bool] = {}
+        pending = {job.id: job for job in plan.jobs}
+        stopped = False
+
+        def finish(job: PlanJob, job_result: ExecutionResult | None) -> None:
+            nonlocal stopped
+            status[job.id] = job_result is not None and job_result.success
+            _remove(job.cleanup)
+            if job_result is not None:
+                durations[job.item] += job_result.duration
+            if (
+                job_result is not None
+                and not job_result.success
+                and job.item not in result.results
+            ):
+                result.results[job.item] = ExecutionResult(
+                    success=False,
+                    command=job_result.command,
+                    stdout=job_result.stdout,
+                    stderr=f"Job {job.id} failed: {job_result.stderr}",
+                    return_code=job_result.return_code,
+                    duration=durations[job.item],
+                    cancelled=job_result.cancelled,
+                    timed_out=job_result.timed_out,
+                )
+                result.failed += 1
+                if job_result.cancelled and not stopped:
+                    # Interrupted from outside, not by a strict failure
+                    result.cancelled = True
+                elif self.output:
+                    self.output.error(f"Job {job.id} failed: {job_result.stderr}")
+                if self.strict or job_result.cancelled:
+                    stopped = True
+                    self.cancel_token.cancel()
+
+            remaining[job.item] -= 1
+            if remaining[job.item] > 0:
+                return
+            if all(status[j.id] for j in items[job.item]):
+                result.results[job.item] = ExecutionResult(
+                    success=True,
+                    command=f"plan: {len(items[job.item])} job(s)",
+                    stdout="",
+                    stderr="",
+                    return_code=0,
+                    duration=durations[job.item],
+                )
+                result.succeeded += 1
+            if progress and job.item in result.results:
+                progress.advance(job.item)
+
+        workers = self.max_workers if self.parallel else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running: dict[Future[ExecutionResult], PlanJob] = {}
+            while pending or running:
+                for job in list(pending.values()):
+                    if (
+                        stopped
+                        or self.cancel_token.cancelled
+                        or any(status.get(dep) is False for dep in job.depends_on)
+                    ):
+                        del pending[job.id]
+                        finish(job, None)
+                    elif all(status.get(dep) for dep in job.depends_on):
+                        del pending[job.id]
+                        running[
+                            pool.submit(
+                                self.executor.run,
+                                job.command,
+                                job.outputs[-1],
+                                job.limits,
+                            )
+                        ] = job
+                if not running:
+                    # Dependencies that no job in the plan can satisfy
+                    for job in pending.values():
+                        finish(
+                            job,
+                            ExecutionResult(
+                                False, job.command, "", "Unsatisfied dependency", 1
+                            ),
+                        )
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result())
+        _remove(plan.cleanup)
+
+        # Items skipped because the run stopped early
+        result.cancelled = result.cancelled or (
+            self.cancel_token.cancelled and not stopped
+        )
+        for name in items:
+            if name not in result.results:
+                result.failed += 1
+                result.results[name] = ExecutionResult(
+                    False, "", "", "Skipped", 1, cancelled=result.cancelled
+                )
+        return result
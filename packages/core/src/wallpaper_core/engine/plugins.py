@@ -0,0 +1,106 @@
+"""Python effects: functions that transform pixels in-process.
+
+An effect with `python:` instead of `command:` in effects.yaml names a
+function, either as "module:function" or as the name of an entry point in
+the wallpaper_core.effects group, which packages declare with e.g.
+
+    [project.entry-points."wallpaper_core.effects"]
+    halftone = "my_effects.halftone:halftone"
+
+The function is called with the image as a read-only float32 NumPy array
+of shape (height, width, channels) with values in 0..1 (3 channels, or 4
+with alpha last), and the effect's parameters as keyword arguments, with
+defaults filled in and converted to their parameter types. It returns the
+new pixels, which may have a different size but must keep the layout.
+
+Python effects run in the NumPy backend (engine.native) whatever
+core.backend.backend says, so a chain that contains one is decoded once
+and encoded once by ImageMagick. Runners that only execute commands
+(plans, queues, sweeps, the asyncio executors) cannot run them.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+from collections.abc import Callable
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+
+# Entry point group packages register Python effects in
+ENTRY_POINT_GROUP = "wallpaper_core.effects"
+
+
+class PluginError(Exception):
+    """A Python effect's function cannot be loaded or misbehaved."""
+
+
+@functools.cache
+def load_function(spec: str) -> Callable[..., Any]:
+    """Import the function a Python effect names.
+
+    Args:
+        spec: "module:function" (dotted attribute paths allowed), or the
+            name of an entry point in ENTRY_POINT_GROUP
+
+    Returns:
+        The function (cached per spec)
+
+    Raises:
+        PluginError: If the module, attribute or entry point does not
+            exist, fails to import, or is not callable
+    """
+    try:
+        if ":" in spec:
+            module_name, _, attribute = spec.partition(":")
+            target: Any = importlib.import_module(module_name)
+            for part in attribute.split("."):
+                target = getattr(target, part)
+        else:
+            found = entry_points(group=ENTRY_POINT_GROUP, name=spec)
+            if not found:
+                raise PluginError(
+                    f"no entry point '{spec}' in group {ENTRY_POINT_GROUP}"
+                )
+            target = next(iter(found)).load()
+    except PluginError:
+        raise
+    except Exception as e:
+        raise PluginError(f"cannot load {spec}: {e}") from e
+    if not callable(target):
+        raise PluginError(f"{spec} is not callable")
+    return target  # type: ignore[no-any-return]
+
+
+def python_effects(config: EffectsConfig, chain: list[ChainStep]) -> list[str]:
+    """Names of the effects a chain runs in Python, in order, once each.
+
+    These are Python effects and expression effects (engine.expression),
+    which both run in the NumPy backend only.
+    """
+    return list(
+        dict.fromkeys(
+            step.effect
+            for step in chain
+            if (effect := config.effects.get(step.effect)) and effect.in_process
+        )
+    )
+
+
+def command_only_error(config: EffectsConfig, chain: list[ChainStep]) -> str | None:
+    """Error for a runner that executes commands, if the chain needs Python.
+
+    Returns:
+        A message naming the Python effects, or None if there are none
+    """
+    names = python_effects(config, chain)
+    if not names:
+        return None
+    listed = ", ".join(f"'{name}'" for name in names)
+    return (
+        f"Python effect {listed} cannot run as a command; "
+        "process it with `process` or `batch` instead"
+    )
@@ -0,0 +1,220 @@
+"""Header-only image probing: format and dimensions without decoding."""
+
+from __future__ import annotations
+
+import shutil
+import struct
+import subprocess  # nosec: only runs ImageMagick identify
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from wallpaper_core.engine.executor import magick_tool
+
+# Probe results kept per prober (oldest evicted first)
+CACHE_SIZE = 4096
+
+# Seconds allowed for the identify fallback
+IDENTIFY_TIMEOUT = 30.0
+
+# JPEG start-of-frame markers (all but DHT, JPG and DAC in C0-CF)
+_JPEG_SOF = {0xC0 + n for n in range(16)} - {0xC4, 0xC8, 0xCC}
+# JPEG markers without a length field
+_JPEG_STANDALONE = {0x01, 0xD8} | {0xD0 + n for n in range(8)}
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Format and dimensions of an image."""
+
+    format: str
+    width: int
+    height: int
+
+    @property
+    def megapixels(self) -> float:
+        """Pixel count in millions."""
+        return self.width * self.height / 1e6
+
+
+def _png(head: bytes) -> ImageInfo:
+    if head[12:16] != b"IHDR" or len(head) < 24:
+        raise ValueError("PNG without IHDR header")
+    width, height = struct.unpack(">II", head[16:24])
+    return ImageInfo("PNG", width, height)
+
+
+def _gif(head: bytes) -> ImageInfo:
+    if len(head) < 10:
+        raise ValueError("truncated GIF header")
+    width, height = struct.unpack("<HH", head[6:10])
+    return ImageInfo("GIF", width, height)
+
+
+def _webp(head: bytes) -> ImageInfo:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return ImageInfo("WEBP", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+        (bits,) = struct.unpack("<I", head[21:25])
+        return ImageInfo("WEBP", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return ImageInfo("WEBP", width, height)
+    raise ValueError("WebP without a VP8/VP8L/VP8X header")
+
+
+def _jpeg(f: BinaryIO) -> ImageInfo:
+    """Walk JPEG marker segments up to the first start-of-frame."""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise ValueError("JPEG ends before its frame header")
+        if byte != b"\xff":
+            raise ValueError("corrupt JPEG marker")
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            raise ValueError("JPEG ends before its frame header")
+        code = marker[0]
+        if code in _JPEG_STANDALONE:
+            continue
+        if code in (0xD9, 0xDA):
+            raise ValueError("JPEG has no frame header before its image data")
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            raise ValueError("truncated JPEG segment")
+        (length,) = struct.unpack(">H", length_bytes)
+        if code in _JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                raise ValueError("truncated JPEG frame header")
+            height, width = struct.unpack(">HH", frame[1:5])
+            return ImageInfo("JPEG", width, height)
+        f.seek(length - 2, 1)
+
+
+def read_header(path: Path) -> ImageInfo | None:
+    """Read format and dimensions from a JPEG, PNG, WebP or GIF header.
+
+    Only the first bytes of the file are read (for JPEG, the marker
+    segments before the frame header).
+
+    Args:
+        path: Image file
+
+    Returns:
+        Image info, or None if the file is not in a supported format
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file has a known signature but a corrupt header
+    """
+    with path.open("rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            info = _png(head)
+        elif head[:6] in (b"GIF87a", b"GIF89a"):
+            info = _gif(head)
+        elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            info = _webp(head)
+        elif head.startswith(b"\xff\xd8"):
+            info = _jpeg(f)
+        else:
+            return None
+    if info.width == 0 or info.height == 0:
+        raise ValueError(f"{info.format} header has zero dimensions")
+    return info
+
+
+class ImageProber:
+    """Probe images, caching results by path, mtime and size.
+
+    Supported formats are read from their headers in pure Python; anything
+    else falls back to `identify -ping`, which also avoids decoding pixels.
+    """
+
+    def __init__(self, binary: str | None = None) -> None:
+        """Initialize ImageProber.
+
+        Args:
+            binary: ImageMagick binary for the fallback (auto-detected if None)
+        """
+        self.binary = binary
+        self._cache: OrderedDict[tuple[str, int, int], ImageInfo] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def probe(self, path: Path) -> ImageInfo:
+        """Get the format and dimensions of an image.
+
+        Args:
+            path: Image file
+
+        Returns:
+            Image info
+
+        Raises:
+            ValueError: If the file is missing, unreadable or not an image
+        """
+        try:
+            stat = path.stat()
+        except OSError as e:
+            raise ValueError(f"Cannot read {path}: {e.strerror}") from e
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        try:
+            info = read_header(path)
+        except OSError as e:
+            raise ValueError(f"Cannot read {path}: {e.strerror}") from e
+        except ValueError as e:
+            raise ValueError(f"Corrupt image {path}: {e}") from e
+        if info is None:
+            info = self._identify(path)
+
+        with self._lock:
+            self._cache[key] = info
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return info
+
+    def _identify(self, path: Path) -> ImageInfo:
+        """Probe a format without a built-in reader via `identify -ping`."""
+        binary = self.binary or shutil.which("magick") or shutil.which("convert")
+        if binary is None:
+            raise ValueError(f"Unknown image format: {path}")
+        command = [
+            *magick_tool(binary, "identify"),
+            "-ping",
+            "-format",
+            "%m %w %h",
+            f"{path}[0]",
+        ]
+        try:
+            result = subprocess.run(  # nosec: fixed argument list, no shell
+                command,
+                capture_output=True,
+                text=True,
+                timeout=IDENTIFY_TIMEOUT,
+                check=False,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise ValueError(f"Cannot identify {path}: {e}") from e
+        try:
+            fmt, width, height = result.stdout.split()
+            info = ImageInfo(fmt, int(width), int(height))
+        except ValueError:
+            message = result.stderr.strip() or "not an image"
+            raise ValueError(f"Cannot identify {path}: {message}") from None
+        if result.returncode != 0 or info.width == 0 or info.height == 0:
+            raise ValueError(f"Cannot identify {path}: {result.stderr.strip()}")
+        return info
@@ -0,0 +1,433 @@
+"""Shared SQLite job queue for running plans on several workers."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wallpaper_core.engine.cancel import CancelToken
+from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.plan import PlanJob, _remove
+
+if TYPE_CHECKING:
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.engine.plan import ExecutionPlan
+
+# Seconds to wait for another worker's write lock before giving up
+LOCK_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_path TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    plan INTEGER NOT NULL REFERENCES plans(id),
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS deps (
+    job TEXT NOT NULL REFERENCES jobs(id),
+    dependency TEXT NOT NULL REFERENCES jobs(id),
+    PRIMARY KEY (job, dependency)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, seq);
+"""
+
+# Pending jobs whose dependencies have all completed
+_READY = """
+SELECT id, payload, attempts FROM jobs
+WHERE status = 'pending' AND NOT EXISTS (
+    SELECT 1 FROM deps JOIN jobs AS dep ON dep.id = deps.dependency
+    WHERE deps.job = jobs.id AND dep.status != 'done'
+)
+ORDER BY seq LIMIT 1
+"""
+
+
+def default_worker_id() -> str:
+    """Worker id unique across hosts sharing a queue (<host>:<pid>)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class QueuedJob:
+    """A job claimed from the queue."""
+
+    id: str
+    job: PlanJob
+    attempt: int
+
+
+class JobQueue:
+    """Job store shared by workers through a SQLite database.
+
+    The database can live on storage shared by several hosts. Every
+    operation runs in its own short transaction on a fresh connection, so
+    a queue object can be used from any thread. Claims take the database
+    write lock, so a job is only ever leased to one worker at a time; a
+    lease that is not renewed by heartbeats expires and the job becomes
+    claimable again.
+
+    SQLite relies on POSIX file locks; on NFS these must be supported by
+    the mount (NFSv4, or NFSv3 with lockd).
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize JobQueue, creating the database if needed.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        try:
+            conn.executescript(_SCHEMA)  # commits on its own
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in an immediate (write-locked) transaction."""
+        conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def add_plan(self, plan: ExecutionPlan, max_attempts: int = 3) -> int:
+        """Enqueue every job of a plan.
+
+        Job ids are prefixed with the plan's queue id, so the same plan
+        (or plans for images with the same name) can be enqueued twice.
+
+        Args:
+            plan: Plan to enqueue
+            max_attempts: Attempts per job before it is marked failed
+
+        Returns:
+            Queue id of the plan
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO plans (input_path, output_dir, created) VALUES (?, ?, ?)",
+                (str(plan.input_path), str(plan.output_dir), time.time()),
+            )
+            plan_id = cursor.lastrowid
+            assert plan_id is not None  # nosec: set by INSERT
+            (seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM jobs").fetchone()
+            for job in plan.jobs:
+                seq += 1
+                conn.execute(
+                    "INSERT INTO jobs (id, seq, plan, payload, max_attempts) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        f"{plan_id}:{job.id}",
+                        seq,
+                        plan_id,
+                        job.model_dump_json(),
+                        max_attempts,
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO deps (job, dependency) VALUES (?, ?)",
+                    [(f"{plan_id}:{job.id}", f"{plan_id}:{d}") for d in job.depends_on],
+                )
+        return plan_id
+
+    def claim(self, worker: str, lease_seconds: float) -> QueuedJob | None:
+        """Lease the next ready job to a worker.
+
+        Expired leases are reclaimed first: the job is re-queued if it has
+        attempts left, otherwise it fails along with everything depending
+        on it.
+
+        Args:
+            worker: Id of the claiming worker
+            lease_seconds: Lease duration (renew with heartbeat())
+
+        Returns:
+            The claimed job, or None if no job is ready
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "SELECT id, payload, attempts, max_attempts FROM jobs "
+                "WHERE status = 'running' AND lease_expires < ?",
+                (now,),
+            ).fetchall()
+            for job_id, payload, attempts, max_attempts in expired:
+                error = f"Lease expired (attempt {attempts})"
+                if attempts < max_attempts:
+                    self._set_status(conn, job_id, "pending", error)
+                else:
+                    self._set_status(conn, job_id, "failed", error)
+                    _remove(PlanJob.model_validate_json(payload).cleanup)
+            self._fail_dependents(conn)
+
+            row = conn.execute(_READY).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = ?, worker = ?, "
+                "lease_expires = ? WHERE id = ?",
+                (attempts + 1, worker, now + lease_seconds, job_id),
+            )
+        return QueuedJob(job_id, PlanJob.model_validate_json(payload), attempts + 1)
+
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        """Renew a worker's lease on a running job.
+
+        Returns:
+            False if the worker no longer holds the lease
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker: str) -> bool:
+        """Mark a leased job as done.
+
+        Returns:
+            False if the worker no longer held the lease (the result is
+            dropped; another worker owns the job now)
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', lease_expires = NULL, error = '' "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        """Record a failed attempt of a leased job.
+
+        The job is re-queued while it has attempts left. Once they are used
+        up it fails for good, and so does every job depending on it.
+
+        Returns:
+            True if the job was re-queued for another attempt
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            retry = bool(attempts < max_attempts)
+            self._set_status(conn, job_id, "pending" if retry else "failed", error)
+            if not retry:
+                self._fail_dependents(conn)
+            return retry
+
+    def release(self, job_id: str, worker: str) -> None:
+        """Return an interrupted job to the queue without using an attempt."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = attempts - 1, "
+                "worker = NULL, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker),
+            )
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs in each status."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = dict.fromkeys(("pending", "running", "done", "failed"), 0)
+        counts.update(dict(rows))
+        return counts
+
+    def active(self) -> bool:
+        """Check if any job is still pending or running."""
+        counts = self.counts()
+        return counts["pending"] + counts["running"] > 0
+
+    def failures(self) -> dict[str, str]:
+        """Error of every failed job, by job id."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, error FROM jobs WHERE status = 'failed' ORDER BY seq"
+            ).fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _set_status(
+        conn: sqlite3.Connection, job_id: str, status: str, error: str
+    ) -> None:
+        """Move a job to a new status, dropping its lease."""
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, worker = NULL, "
+            "lease_expires = NULL WHERE id = ?",
+            (status, error, job_id),
+        )
+
+    @staticmethod
+    def _fail_dependents(conn: sqlite3.Connection) -> None:
+        """Fail pending jobs whose dependencies failed, transitively.
+
+        Their intermediates are removed, as PlanExecutor does for skipped
+        jobs.
+        """
+        while True:
+            rows = conn.execute(
+                "SELECT DISTINCT jobs.id, jobs.payload, deps.dependency FROM jobs "
+                "JOIN deps ON deps.job = jobs.id "
+                "JOIN jobs AS dep ON dep.id = deps.dependency "
+                "WHERE jobs.status = 'pending' AND dep.status = 'failed'"
+            ).fetchall()
+            if not rows:
+                return
+            for job_id, payload, dependency in rows:
+                JobQueue._set_status(
+                    conn, job_id, "failed", f"Dependency {dependency} failed"
+                )
+                _remove(PlanJob.model_validate_json(payload).cleanup)
+
+
+@dataclass
+class WorkerResult:
+    """Jobs handled by one worker run."""
+
+    succeeded: int = 0
+    failed: int = 0
+    retried: int = 0
+    cancelled: bool = False
+
+
+class QueueWorker:
+    """Claim and run jobs from a JobQueue until it drains."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: str | None = None,
+        output: RichOutput | None = None,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+        follow: bool = False,
+        max_jobs: int = 0,
+        cancel_token: CancelToken | None = None,
+    ) -> None:
+        """Initialize QueueWorker.
+
+        Args:
+            queue: Queue to take jobs from
+            worker_id: Id recorded on leases (None = <host>:<pid>)
+            output: RichOutput for logging
+            lease_seconds: Lease duration; heartbeats renew it every third
+            poll_interval: Seconds between polls when no job is ready
+            follow: Keep waiting for new jobs once the queue is drained
+            max_jobs: Stop after this many jobs (0 = no limit)
+            cancel_token: Token that stops the worker and its running command
+        """
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.output = output
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.follow = follow
+        self.max_jobs = max_jobs
+        self.cancel_token = cancel_token or CancelToken()
+        self.executor = CommandExecutor(output, cancel_token=self.cancel_token)
+
+    def run(self) -> WorkerResult:
+        """Run jobs until the queue drains, max_jobs is reached or cancelled.
+
+        A worker waits while other workers still hold jobs, since those
+        may fail back into the queue or unblock dependent jobs.
+
+        Returns:
+            Counts of the jobs this worker ran
+        """
+        result = WorkerResult()
+        handled = 0
+        while not self.cancel_token.cancelled:
+            if self.max_jobs and handled >= self.max_jobs:
+                break
+            queued = self.queue.claim(self.worker_id, self.lease_seconds)
+            if queued is None:
+                if not self.follow and not self.queue.active():
+                    break
+                self.cancel_token.wait(self.poll_interval)
+                continue
+            handled += 1
+            self._run_job(queued, result)
+        result.cancelled = self.cancel_token.cancelled
+        return result
+
+    def _run_job(self, queued: QueuedJob, result: WorkerResult) -> None:
+        """Run one claimed job while heartbeating its lease."""
+        job = queued.job
+        if self.output:
+            self.output.verbose(f"Running {queued.id} (attempt {queued.attempt})")
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(queued.id, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            job_result = self.executor.run(job.command, job.outputs[-1], job.limits)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if job_result.cancelled:
+            self.queue.release(queued.id, self.worker_id)
+        elif job_result.success:
+            if self.queue.complete(queued.id, self.worker_id):
+                _remove(job.cleanup)
+                result.succeeded += 1
+        elif self.queue.fail(queued.id, self.worker_id, job_result.stderr):
+            result.retried += 1
+            if self.output:
+                self.output.warning(f"Job {queued.id} failed, will retry")
+        else:
+            _remove(job.cleanup)
+            result.failed += 1
+            if self.output:
+                self.output.error(f"Job {queued.id} failed: {job_result.stderr}")
+
+    def _heartbeat(self, job_id: str, stop: threading.Event) -> None:
+        """Renew a job's lease until stopped."""
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                if self.output:
+                    self.output.warning(f"Lost the lease on {job_id}")
+                return
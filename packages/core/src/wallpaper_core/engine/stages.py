@@ -0,0 +1,309 @@
+"""Stage-pipelined execution of one chain over many input images.
+
+Each image goes through three stages, each with its own worker threads:
+
+- decode: read the input file and load it into the backend (with magick
+  this only reads the file; with numpy or wand it decodes)
+- apply: run the chain's steps
+- encode: encode the result and write the output file
+
+Stages are connected by bounded queues. A stage whose next queue is full
+waits, so a fast decoder cannot run ahead of slow effects and at most
+decoders + queue_size + appliers + queue_size + encoders images are in
+memory at once, however many inputs there are. Meanwhile, different images
+are decoded, transformed and encoded at the same time, and encoding (often
+the slowest part, e.g. for PNG) overlaps the effects of the next images.
+
+StageStats report how busy each stage was, to tune its worker count: a
+stage near 100% is the bottleneck, a stage mostly waiting for input has
+more workers than it needs.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from wallpaper_core.engine.backend import BackendError, chain_success
+from wallpaper_core.engine.batch import BatchResult
+from wallpaper_core.engine.executor import ExecutionResult
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from wallpaper_core.effects.schema import ChainStep
+    from wallpaper_core.engine.backend import ImageBackend
+    from wallpaper_core.engine.chain import ChainExecutor
+
+# Names of the stages, in order
+STAGES = ("decode", "apply", "encode")
+
+
+@dataclass
+class StageStats:
+    """How one stage spent its time (seconds are summed over its workers)."""
+
+    name: str
+    workers: int
+    items: int = 0
+    busy: float = 0.0
+    """Working on images"""
+
+    starved: float = 0.0
+    """Waiting for the previous stage"""
+
+    blocked: float = 0.0
+    """Waiting for room in the next stage's queue (backpressure)"""
+
+    def utilization(self, duration: float) -> float:
+        """Share of the workers' time spent working during a run."""
+        if duration <= 0 or self.workers == 0:
+            return 0.0
+        return min(self.busy / (self.workers * duration), 1.0)
+
+
+@dataclass
+class StagedResult(BatchResult):
+    """Result of a staged run: one result per input, and stage statistics."""
+
+    stages: list[StageStats] = field(default_factory=list)
+    duration: float = 0.0
+    aborted: bool = False
+    """Stopped by a failure in strict mode (not by the cancel token)"""
+
+
+@dataclass
+class _Job:
+    """An image moving through the stages."""
+
+    input_path: Path
+    output_path: Path
+    image: Any = None
+    start: float = 0.0
+
+
+# Tells a stage's worker that no more jobs will come
+_DONE = object()
+
+
+class StagedExecutor:
+    """Apply one chain to many images in decode, apply and encode stages."""
+
+    def __init__(
+        self,
+        chain_executor: ChainExecutor,
+        decoders: int = 1,
+        appliers: int | None = None,
+        encoders: int | None = None,
+        queue_size: int = 2,
+        strict: bool = False,
+    ) -> None:
+        """Initialize StagedExecutor.
+
+        Args:
+            chain_executor: Executor whose backends, settings and cancel
+                token the stages use
+            decoders: Decode stage workers
+            appliers: Apply stage workers (None = CPU count)
+            encoders: Encode stage workers (None = CPU count)
+            queue_size: Images each queue between two stages holds
+            strict: Skip the remaining images when one fails; they are
+                reported as failed, not cancelled
+        """
+        cpus = os.cpu_count() or 1
+        self.chain_executor = chain_executor
+        self.output = chain_executor.output
+        self.executor = chain_executor.executor
+        self.workers = {
+            "decode": max(decoders, 1),
+            "apply": max(appliers or cpus, 1),
+            "encode": max(encoders or cpus, 1),
+        }
+        self.queue_size = max(queue_size, 1)
+        self.strict = strict
+
+    def execute(
+        self, chain: list[ChainStep], jobs: list[tuple[Path, Path]]
+    ) -> StagedResult:
+        """Apply a chain to every input.
+
+        The chain is optimized once, and runs in the in-process backend if
+        that supports it (else with magick) for every image.
+
+        Args:
+            chain: Chain to apply
+            jobs: (input path, output path) pairs; each output's suffix
+                selects its format
+
+        Returns:
+            StagedResult keyed by input path
+        """
+        result = StagedResult(total=len(jobs))
+        backend = self.chain_executor.backend_for(chain)
+        steps = self.chain_executor.optimizer.optimize(chain).steps
+        if self.output:
+            self.output.debug(
+                f"Staged run of {len(jobs)} images with {backend.label}: "
+                + ", ".join(f"{n} x{self.workers[n]}" for n in STAGES)
+            )
+        run = _StagedRun(self, backend, chain, steps, result)
+        start = time.time()
+        run.start(jobs)
+        result.duration = time.time() - start
+        result.cancelled = self.executor.cancel_token.cancelled
+        result.aborted = run.aborted.is_set()
+        return result
+
+
+class _StagedRun:
+    """Threads and queues of one StagedExecutor.execute call."""
+
+    def __init__(
+        self,
+        staged: StagedExecutor,
+        backend: ImageBackend[Any],
+        chain: list[ChainStep],
+        steps: list[ChainStep],
+        result: StagedResult,
+    ) -> None:
+        self.backend = backend
+        self.chain = chain
+        self.steps = steps
+        self.result = result
+        self.workers = staged.workers
+        self.cancel_token = staged.executor.cancel_token
+        self.strict = staged.strict
+        # Set by a strict failure; kept apart from the cancel token so the
+        # run is not reported as cancelled and later runs are unaffected
+        self.aborted = threading.Event()
+        self.lock = threading.Lock()
+        # The decode inbox holds paths only, so it need not be bounded
+        self.inboxes: list[queue.Queue[Any]] = [
+            queue.Queue(),
+            queue.Queue(staged.queue_size),
+            queue.Queue(staged.queue_size),
+        ]
+        self.work: list[Callable[[_Job], None]] = [
+            self._decode,
+            self._apply,
+            self._encode,
+        ]
+        self.live = [0] * len(STAGES)
+        result.stages = [StageStats(name, self.workers[name]) for name in STAGES]
+
+    def start(self, jobs: list[tuple[Path, Path]]) -> None:
+        """Run every job through the stages and wait for the last one."""
+        for input_path, output_path in jobs:
+            self.inboxes[0].put(_Job(input_path, output_path))
+        for _ in range(self.workers[STAGES[0]]):
+            self.inboxes[0].put(_DONE)
+
+        threads: list[threading.Thread] = []
+        for index, name in enumerate(STAGES):
+            self.live[index] = self.workers[name]
+            threads.extend(
+                threading.Thread(target=self._worker, args=(index,), name=f"{name}-{n}")
+                for n in range(self.workers[name])
+            )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _worker(self, index: int) -> None:
+        """Take jobs from a stage's queue until the previous stage is done."""
+        stats = self.result.stages[index]
+        inbox = self.inboxes[index]
+        outbox = self.inboxes[index + 1] if index + 1 < len(STAGES) else None
+        while True:
+            waited = time.time()
+            job = inbox.get()
+            busy = time.time()
+            if job is _DONE:
+                break
+            if self.cancel_token.cancelled:
+                self._finish(job, self._cancelled(job))
+                continue
+            if self.aborted.is_set():
+                self._finish(job, self._not_run(job))
+                continue
+            try:
+                self.work[index](job)
+            except Exception as e:
+                error = e if isinstance(e, BackendError) else BackendError(str(e))
+                self._finish(job, self.backend.failure(error, time.time() - job.start))
+                continue
+            finally:
+                done = time.time()
+                with self.lock:
+                    stats.items += 1
+                    stats.starved += busy - waited
+                    stats.busy += done - busy
+            if outbox is None:
+                self._finish(job, chain_success(self.chain, done - job.start))
+                continue
+            outbox.put(job)
+            with self.lock:
+                stats.blocked += time.time() - done
+
+        with self.lock:
+            self.live[index] -= 1
+            last = self.live[index] == 0
+        if last and outbox is not None:
+            for _ in range(self.workers[STAGES[index + 1]]):
+                outbox.put(_DONE)
+
+    def _decode(self, job: _Job) -> None:
+        job.start = time.time()
+        job.image = self.backend.load_file(job.input_path)
+
+    def _apply(self, job: _Job) -> None:
+        image = job.image
+        job.image = self.backend.apply_chain(image, self.steps)
+        if job.image is not image:
+            self.backend.release(image)
+
+    def _encode(self, job: _Job) -> None:
+        command = self.backend.encode_command(self.chain, job.output_path)
+        self.backend.save_file(job.image, job.output_path, command)
+        self.backend.release(job.image)
+        job.image = None
+
+    def _elapsed(self, job: _Job) -> float:
+        """Seconds since a job was decoded (0 if it never was)."""
+        return time.time() - job.start if job.start else 0.0
+
+    def _cancelled(self, job: _Job) -> ExecutionResult:
+        return self.backend.executor._cancelled_result(
+            str(job.input_path), self._elapsed(job)
+        )
+
+    def _not_run(self, job: _Job) -> ExecutionResult:
+        return ExecutionResult(
+            success=False,
+            command=str(job.input_path),
+            stdout="",
+            stderr="Not run: earlier failure",
+            return_code=1,
+            duration=self._elapsed(job),
+        )
+
+    def _finish(self, job: _Job, result: ExecutionResult) -> None:
+        """Record a job's result and free its image."""
+        if job.image is not None:
+            self.backend.release(job.image)
+            job.image = None
+        with self.lock:
+            self.result.results[str(job.input_path)] = result
+            if result.success:
+                self.result.succeeded += 1
+                return
+            if not result.cancelled:
+                self.result.failed += 1
+                if self.strict:
+                    self.aborted.set()
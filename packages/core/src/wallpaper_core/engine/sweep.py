@@ -0,0 +1,402 @@
+"""Parameter sweeps: one effect rendered over a grid of parameter values."""
+
+from __future__ import annotations
+
+import itertools
+import re
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wallpaper_core.effects.schema import ChainStep
+from wallpaper_core.engine.batch import BatchResult
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.encoding import apply_encoding, encoding_options
+from wallpaper_core.engine.executor import (
+    CommandExecutor,
+    ExecutionResult,
+    magick_tool,
+    simple_ops,
+    substitute_command,
+)
+from wallpaper_core.engine.params import CompiledType, ParamValue, parameter_type
+from wallpaper_core.engine.plugins import command_only_error
+
+if TYPE_CHECKING:
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
+    from wallpaper_core.console.output import RichOutput
+    from wallpaper_core.effects.schema import EffectsConfig, ParameterType
+
+# Largest grid a single sweep may generate
+MAX_SWEEP_POINTS = 256
+
+# Characters kept as-is in parameter-encoded file names
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9.+-]")
+
+# Decimal places kept for values of float ranges
+_FLOAT_DIGITS = 6
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    """One combination of swept parameter values."""
+
+    effect: str
+    params: tuple[tuple[str, ParamValue], ...]
+
+    @property
+    def name(self) -> str:
+        """Deterministic file name stem, e.g. "blur__blur=0x8"."""
+        encoded = (
+            f"{key}={_UNSAFE_NAME_CHARS.sub('_', str(value))}"
+            for key, value in self.params
+        )
+        return "__".join([self.effect, *encoded])
+
+    @property
+    def label(self) -> str:
+        """Human-readable parameter values, e.g. "blur=0x8"."""
+        return " ".join(f"{key}={value}" for key, value in self.params)
+
+
+def _range_values(param_type: ParameterType, spec: str) -> list[ParamValue]:
+    """Expand an inclusive start:stop[:step] range."""
+    parts = spec.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"'{spec}' is not a start:stop[:step] range")
+    integer = param_type.type == "integer"
+    try:
+        numbers = [int(p) if integer else float(p) for p in parts]
+    except ValueError:
+        kind = "integer" if integer else "number"
+        raise ValueError(f"'{spec}' has a bound that is not an {kind}") from None
+    if len(numbers) == 2:
+        if not integer:
+            raise ValueError(f"float range '{spec}' needs a step")
+        numbers.append(1 if numbers[1] >= numbers[0] else -1)
+    start, stop, step = numbers
+    if step == 0 or (stop - start) * step < 0:
+        raise ValueError(f"range '{spec}' never reaches {stop}")
+
+    count = int((stop - start) / step + 1e-9) + 1
+    if count > MAX_SWEEP_POINTS:
+        raise ValueError(f"range '{spec}' has more than {MAX_SWEEP_POINTS} values")
+    if integer:
+        return [int(start + i * step) for i in range(count)]
+    return [round(start + i * step, _FLOAT_DIGITS) for i in range(count)]
+
+
+def parse_values(param_type: ParameterType | None, spec: str) -> list[ParamValue]:
+    """Parse the values to sweep for one parameter.
+
+    Numeric types accept an inclusive range ("0:100:25", "0.2:1:0.2"); every
+    type accepts a comma-separated list ("0x2,0x4,0x8"). Each value is
+    checked against the parameter type's min/max and pattern.
+
+    Args:
+        param_type: Parameter type (None = untyped string)
+        spec: Range or list of values
+
+    Returns:
+        Typed values, duplicates dropped, in the given order
+
+    Raises:
+        ValueError: If the spec is malformed or a value is invalid
+    """
+    raw: list[ParamValue]
+    if (
+        param_type is not None
+        and param_type.type in ("integer", "float")
+        and ":" in spec
+    ):
+        raw = _range_values(param_type, spec)
+    else:
+        raw = [part.strip() for part in spec.split(",") if part.strip()]
+    if not raw:
+        raise ValueError("no values given")
+
+    compiled = CompiledType.compile(param_type) if param_type is not None else None
+    values: list[ParamValue] = []
+    for value in raw:
+        typed = compiled.coerce(value) if compiled is not None else str(value)
+        if typed not in values:
+            values.append(typed)
+    return values
+
+
+def build_grid(
+    config: EffectsConfig, effect_name: str, specs: dict[str, str]
+) -> list[SweepPoint]:
+    """Build every combination of the swept parameter values.
+
+    Args:
+        config: Effects configuration
+        effect_name: Effect to sweep
+        specs: Value spec per parameter (see parse_values), in sweep order
+
+    Returns:
+        Grid points; the last parameter varies fastest
+
+    Raises:
+        ValueError: Listing every unknown parameter and invalid value, or if
+            the grid is empty or too large
+    """
+    if effect_name not in config.effects:
+        raise ValueError(f"Unknown effect: {effect_name}")
+    python = command_only_error(config, [ChainStep(effect=effect_name)])
+    if python is not None:
+        raise ValueError(python)
+    if not specs:
+        raise ValueError(f"No parameters to sweep for effect '{effect_name}'")
+
+    errors: list[str] = []
+    axes: list[list[tuple[str, ParamValue]]] = []
+    for name, spec in specs.items():
+        try:
+            values = parse_values(parameter_type(config, effect_name, name), spec)
+        except ValueError as e:
+            errors.append(f"{name}: {e}")
+            continue
+        axes.append([(name, value) for value in values])
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    size = 1
+    for axis in axes:
+        size *= len(axis)
+    if size > MAX_SWEEP_POINTS:
+        raise ValueError(
+            f"Sweep has {size} combinations (at most {MAX_SWEEP_POINTS} allowed)"
+        )
+    return [SweepPoint(effect_name, combo) for combo in itertools.product(*axes)]
+
+
+def build_sweep_command(
+    effect_ops: list[str], output_paths: list[Path], options: str = ""
+) -> str:
+    """Build one magick command that writes every sweep point from $INPUT.
+
+    Each point but the last is rendered on a clone of the decoded input and
+    written with -write, so the input is read once. Parentheses scope the
+    settings each point's operators make (-fill, -gravity, ...).
+
+    Args:
+        effect_ops: Substituted operators of each point
+        output_paths: Output file of each point ($OUTPUT is the last one)
+        options: Encoder options applied to every point before it is written
+
+    Returns:
+        Command template with $INPUT and $OUTPUT placeholders
+    """
+    suffix = f" {options}" if options else ""
+    parts = ['magick "$INPUT" -respect-parentheses']
+    for ops, path in zip(effect_ops[:-1], output_paths[:-1], strict=True):
+        parts.append(f'\\( +clone {ops}{suffix} -write "{path}" +delete \\)')
+    parts.append(f"{effect_ops[-1]}{suffix}")
+    parts.append('"$OUTPUT"')
+    return " ".join(parts)
+
+
+def build_contact_sheet_command(
+    binary: str,
+    tiles: list[tuple[Path, str]],
+    sheet_path: Path,
+    columns: int,
+    tile_size: int,
+) -> str:
+    """Build a montage command laying out labelled outputs in a grid.
+
+    Args:
+        binary: ImageMagick binary
+        tiles: (image, label) per tile, in grid order
+        sheet_path: Contact sheet file
+        columns: Tiles per row
+        tile_size: Largest tile width/height in pixels
+
+    Returns:
+        Shell command
+    """
+    parts = [shlex.join(magick_tool(binary, "montage"))]
+    for path, label in tiles:
+        # montage expands %-escapes in labels
+        parts.append(f"-label {shlex.quote(label.replace('%', '%%'))}")
+        parts.append(f'"{path}"')
+    parts.append(f"-tile {columns}x -geometry {tile_size}x{tile_size}+4+4")
+    parts.append(f'"{sheet_path}"')
+    return " ".join(parts)
+
+
+class SweepExecutor:
+    """Render an effect for every point of a parameter grid.
+
+    When the effect is a single `magick "$INPUT" ... "$OUTPUT"` command, the
+    whole grid is one magick process working on clones of the decoded
+    input. Other commands run once per point, in parallel.
+    """
+
+    def __init__(
+        self,
+        config: EffectsConfig,
+        output: RichOutput | None = None,
+        encoding: EncodingSettings | None = None,
+        limits: LimitSettings | None = None,
+        max_workers: int = 4,
+    ) -> None:
+        """Initialize SweepExecutor.
+
+        Args:
+            config: Effects configuration
+            output: RichOutput instance for logging
+            encoding: Resolved encoding profile of the sweep outputs
+            limits: Global limits (layered with the effect's own)
+            max_workers: Parallel commands when points run separately
+        """
+        self.config = config
+        self.output = output
+        self.encoding = encoding
+        self.max_workers = max_workers
+        self.chain_executor = ChainExecutor(config, output, limits=limits)
+        self.executor: CommandExecutor = self.chain_executor.executor
+
+    def output_paths(
+        self, points: list[SweepPoint], output_dir: Path, suffix: str
+    ) -> list[Path]:
+        """Output file of each point."""
+        return [output_dir / f"{point.name}{suffix}" for point in points]
+
+    def point_params(self, point: SweepPoint) -> dict[str, ParamValue]:
+        """Parameters of a point with the effect's defaults filled in."""
+        return self.chain_executor._get_params_with_defaults(
+            point.effect, dict(point.params)
+        )
+
+    def commands(
+        self, points: list[SweepPoint], input_path: Path, output_dir: Path, suffix: str
+    ) -> list[str]:
+        """Shell commands a sweep runs (one if the grid is cloned in-process)."""
+        if not points:
+            return []
+        paths = self.output_paths(points, output_dir, suffix)
+        binary = self.executor.binary
+        combined = self._combined_template(points, paths)
+        if combined is not None:
+            return [substitute_command(combined, input_path, paths[-1], {}, binary)]
+        template = self._point_template(points[0].effect, paths[0])
+        return [
+            substitute_command(template, input_path, path, self.point_params(p), binary)
+            for p, path in zip(points, paths, strict=True)
+        ]
+
+    def execute(
+        self, points: list[SweepPoint], input_path: Path, output_dir: Path, suffix: str
+    ) -> BatchResult:
+        """Render every sweep point.
+
+        Args:
+            points: Grid points (all of the same effect)
+            input_path: Source image
+            output_dir: Directory for the point outputs
+            suffix: Output file suffix (e.g. ".png")
+
+        Returns:
+            BatchResult keyed by point name
+        """
+        result = BatchResult(total=len(points), output_dir=output_dir)
+        if not points:
+            return result
+        paths = self.output_paths(points, output_dir, suffix)
+
+        combined = self._combined_template(points, paths)
+        if combined is not None:
+            if self.output:
+                self.output.debug(f"Rendering {len(points)} points from one decode")
+            shared = self.executor.execute(
+                combined, input_path, paths[-1], limits=self._limits(points)
+            )
+            outcomes = [shared] * len(points)
+        else:
+            template = self._point_template(points[0].effect, paths[0])
+            limits = self.chain_executor.effect_limits(points[0].effect)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                outcomes = list(
+                    pool.map(
+                        lambda job: self.executor.execute(
+                            template,
+                            input_path,
+                            job[1],
+                            self.point_params(job[0]),
+                            limits,
+                        ),
+                        zip(points, paths, strict=True),
+                    )
+                )
+
+        for point, outcome in zip(points, outcomes, strict=True):
+            result.results[point.name] = outcome
+            if outcome.success:
+                result.succeeded += 1
+            else:
+                result.failed += 1
+        result.cancelled = self.executor.cancel_token.cancelled
+        return result
+
+    def contact_sheet(
+        self,
+        points: list[SweepPoint],
+        output_dir: Path,
+        suffix: str,
+        sheet_path: Path,
+        columns: int,
+        tile_size: int,
+    ) -> ExecutionResult:
+        """Lay the point outputs out in a labelled grid.
+
+        Args:
+            points: Grid points rendered by execute()
+            output_dir: Directory holding the point outputs
+            suffix: Output file suffix
+            sheet_path: Contact sheet file
+            columns: Tiles per row
+            tile_size: Largest tile width/height in pixels
+
+        Returns:
+            ExecutionResult of the montage command
+        """
+        paths = self.output_paths(points, output_dir, suffix)
+        tiles = [(path, point.label) for point, path in zip(points, paths, strict=True)]
+        command = build_contact_sheet_command(
+            self.executor.binary, tiles, sheet_path, columns, tile_size
+        )
+        return self.executor.run(command, sheet_path)
+
+    def _point_template(self, effect_name: str, output_path: Path) -> str:
+        """Effect command of a single point with encoder options applied."""
+        command = self.config.effects[effect_name].command
+        return apply_encoding(command, self.encoding, output_path)
+
+    def _combined_template(
+        self, points: list[SweepPoint], paths: list[Path]
+    ) -> str | None:
+        """Single-process command for the grid, or None if not possible."""
+        effect = self.config.effects[points[0].effect]
+        ops: list[str] = []
+        for point in points:
+            resolved = substitute_command(
+                effect.command, "$INPUT", "$OUTPUT", self.point_params(point), "magick"
+            )
+            point_ops = simple_ops(resolved)
+            if point_ops is None:
+                return None
+            ops.append(point_ops)
+        return build_sweep_command(
+            ops, paths, encoding_options(self.encoding, paths[-1])
+        )
+
+    def _limits(self, points: list[SweepPoint]) -> LimitSettings:
+        """Limits for a combined command: the time limit covers every point."""
+        limits = self.chain_executor.effect_limits(points[0].effect)
+        if limits.timeout is None:
+            return limits
+        return limits.model_copy(update={"timeout": limits.timeout * len(points)})
@@ -0,0 +1,47 @@
+"""Placement of intermediate files for chains and size variants."""
+
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+# RAM-backed tmpfs used for intermediates when no temp_dir is configured
+RAM_TEMP_DIR = Path("/dev/shm")  # nosec B108: only used when writable
+
+# Free space that must remain on the RAM disk besides the intermediates
+RAM_HEADROOM_BYTES = 256 * 1024 * 1024
+
+# Intermediates are often stored less compressed than the input image
+INTERMEDIATE_SIZE_FACTOR = 4
+
+
+def resolve_temp_dir(configured: Path | None, input_path: Path) -> Path | None:
+    """Pick the directory for an item's intermediate files.
+
+    A configured directory always wins. Otherwise /dev/shm is used when it
+    exists, is writable and has room for a few intermediates of the input's
+    size; failing that, None selects the system default temp directory.
+
+    Args:
+        configured: processing.temp_dir setting
+        input_path: Input image (its size estimates the intermediates)
+
+    Returns:
+        Directory to create temporary directories in, or None
+    """
+    if configured is not None:
+        configured.mkdir(parents=True, exist_ok=True)
+        return configured
+
+    if not RAM_TEMP_DIR.is_dir() or not os.access(RAM_TEMP_DIR, os.W_OK | os.X_OK):
+        return None
+
+    try:
+        input_size = input_path.stat().st_size
+        free = shutil.disk_usage(RAM_TEMP_DIR).free
+    except OSError:
+        return None
+
+    required = input_size * INTERMEDIATE_SIZE_FACTOR + RAM_HEADROOM_BYTES
+    return RAM_TEMP_DIR if free >= required else None
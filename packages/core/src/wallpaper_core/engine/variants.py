@@ -0,0 +1,227 @@
+"""Multi-resolution output variants derived from a single effect run."""
+
+from __future__ import annotations
+
+import re
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wallpaper_core.engine.encoding import INTERMEDIATE_FORMAT, encoding_options
+from wallpaper_core.engine.executor import CommandExecutor, ExecutionResult
+from wallpaper_core.engine.tempdir import resolve_temp_dir
+
+if TYPE_CHECKING:
+    from wallpaper_core.config.schema import EncodingSettings
+    from wallpaper_core.console.output import RichOutput
+
+_GEOMETRY_PATTERN = re.compile(r"^(\d+)x(\d+)$")
+
+# Scale the source so it covers the master geometry (aspect ratio preserved)
+PRESCALE_COMMAND = 'magick "$INPUT" -resize "$GEOMETRY"^ "$OUTPUT"'
+
+
+@dataclass(frozen=True)
+class OutputGeometry:
+    """Target output size for a wallpaper variant."""
+
+    width: int
+    height: int
+
+    @classmethod
+    def parse(cls, value: str) -> OutputGeometry:
+        """Parse a WIDTHxHEIGHT geometry string.
+
+        Args:
+            value: Geometry string (e.g., "3840x2160")
+
+        Returns:
+            Parsed OutputGeometry
+
+        Raises:
+            ValueError: If the string is not a valid positive geometry
+        """
+        match = _GEOMETRY_PATTERN.match(value.strip())
+        if match is None:
+            raise ValueError(
+                f"Invalid output size '{value}' (expected WIDTHxHEIGHT, e.g. 1920x1080)"
+            )
+        width, height = int(match.group(1)), int(match.group(2))
+        if width == 0 or height == 0:
+            raise ValueError(f"Invalid output size '{value}' (must be non-zero)")
+        return cls(width=width, height=height)
+
+    def __str__(self) -> str:
+        return f"{self.width}x{self.height}"
+
+
+def parse_geometries(values: list[str]) -> list[OutputGeometry]:
+    """Parse geometry strings, dropping duplicates but keeping order."""
+    geometries: list[OutputGeometry] = []
+    for value in values:
+        geometry = OutputGeometry.parse(value)
+        if geometry not in geometries:
+            geometries.append(geometry)
+    return geometries
+
+
+def master_geometry(geometries: list[OutputGeometry]) -> OutputGeometry:
+    """Smallest geometry that every variant can be cropped from."""
+    return OutputGeometry(
+        width=max(g.width for g in geometries),
+        height=max(g.height for g in geometries),
+    )
+
+
+def variant_output_path(output_path: Path, geometry: OutputGeometry) -> Path:
+    """Get the output path for one size variant of an item.
+
+    Example:
+        >>> variant_output_path(Path("/out/wall/effects/blur.jpg"),
+        ...                     OutputGeometry(1920, 1080))
+        Path('/out/wall/effects/blur@1920x1080.jpg')
+    """
+    suffix = output_path.suffix or ".png"
+    return output_path.with_name(f"{output_path.stem}@{geometry}{suffix}")
+
+
+def build_variants_command(
+    output_path: Path, geometries: list[OutputGeometry], options: str = ""
+) -> str:
+    """Build one magick command that writes every variant from $INPUT.
+
+    All but the last variant are derived from a clone of the master image
+    and written with -write, so the master is decoded only once. Encoder
+    options are applied to the master so every variant inherits them.
+    """
+    parts = ['magick "$INPUT"']
+    if options:
+        parts.append(options)
+    for geometry in geometries[:-1]:
+        path = variant_output_path(output_path, geometry)
+        parts.append(
+            f"\\( +clone -resize {geometry}^ -gravity center -extent {geometry} "
+            f'+repage -write "{path}" +delete \\)'
+        )
+    last = geometries[-1]
+    parts.append(f"-resize {last}^ -gravity center -extent {last} +repage")
+    parts.append('"$OUTPUT"')
+    return " ".join(parts)
+
+
+class VariantExecutor:
+    """Render an item once and derive every requested size from it."""
+
+    def __init__(
+        self,
+        executor: CommandExecutor | None = None,
+        output: RichOutput | None = None,
+        temp_dir: Path | None = None,
+    ) -> None:
+        """Initialize VariantExecutor.
+
+        Args:
+            executor: CommandExecutor used for resize steps
+            output: RichOutput instance for logging
+            temp_dir: Directory for intermediates (None = /dev/shm or system)
+        """
+        self.output = output
+        self.temp_dir = temp_dir
+        self.executor = executor or CommandExecutor(output)
+
+    def execute(
+        self,
+        render: Callable[[Path, Path], ExecutionResult],
+        input_path: Path,
+        output_path: Path,
+        geometries: list[OutputGeometry],
+        encoding: EncodingSettings | None = None,
+    ) -> ExecutionResult:
+        """Render an item at the largest needed size, then resample.
+
+        Process flow:
+        - input -> source (scaled to cover the master geometry)
+        - render(source) -> master
+        - master -> every variant (single magick process)
+
+        Source and master are INTERMEDIATE_FORMAT files, which render
+        writes without encoder options; the profile is applied once, to
+        the variants.
+
+        Args:
+            render: Callable applying the effect/composite/preset
+            input_path: Path to input image
+            output_path: Base output path (variant suffixes are added)
+            geometries: Requested output sizes
+            encoding: Encoding profile for the variant files
+
+        Returns:
+            ExecutionResult for the whole variant set
+        """
+        if not geometries:
+            return render(input_path, output_path)
+
+        master = master_geometry(geometries)
+        total_duration = 0.0
+
+        with tempfile.TemporaryDirectory(
+            dir=resolve_temp_dir(self.temp_dir, input_path)
+        ) as temp_dir:
+            temp_path = Path(temp_dir)
+            # Lossless intermediates: only the variants are encoded
+            source_path = temp_path / f"source.{INTERMEDIATE_FORMAT}"
+            master_path = temp_path / f"master.{INTERMEDIATE_FORMAT}"
+
+            if self.output:
+                self.output.debug(f"Scaling source to cover {master}")
+            result = self.executor.execute(
+                PRESCALE_COMMAND, input_path, source_path, {"geometry": str(master)}
+            )
+            total_duration += result.duration
+            if not result.success:
+                return self._failure("prescale", result, total_duration)
+
+            result = render(source_path, master_path)
+            total_duration += result.duration
+            source_path.unlink(missing_ok=True)
+            if not result.success:
+                return self._failure("render", result, total_duration)
+
+            result = self.executor.execute(
+                build_variants_command(
+                    output_path,
+                    geometries,
+                    encoding_options(encoding, output_path),
+                ),
+                master_path,
+                variant_output_path(output_path, geometries[-1]),
+            )
+            total_duration += result.duration
+            if not result.success:
+                return self._failure("resample", result, total_duration)
+
+        return ExecutionResult(
+            success=True,
+            command=f"variants: {', '.join(str(g) for g in geometries)}",
+            stdout="",
+            stderr="",
+            return_code=0,
+            duration=total_duration,
+        )
+
+    def _failure(
+        self, stage: str, result: ExecutionResult, duration: float
+    ) -> ExecutionResult:
+        """Wrap a failed stage result."""
+        return ExecutionResult(
+            success=False,
+            command=result.command,
+            stdout=result.stdout,
+            stderr=f"Variant {stage} failed: {result.stderr}",
+            return_code=result.return_code,
+            duration=duration,
+            cancelled=result.cancelled,
+            timed_out=result.timed_out,
+        )
@@ -0,0 +1,395 @@
+"""MagickWand backend: ImageMagick's own operators, run in-process.
+
+Binds libMagickWand with ctypes. Every step still runs its magick command
+line, but the library interprets it (MagickCommandGenesis, which the
+magick binary itself calls) instead of a new process, so results match
+the magick backend. Images live in ImageMagick's in-memory registry as
+"mpr:" images: a chain decodes its input once, passes decoded pixels from
+step to step, and encodes once.
+
+Decoded inputs are kept for later chains (up to MAX_SHARED_INPUTS, least
+recently used first out), so every item of a batch starts from the same
+decoded image; files are matched by path, size and modification time.
+
+Only single `magick "$INPUT" ... "$OUTPUT"` commands run in-process (see
+simple_ops); a chain with any other step runs with magick. Limits (time-out
+and rlimits) apply to processes and are not enforced in-process, and
+cancellation is checked between steps.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import itertools
+import os
+import shlex
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from wallpaper_core.engine.backend import (
+    BackendCapabilities,
+    BackendError,
+    ImageBackend,
+)
+from wallpaper_core.engine.executor import simple_ops, substitute_command
+from wallpaper_core.engine.params import params_with_defaults
+from wallpaper_core.engine.tempdir import resolve_temp_dir
+
+if TYPE_CHECKING:
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+    from wallpaper_core.engine.chain import ChainExecutor
+
+# Library names tried in order (ImageMagick 7 before 6, HDRI builds first)
+LIBRARY_NAMES = [
+    "MagickWand-7.Q16HDRI",
+    "MagickWand-7.Q16",
+    "MagickWand-7.Q8",
+    "MagickWand-6.Q16HDRI",
+    "MagickWand-6.Q16",
+    "MagickWand-6.Q8",
+    "MagickWand",
+]
+
+# Decoded inputs kept for later chains
+MAX_SHARED_INPUTS = 4
+
+# ExceptionType values from here on are errors (lower ones are warnings)
+_ERROR_SEVERITY = 400
+
+_registry_ids = itertools.count()
+
+
+class _ExceptionInfo(ctypes.Structure):
+    """Leading fields of MagickCore's ExceptionInfo (stable since 6.0)."""
+
+    _fields_ = [
+        ("severity", ctypes.c_int),
+        ("error_number", ctypes.c_int),
+        ("reason", ctypes.c_char_p),
+        ("description", ctypes.c_char_p),
+    ]
+
+
+_ExceptionPointer = ctypes.POINTER(_ExceptionInfo)
+
+# MagickBooleanType (*MagickCommand)(ImageInfo *, int, char **, char **,
+#                                    ExceptionInfo *)
+_MagickCommand = ctypes.CFUNCTYPE(
+    ctypes.c_int,
+    ctypes.c_void_p,
+    ctypes.c_int,
+    ctypes.POINTER(ctypes.c_char_p),
+    ctypes.POINTER(ctypes.c_char_p),
+    _ExceptionPointer,
+)
+
+
+def find_library() -> str:
+    """Locate libMagickWand.
+
+    Raises:
+        OSError: If no MagickWand library is installed
+    """
+    for name in LIBRARY_NAMES:
+        path = ctypes.util.find_library(name)
+        if path is not None:
+            return path
+    raise OSError("libMagickWand not found")
+
+
+class MagickLibrary:
+    """The libMagickWand functions the backend calls."""
+
+    def __init__(self, path: str) -> None:
+        """Load the library and start ImageMagick.
+
+        Args:
+            path: Library file or name (see find_library)
+
+        Raises:
+            OSError: If the library cannot be loaded or lacks a function
+        """
+        lib = ctypes.CDLL(path)
+        try:
+            self._declare(lib)
+            # ImageMagick 7 runs everything as `magick`, 6 as `convert`
+            if hasattr(lib, "MagickImageCommand"):
+                self.program = "magick"
+                self.command = _MagickCommand(("MagickImageCommand", lib))
+            else:
+                self.program = "convert"
+                self.command = _MagickCommand(("ConvertImageCommand", lib))
+        except AttributeError as e:
+            raise OSError(f"{path} is not a usable MagickWand library: {e}") from e
+        lib.MagickWandGenesis()
+        self.lib = lib
+
+    @staticmethod
+    def _declare(lib: ctypes.CDLL) -> None:
+        """Set the signatures of the functions used."""
+        signatures: dict[str, tuple[list[Any], Any]] = {
+            "MagickWandGenesis": ([], None),
+            "AcquireImageInfo": ([], ctypes.c_void_p),
+            "DestroyImageInfo": ([ctypes.c_void_p], ctypes.c_void_p),
+            "AcquireExceptionInfo": ([], _ExceptionPointer),
+            "DestroyExceptionInfo": ([_ExceptionPointer], _ExceptionPointer),
+            "MagickCommandGenesis": (
+                [
+                    ctypes.c_void_p,
+                    _MagickCommand,
+                    ctypes.c_int,
+                    ctypes.POINTER(ctypes.c_char_p),
+                    ctypes.POINTER(ctypes.c_char_p),
+                    _ExceptionPointer,
+                ],
+                ctypes.c_int,
+            ),
+            "DeleteImageRegistry": ([ctypes.c_char_p], ctypes.c_int),
+            "NewMagickWand": ([], ctypes.c_void_p),
+            "DestroyMagickWand": ([ctypes.c_void_p], ctypes.c_void_p),
+            "MagickReadImageBlob": (
+                [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t],
+                ctypes.c_int,
+            ),
+            "MagickWriteImages": (
+                [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int],
+                ctypes.c_int,
+            ),
+            "MagickGetException": (
+                [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)],
+                ctypes.c_void_p,
+            ),
+            "MagickRelinquishMemory": ([ctypes.c_void_p], ctypes.c_void_p),
+        }
+        for name, (argtypes, restype) in signatures.items():
+            function = getattr(lib, name)
+            function.argtypes = argtypes
+            function.restype = restype
+
+    def run(self, args: list[str]) -> None:
+        """Run a magick command line in-process.
+
+        Args:
+            args: Arguments after the program name
+
+        Raises:
+            BackendError: If the command reports an error
+        """
+        argv = [self.program, *args]
+        c_argv = (ctypes.c_char_p * len(argv))(*(arg.encode() for arg in argv))
+        image_info = self.lib.AcquireImageInfo()
+        exception = self.lib.AcquireExceptionInfo()
+        try:
+            status = self.lib.MagickCommandGenesis(
+                image_info, self.command, len(argv), c_argv, None, exception
+            )
+            error = exception.contents
+            if not status or error.severity >= _ERROR_SEVERITY:
+                reason = (error.reason or b"").decode(errors="replace")
+                description = (error.description or b"").decode(errors="replace")
+                detail = f" ({description})" if description else ""
+                raise BackendError(f"{reason or 'command failed'}{detail}")
+        finally:
+            self.lib.DestroyExceptionInfo(exception)
+            self.lib.DestroyImageInfo(image_info)
+
+    def store(self, data: bytes, key: str) -> None:
+        """Decode an encoded image into the registry.
+
+        Raises:
+            BackendError: If the data cannot be decoded
+        """
+        wand = self.lib.NewMagickWand()
+        try:
+            if not (
+                self.lib.MagickReadImageBlob(wand, data, len(data))
+                and self.lib.MagickWriteImages(wand, f"mpr:{key}".encode(), 1)
+            ):
+                raise BackendError(self._wand_error(wand))
+        finally:
+            self.lib.DestroyMagickWand(wand)
+
+    def delete(self, key: str) -> None:
+        """Remove an image from the registry."""
+        self.lib.DeleteImageRegistry(key.encode())
+
+    def _wand_error(self, wand: int) -> str:
+        """Get and free the description of a wand's last error."""
+        severity = ctypes.c_int()
+        message = self.lib.MagickGetException(wand, ctypes.byref(severity))
+        text = ctypes.string_at(message).decode(errors="replace") if message else ""
+        self.lib.MagickRelinquishMemory(message)
+        return text or "cannot decode image"
+
+
+_library: MagickLibrary | None = None
+_library_lock = threading.Lock()
+
+
+def load_library() -> MagickLibrary:
+    """Get the process-wide MagickWand library, loading it on first use.
+
+    Raises:
+        OSError: If libMagickWand is missing or unusable
+    """
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = MagickLibrary(find_library())
+        return _library
+
+
+def step_args(config: EffectsConfig, step: ChainStep) -> list[str] | None:
+    """Get a step's magick operators as arguments.
+
+    Returns:
+        The arguments between input and output, or None if the effect is
+        not a single `magick "$INPUT" ... "$OUTPUT"` call
+    """
+    effect = config.effects.get(step.effect)
+    if effect is None:
+        return None
+    params = params_with_defaults(config, step.effect, step.params)
+    ops = simple_ops(
+        substitute_command(effect.command, "$INPUT", "$OUTPUT", params, "magick")
+    )
+    return shlex.split(ops) if ops is not None else None
+
+
+@dataclass
+class WandImage:
+    """A decoded image in ImageMagick's registry."""
+
+    key: str
+    shared: _SharedInput | None = None
+
+
+@dataclass
+class _SharedInput:
+    """A decoded input file kept for later chains."""
+
+    key: str
+    users: int = 0
+    loaded: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class WandBackend(ImageBackend[WandImage]):
+    """Run magick operators in-process on registry images."""
+
+    name = "wand"
+    label = "MagickWand"
+    capabilities = BackendCapabilities(
+        in_process=True, shares_inputs=True, any_command=False
+    )
+
+    def __init__(self, chain_executor: ChainExecutor) -> None:
+        """Initialize WandBackend.
+
+        Args:
+            chain_executor: Executor whose config, encoding and cancel
+                token the backend uses
+
+        Raises:
+            OSError: If libMagickWand is missing or unusable
+        """
+        super().__init__(chain_executor)
+        self.library = load_library()
+        self._inputs: OrderedDict[tuple[str, int, int], _SharedInput] = OrderedDict()
+        self._inputs_lock = threading.Lock()
+
+    def supports(self, steps: list[ChainStep]) -> bool:
+        """Check if every step is a single magick call."""
+        return all(step_args(self.config, step) is not None for step in steps)
+
+    def load(self, data: bytes) -> WandImage:
+        """Decode an encoded image."""
+        image = WandImage(key=_registry_key())
+        self.library.store(data, image.key)
+        return image
+
+    def load_file(self, path: Path) -> WandImage:
+        """Decode an image file, or reuse its decoded image."""
+        try:
+            stat = path.stat()
+        except OSError as e:
+            raise BackendError(f"Cannot read {path}: {e}") from e
+        shared = self._acquire((str(path.resolve()), stat.st_size, stat.st_mtime_ns))
+        try:
+            with shared.lock:
+                if not shared.loaded:
+                    self.library.run([str(path), f"mpr:{shared.key}"])
+                    shared.loaded = True
+        except BackendError:
+            self.release(WandImage(shared.key, shared))
+            raise
+        return WandImage(shared.key, shared)
+
+    def apply_effect(self, image: WandImage, step: ChainStep) -> WandImage:
+        """Run a step's operators from one registry image to a new one."""
+        args = step_args(self.config, step)
+        if args is None:
+            raise BackendError("not a single magick call")
+        result = WandImage(key=_registry_key())
+        self.library.run([f"mpr:{image.key}", *args, f"mpr:{result.key}"])
+        return result
+
+    def save(self, image: WandImage, output_format: str, encode_command: str) -> bytes:
+        """Encode to a temporary file, then read it back."""
+        # The output's size is unknown: /dev/shm only needs its headroom
+        temp_root = resolve_temp_dir(self.chain_executor.temp_dir, Path(os.devnull))
+        with tempfile.TemporaryDirectory(dir=temp_root) as temp_dir:
+            path = Path(temp_dir) / f"output.{output_format}"
+            self.save_file(image, path, encode_command)
+            return path.read_bytes()
+
+    def save_file(
+        self, image: WandImage, output_path: Path, encode_command: str
+    ) -> None:
+        """Run the encode command from a registry image to a file."""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        command = substitute_command(
+            encode_command, f"mpr:{image.key}", output_path, None, "magick"
+        )
+        self.library.run(shlex.split(command)[1:])
+
+    def release(self, image: WandImage) -> None:
+        """Drop an image from the registry (shared inputs stay cached)."""
+        if image.shared is None:
+            self.library.delete(image.key)
+            return
+        with self._inputs_lock:
+            image.shared.users -= 1
+            self._evict()
+
+    def _acquire(self, identity: tuple[str, int, int]) -> _SharedInput:
+        """Get the cache entry of an input file and count a user."""
+        with self._inputs_lock:
+            shared = self._inputs.get(identity)
+            if shared is None:
+                shared = self._inputs[identity] = _SharedInput(key=_registry_key())
+            self._inputs.move_to_end(identity)
+            shared.users += 1
+            self._evict()
+            return shared
+
+    def _evict(self) -> None:
+        """Drop unused inputs beyond MAX_SHARED_INPUTS, oldest first."""
+        excess = len(self._inputs) - MAX_SHARED_INPUTS
+        for identity, shared in list(self._inputs.items()):
+            if excess <= 0:
+                break
+            if shared.users == 0:
+                del self._inputs[identity]
+                self.library.delete(shared.key)
+                excess -= 1
+
+
+def _registry_key() -> str:
+    """A registry key unique within the process."""
+    return f"wallpaper-{os.getpid()}-{next(_registry_ids)}"
@@ -0,0 +1,249 @@
+"""Worker processes rendering NumPy chains from one shared decoded input.
+
+NumPy operations hold the GIL, so in BatchGenerator's thread pool only one
+item computes at a time. With workers = "processes", the batch input is
+decoded once into a multiprocessing.shared_memory block, and the items the
+NumPy backend supports are rendered by worker processes that map the block
+read-only: the pixels are copied neither per worker nor per item. The
+effects config and settings are sent once, when each worker starts.
+
+Workers ignore SIGINT; cancelling the batch's token sets an event that makes
+each worker cancel its own token (stopping its magick processes), after
+which the workers still running are terminated.
+
+Other items (chains with steps NumPy does not implement, blur cascades,
+size variants) keep running on the batch's threads.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import signal
+import threading
+import time
+from collections.abc import Iterator
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+
+from wallpaper_core.engine.cancel import (
+    TERMINATE_GRACE_PERIOD,
+    CancelToken,
+    remove_partial_output,
+)
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.native import NativeBackend, Pixels
+
+if TYPE_CHECKING:
+    from multiprocessing.synchronize import Event
+
+    from wallpaper_core.config.schema import EncodingSettings, LimitSettings
+    from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+    from wallpaper_core.engine.executor import ExecutionResult
+    from wallpaper_core.engine.optimize import OptimizeMode
+
+WorkerMode = Literal["threads", "processes"]
+
+# Seconds between checks of the cancel token while waiting for a worker
+POLL_INTERVAL = 0.1
+
+
+@dataclass(frozen=True)
+class SharedPixels:
+    """Where a decoded image lives in shared memory (sent to workers)."""
+
+    name: str
+    shape: tuple[int, ...]
+    maxval: int
+
+
+class SharedInput:
+    """A decoded input in shared memory and the worker processes reading it."""
+
+    def __init__(
+        self,
+        chain_executor: ChainExecutor,
+        backend: NativeBackend,
+        pixels: Pixels,
+        maxval: int,
+        max_workers: int | None = None,
+    ) -> None:
+        """Copy pixels to shared memory and start the workers.
+
+        Args:
+            chain_executor: Executor whose settings the workers copy
+            backend: Its NumPy backend
+            pixels: Decoded input
+            maxval: PAM MAXVAL to encode results with
+            max_workers: Worker processes (None = CPU count)
+        """
+        self.chain_executor = chain_executor
+        self.backend = backend
+        self.memory = SharedMemory(create=True, size=max(pixels.nbytes, 1))
+        shared: Pixels = np.ndarray(pixels.shape, np.float32, self.memory.buf)
+        shared[...] = pixels
+        del shared  # the block cannot be closed while a view exists
+        self.pixels = SharedPixels(self.memory.name, pixels.shape, maxval)
+        # Workers are spawned: forking the batch's threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.cancel_event = context.Event()
+        self._lock = threading.Lock()
+        self._futures: set[futures.Future[ExecutionResult]] = set()
+        self.pool = ProcessPoolExecutor(
+            max_workers,
+            mp_context=context,
+            initializer=_start_worker,
+            initargs=(
+                chain_executor.config,
+                chain_executor.encoding,
+                chain_executor.limits,
+                chain_executor.optimizer.mode,
+                chain_executor.executor.binary,
+                self.cancel_event,
+            ),
+        )
+
+    @classmethod
+    @contextlib.contextmanager
+    def open(
+        cls,
+        chain_executor: ChainExecutor,
+        backend: NativeBackend,
+        input_path: Path,
+        max_workers: int | None = None,
+    ) -> Iterator[SharedInput]:
+        """Decode an input into shared memory for the duration of a batch.
+
+        Raises:
+            BackendError: If the input cannot be decoded
+        """
+        pixels, maxval = backend.load_file(input_path)
+        shared = cls(chain_executor, backend, pixels, maxval, max_workers)
+        del pixels
+        try:
+            yield shared
+        finally:
+            shared.close()
+
+    def supports(self, chain: list[ChainStep]) -> bool:
+        """Check if the NumPy backend runs a chain."""
+        return self.chain_executor.backend_for(chain) is self.backend
+
+    def render(self, chain: list[ChainStep], output_path: Path) -> ExecutionResult:
+        """Render a chain in a worker and wait for its result.
+
+        If the cancel token fires meanwhile, the workers are stopped (see
+        cancel) and the item is reported as cancelled.
+        """
+        executor = self.chain_executor.executor
+        token = executor.cancel_token
+        start = time.time()
+        with self._lock:
+            if token.cancelled or self.cancel_event.is_set():
+                return executor._cancelled_result("numpy worker", 0.0)
+            future = self.pool.submit(_render, chain, self.pixels, output_path)
+            self._futures.add(future)
+        try:
+            while not token.cancelled:
+                done, _ = futures.wait([future], timeout=POLL_INTERVAL)
+                if done:
+                    return future.result()
+            # While the future is pending, so that cancel waits for it too
+            self.cancel()
+        finally:
+            with self._lock:
+                self._futures.discard(future)
+        remove_partial_output(output_path)
+        return executor._cancelled_result("numpy worker", time.time() - start)
+
+    def cancel(self) -> None:
+        """Stop the workers and the magick processes they started.
+
+        Workers cancel their own tokens on the shared event; the ones still
+        running after that (e.g. in a long NumPy step) are terminated. Safe
+        to call from several threads: later calls wait for the first.
+        """
+        with self._lock:
+            if self.cancel_event.is_set():
+                return
+            self.cancel_event.set()
+            # A worker's token waits up to the grace period before it kills
+            # a magick process group, so allow for that before terminating
+            futures.wait(list(self._futures), timeout=2 * TERMINATE_GRACE_PERIOD)
+            for process in list(getattr(self.pool, "_processes", {}).values()):
+                if process.is_alive():
+                    process.terminate()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        if self.chain_executor.executor.cancel_token.cancelled:
+            self.cancel()
+        self.pool.shutdown(cancel_futures=True)
+        self.memory.close()
+        self.memory.unlink()
+
+
+# ============================================================================
+# Worker side
+# ============================================================================
+
+_backend: NativeBackend | None = None
+_attached: dict[str, tuple[SharedMemory, Pixels]] = {}
+
+
+def _start_worker(
+    config: EffectsConfig,
+    encoding: EncodingSettings | None,
+    limits: LimitSettings | None,
+    optimize: OptimizeMode,
+    binary: str,
+    cancel_event: Event,
+) -> None:
+    """Set up a worker's NumPy backend (once per process)."""
+    global _backend
+    # Ctrl-C reaches the whole process group; the batch cancels workers
+    # through cancel_event instead, so the pool is not broken mid-item
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    chain_executor = ChainExecutor(
+        config, encoding=encoding, limits=limits, optimize=optimize
+    )
+    chain_executor.executor.binary = binary
+    _backend = NativeBackend(chain_executor)
+    threading.Thread(
+        target=_watch_cancel,
+        args=(cancel_event, chain_executor.executor.cancel_token),
+        name="cancel-watcher",
+        daemon=True,
+    ).start()
+
+
+def _watch_cancel(cancel_event: Event, token: CancelToken) -> None:
+    """Cancel a worker's token (and its magick processes) with the batch."""
+    cancel_event.wait()
+    token.cancel()
+
+
+def _render(
+    chain: list[ChainStep], pixels: SharedPixels, output_path: Path
+) -> ExecutionResult:
+    """Render a chain from the shared input to a file."""
+    assert _backend is not None  # nosec: set by _start_worker
+    return _backend.render_file(chain, (_attach(pixels), pixels.maxval), output_path)
+
+
+def _attach(pixels: SharedPixels) -> Pixels:
+    """Map a shared image read-only, once per worker."""
+    if pixels.name not in _attached:
+        memory = SharedMemory(name=pixels.name)
+        array: Pixels = np.ndarray(pixels.shape, np.float32, memory.buf)
+        array.flags.writeable = False
+        _attached[pixels.name] = (memory, array)
+    return _attached[pixels.name][1]
@@ -12,6 +12,7 @@ from wallpaper_core.effects.schema import (
     CompositeEffect,
     Effect,
     EffectsConfig,
+    EffectTraits,
     ParameterDefinition,
     ParameterType,
     Preset,
@@ -172,6 +173,56 @@ def sample_effects_config(
     )
 
 
+@pytest.fixture
+def traits_effects_config() -> EffectsConfig:
+    """Create an effects config whose effects declare optimizer traits."""
+    return EffectsConfig(
+        version="1.0",
+        parameter_types={
+            "blur_geometry": ParameterType(
+                type="string", pattern=r"^\d+x\d+$", default="0x8"
+            ),
+            "percent": ParameterType(type="integer", min=-100, max=100, default=0),
+        },
+        effects={
+            "blur": Effect(
+                description="Blur",
+                command='magick "$INPUT" -blur "$BLUR" "$OUTPUT"',
+                parameters={
+                    "blur": ParameterDefinition(type="blur_geometry", default="0x8")
+                },
+                traits=EffectTraits(kind="spatial", identity={"blur": "0x0"}, cost=4),
+            ),
+            "blackwhite": Effect(
+                description="Grayscale",
+                command='magick "$INPUT" -grayscale Average "$OUTPUT"',
+                traits=EffectTraits(kind="reduction", idempotent=True),
+            ),
+            "negate": Effect(
+                description="Negate",
+                command='magick "$INPUT" -negate "$OUTPUT"',
+                traits=EffectTraits(kind="pointwise", involution=True),
+            ),
+            "brightness": Effect(
+                description="Brightness",
+                command='magick "$INPUT" -brightness-contrast "$BRIGHTNESS"% "$OUTPUT"',
+                parameters={
+                    "brightness": ParameterDefinition(type="percent", default=-20)
+                },
+                traits=EffectTraits(
+                    kind="pointwise",
+                    identity={"brightness": 0},
+                    merge={"brightness": "add"},
+                ),
+            ),
+            "vignette": Effect(
+                description="Vignette",
+                command='magick "$INPUT" -vignette 0x20 "$OUTPUT"',
+            ),
+        },
+    )
+
+
 @pytest.fixture
 def minimal_effects_config() -> EffectsConfig:
     """Create minimal effects config for simple tests."""
@@ -296,13 +347,54 @@ def _mock_subprocess_run(command, **kwargs):
                         b"\x08\x02\x00\x00\x00\xf6B\xc8n\x00\x00\x00\x00IEND\xaeB`\x82"
                     )
 
+            # Extra outputs written mid-command with -write (size variants)
+            for extra_output in re.findall(r'-write "([^"]+)"', command_str):
+                Path(extra_output).parent.mkdir(parents=True, exist_ok=True)
+                Path(extra_output).write_bytes(b"\x89PNG\r\n\x1a\n")
+
     return mock_result
 
 
+class _MockPopen:
+    """
+    Mock subprocess.Popen built on _mock_subprocess_run.
+
+    The command "runs" as soon as it is spawned, so the process is already
+    finished when CommandExecutor registers it with its cancel token and
+    cancellation never signals a real process group.
+    """
+
+    pid = -1
+
+    def __init__(self, command, **kwargs):
+        self.args = command
+        result = _mock_subprocess_run(command, **kwargs)
+        self.returncode = result.returncode
+        self._output = (result.stdout, result.stderr)
+
+    def communicate(self, input=None, timeout=None):
+        return self._output
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def send_signal(self, sig):
+        pass
+
+    def terminate(self):
+        pass
+
+    def kill(self):
+        pass
+
+
 @pytest.fixture(autouse=True)
 def mock_subprocess_for_integration_tests():
     """
-    Auto-use fixture that mocks subprocess.run and shutil.which for all tests.
+    Auto-use fixture that mocks subprocess.Popen and shutil.which for all tests.
 
     This allows integration tests to run without ImageMagick installed
     by simulating command execution and file creation. Also mocks shutil.which
@@ -317,14 +409,22 @@ def mock_subprocess_for_integration_tests():
 
     with (
         patch(
-            "wallpaper_core.engine.executor.subprocess.run",
-            side_effect=_mock_subprocess_run,
+            "wallpaper_core.engine.executor.subprocess.Popen",
+            side_effect=_MockPopen,
         ),
         patch("shutil.which", side_effect=mock_which),
     ):
         yield
 
 
+@pytest.fixture(autouse=True)
+def isolated_clut_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Auto-use fixture that keeps color lookup tables out of ~/.cache."""
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
+
+
 @pytest.fixture(autouse=True)
 def reset_effects_configuration():
     """
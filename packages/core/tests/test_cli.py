@@ -1,13 +1,24 @@
 """Tests for CLI commands."""
 
+import subprocess
+from collections.abc import Iterator
 from pathlib import Path
+from unittest.mock import patch
 
+import pytest
 from typer.testing import CliRunner
 
 from wallpaper_core.cli.main import app
+from wallpaper_core.cli.process import _chain_executor
+from wallpaper_core.config.schema import CoreSettings, EncodingSettings
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.executor import BytesResult, CommandExecutor
 
 runner = CliRunner()
 
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
 
 class TestMainCLI:
     """Tests for main CLI app."""
@@ -77,6 +88,28 @@ class TestProcessCommands:
         expected_output = output_dir / "test_image" / "effects" / "blur.png"
         assert expected_output.exists()
 
+    def test_process_effect_rejects_invalid_parameter(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Process effect checks parameters against their types before running."""
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "effect",
+                str(test_image_file),
+                "-o",
+                str(tmp_path),
+                "--effect",
+                "blur",
+                "--blur",
+                "lots",
+            ],
+        )
+        assert result.exit_code == 1
+        assert "Invalid parameter: blur: 'lots' does not match" in result.output
+        assert not (tmp_path / "test_image").exists()
+
     def test_process_effect_without_output_uses_default(
         self, test_image_file: Path, use_tmp_default_output: Path
     ) -> None:
@@ -398,6 +431,28 @@ class TestProcessCommands:
         )
         assert result.exit_code != 0
 
+    def test_format_flag_sets_file_suffix(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test --format selects the output format for file output too."""
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "effect",
+                str(test_image_file),
+                "-e",
+                "negate",
+                "-o",
+                str(tmp_path),
+                "--format",
+                "jpg",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert (tmp_path / "test_image" / "effects" / "negate.jpg").exists()
+
 
 class TestBatchCommands:
     """Tests for batch commands."""
@@ -897,7 +952,7 @@ class TestExecutorFailures:
         with patch("wallpaper_core.cli.process.CommandExecutor") as mock_executor_class:
             mock_executor = MagicMock()
             mock_executor.execute.return_value = MagicMock(
-                success=False, stderr="ImageMagick error"
+                success=False, stderr="ImageMagick error", cancelled=False
             )
             mock_executor_class.return_value = mock_executor
 
@@ -925,7 +980,7 @@ class TestExecutorFailures:
         with patch("wallpaper_core.cli.process.ChainExecutor") as mock_executor_class:
             mock_executor = MagicMock()
             mock_executor.execute_chain.return_value = MagicMock(
-                success=False, stderr="Chain execution failed"
+                success=False, stderr="Chain execution failed", cancelled=False
             )
             mock_executor_class.return_value = mock_executor
 
@@ -953,7 +1008,7 @@ class TestExecutorFailures:
         with patch("wallpaper_core.cli.process.ChainExecutor") as mock_executor_class:
             mock_executor = MagicMock()
             mock_executor.execute_chain.return_value = MagicMock(
-                success=False, stderr="Chain execution failed"
+                success=False, stderr="Chain execution failed", cancelled=False
             )
             mock_executor_class.return_value = mock_executor
 
@@ -1193,3 +1248,603 @@ class TestBatchUnknownItems:
         # Should exit with code 1 if any effect failed
         # This tests the strict mode error path
         assert result.exit_code in (0, 1)
+
+
+class TestOutputSizes:
+    """Tests for --size multi-resolution output."""
+
+    def test_process_effect_with_sizes(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Process effect writes one file per requested size."""
+        output_dir = tmp_path / "output"
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "effect",
+                str(test_image_file),
+                "-o",
+                str(output_dir),
+                "--effect",
+                "blur",
+                "--size",
+                "3840x2160",
+                "--size",
+                "1920x1080",
+            ],
+        )
+        assert result.exit_code == 0
+        effects_dir = output_dir / "test_image" / "effects"
+        assert (effects_dir / "blur@3840x2160.png").exists()
+        assert (effects_dir / "blur@1920x1080.png").exists()
+        assert not (effects_dir / "blur.png").exists()
+
+    def test_process_composite_with_sizes(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Process composite writes one file per requested size."""
+        output_dir = tmp_path / "output"
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "composite",
+                str(test_image_file),
+                "-o",
+                str(output_dir),
+                "--composite",
+                "blur-brightness80",
+                "-s",
+                "1080x1920",
+            ],
+        )
+        assert result.exit_code == 0
+        expected = (
+            output_dir / "test_image" / "composites" / "blur-brightness80@1080x1920.png"
+        )
+        assert expected.exists()
+
+    def test_process_preset_invalid_size(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Invalid --size values are rejected before processing."""
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "preset",
+                str(test_image_file),
+                "-o",
+                str(tmp_path),
+                "--preset",
+                "dim",
+                "--size",
+                "huge",
+            ],
+        )
+        assert result.exit_code == 1
+        assert not (tmp_path / "test_image").exists()
+
+    def test_batch_presets_with_sizes(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Batch presets writes every size for every preset."""
+        result = runner.invoke(
+            app,
+            [
+                "batch",
+                "presets",
+                str(test_image_file),
+                "-o",
+                str(tmp_path),
+                "--sequential",
+                "--size",
+                "1920x1080",
+                "--size",
+                "1280x720",
+            ],
+        )
+        assert result.exit_code == 0
+        presets_dir = tmp_path / test_image_file.stem / "presets"
+        assert (presets_dir / "dim@1920x1080.png").exists()
+        assert (presets_dir / "dim@1280x720.png").exists()
+
+    def test_batch_dry_run_lists_size_outputs(
+        self, test_image_file: Path, tmp_path: Path, sample_effects_config
+    ) -> None:
+        """Batch dry-run items list every size variant and its commands."""
+        from wallpaper_core.cli.batch import _dry_run_items
+        from wallpaper_core.engine.batch import BatchGenerator
+        from wallpaper_core.engine.variants import OutputGeometry
+
+        generator = BatchGenerator(
+            sample_effects_config,
+            geometries=[OutputGeometry(1920, 1080), OutputGeometry(1280, 720)],
+        )
+        items = _dry_run_items(
+            generator, "effects", test_image_file, tmp_path, flat=False
+        )
+        blur = next(item for item in items if item["name"] == "blur")
+        effects_dir = tmp_path / "test_image" / "effects"
+        assert blur["output_path"] == (
+            f"{effects_dir / 'blur@1920x1080.png'}, {effects_dir / 'blur@1280x720.png'}"
+        )
+        prescale, render, variants = blur["command"].split(" && ")
+        assert '"1920x1080"^' in prescale
+        assert "-blur" in render
+        assert "blur@1280x720.png" in variants
+
+
+class TestExecutionPlans:
+    """Tests for --plan-out and run-plan."""
+
+    def test_plan_out_then_run_plan(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a written plan runs later and produces the batch outputs."""
+        plan_file = tmp_path / "plan.json"
+        output_dir = tmp_path / "out"
+
+        result = runner.invoke(
+            app,
+            [
+                "batch",
+                "composites",
+                str(test_image_file),
+                "-o",
+                str(output_dir),
+                "--plan-out",
+                str(plan_file),
+            ],
+        )
+        assert result.exit_code == 0
+        assert plan_file.exists()
+        assert not output_dir.exists()
+
+        result = runner.invoke(app, ["run-plan", str(plan_file), "--sequential"])
+        assert result.exit_code == 0
+        composites_dir = output_dir / "test_image" / "composites"
+        assert (composites_dir / "blur-brightness80.png").exists()
+
+    def test_run_plan_dry_run(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test dry-run prints every resolved job command."""
+        plan_file = tmp_path / "plan.json"
+        runner.invoke(
+            app,
+            ["batch", "effects", str(test_image_file), "--plan-out", str(plan_file)],
+        )
+
+        result = runner.invoke(
+            app, ["-q", "run-plan", str(plan_file), "--shard", "1/1", "--dry-run"]
+        )
+
+        assert result.exit_code == 0
+        assert str(test_image_file) in result.stdout
+        assert "-blur" in result.stdout
+
+    def test_run_plan_invalid_shard(self, tmp_path: Path) -> None:
+        """Test malformed --shard values are rejected."""
+        from wallpaper_core.engine.plan import ExecutionPlan
+
+        plan_file = tmp_path / "plan.json"
+        ExecutionPlan(input_path=tmp_path / "in.png", output_dir=tmp_path).write(
+            plan_file
+        )
+
+        result = runner.invoke(app, ["run-plan", str(plan_file), "--shard", "3/2"])
+
+        assert result.exit_code == 1
+
+    def test_run_plan_missing_file(self, tmp_path: Path) -> None:
+        """Test an unreadable plan is reported."""
+        result = runner.invoke(app, ["run-plan", str(tmp_path / "missing.json")])
+        assert result.exit_code == 1
+
+
+class TestProcessStreaming:
+    """Tests for '-' (stdin/stdout) input and output."""
+
+    @pytest.fixture(autouse=True)
+    def fake_magick(self, tmp_path: Path) -> Iterator[None]:
+        """Magick stand-in that echoes its input followed by its arguments."""
+        script = tmp_path / "bin" / "magick"
+        script.parent.mkdir()
+        script.write_text('#!/bin/sh\ncat "$1"\nshift\nprintf "[%s]" "$*"\n')
+        script.chmod(0o755)
+        with (
+            patch("subprocess.Popen", _REAL_POPEN),
+            patch("shutil.which", return_value=str(script)),
+        ):
+            yield
+
+    def test_stdin_to_stdout(self) -> None:
+        """Test '-' input and output pipe the image through magick."""
+        result = runner.invoke(
+            app,
+            ["process", "effect", "-", "-e", "blur", "-o", "-", "-f", "jpg"],
+            input=b"IMG",
+        )
+
+        assert result.exit_code == 0
+        assert result.stdout_bytes == b"IMG[-blur 0x8 jpg:-]"
+
+    def test_file_to_stdout_chain(self, tmp_path: Path) -> None:
+        """Test composite steps are connected through in-memory MIFF."""
+        input_file = tmp_path / "wall.png"
+        input_file.write_bytes(b"IMG")
+
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "composite",
+                str(input_file),
+                "-c",
+                "blackwhite-blur",
+                "-o",
+                "-",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert result.stdout_bytes.startswith(b"IMG[")
+        assert b"miff:-]" in result.stdout_bytes
+        assert result.stdout_bytes.endswith(b"png:-]")
+
+    def test_stdin_to_output_dir(self, tmp_path: Path) -> None:
+        """Test stdin input is written under a 'stdin' directory."""
+        result = runner.invoke(
+            app,
+            ["process", "preset", "-", "-p", "dim", "-o", str(tmp_path)],
+            input=b"IMG",
+        )
+
+        assert result.exit_code == 0
+        output_file = tmp_path / "stdin" / "presets" / "dim.png"
+        assert output_file.read_bytes() == (b"IMG[-brightness-contrast -30% png:-]")
+
+    def test_stream_rejects_sizes(self) -> None:
+        """Test --size cannot be combined with stdout output."""
+        result = runner.invoke(
+            app,
+            ["process", "effect", "-", "-e", "blur", "-o", "-", "--size", "800x600"],
+            input=b"IMG",
+        )
+
+        assert result.exit_code == 1
+        assert result.stdout_bytes == b""
+
+    def test_stream_dry_run(self) -> None:
+        """Test dry-run prints the piped commands without running them."""
+        result = runner.invoke(
+            app,
+            [
+                "process",
+                "composite",
+                "-",
+                "-c",
+                "blackwhite-blur",
+                "-o",
+                "-",
+                "-f",
+                "webp",
+                "--dry-run",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert '"-" -grayscale Average "miff:-"' in result.stdout
+        assert '"webp:-"' in result.stdout
+
+
+class TestResumableBatches:
+    """Tests for batch --resume and --retry-failed."""
+
+    def test_resume_skips_journaled_items(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a resumed batch skips items that already completed."""
+        args = ["batch", "effects", str(test_image_file), "-o", str(tmp_path / "out")]
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+
+        result = runner.invoke(app, [*args, "--resume"])
+        assert result.exit_code == 0
+        assert "Skipped" in result.stdout
+
+    def test_retry_failed_with_no_failures(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test --retry-failed has nothing to rerun after a clean batch."""
+        args = ["batch", "effects", str(test_image_file), "-o", str(tmp_path / "out")]
+        runner.invoke(app, args)
+
+        result = runner.invoke(app, [*args, "--retry-failed"])
+        assert result.exit_code == 0
+        assert "Skipped" in result.stdout
+
+
+class TestQueueWorkers:
+    """Tests for run-plan --queue and worker."""
+
+    def test_queue_then_worker(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test queued plan jobs are run by a worker."""
+        plan_file = tmp_path / "plan.json"
+        queue_file = tmp_path / "queue.db"
+        output_dir = tmp_path / "out"
+        runner.invoke(
+            app,
+            [
+                "batch",
+                "effects",
+                str(test_image_file),
+                "-o",
+                str(output_dir),
+                "--plan-out",
+                str(plan_file),
+            ],
+        )
+
+        result = runner.invoke(
+            app, ["run-plan", str(plan_file), "--queue", str(queue_file)]
+        )
+        assert result.exit_code == 0
+        assert "Queued" in result.stdout
+        assert not output_dir.exists()
+
+        result = runner.invoke(app, ["worker", str(queue_file), "--id", "test"])
+        assert result.exit_code == 0
+        assert "0 remaining" in result.stdout
+        assert (output_dir / "test_image" / "effects" / "blur.png").exists()
+
+    def test_worker_missing_queue(self, tmp_path: Path) -> None:
+        """Test worker fails cleanly when the queue does not exist."""
+        result = runner.invoke(app, ["worker", str(tmp_path / "missing.db")])
+        assert result.exit_code == 1
+        assert "Queue not found" in result.output
+
+
+class TestSweep:
+    """Tests for the sweep command."""
+
+    def test_sweep_writes_named_outputs(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test each point is written under a parameter-encoded name."""
+        out = tmp_path / "out"
+        result = runner.invoke(
+            app,
+            [
+                "sweep",
+                str(test_image_file),
+                "-e",
+                "brightness",
+                "-p",
+                "brightness=-20:20:20",
+                "-o",
+                str(out),
+                "--contact-sheet",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "Rendered 3 points" in result.stdout
+        sweep_dir = out / test_image_file.stem / "sweeps" / "brightness"
+        assert (sweep_dir / "brightness__brightness=20.png").exists()
+        assert (sweep_dir / "contact-sheet.png").exists()
+
+    def test_sweep_dry_run_prints_one_command(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a simple effect's grid is one magick command."""
+        result = runner.invoke(
+            app,
+            [
+                "-q",
+                "sweep",
+                str(test_image_file),
+                "-e",
+                "blur",
+                "-p",
+                "blur=0x2,0x4",
+                "-o",
+                str(tmp_path),
+                "--dry-run",
+            ],
+        )
+        assert result.exit_code == 0
+        lines = result.stdout.strip().splitlines()
+        assert len(lines) == 1
+        assert "+clone" in lines[0]
+
+    def test_sweep_reports_all_invalid_values(self, test_image_file: Path) -> None:
+        """Test invalid values are checked against parameter_types before running."""
+        result = runner.invoke(
+            app,
+            [
+                "sweep",
+                str(test_image_file),
+                "-e",
+                "blur",
+                "-p",
+                "blur=0x2,big",
+                "-p",
+                "radius=1",
+            ],
+        )
+        assert result.exit_code == 1
+        assert "does not match" in result.output
+        assert "no parameter 'radius'" in result.output
+
+
+class TestExplain:
+    """Tests for --explain on process composite and preset."""
+
+    def test_composite_explain(self, test_image_file: Path) -> None:
+        """Test the chain and its cost are shown without running anything."""
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as popen:
+            result = runner.invoke(
+                app,
+                [
+                    "process",
+                    "composite",
+                    str(test_image_file),
+                    "-c",
+                    "blur-brightness80",
+                    "--explain",
+                ],
+            )
+        assert result.exit_code == 0, result.output
+        popen.assert_not_called()
+        assert (
+            "Original:  blur(blur=0x8) -> brightness(brightness=-20)" in result.stdout
+        )
+        assert "Estimated cost" in result.stdout
+
+    def test_preset_explain_unknown(self, test_image_file: Path) -> None:
+        """Test unknown presets are rejected."""
+        result = runner.invoke(
+            app,
+            ["process", "preset", str(test_image_file), "-p", "missing", "--explain"],
+        )
+        assert result.exit_code == 1
+        assert "Unknown preset: missing" in result.output
+
+
+class TestExportLut:
+    """Tests for the export-lut command."""
+
+    def test_export_cube(self, tmp_path: Path) -> None:
+        """Test a pointwise composite is written as a .cube file."""
+        cube = tmp_path / "luts" / "bw.cube"
+        with patch(
+            "wallpaper_core.engine.clut.ClutCache.read_samples",
+            return_value=[0] * (64**3 * 3),
+        ):
+            result = runner.invoke(
+                app, ["export-lut", "blackwhite-brightness80", "-o", str(cube)]
+            )
+
+        assert result.exit_code == 0, result.output
+        lines = cube.read_text().splitlines()
+        assert lines[:2] == ['TITLE "blackwhite-brightness80"', "LUT_3D_SIZE 64"]
+        assert len(lines) == 4 + 64**3
+
+    def test_spatial_chain_rejected(self, tmp_path: Path) -> None:
+        """Test chains with a blur cannot be exported."""
+        result = runner.invoke(
+            app,
+            ["export-lut", "-t", "preset", "dark_blur", "-o", str(tmp_path / "x.cube")],
+        )
+        assert result.exit_code == 1
+        assert "Cannot export preset 'dark_blur' as a LUT" in result.output
+        assert not (tmp_path / "x.cube").exists()
+
+
+class TestMap:
+    """Tests for the map command."""
+
+    def test_map_writes_every_image(self, tmp_path: Path) -> None:
+        """Test each input gets its output where process would write it."""
+        inputs = []
+        for name in ("a", "b", "c"):
+            path = tmp_path / f"{name}.png"
+            path.write_bytes(name.encode())
+            inputs.append(str(path))
+        out = tmp_path / "out"
+
+        def fake(_self: object, command: str, data: bytes, *_args: object) -> object:
+            return BytesResult(
+                success=True,
+                command=command,
+                stdout="",
+                stderr="",
+                return_code=0,
+                data=data,
+            )
+
+        with patch.object(CommandExecutor, "execute_bytes", fake):
+            result = runner.invoke(
+                app, ["-v", "map", "-c", "blur-brightness80", "-o", str(out), *inputs]
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "Processed 3 images" in result.stdout
+        assert "encode: " in result.stdout
+        for name in ("a", "b", "c"):
+            output = out / name / "composites" / "blur-brightness80.png"
+            assert output.read_bytes() == name.encode()
+
+    def test_map_dry_run(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test the dry run lists outputs with the requested format."""
+        result = runner.invoke(
+            app,
+            [
+                "-q",
+                "map",
+                "-e",
+                "blur",
+                "-f",
+                "webp",
+                "-o",
+                str(tmp_path),
+                "--dry-run",
+                str(test_image_file),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        expected = tmp_path / test_image_file.stem / "effects" / "blur.webp"
+        assert result.stdout.strip() == f"{test_image_file} -> {expected}"
+
+    def test_map_uses_process_settings(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test map configures its chain executor like process does."""
+        settings = CoreSettings.model_validate(
+            {
+                "processing": {
+                    "temp_dir": str(tmp_path / "tmp"),
+                    "pipeline": True,
+                    "fuse_pointwise": True,
+                    "clut_dir": str(tmp_path / "cluts"),
+                }
+            }
+        )
+        chain_executor = _chain_executor(
+            settings, traits_effects_config, encoding=EncodingSettings(format="webp")
+        )
+        assert chain_executor.temp_dir == tmp_path / "tmp"
+        assert chain_executor.pipeline
+        assert chain_executor.cluts is not None
+        assert chain_executor.cluts.directory == tmp_path / "cluts"
+        assert chain_executor.encoding.format == "webp"
+
+        source = tmp_path / "a.png"
+        source.write_bytes(b"a")
+        with (
+            patch(
+                "wallpaper_core.cli.map_images._chain_executor",
+                wraps=_chain_executor,
+            ) as build,
+            patch.object(CommandExecutor, "execute_bytes"),
+        ):
+            runner.invoke(app, ["map", "-e", "blur", "-f", "webp", str(source)])
+        assert build.call_args.kwargs["encoding"].format == "webp"
+
+    def test_map_needs_one_item(self, test_image_file: Path) -> None:
+        """Test exactly one of -e, -c and -p is required."""
+        result = runner.invoke(
+            app, ["map", "-e", "blur", "-c", "dark", str(test_image_file)]
+        )
+        assert result.exit_code == 1
+        assert "exactly one" in result.output
+
+    def test_map_rejects_clashing_outputs(self, tmp_path: Path) -> None:
+        """Test inputs that would write the same output are refused."""
+        first = tmp_path / "one" / "wall.png"
+        second = tmp_path / "two" / "wall.png"
+        result = runner.invoke(
+            app, ["map", "-e", "blur", "--dry-run", str(first), str(second)]
+        )
+        assert result.exit_code == 1
+        assert "overwrite each other" in result.output
@@ -9,10 +9,14 @@ from pydantic import ValidationError
 from wallpaper_core.config.schema import (
     BackendSettings,
     CoreSettings,
+    EncodingSettings,
     ExecutionSettings,
     ItemType,
+    LimitSettings,
     OutputSettings,
     ProcessingSettings,
+    QueueSettings,
+    StageSettings,
     Verbosity,
 )
 
@@ -121,6 +125,31 @@ def test_processing_settings_handles_none_temp_dir() -> None:
     assert settings.temp_dir is None
 
 
+def test_processing_settings_pipeline_default() -> None:
+    """Test chain pipelining is off by default."""
+    assert ProcessingSettings().pipeline is False
+    assert ProcessingSettings(pipeline=True).pipeline is True
+
+
+def test_queue_settings_defaults() -> None:
+    """Test QueueSettings defaults and validation."""
+    settings = QueueSettings()
+    assert settings.lease_seconds == 60.0
+    assert settings.max_attempts == 3
+    with pytest.raises(ValidationError):
+        QueueSettings(max_attempts=0)
+
+
+def test_stage_settings_defaults() -> None:
+    """Test StageSettings defaults and validation."""
+    settings = StageSettings()
+    assert settings.decoders == 1
+    assert settings.appliers == settings.encoders == 0
+    assert settings.queue_size == 2
+    with pytest.raises(ValidationError):
+        StageSettings(queue_size=0)
+
+
 def test_backend_settings_defaults() -> None:
     """Test BackendSettings default binary (auto-detects magick or convert)."""
     settings = BackendSettings()
@@ -180,3 +209,55 @@ def test_output_settings_loads_from_package_defaults():
     configure(CoreOnlyConfig, app_name="wallpaper-effects-test")
     config = get_config()
     assert config.core.output.default_dir == Path("/tmp/wallpaper-effects")
+
+
+def test_encoding_settings_defaults() -> None:
+    """Test EncodingSettings leaves every encoder option unset."""
+    settings = CoreSettings().encoding
+    assert settings.format is None
+    assert settings.quality is None
+    assert settings.strip_metadata is None
+
+
+def test_encoding_settings_validation() -> None:
+    """Test EncodingSettings validates encoder ranges."""
+    with pytest.raises(ValidationError):
+        EncodingSettings(quality=0)
+    with pytest.raises(ValidationError):
+        EncodingSettings(png_compression_level=10)
+    with pytest.raises(ValidationError):
+        EncodingSettings(webp_method=7)
+
+
+def test_encoding_settings_merged() -> None:
+    """Test merged() only applies explicitly set override fields."""
+    base = EncodingSettings(quality=90, strip_metadata=True)
+    merged = base.merged(EncodingSettings(quality=70))
+    assert merged.quality == 70
+    assert merged.strip_metadata is True
+    assert base.merged(None) == base
+
+
+def test_limit_settings_defaults() -> None:
+    """Test LimitSettings sets no limit by default."""
+    limits = CoreSettings().limits
+    assert limits.timeout is None
+    assert limits.cpu_seconds is None
+    assert limits.memory_mb is None
+    assert limits.output_file_mb is None
+
+
+def test_limit_settings_validation() -> None:
+    """Test LimitSettings rejects non-positive limits."""
+    with pytest.raises(ValidationError):
+        LimitSettings(timeout=0)
+    with pytest.raises(ValidationError):
+        LimitSettings(memory_mb=0)
+
+
+def test_limit_settings_merged() -> None:
+    """Test merged() only applies explicitly set override fields."""
+    base = LimitSettings(timeout=60, memory_mb=1024)
+    merged = base.merged(LimitSettings(timeout=5))
+    assert merged.timeout == 5
+    assert merged.memory_mb == 1024
@@ -0,0 +1,102 @@
+"""Tests for effects expression module (parsing and checking expressions)."""
+
+from __future__ import annotations
+
+import pytest
+from pydantic import ValidationError
+
+from wallpaper_core.effects.expression import (
+    MAX_DEPTH,
+    MAX_LENGTH,
+    ExpressionError,
+    expression_cost,
+    expression_names,
+    parse_expression,
+)
+from wallpaper_core.effects.schema import Effect, ParameterDefinition
+
+
+class TestParseExpression:
+    """Tests for parse_expression."""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "1 - c",
+            "clamp(c * gain + 0.1)",
+            "luminance if x < w / 2 else c",
+            "(r, g * 0.5, min(b, 0.2, y / h))",
+            "smoothstep(0.2, 0.8, c) ** 2 % 1 // 1",
+            "not (r > 0.5 and g <= b or 0 < c < 1)",
+            "-pi + e + sin(c) * atan2(r, g)",
+        ],
+    )
+    def test_allowed(self, text: str) -> None:
+        """Test arithmetic over the documented names parses."""
+        parsed = parse_expression(text, ["gain"])
+        assert parsed.text == text
+        assert len(parsed.components) in (1, 3)
+
+    @pytest.mark.parametrize(
+        ("text", "error"),
+        [
+            ('__import__("os")', "unknown function '__import__'"),
+            ("c.real", "Attribute is not allowed"),
+            ("[c][0]", "is not allowed"),
+            ("(lambda: 1)()", "only functions can be called"),
+            ("'c'", "is not a number"),
+            ("True", "is not a number"),
+            ("1j", "is not a number"),
+            ("1e300", "too large"),
+            ("unknown + 1", "unknown name 'unknown'"),
+            ("abs + 1", "unknown name 'abs'"),
+            ("clamp(c, lo=0)", "takes no keyword arguments"),
+            ("pow(c)", "wrong number of arguments for pow()"),
+            ("(r, g)", "three expressions"),
+            ("(r, (g, b), b)", "Tuple is not allowed"),
+            ("c +", "invalid expression"),
+            ("x := 1", "invalid expression"),
+            ("c" + " + c" * MAX_LENGTH, "longer than"),
+            ("-" * (MAX_DEPTH + 1) + "c", "nested deeper"),
+        ],
+    )
+    def test_rejected(self, text: str, error: str) -> None:
+        """Test anything but a safe arithmetic expression is rejected."""
+        with pytest.raises(ExpressionError, match=error):
+            parse_expression(text)
+
+    def test_parameter_shadows_name(self) -> None:
+        """Test parameters cannot hide pixel names or functions."""
+        with pytest.raises(ExpressionError, match="parameter 'r' shadows"):
+            parse_expression("r", ["r"])
+
+    def test_names_and_cost(self) -> None:
+        """Test read names exclude functions and cost counts operations."""
+        (node,) = parse_expression("clamp(c * gain) + luminance", ["gain"]).components
+        assert expression_names(node) == {"c", "gain", "luminance"}
+        assert expression_cost(node) == 3
+
+
+class TestExpressionEffect:
+    """Tests for expression: in effect definitions."""
+
+    def test_expression_drops_command(self) -> None:
+        """Test an expression replaces a command and runs in-process."""
+        effect = Effect(
+            description="Gain",
+            command='magick "$INPUT" -fx "u*1.2" "$OUTPUT"',
+            expression="c * gain",
+            parameters={"gain": ParameterDefinition(type="float", default=1.2)},
+        )
+        assert effect.command == ""
+        assert effect.in_process
+
+    def test_unknown_parameter_rejected(self) -> None:
+        """Test expressions can only use the effect's own parameters."""
+        with pytest.raises(ValidationError, match="unknown name 'gain'"):
+            Effect(description="Gain", expression="c * gain")
+
+    def test_python_and_expression(self) -> None:
+        """Test an effect cannot have both a function and an expression."""
+        with pytest.raises(ValidationError, match="both"):
+            Effect(description="x", python="pkg:f", expression="c")
@@ -0,0 +1,143 @@
+"""Tests for engine async_batch module."""
+
+import asyncio
+import subprocess
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import Effect, EffectsConfig
+from wallpaper_core.engine.async_batch import AsyncBatchGenerator
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+
+@pytest.fixture(autouse=True)
+def fake_magick(tmp_path: Path) -> Iterator[Path]:
+    """Run real subprocesses with a magick stand-in that copies its input."""
+    script = tmp_path / "bin" / "magick"
+    script.parent.mkdir()
+    script.write_text('#!/bin/sh\nfor last; do :; done\ncp "$1" "$last"\n')
+    script.chmod(0o755)
+    with (
+        patch("subprocess.Popen", _REAL_POPEN),
+        patch("shutil.which", return_value=str(script)),
+    ):
+        yield script
+
+
+class TestAsyncBatchGenerator:
+    """Tests for AsyncBatchGenerator class."""
+
+    def test_generate_all_effects(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test every effect is generated into the usual layout."""
+        generator = AsyncBatchGenerator(sample_effects_config)
+
+        result = asyncio.run(
+            generator.generate_all_effects(test_image_file, tmp_path / "out")
+        )
+
+        assert result.success is True
+        assert result.succeeded == result.total == 3
+        assert result.output_dir == tmp_path / "out" / test_image_file.stem
+        for name in sample_effects_config.effects:
+            assert (result.output_dir / "effects" / f"{name}.png").exists()
+
+    def test_generate_all(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test effects, composites and presets all run as chains."""
+        generator = AsyncBatchGenerator(sample_effects_config)
+
+        result = asyncio.run(generator.generate_all(test_image_file, tmp_path))
+
+        assert result.success is True
+        assert result.total == 3 + 2 + len(sample_effects_config.presets)
+        assert (result.output_dir / "composites" / "blur-brightness.png").exists()
+
+    def test_iter_results_yields_each_item(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test results are yielded once per item as they complete."""
+        generator = AsyncBatchGenerator(sample_effects_config)
+
+        async def run() -> list[str]:
+            return [
+                name
+                async for name, _ in generator.iter_results(
+                    test_image_file, tmp_path, [ItemType.EFFECT, ItemType.COMPOSITE]
+                )
+            ]
+
+        names = asyncio.run(run())
+
+        assert sorted(names) == sorted(
+            [*sample_effects_config.effects, *sample_effects_config.composites]
+        )
+
+    def test_strict_failure_cancels_running_items(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test the first failure cancels items that are still running."""
+        config = EffectsConfig(
+            version="1.0",
+            effects={
+                "fail": Effect(description="Fail", command="exit 3"),
+                "slow": Effect(
+                    description="Slow", command='touch "$OUTPUT" && sleep 30'
+                ),
+            },
+        )
+        generator = AsyncBatchGenerator(config, strict=True, max_concurrency=2)
+
+        start = time.monotonic()
+        result = asyncio.run(generator.generate_all_effects(test_image_file, tmp_path))
+
+        assert time.monotonic() - start < 10
+        assert result.failed == 1
+        assert "slow" not in result.results
+        assert not (tmp_path / test_image_file.stem / "effects" / "slow.png").exists()
+
+    def test_many_jobs_without_threads(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test queued jobs are tasks, not threads."""
+        config = EffectsConfig(
+            version="1.0",
+            effects={
+                f"e{i}": Effect(description="Noop", command="true") for i in range(200)
+            },
+        )
+        generator = AsyncBatchGenerator(config, max_concurrency=8)
+        threads_before = threading.active_count()
+        peak_threads = threads_before
+
+        async def run() -> int:
+            nonlocal peak_threads
+            count = 0
+            async for _ in generator.iter_results(
+                test_image_file, tmp_path, [ItemType.EFFECT]
+            ):
+                peak_threads = max(peak_threads, threading.active_count())
+                count += 1
+            return count
+
+        assert asyncio.run(run()) == 200
+        assert peak_threads - threads_before <= 2
@@ -0,0 +1,167 @@
+"""Tests for engine async_executor module."""
+
+import asyncio
+import subprocess
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import LimitSettings
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+from wallpaper_core.engine.async_executor import (
+    AsyncChainExecutor,
+    AsyncCommandExecutor,
+)
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+
+@pytest.fixture(autouse=True)
+def fake_magick(tmp_path: Path) -> Iterator[Path]:
+    """Run real subprocesses with a magick stand-in that copies its input."""
+    script = tmp_path / "bin" / "magick"
+    script.parent.mkdir()
+    script.write_text('#!/bin/sh\nfor last; do :; done\ncp "$1" "$last"\n')
+    script.chmod(0o755)
+    with (
+        patch("subprocess.Popen", _REAL_POPEN),
+        patch("shutil.which", return_value=str(script)),
+    ):
+        yield script
+
+
+class TestAsyncCommandExecutor:
+    """Tests for AsyncCommandExecutor class."""
+
+    def test_execute(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test a command runs and its output is written."""
+        output_path = tmp_path / "out" / "blur.png"
+        executor = AsyncCommandExecutor()
+
+        result = asyncio.run(
+            executor.execute(
+                'magick "$INPUT" -blur "$BLUR" "$OUTPUT"',
+                test_image_file,
+                output_path,
+                {"blur": "0x8"},
+            )
+        )
+
+        assert result.success is True
+        assert '-blur "0x8"' in result.command
+        assert output_path.exists()
+
+    def test_execute_failure(self, tmp_path: Path) -> None:
+        """Test a failing command reports its exit status and stderr."""
+        result = asyncio.run(
+            AsyncCommandExecutor().execute(
+                "echo boom >&2; exit 3", tmp_path / "in.png", tmp_path / "out.png"
+            )
+        )
+
+        assert result.success is False
+        assert result.return_code == 3
+        assert result.stderr.strip() == "boom"
+
+    def test_timeout(self, tmp_path: Path) -> None:
+        """Test a command exceeding its timeout is killed and reported."""
+        output_path = tmp_path / "out.png"
+        executor = AsyncCommandExecutor(limits=LimitSettings(timeout=0.2))
+
+        result = asyncio.run(
+            executor.execute(
+                'touch "$OUTPUT" && sleep 30', tmp_path / "in.png", output_path
+            )
+        )
+
+        assert result.timed_out is True
+        assert result.duration < 10
+        assert not output_path.exists()
+
+    def test_cancel_kills_process(self, tmp_path: Path) -> None:
+        """Test cancelling the awaiting task kills the command."""
+        output_path = tmp_path / "out.png"
+        executor = AsyncCommandExecutor()
+
+        async def run() -> None:
+            task = asyncio.create_task(
+                executor.execute(
+                    'touch "$OUTPUT" && sleep 30', tmp_path / "in.png", output_path
+                )
+            )
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start = time.monotonic()
+        asyncio.run(run())
+
+        assert time.monotonic() - start < 10
+        assert not output_path.exists()
+
+    def test_concurrency_limit(self, tmp_path: Path) -> None:
+        """Test the semaphore caps how many commands run at once."""
+        executor = AsyncCommandExecutor(max_concurrency=2)
+
+        async def run() -> None:
+            await asyncio.gather(
+                *(
+                    executor.execute(
+                        "sleep 0.3", tmp_path / "in.png", tmp_path / f"{i}.png"
+                    )
+                    for i in range(4)
+                )
+            )
+
+        start = time.monotonic()
+        asyncio.run(run())
+
+        assert time.monotonic() - start >= 0.55
+
+
+class TestAsyncChainExecutor:
+    """Tests for AsyncChainExecutor class."""
+
+    def test_execute_chain(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a multi-step chain writes the final output only."""
+        output_path = tmp_path / "out.png"
+        executor = AsyncChainExecutor(sample_effects_config, temp_dir=tmp_path / "tmp")
+
+        result = asyncio.run(
+            executor.execute_chain(
+                [ChainStep(effect="blur"), ChainStep(effect="brightness")],
+                test_image_file,
+                output_path,
+            )
+        )
+
+        assert result.success is True
+        assert result.command == "chain: blur -> brightness"
+        assert output_path.exists()
+        assert list((tmp_path / "tmp").iterdir()) == []
+
+    def test_execute_chain_unknown_effect(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test an unknown effect fails before anything runs."""
+        result = asyncio.run(
+            AsyncChainExecutor(sample_effects_config).execute_chain(
+                [ChainStep(effect="nonexistent")], test_image_file, tmp_path / "o.png"
+            )
+        )
+
+        assert result.success is False
+        assert "Unknown effect" in result.stderr
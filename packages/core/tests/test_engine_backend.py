@@ -0,0 +1,174 @@
+"""Tests for engine backend module."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+from wallpaper_core.engine.backend import (
+    IN_PROCESS_BACKENDS,
+    BackendCapabilities,
+    BackendError,
+    ImageBackend,
+    load_backend,
+)
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.memory import MemoryExecutor
+
+
+class ListBackend(ImageBackend[list[str]]):
+    """Images are the names of the effects applied so far."""
+
+    name = "list"
+    label = "List"
+    capabilities = BackendCapabilities(
+        in_process=True, shares_inputs=False, any_command=False
+    )
+
+    def __init__(self, chain_executor: ChainExecutor) -> None:
+        super().__init__(chain_executor)
+        self.released: list[list[str]] = []
+        self.failing: str | None = None
+
+    def supports(self, steps: list[ChainStep]) -> bool:
+        return all(step.effect != "vignette" for step in steps)
+
+    def load(self, data: bytes) -> list[str]:
+        return [data.decode(errors="replace")]
+
+    def apply_effect(self, image: list[str], step: ChainStep) -> list[str]:
+        if step.effect == self.failing:
+            raise BackendError("boom")
+        return [*image, step.effect]
+
+    def save(self, image: list[str], output_format: str, encode_command: str) -> bytes:
+        return f"{output_format}:{'+'.join(image)}".encode()
+
+    def release(self, image: list[str]) -> None:
+        self.released.append(image)
+
+
+def _executor(config: EffectsConfig) -> tuple[ChainExecutor, ListBackend]:
+    executor = ChainExecutor(config)
+    backend = ListBackend(executor)
+    executor.backend = backend
+    return executor, backend
+
+
+class TestImageBackend:
+    """Tests for the chain runner every backend shares."""
+
+    def test_run_applies_and_releases(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test steps run in order and every image is released once."""
+        _, backend = _executor(traits_effects_config)
+        chain = [ChainStep(effect="blur"), ChainStep(effect="negate")]
+        result = backend.run(chain, b"in", "png")
+
+        assert result.success
+        assert result.data == b"png:in+blur+negate"
+        assert result.command == "chain: blur -> negate"
+        assert backend.released == [
+            ["in", "blur"],
+            ["in", "blur", "negate"],
+            ["in"],
+        ]
+
+    def test_step_failure(self, traits_effects_config: EffectsConfig) -> None:
+        """Test a failing step names the step and frees intermediates."""
+        _, backend = _executor(traits_effects_config)
+        backend.failing = "negate"
+        chain = [ChainStep(effect="blur"), ChainStep(effect="negate")]
+        result = backend.run(chain, b"in", "png")
+
+        assert not result.success
+        assert result.stderr == "List backend failed: step 2 (negate): boom"
+        assert backend.released == [["in", "blur"], ["in"]]
+
+    def test_cancelled(self, traits_effects_config: EffectsConfig) -> None:
+        """Test cancellation stops the chain between steps."""
+        executor, backend = _executor(traits_effects_config)
+        executor.executor.cancel_token.cancel()
+        result = backend.run([ChainStep(effect="blur")], b"in", "png")
+        assert not result.success
+        assert result.cancelled
+
+    def test_run_file(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test file runs read the input and write the encoded output."""
+        _, backend = _executor(traits_effects_config)
+        source = tmp_path / "in.png"
+        source.write_bytes(b"in")
+        output = tmp_path / "out" / "result.webp"
+        assert backend.run_file([ChainStep(effect="negate")], source, output).success
+        assert output.read_bytes() == b"webp:in+negate"
+
+        missing = backend.run_file([], tmp_path / "missing.png", output)
+        assert "List backend failed: Cannot read" in missing.stderr
+
+
+class TestBackendSelection:
+    """Tests for picking and loading backends."""
+
+    def test_unsupported_chains_use_magick(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test chains the backend cannot run fall back to magick."""
+        executor, backend = _executor(traits_effects_config)
+        assert executor.backend_for([ChainStep(effect="negate")]) is backend
+        chain = [ChainStep(effect="negate"), ChainStep(effect="vignette")]
+        assert executor.backend_for(chain) is executor.magick
+
+    def test_executors_use_the_backend(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test chain and memory executors run supported chains in it."""
+        executor, _ = _executor(traits_effects_config)
+        source = tmp_path / "in.png"
+        source.write_bytes(b"in")
+        result = executor.execute_chain(
+            [ChainStep(effect="negate")], source, tmp_path / "out.png"
+        )
+        assert result.success
+        assert (tmp_path / "out.png").read_bytes() == b"png:in+negate"
+
+        memory = MemoryExecutor(traits_effects_config)
+        memory.chain_executor.backend = ListBackend(memory.chain_executor)
+        assert memory.apply(b"in", "blur").data == b"png:in+blur"
+
+    def test_missing_dependency(self, traits_effects_config: EffectsConfig) -> None:
+        """Test a backend whose import fails warns and falls back."""
+        output = MagicMock()
+        missing = ("wallpaper_core.engine.missing", "MissingBackend", "something")
+        with patch.dict(IN_PROCESS_BACKENDS, {"missing": missing}):
+            backend = load_backend(
+                "missing", ChainExecutor(traits_effects_config), output
+            )
+        assert backend is None
+        assert "needs something" in output.warning.call_args.args[0]
+
+    def test_batch_shares_inputs(
+        self,
+        traits_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test single effects run in backends that share decoded inputs."""
+        generator = BatchGenerator(
+            traits_effects_config, parallel=False, manifest=False
+        )
+        backend = ListBackend(generator.chain_executor)
+        backend.capabilities = BackendCapabilities(
+            in_process=True, shares_inputs=True, any_command=False
+        )
+        generator.chain_executor.backend = backend
+        with patch.object(generator.executor, "execute") as execute:
+            result = generator.generate_all_effects(test_image_file, tmp_path)
+
+        assert result.succeeded == len(traits_effects_config.effects)
+        # Even vignette, which falls back to magick, runs as a chain
+        execute.assert_not_called()
+        output = tmp_path / "test_image" / "effects" / "negate.png"
+        assert output.read_bytes().endswith(b"+negate")
@@ -1,6 +1,7 @@
 """Tests for engine batch module."""
 
 from pathlib import Path
+from unittest.mock import patch
 
 from wallpaper_core.config.schema import ItemType
 from wallpaper_core.effects.schema import EffectsConfig
@@ -324,3 +325,43 @@ class TestBatchGenerator:
             base_dir, "test_flat", ItemType.EFFECT, test_image_file, flat=True
         )
         assert flat_path == base_dir / f"test_flat{test_image_file.suffix}"
+
+
+class TestBatchValidation:
+    """Tests for validating batch items before running them."""
+
+    def test_strict_batch_with_invalid_item_runs_nothing(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a strict batch with an invalid item spawns no commands."""
+        sample_effects_config.presets["subtle_blur"].params = {"blur": "big"}
+        generator = BatchGenerator(sample_effects_config, parallel=False)
+
+        with patch.object(generator, "_process_item") as process:
+            result = generator.generate_all_presets(test_image_file, tmp_path)
+
+        process.assert_not_called()
+        assert result.failed == result.total == 2
+        assert "does not match" in result.results["subtle_blur"].stderr
+        assert "Not run" in result.results["dark_blur"].stderr
+
+    def test_lenient_batch_skips_only_invalid_items(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test without strict mode the valid items still run."""
+        sample_effects_config.presets["subtle_blur"].params = {"blur": "big"}
+        generator = BatchGenerator(sample_effects_config, parallel=False, strict=False)
+
+        with patch.object(
+            generator, "_process_item", wraps=generator._process_item
+        ) as process:
+            result = generator.generate_all_presets(test_image_file, tmp_path)
+
+        assert [call.args[0] for call in process.call_args_list] == ["dark_blur"]
+        assert (result.total, result.succeeded, result.failed) == (2, 1, 1)
@@ -0,0 +1,239 @@
+"""Tests for engine cancel module."""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.cancel import CancelToken, cancel_on_signals
+from wallpaper_core.engine.executor import CommandExecutor
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+
+@pytest.fixture
+def real_processes() -> Iterator[None]:
+    """Run real child processes instead of the mocked magick commands."""
+    with patch("wallpaper_core.engine.executor.subprocess.Popen", _REAL_POPEN):
+        yield
+
+
+def _wait_for_exit(pid: int, timeout: float = 5.0) -> bool:
+    """Wait until a (possibly reparented) child is gone or a zombie."""
+    deadline = time.monotonic() + timeout
+    stat = Path(f"/proc/{pid}/stat")
+    while time.monotonic() < deadline:
+        try:
+            if stat.read_text().split(") ", 1)[1].startswith("Z"):
+                return True
+        except (FileNotFoundError, IndexError):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestCancelToken:
+    """Tests for CancelToken class."""
+
+    def test_cancel_terminates_process_group(
+        self, real_processes: None, tmp_path: Path
+    ) -> None:
+        """Test cancelling kills the shell and the children it started."""
+        pid_file = tmp_path / "child.pid"
+        process = subprocess.Popen(
+            f'sleep 30 & echo $! > "{pid_file}"; wait',
+            shell=True,
+            start_new_session=True,
+        )
+        token = CancelToken()
+        token.register(process)
+        assert token.running() == 1
+        while not (pid_file.exists() and pid_file.read_text().strip()):
+            time.sleep(0.01)
+
+        token.cancel()
+
+        assert token.cancelled is True
+        assert process.wait(timeout=5) != 0
+        assert _wait_for_exit(int(pid_file.read_text()))
+
+    def test_register_after_cancel_terminates(self, real_processes: None) -> None:
+        """Test a process spawned after cancellation is stopped at once."""
+        token = CancelToken()
+        token.cancel()
+
+        process = subprocess.Popen("sleep 30", shell=True, start_new_session=True)
+        token.register(process)
+
+        assert process.wait(timeout=5) != 0
+
+    def test_child_token(self) -> None:
+        """Test a child is cancelled with its parent but not the other way."""
+        parent = CancelToken()
+        child = CancelToken(parent)
+
+        child.cancel()
+        assert parent.cancelled is False
+        child.reset()
+        assert child.cancelled is False
+
+        parent.cancel()
+        assert child.cancelled is True
+        assert child.wait(0) is True
+        child.reset()
+        assert child.cancelled is True
+        assert CancelToken(parent).cancelled is True
+
+
+class TestCommandExecutorCancellation:
+    """Tests for cancelling CommandExecutor commands."""
+
+    def test_cancel_running_command(self, real_processes: None, tmp_path: Path) -> None:
+        """Test an in-flight command is killed and its partial output removed."""
+        token = CancelToken()
+        executor = CommandExecutor(cancel_token=token)
+        output_path = tmp_path / "out.png"
+
+        timer = threading.Timer(0.2, token.cancel)
+        timer.start()
+        start = time.monotonic()
+        result = executor.execute(
+            'touch "$OUTPUT" && sleep 30', tmp_path / "in.png", output_path
+        )
+        timer.join()
+
+        assert time.monotonic() - start < 10
+        assert result.success is False
+        assert result.cancelled is True
+        assert not output_path.exists()
+        assert token.running() == 0
+
+    def test_execute_after_cancel_skips_command(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test no process is started once the token is cancelled."""
+        token = CancelToken()
+        token.cancel()
+
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            result = CommandExecutor(cancel_token=token).execute(
+                'magick "$INPUT" "$OUTPUT"', test_image_file, tmp_path / "out.png"
+            )
+
+        mock_popen.assert_not_called()
+        assert result.cancelled is True
+        assert result.stderr == "Cancelled"
+
+
+class TestBatchCancellation:
+    """Tests for cancelling BatchGenerator runs."""
+
+    def test_cancelled_batch_stops(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a cancelled sequential batch runs no further items."""
+        generator = BatchGenerator(config=sample_effects_config, parallel=False)
+        generator.cancel()
+
+        result = generator.generate_all_effects(test_image_file, tmp_path)
+
+        assert result.cancelled is True
+        assert result.succeeded == 0
+        assert not (tmp_path / test_image_file.stem).exists()
+
+    def test_strict_failure_cancels_running_items(
+        self,
+        sample_effects_config: EffectsConfig,
+        tmp_path: Path,
+    ) -> None:
+        """Test a strict parallel failure cancels the run, not the caller's token."""
+        # Without the input probe, the missing input fails inside each item
+        generator = BatchGenerator(
+            config=sample_effects_config, parallel=True, strict=True, probe=False
+        )
+
+        result = generator.generate_all_effects(tmp_path / "missing.png", tmp_path)
+
+        assert result.success is False
+        assert result.cancelled is False
+        assert generator._run_token.cancelled is True
+        assert generator.cancel_token.cancelled is False
+
+    def test_batches_run_after_strict_failure(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test the same generator runs later batches after a strict abort."""
+        generator = BatchGenerator(
+            config=sample_effects_config, parallel=True, strict=True, probe=False
+        )
+        failed = generator.generate_all_effects(tmp_path / "missing.png", tmp_path)
+        assert failed.success is False
+
+        for output_dir in (tmp_path / "first", tmp_path / "second"):
+            result = generator.generate_all_effects(test_image_file, output_dir)
+            assert result.cancelled is False
+            assert result.success is True
+            assert result.succeeded == len(sample_effects_config.effects)
+
+    def test_user_cancel_survives_strict_reset(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a cancelled caller token still stops the next batch."""
+        generator = BatchGenerator(config=sample_effects_config, parallel=True)
+        generator.cancel()
+
+        result = generator.generate_all_effects(test_image_file, tmp_path)
+
+        assert result.cancelled is True
+        assert result.succeeded == 0
+
+
+class TestCancelOnSignals:
+    """Tests for cancel_on_signals context manager."""
+
+    def test_sigint_cancels_token(self) -> None:
+        """Test SIGINT cancels the token instead of raising."""
+        token = CancelToken()
+        previous = signal.getsignal(signal.SIGINT)
+
+        with cancel_on_signals(token):
+            os.kill(os.getpid(), signal.SIGINT)
+            assert token.cancelled is True
+            # The first signal restores the previous handler
+            assert signal.getsignal(signal.SIGINT) is previous
+
+        assert signal.getsignal(signal.SIGINT) is previous
+
+    def test_noop_off_main_thread(self) -> None:
+        """Test handlers are left alone outside the main thread."""
+        token = CancelToken()
+        handlers: list[object] = []
+
+        def run() -> None:
+            with cancel_on_signals(token):
+                handlers.append(signal.getsignal(signal.SIGINT))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+        assert handlers == [signal.getsignal(signal.SIGINT)]
+        assert token.cancelled is False
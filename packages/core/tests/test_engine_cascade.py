@@ -0,0 +1,181 @@
+"""Tests for engine cascade module."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import EncodingSettings, ItemType
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig, EffectTraits, Preset
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.cascade import (
+    BlurCascade,
+    blur_groups,
+    downscale_factor,
+    gaussian_sigma,
+)
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.plan import PlanExecutor
+from wallpaper_core.engine.probe import ImageInfo
+
+
+@pytest.fixture
+def gaussian_config(traits_effects_config: EffectsConfig) -> EffectsConfig:
+    """Traits config whose blur declares the gaussian trait, with blur presets."""
+    traits_effects_config.effects["blur"].traits = EffectTraits(
+        kind="spatial", identity={"blur": "0x0"}, cost=4, gaussian="blur"
+    )
+    for name, sigma in [("soft", 4), ("softer", 8), ("softest", 16)]:
+        traits_effects_config.presets[name] = Preset(
+            description=f"Blur {sigma}", effect="blur", params={"blur": f"0x{sigma}"}
+        )
+    return traits_effects_config
+
+
+class TestGaussianSigma:
+    """Tests for gaussian_sigma and blur_groups."""
+
+    def test_sigma_from_params_and_default(
+        self, gaussian_config: EffectsConfig
+    ) -> None:
+        """Test the sigma comes from the step or the parameter default."""
+        step = ChainStep(effect="blur", params={"blur": "0x2.5"})
+        assert gaussian_sigma(gaussian_config, step) == 2.5
+        assert gaussian_sigma(gaussian_config, ChainStep(effect="blur")) == 8
+
+    def test_not_cascadable(self, gaussian_config: EffectsConfig) -> None:
+        """Test explicit radii, other effects and encoded blurs are excluded."""
+        step = ChainStep(effect="blur", params={"blur": "5x4"})
+        assert gaussian_sigma(gaussian_config, step) is None
+        assert gaussian_sigma(gaussian_config, ChainStep(effect="negate")) is None
+
+        gaussian_config.effects["blur"].encoding = EncodingSettings(format="jpg")
+        assert gaussian_sigma(gaussian_config, ChainStep(effect="blur")) is None
+
+    def test_groups_need_two_items(self, gaussian_config: EffectsConfig) -> None:
+        """Test items are grouped by their leading blur, if it is shared."""
+        chains = {
+            "a": [ChainStep(effect="blur", params={"blur": "0x4"})],
+            "b": [ChainStep(effect="blur"), ChainStep(effect="negate")],
+            "c": [ChainStep(effect="negate"), ChainStep(effect="blur")],
+        }
+        assert blur_groups(gaussian_config, chains) == {"blur": {"a": 4, "b": 8}}
+        del chains["a"]
+        assert blur_groups(gaussian_config, chains) == {}
+
+
+class TestBlurCascade:
+    """Tests for BlurCascade."""
+
+    def test_stages_blur_by_the_difference(
+        self, gaussian_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test stages are sorted, deduplicated and blur incrementally."""
+        cascade = BlurCascade(
+            ChainExecutor(gaussian_config), "blur", [8, 4, 8], tmp_path, tmp_path
+        )
+        assert [stage.sigma for stage in cascade.stages] == [4, 8]
+        assert cascade.stages[0].increment == 4
+        assert cascade.stages[1].increment == pytest.approx(6.928, abs=1e-3)
+        assert cascade.cost < 4 + 8
+
+    def test_render_chains_stages_once(
+        self, gaussian_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test each stage renders once, from the previous stage's output."""
+        executor = ChainExecutor(gaussian_config)
+        cascade = BlurCascade(executor, "blur", [4, 8], test_image_file, tmp_path)
+        with patch.object(executor.executor, "run", wraps=executor.executor.run) as run:
+            assert cascade.render(8).success
+            assert cascade.render(4).success
+
+        commands = [call.args[0] for call in run.call_args_list]
+        assert len(commands) == 2
+        assert f'"{test_image_file}" -blur "0x4"' in commands[0]
+        assert f'"{cascade.stages[0].path}" -blur "0x6.9282"' in commands[1]
+
+    def test_downscaled_when_tolerated(
+        self, gaussian_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a tolerance renders large blurs at reduced size."""
+        info = ImageInfo(format="PNG", width=1000, height=500)
+        cascade = BlurCascade(
+            ChainExecutor(gaussian_config),
+            "blur",
+            [16],
+            tmp_path,
+            tmp_path,
+            info,
+            tolerance=0.25,
+        )
+        command, params = cascade.command(cascade.stages[0])
+
+        assert downscale_factor(16, 0.25) == 4
+        assert downscale_factor(4, 0.25) == 1
+        assert '-resize 250x125! -blur "0x4" -resize 1000x500!' in command
+        assert params == {}
+
+
+class TestBatchCascade:
+    """Tests for blur cascades in BatchGenerator."""
+
+    def test_presets_share_blurs(
+        self, gaussian_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test blur presets blur the input once and each other after that."""
+        generator = BatchGenerator(gaussian_config, parallel=False, cascade_blurs=True)
+        with patch.object(
+            CommandExecutor, "run", autospec=True, side_effect=CommandExecutor.run
+        ) as run:
+            result = generator.generate_all_presets(test_image_file, tmp_path)
+
+        assert result.succeeded == 3
+        blurs = [c.args[1] for c in run.call_args_list if "-blur" in c.args[1]]
+        assert sum(str(test_image_file) in command for command in blurs) == 1
+        for name in ["soft", "softer", "softest"]:
+            assert (tmp_path / "test_image" / "presets" / f"{name}.png").exists()
+
+    @pytest.mark.parametrize("cascade", [False, None])
+    def test_cascade_off(
+        self,
+        gaussian_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+        cascade: bool | None,
+    ) -> None:
+        """Test cascades are opt-in: by default the input is blurred per item."""
+        kwargs = {} if cascade is None else {"cascade_blurs": cascade}
+        generator = BatchGenerator(gaussian_config, parallel=False, **kwargs)
+        with patch.object(
+            CommandExecutor, "run", autospec=True, side_effect=CommandExecutor.run
+        ) as run:
+            generator.generate_all_presets(test_image_file, tmp_path)
+
+        blurs = [c.args[1] for c in run.call_args_list if "-blur" in c.args[1]]
+        assert sum(str(test_image_file) in command for command in blurs) == 3
+
+    def test_plan_shares_blurs(
+        self, gaussian_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a generator's plan renders the same cascade as its batch."""
+        generator = BatchGenerator(gaussian_config, cascade_blurs=True)
+        plan = generator.plan(test_image_file, tmp_path, [ItemType.PRESET])
+
+        stages = [job for job in plan.jobs if job.id.startswith("blur/blur/")]
+        assert [job.id for job in stages] == [
+            "blur/blur/0",
+            "blur/blur/1",
+            "blur/blur/2",
+        ]
+        assert stages[0].inputs == [test_image_file]
+        assert stages[1].depends_on == [stages[0].id]
+        soft, softer = plan.items()["soft"][-1], plan.items()["softer"][-1]
+        assert soft.inputs == stages[0].outputs
+        assert softer.depends_on == [stages[1].id]
+        assert plan.cleanup == [stages[0].outputs[0].parent]
+
+        result = PlanExecutor(parallel=False).execute(plan)
+        assert result.succeeded == 3
+        assert (tmp_path / "test_image" / "presets" / "softest.png").exists()
+        assert not plan.cleanup[0].exists()
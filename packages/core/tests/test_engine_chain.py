@@ -1,9 +1,37 @@
 """Tests for engine chain module."""
 
+import subprocess
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Any
+from unittest.mock import patch
 
-from wallpaper_core.effects.schema import ChainStep, EffectsConfig
-from wallpaper_core.engine.chain import ChainExecutor
+import pytest
+
+from wallpaper_core.config.schema import LimitSettings
+from wallpaper_core.effects.schema import ChainStep, Effect, EffectsConfig
+from wallpaper_core.engine.chain import (
+    ChainExecutor,
+    StepCommand,
+    can_pipe,
+    pipeline_segments,
+)
+from wallpaper_core.engine.executor import ExecutionResult, pipeline_failure
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+# Magick stand-in: appends its arguments to its input; "-" and "fmt:-" are
+# stdin/stdout
+_FAKE_MAGICK = """#!/bin/sh
+for last; do :; done
+if [ "$1" = "-" ]; then data=$(cat); else data=$(cat "$1"); fi
+shift
+case "$last" in
+  *:-) printf '%s[%s]' "$data" "$*" ;;
+  *) printf '%s[%s]' "$data" "$*" > "$last" ;;
+esac
+"""
 
 
 class TestChainExecutor:
@@ -172,3 +200,196 @@ class TestChainExecutor:
 
         assert result.success is True
         assert result.duration >= 0
+
+    def test_chain_uses_temp_dir_and_discards_intermediates(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test intermediates live in temp_dir and are deleted once consumed."""
+        scratch = tmp_path / "scratch"
+        executor = ChainExecutor(config=sample_effects_config, temp_dir=scratch)
+        execute = executor.executor.execute
+        seen: list[list[str]] = []
+
+        def record(*args: Any, **kwargs: Any) -> ExecutionResult:
+            seen.append(sorted(p.name for p in scratch.rglob("step_*")))
+            return execute(*args, **kwargs)
+
+        with patch.object(executor.executor, "execute", side_effect=record):
+            result = executor.execute_chain(
+                chain=[
+                    ChainStep(effect="blur"),
+                    ChainStep(effect="brightness"),
+                    ChainStep(effect="blackwhite"),
+                ],
+                input_path=test_image_file,
+                output_path=tmp_path / "output.png",
+            )
+
+        assert result.success is True
+        assert seen == [[], ["step_0.png"], ["step_1.png"]]
+        assert list(scratch.iterdir()) == []
+
+
+def _step(effect: str, command: str) -> StepCommand:
+    """Build a planned step for segment tests."""
+    return StepCommand(effect, command, Path("in"), Path("out"), {}, LimitSettings())
+
+
+class TestPipelineSegments:
+    """Tests for grouping chain steps into pipelines."""
+
+    def test_can_pipe(self) -> None:
+        """Test steps reading or writing their image twice cannot be piped."""
+        simple = 'magick "$INPUT" -negate "$OUTPUT"'
+        double_read = 'magick "$INPUT" "$INPUT" -composite "$OUTPUT"'
+        assert can_pipe(simple, simple) is True
+        assert can_pipe(simple, double_read) is False
+        assert can_pipe(double_read, simple) is True
+
+    def test_segments_split_on_unpipeable_steps(self) -> None:
+        """Test a step needing a seekable input starts a new segment."""
+        steps = [
+            _step("blur", 'magick "$INPUT" -blur 0x8 "$OUTPUT"'),
+            _step("negate", 'magick "$INPUT" -negate "$OUTPUT"'),
+            _step("mask", 'magick "$INPUT" "$INPUT" -composite "$OUTPUT"'),
+            _step("flip", 'magick "$INPUT" -flip "$OUTPUT"'),
+        ]
+
+        segments = pipeline_segments(steps)
+
+        assert [[s.effect for s in segment] for segment in segments] == [
+            ["blur", "negate"],
+            ["mask", "flip"],
+        ]
+
+    def test_pipeline_failure_skips_broken_pipes(self) -> None:
+        """Test a producer killed by SIGPIPE is not blamed for the failure."""
+        results = [
+            ExecutionResult(False, "a", "", "", -13),
+            ExecutionResult(False, "b", "", "bad", 1),
+            ExecutionResult(True, "c", "", "", 0),
+        ]
+        assert pipeline_failure(results) == 1
+        assert pipeline_failure(results[2:]) is None
+
+
+class TestPipelinedChain:
+    """Tests for ChainExecutor pipeline mode."""
+
+    @pytest.fixture(autouse=True)
+    def fake_magick(self, tmp_path: Path) -> Iterator[None]:
+        """Run chains through real pipes with a magick stand-in."""
+        script = tmp_path / "bin" / "magick"
+        script.parent.mkdir()
+        script.write_text(_FAKE_MAGICK)
+        script.chmod(0o755)
+        with (
+            patch("subprocess.Popen", _REAL_POPEN),
+            patch("shutil.which", return_value=str(script)),
+        ):
+            yield
+
+    def test_steps_connected_by_miff_pipes(
+        self, sample_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test intermediates are streamed as MIFF without temp files."""
+        input_path = tmp_path / "input.png"
+        input_path.write_text("IMG")
+        output_path = tmp_path / "out" / "output.png"
+        scratch = tmp_path / "scratch"
+        executor = ChainExecutor(sample_effects_config, temp_dir=scratch, pipeline=True)
+
+        result = executor.execute_chain(
+            [
+                ChainStep(effect="blur"),
+                ChainStep(effect="brightness"),
+                ChainStep(effect="blackwhite"),
+            ],
+            input_path,
+            output_path,
+        )
+
+        assert result.success is True
+        assert output_path.read_text() == (
+            "IMG[-blur 0x8 miff:-][-brightness-contrast -20% miff:-]"
+            f"[-grayscale Average {output_path}]"
+        )
+        assert list(scratch.iterdir()) == []
+
+    def test_unpipeable_step_falls_back_to_file(
+        self, sample_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a step reading $INPUT twice gets a temp file input."""
+        sample_effects_config.effects["mask"] = Effect(
+            description="Self-mask",
+            command='magick "$INPUT" "$INPUT" "$OUTPUT"',
+        )
+        input_path = tmp_path / "input.png"
+        input_path.write_text("IMG")
+        output_path = tmp_path / "output.png"
+        executor = ChainExecutor(sample_effects_config, pipeline=True)
+
+        result = executor.execute_chain(
+            [ChainStep(effect="blackwhite"), ChainStep(effect="mask")],
+            input_path,
+            output_path,
+        )
+
+        assert result.success is True
+        assert "miff:-" not in output_path.read_text()
+
+    def test_failing_step_is_reported(
+        self, sample_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test the failing stage is named and the partial output removed."""
+        sample_effects_config.effects["brightness"].command = (
+            'cat > /dev/null; echo broken >&2; exit 3 # "$INPUT" "$OUTPUT"'
+        )
+        input_path = tmp_path / "input.png"
+        input_path.write_text("IMG")
+        output_path = tmp_path / "output.png"
+        executor = ChainExecutor(sample_effects_config, pipeline=True)
+
+        result = executor.execute_chain(
+            [
+                ChainStep(effect="blur"),
+                ChainStep(effect="brightness"),
+                ChainStep(effect="blackwhite"),
+            ],
+            input_path,
+            output_path,
+        )
+
+        assert result.success is False
+        assert "Chain failed at step 2 (brightness)" in result.stderr
+        assert "broken" in result.stderr
+        assert not output_path.exists()
+
+    def test_timeout_kills_pipeline(
+        self, sample_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a stage over its time-out stops the whole pipeline."""
+        sample_effects_config.effects["brightness"].command = (
+            'sleep 30 # "$INPUT" "$OUTPUT"'
+        )
+        input_path = tmp_path / "input.png"
+        input_path.write_text("IMG")
+        executor = ChainExecutor(
+            sample_effects_config,
+            limits=LimitSettings(timeout=0.5),
+            pipeline=True,
+        )
+
+        result = executor.execute_chain(
+            [ChainStep(effect="blur"), ChainStep(effect="brightness")],
+            input_path,
+            tmp_path / "output.png",
+        )
+
+        assert result.success is False
+        assert result.timed_out is True
+        assert "step 2 (brightness)" in result.stderr
+        assert result.duration < 10
@@ -0,0 +1,240 @@
+"""Tests for engine clut module."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import ChainStep, CompositeEffect, EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.clut import (
+    ClutCache,
+    clut_ops,
+    cube_text,
+    fusible_runs,
+    step_ops,
+)
+from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.memory import MemoryExecutor
+from wallpaper_core.engine.plan import build_plan
+
+
+class TestFusibleSteps:
+    """Tests for classifying and grouping pointwise steps."""
+
+    def test_step_ops(self, traits_effects_config: EffectsConfig) -> None:
+        """Test pointwise steps yield their operators with params substituted."""
+        config = traits_effects_config
+        assert step_ops(config, ChainStep(effect="brightness")) == (
+            '-brightness-contrast "-20"%'
+        )
+        assert step_ops(config, ChainStep(effect="blackwhite")) == (
+            "-grayscale Average"
+        )
+        assert step_ops(config, ChainStep(effect="blur")) is None
+        assert step_ops(config, ChainStep(effect="vignette")) is None
+
+    def test_runs_need_two_steps(self, traits_effects_config: EffectsConfig) -> None:
+        """Test only runs of two or more pointwise steps are fused."""
+        chain = [
+            ChainStep(effect="blur"),
+            ChainStep(effect="blackwhite"),
+            ChainStep(effect="brightness"),
+            ChainStep(effect="vignette"),
+            ChainStep(effect="negate"),
+        ]
+        assert fusible_runs(traits_effects_config, chain) == [range(1, 3)]
+
+    def test_clut_ops_rejects_spatial(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test a run containing a non-pointwise step cannot become a CLUT."""
+        with pytest.raises(ValueError, match=r"step 2 \(blur\)"):
+            clut_ops(
+                traits_effects_config,
+                [ChainStep(effect="negate"), ChainStep(effect="blur")],
+            )
+
+
+class TestCubeText:
+    """Tests for cube_text function."""
+
+    def test_identity_level_2(self) -> None:
+        """Test samples map to .cube entries in order, scaled to 0-1."""
+        size = 4
+        samples = []
+        for b in range(size):
+            for g in range(size):
+                for r in range(size):
+                    samples += [r * 21845, g * 21845, b * 21845]
+        text = cube_text(samples, 2, "identity")
+        lines = text.splitlines()
+
+        assert lines[:2] == ['TITLE "identity"', "LUT_3D_SIZE 4"]
+        assert lines[4] == "0.000000 0.000000 0.000000"
+        assert lines[5] == "0.333333 0.000000 0.000000"
+        assert lines[-1] == "1.000000 1.000000 1.000000"
+        assert len(lines) == 4 + size**3
+
+    def test_sample_count_checked(self) -> None:
+        """Test a truncated CLUT is rejected."""
+        with pytest.raises(ValueError, match="expected 192 samples"):
+            cube_text([0] * 10, 2, "bad")
+
+
+class TestClutCache:
+    """Tests for ClutCache."""
+
+    def test_generated_once(self, tmp_path: Path) -> None:
+        """Test a CLUT is rendered from the identity HALD once, then reused."""
+        executor = CommandExecutor()
+        cache = ClutCache(executor, tmp_path)
+        with patch.object(executor, "run", wraps=executor.run) as run:
+            assert cache.ensure("-negate").success
+            assert cache.ensure("-negate").success
+
+        assert run.call_count == 1
+        command = run.call_args.args[0]
+        assert command.startswith('/usr/bin/magick "hald:8" -negate')
+        assert cache.path("-negate").exists()
+        assert not list(tmp_path.glob("*.tmp.png"))
+
+    def test_key_depends_on_ops_and_level(self, tmp_path: Path) -> None:
+        """Test different operators or levels never share a cache file."""
+        executor = CommandExecutor()
+        cache = ClutCache(executor, tmp_path)
+        assert cache.path("-negate") != cache.path("-negate -negate")
+        assert cache.path("-negate") != ClutCache(executor, tmp_path, 4).path("-negate")
+
+
+class TestChainFusion:
+    """Tests for CLUT fusion in the chain executors."""
+
+    def test_plan_fuses_pointwise_run(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test consecutive pointwise steps become one -hald-clut step."""
+        chain = [
+            ChainStep(effect="blur"),
+            ChainStep(effect="negate"),
+            ChainStep(effect="brightness"),
+        ]
+        executor = ChainExecutor(
+            traits_effects_config, fuse_pointwise=True, clut_dir=tmp_path / "cluts"
+        )
+        steps = executor.plan_chain(
+            chain, tmp_path / "in.png", tmp_path / "out.png", tmp_path
+        )
+
+        assert [step.effect for step in steps] == ["blur", "clut[negate+brightness]"]
+        clut = steps[1].clut
+        assert clut is not None
+        assert clut.path.exists()
+        assert "-hald-clut" in steps[1].command
+        assert steps[1].output_path == tmp_path / "out.png"
+
+    def test_failed_generation_keeps_steps(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test steps run separately when their CLUT cannot be rendered."""
+        chain = [ChainStep(effect="negate"), ChainStep(effect="brightness")]
+        executor = ChainExecutor(
+            traits_effects_config, fuse_pointwise=True, clut_dir=tmp_path
+        )
+        failure = executor.check_chain([])
+        with patch.object(executor.cluts, "ensure", return_value=failure):
+            steps = executor.plan_chain(
+                chain, tmp_path / "in.png", tmp_path / "out.png", tmp_path
+            )
+        assert [step.effect for step in steps] == ["negate", "brightness"]
+
+    @pytest.mark.parametrize("fuse", [False, None])
+    def test_fusion_off(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path, fuse: bool | None
+    ) -> None:
+        """Test fusion is opt-in: fuse_pointwise=False (the default) keeps steps."""
+        chain = [ChainStep(effect="negate"), ChainStep(effect="brightness")]
+        kwargs = {} if fuse is None else {"fuse_pointwise": fuse}
+        executor = ChainExecutor(traits_effects_config, **kwargs)
+        steps = executor.plan_chain(
+            chain, tmp_path / "in.png", tmp_path / "out.png", tmp_path
+        )
+        assert len(steps) == 2
+        assert executor.cluts is None
+
+    def test_memory_executor_fuses(
+        self, traits_effects_config: EffectsConfig, test_image_file: Path
+    ) -> None:
+        """Test in-memory chains apply the fused CLUT in one command."""
+        executor = MemoryExecutor(traits_effects_config, fuse_pointwise=True)
+        chain = [ChainStep(effect="blackwhite"), ChainStep(effect="brightness")]
+        with patch.object(
+            executor.executor, "execute_bytes", wraps=executor.executor.execute_bytes
+        ) as execute:
+            executor.apply_chain(test_image_file.read_bytes(), chain)
+
+        assert execute.call_count == 1
+        assert "-hald-clut" in execute.call_args.args[0]
+
+
+class TestPlanCluts:
+    """Tests for CLUT jobs in execution plans."""
+
+    def test_clut_job_is_a_dependency(
+        self,
+        traits_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test planning renders nothing and adds a CLUT job the step needs."""
+        traits_effects_config.composites["gray-dim"] = CompositeEffect(
+            description="Gray and dim",
+            chain=[ChainStep(effect="blackwhite"), ChainStep(effect="brightness")],
+        )
+        plan = build_plan(
+            traits_effects_config,
+            test_image_file,
+            tmp_path / "out",
+            [ItemType.COMPOSITE],
+            fuse_pointwise=True,
+        )
+
+        assert not (tmp_path / "out").exists()
+        clut_job, step_job = plan.jobs
+        assert clut_job.effect == "clut"
+        assert clut_job.item == "gray-dim"
+        assert '"hald:8" -grayscale Average' in clut_job.command
+        assert step_job.depends_on == [clut_job.id]
+        assert str(clut_job.outputs[0]) in step_job.command
+
+    def test_generator_plan_uses_its_cache(
+        self,
+        traits_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a generator's plan only renders CLUTs missing from its cache."""
+        traits_effects_config.composites["gray-dim"] = CompositeEffect(
+            description="Gray and dim",
+            chain=[ChainStep(effect="blackwhite"), ChainStep(effect="brightness")],
+        )
+        cluts = tmp_path / "cluts"
+        generator = BatchGenerator(
+            traits_effects_config, fuse_pointwise=True, clut_dir=cluts
+        )
+
+        clut_job, _ = generator.plan(
+            test_image_file, tmp_path, [ItemType.COMPOSITE]
+        ).jobs
+        assert clut_job.outputs[0].parent == cluts
+        assert not cluts.exists()
+
+        cluts.mkdir()
+        clut_job.outputs[0].touch()
+        (step_job,) = generator.plan(
+            test_image_file, tmp_path, [ItemType.COMPOSITE]
+        ).jobs
+        assert step_job.depends_on == []
+        assert str(clut_job.outputs[0]) in step_job.command
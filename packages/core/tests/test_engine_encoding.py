@@ -0,0 +1,222 @@
+"""Tests for engine encoding module."""
+
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import EncodingSettings, ItemType
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.encoding import (
+    apply_encoding,
+    encoding_options,
+    output_suffix,
+    resolve_item_encoding,
+)
+from wallpaper_core.engine.executor import CommandExecutor
+
+# Captured at import time, before the autouse fixture mocks Popen and which
+_REAL_POPEN = subprocess.Popen
+_REAL_MAGICK = shutil.which("magick")
+
+
+class TestEncodingOptions:
+    """Tests for encoder option generation."""
+
+    def test_no_profile(self) -> None:
+        """Test no options without a profile."""
+        assert encoding_options(None, Path("out.png")) == ""
+        assert encoding_options(EncodingSettings(), Path("out.png")) == ""
+
+    def test_png_options(self) -> None:
+        """Test PNG defines are emitted and quality is skipped."""
+        profile = EncodingSettings(
+            quality=80, png_compression_level=1, png_compression_filter=5
+        )
+        options = encoding_options(profile, Path("out.png"))
+        assert "-define png:compression-level=1" in options
+        assert "-define png:compression-filter=5" in options
+        assert "-quality" not in options
+
+    def test_webp_options(self) -> None:
+        """Test WebP method and quality are emitted for WebP only."""
+        profile = EncodingSettings(quality=85, webp_method=2, png_compression_level=9)
+        options = encoding_options(profile, Path("out.webp"))
+        assert "-quality 85" in options
+        assert "-define webp:method=2" in options
+        assert "png:" not in options
+
+    def test_strip_and_single_channel(self) -> None:
+        """Test metadata stripping and grayscale output options."""
+        profile = EncodingSettings(strip_metadata=True, single_channel=True)
+        options = encoding_options(profile, Path("out.jpg"))
+        assert "-strip" in options
+        assert "-define colorspace:auto-grayscale=on" in options
+        assert "-colorspace" not in options
+        off = encoding_options(EncodingSettings(single_channel=False), Path("o.png"))
+        assert off == "-define colorspace:auto-grayscale=off"
+
+    def test_apply_encoding_before_output(self) -> None:
+        """Test options are inserted right before $OUTPUT."""
+        command = apply_encoding(
+            'magick "$INPUT" -blur "$BLUR" "$OUTPUT"',
+            EncodingSettings(quality=70),
+            Path("out.jpg"),
+        )
+        assert command == 'magick "$INPUT" -blur "$BLUR" -quality 70 "$OUTPUT"'
+
+    def test_format_normalized(self) -> None:
+        """Test format names are normalized to extensions."""
+        assert EncodingSettings(format=".JPEG").format == "jpg"
+        assert output_suffix(Path("in.png"), EncodingSettings(format="webp")) == ".webp"
+        assert output_suffix(Path("in.png"), EncodingSettings()) == ".png"
+
+
+class TestResolveItemEncoding:
+    """Tests for per-item profile resolution."""
+
+    def test_effect_overrides_global(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test an effect's encoding block overrides the global profile."""
+        sample_effects_config.effects["blackwhite"].encoding = EncodingSettings(
+            single_channel=True, quality=60
+        )
+        profile = resolve_item_encoding(
+            sample_effects_config,
+            EncodingSettings(quality=90, strip_metadata=True),
+            "blackwhite",
+            ItemType.EFFECT,
+        )
+        assert profile.quality == 60
+        assert profile.strip_metadata is True
+        assert profile.single_channel is True
+
+    def test_grayscale_carries_through_chain(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test single_channel from an earlier step survives later steps."""
+        sample_effects_config.effects["blackwhite"].encoding = EncodingSettings(
+            single_channel=True
+        )
+        profile = resolve_item_encoding(
+            sample_effects_config, None, "blackwhite-blur", ItemType.COMPOSITE
+        )
+        assert profile.single_channel is True
+
+    def test_global_single_channel_keeps_color(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test a global single_channel never converts color results to gray."""
+        executor = ChainExecutor(
+            sample_effects_config, encoding=EncodingSettings(single_channel=True)
+        )
+        for name in ("blur", "brightness"):
+            command = executor.encoded_command(name, Path("out.png"))
+            assert command is not None
+            assert "-colorspace" not in command
+            assert "-type" not in command
+            assert "colorspace:auto-grayscale=on" in command
+
+    def test_preset_follows_composite(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test presets resolve through their composite."""
+        sample_effects_config.effects["brightness"].encoding = EncodingSettings(
+            format="webp"
+        )
+        profile = resolve_item_encoding(
+            sample_effects_config, None, "dark_blur", ItemType.PRESET
+        )
+        assert profile.format == "webp"
+
+
+class TestEncodingExecution:
+    """Tests for encoding applied during execution."""
+
+    def test_chain_encodes_final_step_only(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test encoder options only reach the last chain step."""
+        executor = ChainExecutor(
+            sample_effects_config, encoding=EncodingSettings(png_compression_level=1)
+        )
+        commands: list[str] = []
+        original = executor.executor.execute
+
+        def record(command_template, *args, **kwargs):
+            commands.append(command_template)
+            return original(command_template, *args, **kwargs)
+
+        executor.executor.execute = record  # type: ignore[method-assign]
+        composite = sample_effects_config.composites["blur-brightness"]
+        result = executor.execute_chain(
+            composite.chain, test_image_file, tmp_path / "out.png"
+        )
+
+        assert result.success is True
+        assert "compression-level" not in commands[0]
+        assert "-define png:compression-level=1" in commands[-1]
+
+    def test_batch_uses_profile_format(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test batch outputs use the profile's format as suffix."""
+        generator = BatchGenerator(
+            config=sample_effects_config,
+            parallel=False,
+            encoding=EncodingSettings(format="jpg", quality=85),
+        )
+
+        result = generator.generate_all_effects(test_image_file, tmp_path)
+
+        assert result.success is True
+        for exec_result in result.results.values():
+            assert "-quality 85" in exec_result.command
+        effects_dir = tmp_path / test_image_file.stem / "effects"
+        assert (effects_dir / "blur.jpg").exists()
+
+
+@pytest.mark.skipif(_REAL_MAGICK is None, reason="needs ImageMagick")
+class TestSingleChannelOutput:
+    """Run real magick commands with single_channel set."""
+
+    def _channels(self, source: str, effect: str, tmp_path: Path) -> str:
+        """Render an effect with a global single_channel, and identify it."""
+        image = tmp_path / "in.png"
+        output = tmp_path / f"{effect}.png"
+        with patch("subprocess.Popen", _REAL_POPEN):
+            subprocess.run(
+                [str(_REAL_MAGICK), "-size", "8x8", source, str(image)], check=True
+            )
+            executor = CommandExecutor(binary=str(_REAL_MAGICK))
+            command = apply_encoding(
+                f'magick "$INPUT" -{effect} "$OUTPUT"',
+                EncodingSettings(single_channel=True),
+                output,
+            )
+            assert executor.execute(command, image, output).success
+            return subprocess.run(
+                [str(_REAL_MAGICK), "identify", "-format", "%[channels]", str(output)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+
+    def test_color_stays_color(self, tmp_path: Path) -> None:
+        """Test a color result keeps its channels."""
+        assert self._channels("gradient:red-blue", "negate", tmp_path) != "gray"
+
+    def test_gray_becomes_single_channel(self, tmp_path: Path) -> None:
+        """Test a gray result is written with one channel."""
+        assert self._channels("gradient:white-black", "negate", tmp_path) == "gray"
@@ -72,12 +72,11 @@ class TestCommandExecutor:
         executor = CommandExecutor()
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -93,12 +92,11 @@ class TestCommandExecutor:
         executor = CommandExecutor()
         output_path = tmp_path / "blurred.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" -blur "$BLUR" "$OUTPUT"',
@@ -119,12 +117,11 @@ class TestCommandExecutor:
         executor = CommandExecutor()
         output_path = tmp_path / "nested" / "dir" / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -143,12 +140,11 @@ class TestCommandExecutor:
         executor = CommandExecutor(output=output)
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -164,12 +160,11 @@ class TestCommandExecutor:
         input_path = tmp_path / "nonexistent.png"
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 1
-            mock_result.stdout = ""
-            mock_result.stderr = "Error: file not found"
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 1
+            mock_process.communicate.return_value = ("", "Error: file not found")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -189,12 +184,11 @@ class TestCommandExecutor:
 
         cmd_template = 'magick "$INPUT" -brightness-contrast "$BRIGHTNESS"% "$OUTPUT"'
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template=cmd_template,
@@ -213,12 +207,11 @@ class TestCommandExecutor:
         executor = CommandExecutor()
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -238,13 +231,12 @@ class TestCommandExecutor:
         executor = CommandExecutor(output=output)
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
             # Mock subprocess to return with stdout
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = "Processing complete"
-            mock_result.stderr = ""
-            mock_run.return_value = mock_result
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("Processing complete", "")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -265,13 +257,12 @@ class TestCommandExecutor:
         executor = CommandExecutor(output=output)
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
             # Mock subprocess to return with stderr
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = ""
-            mock_result.stderr = "Warning message"
-            mock_run.return_value = mock_result
+            mock_process = MagicMock()
+            mock_process.returncode = 0
+            mock_process.communicate.return_value = ("", "Warning message")
+            mock_popen.return_value = mock_process
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
@@ -289,8 +280,8 @@ class TestCommandExecutor:
         executor = CommandExecutor()
         output_path = tmp_path / "output.png"
 
-        with patch("wallpaper_core.engine.executor.subprocess.run") as mock_run:
-            mock_run.side_effect = RuntimeError("Command failed")
+        with patch("wallpaper_core.engine.executor.subprocess.Popen") as mock_popen:
+            mock_popen.side_effect = RuntimeError("Command failed")
 
             result = executor.execute(
                 command_template='magick "$INPUT" "$OUTPUT"',
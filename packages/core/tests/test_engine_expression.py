@@ -0,0 +1,196 @@
+"""Tests for engine expression module (expressions compiled to NumPy)."""
+
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.effects.expression import parse_expression
+from wallpaper_core.effects.schema import (
+    ChainStep,
+    Effect,
+    EffectsConfig,
+    ParameterDefinition,
+)
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import BytesResult, CommandExecutor
+
+np = pytest.importorskip("numpy")
+
+from wallpaper_core.engine import expression, native  # noqa: E402
+
+
+def _pixels(height: int = 6, width: int = 8, channels: int = 3) -> "np.ndarray":
+    rng = np.random.default_rng(0)
+    return rng.random((height, width, channels), dtype=np.float32)
+
+
+def _evaluate(text: str, pixels: "np.ndarray", **params: float) -> "np.ndarray":
+    compiled = expression.CompiledExpression(parse_expression(text, params))
+    return compiled(pixels, params)
+
+
+@pytest.fixture
+def direct(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Never bake tables."""
+    monkeypatch.setattr(expression, "LUT_SIZE", 10**12)
+    monkeypatch.setattr(expression, "CUBE_SIZE", 10**4)
+
+
+class TestCompiledExpression:
+    """Tests for evaluating expressions."""
+
+    def test_per_channel(self) -> None:
+        """Test one expression of c computes each channel from itself."""
+        pixels = _pixels()
+        assert np.allclose(_evaluate("1 - c", pixels), 1 - pixels)
+        assert np.allclose(
+            _evaluate("c * gain", pixels, gain=0.5), pixels * np.float32(0.5)
+        )
+
+    def test_names(self) -> None:
+        """Test luminance, coordinates and the image size."""
+        pixels = _pixels()
+        luminance = pixels @ np.array([0.212656, 0.715158, 0.072186], np.float32)
+        result = _evaluate("luminance", pixels)
+        assert np.allclose(result, luminance[..., np.newaxis].repeat(3, 2))
+        result = _evaluate("x / w + y / h / 10", pixels)
+        assert np.isclose(result[0, 0, 0], 0)
+        assert np.isclose(result[5, 7, 2], 7 / 8 + 5 / 6 / 10)
+
+    def test_tuple_and_conditions(self) -> None:
+        """Test a tuple computes red, green and blue separately."""
+        pixels = _pixels()
+        result = _evaluate("(b, g if g > 0.5 else 0, not r < 0.5)", pixels)
+        assert np.allclose(result[..., 0], pixels[..., 2])
+        assert np.allclose(
+            result[..., 1], np.where(pixels[..., 1] > 0.5, pixels[..., 1], 0)
+        )
+        assert np.array_equal(
+            result[..., 2], (pixels[..., 0] >= 0.5).astype(np.float32)
+        )
+
+    def test_clips_and_keeps_alpha(self) -> None:
+        """Test results are clipped, NaN becomes 0 and alpha is kept."""
+        pixels = _pixels(channels=4)
+        result = _evaluate("(c * 10, log(c - 2), 1 / (c - c))", pixels)
+        assert result.dtype == np.float32
+        assert np.array_equal(result[..., 3], pixels[..., 3])
+        assert result[..., 0].max() == 1
+        assert not np.isnan(result).any()
+        assert np.all(result[..., 1] == 0)
+        assert np.all(result[..., 2] == 1)
+
+    def test_tiles(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test evaluation in bands of rows gives the same result."""
+        pixels = _pixels(37, 11)
+        text = "c * y / h + x / w"
+        whole = _evaluate(text, pixels)
+        monkeypatch.setattr(expression, "TILE_PIXELS", 30)
+        assert np.array_equal(_evaluate(text, pixels), whole)
+
+    def test_curve_table(self, direct: None, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test expressions of c alone are baked into an exact 1D table."""
+        levels = np.arange(300 * 300 * 3, dtype=np.float32) % 256 / 255
+        pixels = levels.reshape(300, 300, 3)
+        text = "pow(c, 0.8) * 1.1 - 0.05 + 0.1 * sin(6 * c)"
+        evaluated = _evaluate(text, pixels)
+        monkeypatch.setattr(expression, "LUT_SIZE", 65536)
+        with patch.object(
+            expression, "_curve_lookup", wraps=expression._curve_lookup
+        ) as baked:
+            result = _evaluate(text, pixels)
+        baked.assert_called_once()
+        assert np.abs(result - evaluated).max() < 1e-5
+
+    def test_cube_table(self, direct: None, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test costly pointwise expressions are baked into a 3D table."""
+        pixels = _pixels(40, 40)
+        text = " + ".join(f"0.1 * sin({k} * luminance + c)" for k in range(1, 8))
+        evaluated = _evaluate(text, pixels)
+        monkeypatch.setattr(expression, "CUBE_SIZE", 11)
+        monkeypatch.setattr(expression, "_CUBE_COST", 4)
+        with patch.object(expression, "trilinear", wraps=expression.trilinear) as baked:
+            result = _evaluate(text, pixels)
+        baked.assert_called()
+        assert np.abs(result - evaluated).max() < 0.02
+
+    def test_coordinates_are_never_baked(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test expressions of x and y are evaluated directly."""
+        monkeypatch.setattr(expression, "LUT_SIZE", 4)
+        monkeypatch.setattr(expression, "CUBE_SIZE", 2)
+        monkeypatch.setattr(expression, "_TABLE_COST", 0)
+        monkeypatch.setattr(expression, "_CUBE_COST", 0)
+        pixels = _pixels()
+        result = _evaluate("c * x / w", pixels)
+        assert np.allclose(
+            result, pixels * (np.arange(8) / 8)[np.newaxis, :, np.newaxis]
+        )
+
+    def test_trilinear_is_exact_for_linear_tables(self) -> None:
+        """Test trilinear lookup reproduces a linear color transform."""
+        matrix = np.array(
+            [[0.2, 0.3, 0.5], [0.1, 0.6, 0.3], [0.7, 0.2, 0.1]], np.float32
+        )
+        axis = np.linspace(0, 1, 5, dtype=np.float32)
+        grid = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1)
+        pixels = _pixels()
+        result = expression.trilinear(grid @ matrix, pixels)
+        assert np.abs(result - pixels @ matrix).max() < 1e-5
+
+
+def _fake_magick(
+    _self: CommandExecutor, command: str, data: bytes, *_args: Any, **_kwargs: Any
+) -> BytesResult:
+    """Decode to fixed pixels, and "encode" by passing PAM through."""
+    output = native.encode_pam(_pixels()) if "-colorspace" in command else data
+    return BytesResult(
+        success=True, command=command, stdout="", stderr="", return_code=0, data=output
+    )
+
+
+@pytest.fixture
+def expression_config(traits_effects_config: EffectsConfig) -> EffectsConfig:
+    """The traits config with a "gain" expression effect."""
+    traits_effects_config.effects["gain"] = Effect(
+        description="Gain",
+        expression="c * gain",
+        parameters={"gain": ParameterDefinition(type="float", default=0.5)},
+    )
+    traits_effects_config.effects["label"] = Effect(
+        description="Label",
+        expression="c * label",
+        parameters={"label": ParameterDefinition(type="string", default="dark")},
+    )
+    return traits_effects_config
+
+
+class TestExpressionEffects:
+    """Tests for running expression effects in chains."""
+
+    def test_chain_runs_in_numpy(
+        self, expression_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a chain with an expression runs in the NumPy backend."""
+        executor = ChainExecutor(expression_config)
+        chain = [
+            ChainStep(effect="negate"),
+            ChainStep(effect="gain", params={"gain": 2}),
+        ]
+        assert isinstance(executor.backend_for(chain), native.NativeBackend)
+        output = tmp_path / "out.pam"
+        with patch.object(CommandExecutor, "execute_bytes", _fake_magick):
+            result = executor.execute_chain(chain, test_image_file, output)
+
+        assert result.success, result.stderr
+        pixels, _ = native.decode_pam(output.read_bytes())
+        expected = np.clip((1 - _pixels()) * 2, 0, 1)
+        assert np.abs(pixels - expected).max() <= 1 / 255
+
+    def test_parameters_must_be_numbers(self, expression_config: EffectsConfig) -> None:
+        """Test a non-numeric parameter fails the step."""
+        op = native.step_op(expression_config, ChainStep(effect="label"))
+        assert op is not None
+        with pytest.raises(native.BackendError, match="'label' is not a number"):
+            op(_pixels())
@@ -0,0 +1,197 @@
+"""Tests for engine journal module."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.journal import JOURNAL_NAME, BatchJournal, file_sha256
+
+
+def _digests(path: Path) -> dict[str, str]:
+    """Journal digests of a single output file."""
+    return {str(path): file_sha256(path)}
+
+
+class TestBatchJournal:
+    """Tests for BatchJournal."""
+
+    def test_record_and_reload(self, tmp_path: Path) -> None:
+        """Test entries survive reopening the journal."""
+        output = tmp_path / "blur.png"
+        output.write_bytes(b"image")
+        journal = BatchJournal(tmp_path / JOURNAL_NAME)
+        journal.record_done(output, "blur", "effect", _digests(output), 1.5)
+
+        entry = BatchJournal(tmp_path / JOURNAL_NAME).get(output)
+        assert entry is not None
+        assert entry.done
+        assert entry.duration == 1.5
+        assert entry.verify()
+
+    def test_later_entry_wins(self, tmp_path: Path) -> None:
+        """Test the latest entry for an output replaces earlier ones."""
+        output = tmp_path / "blur.png"
+        journal = BatchJournal(tmp_path / JOURNAL_NAME)
+        journal.record_failed(output, "blur", "effect", "boom", 0.1)
+        output.write_bytes(b"image")
+        journal.record_done(output, "blur", "effect", _digests(output), 0.2)
+
+        entry = BatchJournal(tmp_path / JOURNAL_NAME).get(output)
+        assert entry is not None
+        assert entry.done
+
+    def test_torn_line_is_ignored(self, tmp_path: Path) -> None:
+        """Test a line cut short by a crash does not break loading."""
+        output = tmp_path / "blur.png"
+        output.write_bytes(b"image")
+        path = tmp_path / JOURNAL_NAME
+        BatchJournal(path).record_done(output, "blur", "effect", _digests(output), 0.1)
+        with path.open("a") as f:
+            f.write('{"output": "/x.png", "item"')
+
+        journal = BatchJournal(path)
+        assert journal.get(output) is not None
+        assert journal.get(Path("/x.png")) is None
+
+    def test_verify_detects_changed_output(self, tmp_path: Path) -> None:
+        """Test verify fails once an output is modified or removed."""
+        output = tmp_path / "blur.png"
+        output.write_bytes(b"image")
+        journal = BatchJournal(tmp_path / JOURNAL_NAME)
+        journal.record_done(output, "blur", "effect", _digests(output), 0.1)
+        entry = journal.get(output)
+        assert entry is not None
+
+        output.write_bytes(b"other")
+        assert not entry.verify()
+        output.unlink()
+        assert not entry.verify()
+
+
+class TestResumableBatch:
+    """Tests for journaled BatchGenerator runs."""
+
+    def _run(
+        self,
+        config: EffectsConfig,
+        image: Path,
+        output_dir: Path,
+        **kwargs: bool,
+    ) -> tuple[list[str], int]:
+        """Run an effects batch, returning the processed items and skip count."""
+        generator = BatchGenerator(config, parallel=False, **kwargs)
+        with patch.object(
+            generator, "_process_item", wraps=generator._process_item
+        ) as process:
+            result = generator.generate_all_effects(image, output_dir)
+        assert result.success
+        return [call.args[0] for call in process.call_args_list], result.skipped
+
+    def test_batch_writes_journal(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test every finished item is journaled with its output hash."""
+        output_dir = tmp_path / "out"
+        self._run(sample_effects_config, test_image_file, output_dir)
+
+        path = output_dir / test_image_file.stem / JOURNAL_NAME
+        entries = [json.loads(line) for line in path.read_text().splitlines()]
+        assert {e["item"] for e in entries} == set(sample_effects_config.effects)
+        assert all(e["status"] == "done" and e["outputs"] for e in entries)
+
+    def test_resume_skips_verified_items(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test --resume reruns only items whose output changed."""
+        output_dir = tmp_path / "out"
+        self._run(sample_effects_config, test_image_file, output_dir)
+        (output_dir / test_image_file.stem / "effects" / "blur.png").write_bytes(b"x")
+
+        processed, skipped = self._run(
+            sample_effects_config, test_image_file, output_dir, resume=True
+        )
+        assert processed == ["blur"]
+        assert skipped == len(sample_effects_config.effects) - 1
+
+    def test_resume_reruns_changed_recipe(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test --resume reruns items whose parameters or input changed."""
+        output_dir = tmp_path / "out"
+        self._run(sample_effects_config, test_image_file, output_dir)
+        sample_effects_config.effects["blur"].parameters["blur"].default = "0x2"
+
+        processed, skipped = self._run(
+            sample_effects_config, test_image_file, output_dir, resume=True
+        )
+        assert processed == ["blur"]
+        assert skipped == len(sample_effects_config.effects) - 1
+
+        test_image_file.write_bytes(test_image_file.read_bytes() + b"\0")
+        processed, skipped = self._run(
+            sample_effects_config, test_image_file, output_dir, resume=True
+        )
+        assert processed == list(sample_effects_config.effects)
+        assert skipped == 0
+
+    def test_without_resume_everything_runs(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a plain rerun ignores the journal."""
+        output_dir = tmp_path / "out"
+        self._run(sample_effects_config, test_image_file, output_dir)
+
+        processed, skipped = self._run(
+            sample_effects_config, test_image_file, output_dir
+        )
+        assert processed == list(sample_effects_config.effects)
+        assert skipped == 0
+
+    def test_retry_failed_runs_only_failures(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test --retry-failed reruns only items journaled as failed."""
+        output_dir = tmp_path / "out"
+        self._run(sample_effects_config, test_image_file, output_dir)
+        base_dir = output_dir / test_image_file.stem
+        BatchJournal(base_dir / JOURNAL_NAME).record_failed(
+            base_dir / "effects" / "blackwhite.png",
+            "blackwhite",
+            ItemType.EFFECT.value,
+            "boom",
+            0.1,
+        )
+
+        processed, _ = self._run(
+            sample_effects_config, test_image_file, output_dir, retry_failed=True
+        )
+        assert processed == ["blackwhite"]
+
+    def test_journal_disabled(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test no journal is written when journaling is off."""
+        output_dir = tmp_path / "out"
+        self._run(sample_effects_config, test_image_file, output_dir, journal=False)
+        assert not (output_dir / test_image_file.stem / JOURNAL_NAME).exists()
@@ -0,0 +1,169 @@
+"""Tests for engine limits module."""
+
+import subprocess
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import LimitSettings
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.limits import effect_limits, rlimit_command
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+
+@pytest.fixture
+def real_processes() -> Iterator[None]:
+    """Run real child processes instead of the mocked magick commands."""
+    with patch("wallpaper_core.engine.executor.subprocess.Popen", _REAL_POPEN):
+        yield
+
+
+class TestEffectLimits:
+    """Tests for effect_limits resolution."""
+
+    def test_effect_overrides_global(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test an effect's limits block is layered over the global limits."""
+        sample_effects_config.effects["blur"].limits = LimitSettings(timeout=5)
+        base = LimitSettings(timeout=60, memory_mb=512)
+
+        limits = effect_limits(sample_effects_config, base, "blur")
+
+        assert limits.timeout == 5
+        assert limits.memory_mb == 512
+        assert effect_limits(sample_effects_config, base, "brightness") == base
+
+    def test_chain_steps_use_effect_limits(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test each chain step runs with its own effect's limits."""
+        sample_effects_config.effects["blur"].limits = LimitSettings(timeout=5)
+        chain_executor = ChainExecutor(
+            sample_effects_config, limits=LimitSettings(timeout=60)
+        )
+        composite = sample_effects_config.composites["blur-brightness"]
+
+        with patch.object(
+            chain_executor.executor,
+            "execute",
+            wraps=chain_executor.executor.execute,
+        ) as mock_execute:
+            chain_executor.execute_chain(
+                composite.chain, test_image_file, tmp_path / "out.png"
+            )
+
+        timeouts = [call.args[4].timeout for call in mock_execute.call_args_list]
+        assert timeouts == [5, 60]
+
+
+class TestRlimitCommand:
+    """Tests for rlimit_command."""
+
+    def test_no_limits(self) -> None:
+        """Test commands are unchanged without rlimits."""
+        assert rlimit_command("true", None) == "true"
+        assert rlimit_command("true", LimitSettings(timeout=10)) == "true"
+
+    def test_prefixes_ulimit(self) -> None:
+        """Test the configured rlimits are set by the shell, in its units."""
+        command = rlimit_command(
+            "magick a b", LimitSettings(cpu_seconds=30, output_file_mb=1)
+        )
+        assert command == (
+            "ulimit -S -t 30 && ulimit -H -t 31 && ulimit -f 2048 || exit 1\n"
+            "magick a b"
+        )
+
+    def test_shell_applies_limits(self, real_processes: None) -> None:
+        """Test a real shell gives the command the limits, in bytes."""
+        limits = LimitSettings(cpu_seconds=30, memory_mb=1024, output_file_mb=1)
+        script = (
+            "import resource; print(*(resource.getrlimit(getattr(resource, k)) "
+            "for k in ('RLIMIT_CPU', 'RLIMIT_AS', 'RLIMIT_FSIZE')))"
+        )
+        command = rlimit_command(f'python3 -c "{script}"', limits)
+        result = subprocess.run(
+            command, shell=True, capture_output=True, text=True, check=True
+        )
+        mib = 1024 * 1024
+        assert result.stdout.split() == [
+            "(30,",
+            "31)",
+            f"({1024 * mib},",
+            f"{1024 * mib})",
+            f"({mib},",
+            f"{mib})",
+        ]
+
+
+class TestCommandExecutorLimits:
+    """Tests for limits enforced by CommandExecutor."""
+
+    def test_timeout(self, real_processes: None, tmp_path: Path) -> None:
+        """Test a command exceeding its timeout is killed and reported."""
+        output_path = tmp_path / "out.png"
+        executor = CommandExecutor(limits=LimitSettings(timeout=0.2))
+
+        result = executor.execute(
+            'touch "$OUTPUT" && sleep 30', tmp_path / "in.png", output_path
+        )
+
+        assert result.success is False
+        assert result.timed_out is True
+        assert result.cancelled is False
+        assert "Timed out after 0.2s" in result.stderr
+        assert result.duration < 10
+        assert not output_path.exists()
+
+    def test_per_call_limits_override(
+        self, real_processes: None, tmp_path: Path
+    ) -> None:
+        """Test limits passed to execute() replace the executor defaults."""
+        executor = CommandExecutor(limits=LimitSettings(timeout=0.2))
+
+        result = executor.execute(
+            'sleep 0.5 && touch "$OUTPUT"',
+            tmp_path / "in.png",
+            tmp_path / "out.png",
+            limits=LimitSettings(timeout=30),
+        )
+
+        assert result.success is True
+        assert result.timed_out is False
+
+    def test_output_file_limit(self, real_processes: None, tmp_path: Path) -> None:
+        """Test RLIMIT_FSIZE stops a command writing an oversized file."""
+        executor = CommandExecutor(limits=LimitSettings(output_file_mb=1))
+
+        result = executor.execute(
+            'head -c 2097152 /dev/zero > "$OUTPUT"',
+            tmp_path / "in.png",
+            tmp_path / "out.png",
+        )
+
+        assert result.success is False
+        assert result.timed_out is False
+
+    def test_cpu_limit(self, real_processes: None, tmp_path: Path) -> None:
+        """Test exceeding RLIMIT_CPU is reported as a time-out."""
+        executor = CommandExecutor(limits=LimitSettings(cpu_seconds=1))
+
+        result = executor.execute(
+            "exec python3 -c 'while True: pass'",
+            tmp_path / "in.png",
+            tmp_path / "out.png",
+        )
+
+        assert result.success is False
+        assert result.timed_out is True
+        assert result.stderr == "CPU time limit exceeded"
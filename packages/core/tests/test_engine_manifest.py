@@ -0,0 +1,145 @@
+"""Tests for engine manifest module."""
+
+from pathlib import Path
+
+import pytest
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.journal import file_sha256
+from wallpaper_core.engine.manifest import (
+    MANIFEST_NAME,
+    OutputManifest,
+    recipe_hash,
+)
+from wallpaper_core.engine.variants import OutputGeometry
+
+
+class TestOutputManifest:
+    """Tests for OutputManifest."""
+
+    def test_record_write_and_read(self, tmp_path: Path) -> None:
+        """Test entries round-trip with paths relative to the root."""
+        output = tmp_path / "effects" / "blur.png"
+        output.parent.mkdir()
+        output.write_bytes(b"image")
+        manifest = OutputManifest.load(tmp_path, tmp_path / "in.png", "abc")
+        manifest.record(output, "d1", "blur", ItemType.EFFECT, "h1", [], 0.5, (10, 20))
+        manifest.write()
+
+        loaded = OutputManifest.read(tmp_path / MANIFEST_NAME)
+        entry = loaded.get(output)
+        assert list(loaded.entries) == ["effects/blur.png"]
+        assert entry is not None
+        assert (entry.width, entry.height) == (10, 20)
+        assert entry.size == 5
+        assert entry.input_hash == "abc"
+
+    def test_matches_detects_changes(self, tmp_path: Path) -> None:
+        """Test matches() compares size and mtime without hashing."""
+        output = tmp_path / "blur.png"
+        output.write_bytes(b"image")
+        manifest = OutputManifest.load(tmp_path, tmp_path / "in.png", "abc")
+        manifest.record(output, "d1", "blur", ItemType.EFFECT, "h1", [], 0.5)
+        entry = manifest.get(output)
+        assert entry is not None
+        assert entry.matches(output)
+
+        output.write_bytes(b"changed image")
+        assert not entry.matches(output)
+
+    def test_new_input_drops_entries(self, tmp_path: Path) -> None:
+        """Test entries for a different input are not carried over."""
+        output = tmp_path / "blur.png"
+        output.write_bytes(b"image")
+        manifest = OutputManifest.load(tmp_path, tmp_path / "in.png", "abc")
+        manifest.record(output, "d1", "blur", ItemType.EFFECT, "h1", [], 0.5)
+        manifest.write()
+
+        assert OutputManifest.load(tmp_path, tmp_path / "in.png", "abc").entries
+        assert not OutputManifest.load(tmp_path, tmp_path / "in.png", "xyz").entries
+
+    def test_read_rejects_other_version(self, tmp_path: Path) -> None:
+        """Test reading a manifest of another version fails."""
+        path = tmp_path / MANIFEST_NAME
+        path.write_text('{"version": 99, "input_path": "a", "input_hash": ""}')
+        with pytest.raises(ValueError, match="version"):
+            OutputManifest.read(path)
+
+    def test_recipe_hash_is_order_independent(self) -> None:
+        """Test the recipe hash ignores dict key order."""
+        assert recipe_hash({"a": 1, "b": [1, 2]}) == recipe_hash({"b": [1, 2], "a": 1})
+        assert recipe_hash({"a": 1}) != recipe_hash({"a": 2})
+
+
+class TestBatchManifest:
+    """Tests for the manifest written by BatchGenerator."""
+
+    def test_batch_writes_manifest(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a batch records every output with hashes and params."""
+        generator = BatchGenerator(sample_effects_config, parallel=True)
+        result = generator.generate_all_effects(test_image_file, tmp_path / "out")
+        assert result.success
+        assert result.output_dir is not None
+
+        manifest = OutputManifest.read(result.output_dir / MANIFEST_NAME)
+        assert set(manifest.entries) == {
+            f"effects/{name}.png" for name in sample_effects_config.effects
+        }
+        assert manifest.input_hash == file_sha256(test_image_file)
+        blur = manifest.entries["effects/blur.png"]
+        assert blur.params == [{"effect": "blur", "params": {"blur": "0x8"}}]
+        assert blur.sha256 == file_sha256(result.output_dir / "effects" / "blur.png")
+
+    def test_command_hash_follows_params(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test items with different parameters get different command hashes."""
+        generator = BatchGenerator(sample_effects_config, parallel=False)
+        result = generator.generate_all_presets(test_image_file, tmp_path / "out")
+        assert result.output_dir is not None
+
+        manifest = OutputManifest.read(result.output_dir / MANIFEST_NAME)
+        hashes = {entry.command_hash for entry in manifest.entries.values()}
+        assert len(hashes) == len(manifest.entries)
+
+    def test_variant_sizes_recorded(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test size variants get one entry each with their dimensions."""
+        generator = BatchGenerator(
+            sample_effects_config,
+            parallel=False,
+            geometries=[OutputGeometry(1920, 1080), OutputGeometry(640, 480)],
+        )
+        result = generator.generate_all_effects(test_image_file, tmp_path / "out")
+        assert result.output_dir is not None
+
+        manifest = OutputManifest.read(result.output_dir / MANIFEST_NAME)
+        # The mock magick only writes the last file of each variant set
+        entry = manifest.entries["effects/blur@640x480.png"]
+        assert (entry.width, entry.height) == (640, 480)
+
+    def test_manifest_disabled(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test no manifest is written when disabled."""
+        generator = BatchGenerator(sample_effects_config, manifest=False)
+        result = generator.generate_all_effects(test_image_file, tmp_path / "out")
+        assert result.output_dir is not None
+        assert not (result.output_dir / MANIFEST_NAME).exists()
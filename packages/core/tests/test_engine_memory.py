@@ -0,0 +1,137 @@
+"""Tests for engine memory module."""
+
+import io
+import subprocess
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import EncodingSettings, ItemType
+from wallpaper_core.effects.schema import ChainStep, Effect, EffectsConfig
+from wallpaper_core.engine.executor import CommandExecutor
+from wallpaper_core.engine.memory import MemoryExecutor, is_streamable
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+
+@pytest.fixture(autouse=True)
+def fake_magick(tmp_path: Path) -> Iterator[Path]:
+    """Magick stand-in that echoes its input followed by its arguments."""
+    script = tmp_path / "bin" / "magick"
+    script.parent.mkdir()
+    script.write_text('#!/bin/sh\ncat "$1"\nshift\nprintf "[%s]" "$*"\n')
+    script.chmod(0o755)
+    with (
+        patch("subprocess.Popen", _REAL_POPEN),
+        patch("shutil.which", return_value=str(script)),
+    ):
+        yield script
+
+
+class TestExecuteBytes:
+    """Tests for CommandExecutor.execute_bytes."""
+
+    def test_pipes_stdin_to_stdout(self) -> None:
+        """Test $INPUT/$OUTPUT become stdin and format-prefixed stdout."""
+        result = CommandExecutor().execute_bytes(
+            'magick "$INPUT" -blur "$BLUR" "$OUTPUT"', b"IMG", "png", {"blur": "0x2"}
+        )
+
+        assert result.success is True
+        assert result.data == b"IMG[-blur 0x2 png:-]"
+
+    def test_failure_has_no_data(self) -> None:
+        """Test a failed command returns stderr and no data."""
+        result = CommandExecutor().execute_bytes("echo bad >&2; exit 1", b"IMG", "png")
+
+        assert result.success is False
+        assert result.data == b""
+        assert result.stderr.strip() == "bad"
+
+
+class TestMemoryExecutor:
+    """Tests for MemoryExecutor class."""
+
+    def test_apply_effect(self, sample_effects_config: EffectsConfig) -> None:
+        """Test an effect is applied to bytes with default params."""
+        result = MemoryExecutor(sample_effects_config).apply(b"IMG", "blur")
+
+        assert result.success is True
+        assert result.data == b"IMG[-blur 0x8 png:-]"
+
+    def test_apply_effect_params(self, sample_effects_config: EffectsConfig) -> None:
+        """Test parameter overrides reach the command."""
+        result = MemoryExecutor(sample_effects_config).apply(
+            b"IMG", "blur", params={"blur": "0x3"}
+        )
+
+        assert result.data == b"IMG[-blur 0x3 png:-]"
+
+    def test_apply_composite_uses_miff_intermediates(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test intermediates are passed as in-memory MIFF blobs."""
+        result = MemoryExecutor(sample_effects_config).apply(
+            io.BytesIO(b"IMG"), "blur-brightness", ItemType.COMPOSITE, "jpg"
+        )
+
+        assert result.success is True
+        assert result.data == (
+            b"IMG[-blur 0x8 miff:-][-brightness-contrast -20% jpg:-]"
+        )
+
+    def test_encoding_profile(self, sample_effects_config: EffectsConfig) -> None:
+        """Test the encoding profile selects format and encoder options."""
+        executor = MemoryExecutor(
+            sample_effects_config,
+            encoding=EncodingSettings(format="webp", quality=80),
+        )
+
+        result = executor.apply_chain(b"IMG", [ChainStep(effect="blackwhite")])
+
+        assert result.data == b"IMG[-grayscale Average -quality 80 webp:-]"
+
+    def test_step_failure(self, sample_effects_config: EffectsConfig) -> None:
+        """Test a failing step reports the step and returns no data."""
+        sample_effects_config.effects["blur"].command = (
+            'magick "$INPUT" "$OUTPUT"; exit 2'
+        )
+
+        result = MemoryExecutor(sample_effects_config).apply(
+            b"IMG", "blur-brightness", ItemType.COMPOSITE
+        )
+
+        assert result.success is False
+        assert "Chain failed at step 1 (blur)" in result.stderr
+        assert result.data == b""
+
+    def test_unknown_item(self, sample_effects_config: EffectsConfig) -> None:
+        """Test unknown items fail without running anything."""
+        result = MemoryExecutor(sample_effects_config).apply(
+            b"IMG", "missing", ItemType.PRESET
+        )
+
+        assert result.success is False
+        assert result.stderr == "Unknown preset: missing"
+
+    def test_not_streamable(self) -> None:
+        """Test commands reading $INPUT twice are rejected."""
+        config = EffectsConfig(
+            version="1.0",
+            effects={
+                "mask": Effect(
+                    description="Self-mask",
+                    command='magick "$INPUT" "$INPUT" -compose Multiply '
+                    '-composite "$OUTPUT"',
+                )
+            },
+        )
+
+        result = MemoryExecutor(config).apply(b"IMG", "mask")
+
+        assert result.success is False
+        assert "cannot run in memory" in result.stderr
+        assert is_streamable('magick "$INPUT" -negate "$OUTPUT"') is True
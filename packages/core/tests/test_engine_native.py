@@ -0,0 +1,273 @@
+"""Tests for engine native module (the NumPy backend)."""
+
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from wallpaper_core.effects import get_package_effects_file
+from wallpaper_core.effects.schema import ChainStep, Effect, EffectsConfig
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import BytesResult
+from wallpaper_core.engine.memory import MemoryExecutor
+
+np = pytest.importorskip("numpy")
+
+from wallpaper_core.engine import native  # noqa: E402
+
+# Captured at import time, before the autouse fixture mocks Popen and which
+_REAL_POPEN = subprocess.Popen
+_REAL_MAGICK = shutil.which("magick")
+
+_WALLPAPER = Path(__file__).parents[3] / "tests" / "fixtures" / "test-wallpaper.jpg"
+
+
+@pytest.fixture
+def package_config() -> EffectsConfig:
+    """The packaged effects.yaml."""
+    return EffectsConfig(**yaml.safe_load(get_package_effects_file().read_text()))
+
+
+def _pixels(height: int = 24, width: int = 32) -> "np.ndarray":
+    return np.random.default_rng(0).random((height, width, 3), dtype=np.float32)
+
+
+def _bytes_result(data: bytes) -> BytesResult:
+    return BytesResult(
+        success=True, command="magick", stdout="", stderr="", return_code=0, data=data
+    )
+
+
+class TestNativeOps:
+    """Tests for recognising steps with a NumPy implementation."""
+
+    def test_every_builtin_effect(self, package_config: EffectsConfig) -> None:
+        """Test all nine packaged effects run natively with default params."""
+        for name in package_config.effects:
+            op = native.step_op(package_config, ChainStep(effect=name))
+            assert op is not None, name
+            assert op(_pixels()).shape == (24, 32, 3)
+
+    def test_unknown_operators(self) -> None:
+        """Test operators without an implementation fall back."""
+        assert native.native_op("-resize 50%") is None
+        assert native.native_op("-blur 0x8 -negate") is None
+        assert native.native_op('-brightness-contrast "10"x"5"%') is not None
+
+    def test_chain_needs_every_step(self, package_config: EffectsConfig) -> None:
+        """Test a chain with one unsupported step has no native version."""
+        package_config.effects["swirl"] = Effect(
+            description="Swirl", command='magick "$INPUT" -swirl 90 "$OUTPUT"'
+        )
+        chain = [ChainStep(effect="blur"), ChainStep(effect="brightness")]
+        ops = native.chain_ops(package_config, chain)
+        assert ops is not None and len(ops) == 2
+        chain.append(ChainStep(effect="swirl"))
+        assert native.chain_ops(package_config, chain) is None
+
+
+class TestPam:
+    """Tests for the PAM codec."""
+
+    @pytest.mark.parametrize("maxval", [255, 65535])
+    def test_round_trip(self, maxval: int) -> None:
+        """Test RGBA pixels survive encoding at 8 and 16 bits."""
+        pixels = np.concatenate([_pixels(), np.full((24, 32, 1), 0.5, np.float32)], 2)
+        decoded, depth = native.decode_pam(native.encode_pam(pixels, maxval))
+        assert depth == maxval
+        assert np.abs(decoded - pixels).max() <= 0.5 / maxval + 1e-6
+
+    def test_grayscale_expands_to_rgb(self) -> None:
+        """Test one-channel images decode as three equal channels."""
+        data = (
+            b"P7\nWIDTH 2\nHEIGHT 1\nDEPTH 1\nMAXVAL 255\n"
+            b"TUPLTYPE GRAYSCALE\nENDHDR\n\x00\xff"
+        )
+        pixels, _ = native.decode_pam(data)
+        assert pixels.tolist() == [[[0, 0, 0], [1, 1, 1]]]
+
+    @pytest.mark.parametrize("data", [b"PNG", b"P7\nWIDTH 2\nENDHDR\n"])
+    def test_invalid(self, data: bytes) -> None:
+        """Test data that is not a usable PAM image is rejected."""
+        with pytest.raises(ValueError):
+            native.decode_pam(data)
+
+
+class TestOperations:
+    """Tests for the NumPy operations."""
+
+    def test_blur_keeps_flat_images(self) -> None:
+        """Test the kernel is normalized and edges repeat the border."""
+        flat = np.full((20, 30, 3), 0.25, np.float32)
+        assert np.allclose(native.gaussian_blur(flat, 8), 0.25, atol=1e-6)
+
+    def test_fft_matches_direct(self) -> None:
+        """Test the FFT path computes the same convolution."""
+        kernel = native.gaussian_kernel(3.0)
+        direct = native._convolve_axis(_pixels(), kernel, 1)
+        with patch.object(native, "_DIRECT_TAPS", 1):
+            fft = native._convolve_axis(_pixels(), kernel, 1)
+        assert np.abs(direct - fft).max() < 1e-5
+
+    def test_identities(self) -> None:
+        """Test neutral parameters leave the image unchanged."""
+        pixels = _pixels()
+        assert np.allclose(native.brightness_contrast(pixels, 0, 0), pixels)
+        assert np.allclose(native.modulate(pixels, 100, 100, 100), pixels, atol=1e-6)
+        assert np.allclose(native.colorize(pixels, "#ff0000", 0), pixels)
+
+    def test_desaturate_is_gray(self) -> None:
+        """Test saturation 0 leaves equal channels."""
+        gray = native.modulate(_pixels(), 100, 0, 100)
+        assert np.allclose(gray[..., 0], gray[..., 1], atol=1e-6)
+
+    def test_vignette_mask_is_cached(self) -> None:
+        """Test masks are computed once per size and sigma."""
+        mask = native.vignette_mask(32, 24, 5.0)
+        assert native.vignette_mask(32, 24, 5.0) is mask
+        assert mask[12, 16, 0] > 0.9 > mask[0, 0, 0]
+
+
+class TestNativeChains:
+    """Tests for the NumPy backend in the chain and memory executors."""
+
+    def test_chain_decodes_and_encodes_once(
+        self, package_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a chain of built-ins runs as one decode and one encode."""
+        executor = ChainExecutor(package_config, backend="numpy")
+        chain = [ChainStep(effect="blur"), ChainStep(effect="brightness")]
+        pam = native.encode_pam(_pixels())
+        with (
+            patch.object(
+                executor.executor,
+                "execute_bytes",
+                side_effect=[_bytes_result(pam), _bytes_result(b"ENCODED")],
+            ) as execute_bytes,
+            patch.object(executor.executor, "run") as run,
+        ):
+            result = executor.execute_chain(
+                chain, test_image_file, tmp_path / "out.png"
+            )
+
+        assert result.success
+        assert execute_bytes.call_count == 2
+        run.assert_not_called()
+        assert (tmp_path / "out.png").read_bytes() == b"ENCODED"
+
+    def test_unsupported_chain_uses_magick(
+        self, package_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test chains with a step without NumPy version run with magick."""
+        package_config.effects["swirl"] = Effect(
+            description="Swirl", command='magick "$INPUT" -swirl 90 "$OUTPUT"'
+        )
+        executor = ChainExecutor(package_config, backend="numpy")
+        with patch.object(executor.executor, "execute_bytes") as execute_bytes:
+            result = executor.execute_chain(
+                [ChainStep(effect="blur"), ChainStep(effect="swirl")],
+                test_image_file,
+                tmp_path / "out.png",
+            )
+        assert result.success
+        execute_bytes.assert_not_called()
+
+    def test_decode_failure(
+        self, package_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test undecodable magick output fails the chain."""
+        executor = ChainExecutor(package_config, backend="numpy")
+        with patch.object(
+            executor.executor, "execute_bytes", return_value=_bytes_result(b"junk")
+        ):
+            result = executor.execute_chain(
+                [ChainStep(effect="negate")], test_image_file, tmp_path / "out.png"
+            )
+        assert not result.success
+        assert "NumPy backend failed: Cannot decode image" in result.stderr
+
+    def test_memory_executor(self, package_config: EffectsConfig) -> None:
+        """Test in-memory chains use the NumPy backend too."""
+        executor = MemoryExecutor(package_config, backend="numpy")
+        pam = native.encode_pam(_pixels())
+        with patch.object(
+            executor.executor,
+            "execute_bytes",
+            side_effect=[_bytes_result(pam), _bytes_result(b"OUT")],
+        ):
+            result = executor.apply_chain(b"IMG", [ChainStep(effect="sepia")])
+        assert result.success
+        assert result.data == b"OUT"
+
+
+@pytest.mark.skipif(
+    _REAL_MAGICK is None or not _WALLPAPER.exists(),
+    reason="parity checks need ImageMagick and the fixture wallpaper",
+)
+class TestParity:
+    """Check the NumPy backend against ImageMagick on a real image."""
+
+    @pytest.fixture
+    def source(self, tmp_path: Path) -> Path:
+        """Downscaled copy of the fixture wallpaper."""
+        source = tmp_path / "source.png"
+        subprocess.run(
+            [str(_REAL_MAGICK), str(_WALLPAPER), "-resize", "240x", str(source)],
+            check=True,
+        )
+        return source
+
+    def _decode(self, executor: ChainExecutor, path: Path) -> "np.ndarray":
+        result = executor.executor.execute_bytes(
+            native.DECODE_COMMAND, path.read_bytes(), "pam"
+        )
+        assert result.success, result.stderr
+        return native.decode_pam(result.data)[0]
+
+    @pytest.mark.parametrize(
+        "chain",
+        [
+            [ChainStep(effect=name)]
+            for name in [
+                "blur",
+                "blackwhite",
+                "negate",
+                "brightness",
+                "contrast",
+                "saturation",
+                "sepia",
+                "vignette",
+                "color_overlay",
+            ]
+        ]
+        + [
+            [ChainStep(effect="blur"), ChainStep(effect="brightness")],
+            [ChainStep(effect="negate"), ChainStep(effect="saturation")],
+        ],
+        ids=lambda chain: "+".join(step.effect for step in chain),
+    )
+    def test_matches_imagemagick(
+        self,
+        package_config: EffectsConfig,
+        source: Path,
+        tmp_path: Path,
+        chain: list[ChainStep],
+    ) -> None:
+        """Test each backend's output is within PARITY_TOLERANCE."""
+        with patch("subprocess.Popen", _REAL_POPEN):
+            outputs = {}
+            for backend in ("magick", "numpy"):
+                executor = ChainExecutor(
+                    package_config, backend=backend, fuse_pointwise=False
+                )
+                executor.executor.binary = str(_REAL_MAGICK)
+                output = tmp_path / f"{backend}.png"
+                result = executor.execute_chain(chain, source, output)
+                assert result.success, result.stderr
+                outputs[backend] = self._decode(executor, output)
+
+        mean, _ = native.pixel_difference(outputs["magick"], outputs["numpy"])
+        assert mean <= native.PARITY_TOLERANCE
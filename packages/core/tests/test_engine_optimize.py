@@ -0,0 +1,166 @@
+"""Tests for engine optimize module."""
+
+from pathlib import Path
+
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.optimize import ChainOptimizer, describe_step
+
+
+def _names(steps: list[ChainStep]) -> list[str]:
+    return [describe_step(step) for step in steps]
+
+
+class TestChainOptimizer:
+    """Tests for ChainOptimizer."""
+
+    def test_drops_identity_steps(self, traits_effects_config: EffectsConfig) -> None:
+        """Test steps whose parameters make them no-ops are removed."""
+        result = ChainOptimizer(traits_effects_config).optimize(
+            [
+                ChainStep(effect="blur", params={"blur": "0x0"}),
+                ChainStep(effect="brightness", params={"brightness": "0"}),
+                ChainStep(effect="negate"),
+            ]
+        )
+        assert _names(result.steps) == ["negate"]
+        assert len(result.rewrites) == 2
+
+    def test_all_identities_keep_one_step(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test a chain of no-ops still has a step to write the output."""
+        result = ChainOptimizer(traits_effects_config).optimize(
+            [ChainStep(effect="brightness", params={"brightness": 0})]
+        )
+        assert _names(result.steps) == ["brightness(brightness=0)"]
+
+    def test_cancelled_chain_passes_through(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test a chain that cancels out becomes a no-op, not its first step."""
+        result = ChainOptimizer(traits_effects_config).optimize(
+            [ChainStep(effect="negate"), ChainStep(effect="negate")]
+        )
+        assert _names(result.steps) == ["brightness(brightness=0)"]
+        assert result.rewrites == [
+            "dropped negate applied twice",
+            "passed the image through with brightness(brightness=0)",
+        ]
+
+    def test_cancelled_chain_without_identities(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test a chain that cancels out runs as written if nothing is a no-op."""
+        for effect in traits_effects_config.effects.values():
+            if effect.traits is not None:
+                effect.traits.identity = {}
+        chain = [ChainStep(effect="negate"), ChainStep(effect="negate")]
+        result = ChainOptimizer(traits_effects_config).optimize(chain)
+        assert _names(result.steps) == ["negate", "negate"]
+        assert not result.changed
+
+    def test_idempotent_and_involution(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test repeats collapse and self-inverse pairs cancel."""
+        result = ChainOptimizer(traits_effects_config).optimize(
+            [
+                ChainStep(effect="blackwhite"),
+                ChainStep(effect="blackwhite"),
+                ChainStep(effect="negate"),
+                ChainStep(effect="negate"),
+            ]
+        )
+        assert _names(result.steps) == ["blackwhite"]
+
+    def test_reduction_moves_before_spatial(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test a grayscale after a blur runs first and lowers the cost."""
+        result = ChainOptimizer(traits_effects_config).optimize(
+            [ChainStep(effect="blur"), ChainStep(effect="blackwhite")]
+        )
+        assert _names(result.steps) == ["blackwhite", "blur(blur=0x8)"]
+        assert result.rewrites == ["moved blackwhite before blur"]
+        assert result.cost_after < result.cost_before
+        assert 0 < result.savings < 1
+
+    def test_effects_without_traits_are_barriers(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test nothing is moved or merged across an effect without traits."""
+        chain = [
+            ChainStep(effect="negate"),
+            ChainStep(effect="vignette"),
+            ChainStep(effect="negate"),
+        ]
+        result = ChainOptimizer(traits_effects_config, "approximate").optimize(chain)
+        assert not result.changed
+        assert _names(result.steps) == ["negate", "vignette", "negate"]
+
+    def test_merge_only_when_approximate(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test consecutive additive steps merge in approximate mode only."""
+        chain = [
+            ChainStep(effect="brightness", params={"brightness": -20}),
+            ChainStep(effect="brightness", params={"brightness": -30}),
+        ]
+        assert not ChainOptimizer(traits_effects_config, "safe").optimize(chain).changed
+        result = ChainOptimizer(traits_effects_config, "approximate").optimize(chain)
+        assert _names(result.steps) == ["brightness(brightness=-50)"]
+
+    def test_merge_out_of_range_is_skipped(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test merges whose result fails validation are not applied."""
+        chain = [
+            ChainStep(effect="brightness", params={"brightness": -60}),
+            ChainStep(effect="brightness", params={"brightness": -60}),
+        ]
+        result = ChainOptimizer(traits_effects_config, "approximate").optimize(chain)
+        assert len(result.steps) == 2
+
+    def test_off_leaves_chain_alone(self, traits_effects_config: EffectsConfig) -> None:
+        """Test mode "off" only fills in defaults."""
+        chain = [ChainStep(effect="blur"), ChainStep(effect="blackwhite")]
+        result = ChainOptimizer(traits_effects_config, "off").optimize(chain)
+        assert not result.changed
+        assert _names(result.steps) == ["blur(blur=0x8)", "blackwhite"]
+        assert result.cost_after == result.cost_before
+
+
+class TestChainExecutorOptimize:
+    """Tests for the optimizer in ChainExecutor."""
+
+    def test_plan_uses_optimized_chain(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test planned commands follow the rewritten chain."""
+        chain = [
+            ChainStep(effect="negate"),
+            ChainStep(effect="negate"),
+            ChainStep(effect="blur"),
+            ChainStep(effect="blackwhite"),
+        ]
+        executor = ChainExecutor(traits_effects_config)
+        steps = executor.plan_chain(
+            chain, tmp_path / "in.png", tmp_path / "out.png", tmp_path
+        )
+
+        assert [step.effect for step in steps] == ["blackwhite", "blur"]
+        assert steps[-1].output_path == tmp_path / "out.png"
+
+    def test_plan_unoptimized(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test optimize="off" runs every step as written."""
+        chain = [ChainStep(effect="negate"), ChainStep(effect="negate")]
+        executor = ChainExecutor(
+            traits_effects_config, optimize="off", fuse_pointwise=False
+        )
+        steps = executor.plan_chain(
+            chain, tmp_path / "in.png", tmp_path / "out.png", tmp_path
+        )
+        assert [step.effect for step in steps] == ["negate", "negate"]
@@ -0,0 +1,139 @@
+"""Tests for engine params module."""
+
+import pytest
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import (
+    ChainStep,
+    CompositeEffect,
+    EffectsConfig,
+    ParameterType,
+    Preset,
+)
+from wallpaper_core.engine.params import (
+    CompiledType,
+    ParameterValidator,
+    parameter_type,
+)
+
+
+class TestCompiledType:
+    """Tests for CompiledType."""
+
+    def test_integer_in_range(self) -> None:
+        """Test integers are converted and range-checked."""
+        percent = CompiledType.compile(
+            ParameterType(type="integer", min=-100, max=100, default=0)
+        )
+        assert percent.coerce("-40") == -40
+        with pytest.raises(ValueError, match="maximum"):
+            percent.coerce("150")
+        with pytest.raises(ValueError, match="not an integer"):
+            percent.coerce("1.5")
+
+    def test_float(self) -> None:
+        """Test floats are converted and range-checked."""
+        opacity = CompiledType.compile(
+            ParameterType(type="float", min=0.0, max=1.0, default=0.5)
+        )
+        assert opacity.coerce("0.25") == 0.25
+        with pytest.raises(ValueError, match="minimum"):
+            opacity.coerce(-0.1)
+
+    def test_pattern(self) -> None:
+        """Test string values must match the type's pattern."""
+        geometry = CompiledType.compile(
+            ParameterType(type="string", pattern=r"^\d+x\d+$", default="0x8")
+        )
+        assert geometry.coerce("0x4") == "0x4"
+        with pytest.raises(ValueError, match="does not match"):
+            geometry.coerce("4")
+
+    def test_invalid_pattern(self) -> None:
+        """Test a broken regex in a parameter type is reported."""
+        with pytest.raises(ValueError, match="invalid pattern"):
+            CompiledType.compile(ParameterType(type="string", pattern="(", default=""))
+
+
+class TestParameterType:
+    """Tests for parameter_type function."""
+
+    def test_lookup(self, sample_effects_config: EffectsConfig) -> None:
+        """Test a parameter's type is resolved through parameter_types."""
+        param_type = parameter_type(sample_effects_config, "brightness", "brightness")
+        assert param_type is not None
+        assert param_type.type == "integer"
+
+    def test_unknown_parameter(self, sample_effects_config: EffectsConfig) -> None:
+        """Test unknown effects and parameters are rejected."""
+        with pytest.raises(ValueError, match="Unknown effect"):
+            parameter_type(sample_effects_config, "missing", "blur")
+        with pytest.raises(ValueError, match="known: blur"):
+            parameter_type(sample_effects_config, "blur", "sigma")
+
+
+class TestParameterValidator:
+    """Tests for ParameterValidator."""
+
+    def test_types_compiled_once(self, sample_effects_config: EffectsConfig) -> None:
+        """Test each parameter type is compiled on first use only."""
+        validator = ParameterValidator(sample_effects_config)
+        assert validator.check_params("blur", {"blur": "0x2"}) == []
+        first = validator.compiled_type("blur_geometry")
+        validator.check_params("blur", {"blur": "0x4"})
+        assert validator.compiled_type("blur_geometry") is first
+
+    def test_chain_reports_every_error(
+        self, sample_effects_config: EffectsConfig
+    ) -> None:
+        """Test all bad steps of a chain are reported, not just the first."""
+        validator = ParameterValidator(sample_effects_config)
+        errors = validator.check_chain(
+            [
+                ChainStep(effect="blur", params={"blur": "huge"}),
+                ChainStep(effect="missing"),
+                ChainStep(effect="brightness", params={"brightness": 300}),
+            ]
+        )
+        assert len(errors) == 3
+        assert errors[0].startswith("step 1 (blur): blur:")
+        assert "Unknown effect in chain: missing (step 2)" in errors[1]
+        assert "above the maximum 100" in errors[2]
+
+    def test_defaults_are_checked(self, sample_effects_config: EffectsConfig) -> None:
+        """Test a bad default fails even when no parameters are given."""
+        sample_effects_config.effects["blur"].parameters["blur"].default = "8"
+        validator = ParameterValidator(sample_effects_config)
+        assert validator.check_item("blur", ItemType.EFFECT)
+
+    def test_primitive_types(self, sample_effects_config: EffectsConfig) -> None:
+        """Test parameters typed 'integer' directly are still checked."""
+        sample_effects_config.effects["brightness"].parameters[
+            "brightness"
+        ].type = "integer"
+        validator = ParameterValidator(sample_effects_config)
+        errors = validator.check_params("brightness", {"brightness": "dim"})
+        assert errors == ["brightness: 'dim' is not an integer"]
+
+    def test_check_items(self, sample_effects_config: EffectsConfig) -> None:
+        """Test items referencing missing or invalid definitions are found."""
+        sample_effects_config.composites["broken"] = CompositeEffect(
+            description="Broken", chain=[ChainStep(effect="missing")]
+        )
+        sample_effects_config.presets["too-bright"] = Preset(
+            description="Too bright",
+            effect="brightness",
+            params={"brightness": 500},
+        )
+        validator = ParameterValidator(sample_effects_config)
+        items = [
+            ("blur", ItemType.EFFECT),
+            ("broken", ItemType.COMPOSITE),
+            ("too-bright", ItemType.PRESET),
+        ]
+
+        invalid = validator.check_items(items)
+        assert set(invalid) == {
+            ("broken", ItemType.COMPOSITE),
+            ("too-bright", ItemType.PRESET),
+        }
@@ -0,0 +1,264 @@
+"""Tests for engine plan module."""
+
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import ItemType, LimitSettings
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.plan import (
+    PLAN_VERSION,
+    ExecutionPlan,
+    PlanExecutor,
+    PlanJob,
+    build_plan,
+)
+from wallpaper_core.engine.variants import OutputGeometry
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+
+def _job(job_id: str, item: str, cost: float, depends_on: list[str]) -> PlanJob:
+    """Build a minimal plan job."""
+    return PlanJob(
+        id=job_id,
+        item=item,
+        item_type=ItemType.COMPOSITE,
+        effect="blur",
+        command="true",
+        outputs=[Path(f"/out/{job_id}.png")],
+        depends_on=depends_on,
+        cost=cost,
+    )
+
+
+class TestBuildPlan:
+    """Tests for build_plan function."""
+
+    def test_matches_batch_generator_outputs(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test planned outputs are exactly what BatchGenerator writes."""
+        plan = build_plan(
+            sample_effects_config, test_image_file, tmp_path / "plan", list(ItemType)
+        )
+        BatchGenerator(sample_effects_config, parallel=False).generate_all(
+            test_image_file, tmp_path / "batch"
+        )
+
+        final_outputs = {
+            jobs[-1].outputs[0].relative_to(tmp_path / "plan")
+            for jobs in plan.items().values()
+        }
+        written = {
+            path.relative_to(tmp_path / "batch")
+            for path in (tmp_path / "batch").rglob("*.png")
+        }
+        assert final_outputs == written
+
+    def test_chain_jobs_and_dependencies(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a composite becomes one job per step, linked in order."""
+        plan = build_plan(
+            sample_effects_config,
+            test_image_file,
+            tmp_path,
+            [ItemType.COMPOSITE],
+            limits=LimitSettings(timeout=30),
+            binary="magick",
+        )
+
+        first, second = plan.items()["blur-brightness"]
+        assert first.id == "composite/blur-brightness/0"
+        assert first.depends_on == []
+        assert second.depends_on == [first.id]
+        assert first.outputs == second.inputs
+        assert first.outputs[0].parent.name == ".blur-brightness.png.work"
+        assert second.cleanup == [first.outputs[0], first.outputs[0].parent]
+        assert second.command.startswith(f'magick "{first.outputs[0]}"')
+        assert second.limits.timeout == 30
+        assert first.cost == pytest.approx(test_image_file.stat().st_size / 1e6)
+
+    def test_size_variants(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test sizes add a prescale job before the chain and a resample after."""
+        plan = build_plan(
+            sample_effects_config,
+            test_image_file,
+            tmp_path,
+            [ItemType.EFFECT],
+            binary="magick",
+            geometries=[OutputGeometry(1920, 1080), OutputGeometry(1280, 720)],
+        )
+
+        prescale, render, variants = plan.items()["blur"]
+        assert prescale.id == "effect/blur/prescale"
+        assert '-resize "1920x1080"^' in prescale.command
+        assert render.inputs == prescale.outputs
+        assert render.depends_on == [prescale.id]
+        assert variants.inputs == render.outputs
+        assert variants.depends_on == [render.id]
+        effects_dir = tmp_path / "test_image" / "effects"
+        assert variants.outputs == [
+            effects_dir / "blur@1920x1080.png",
+            effects_dir / "blur@1280x720.png",
+        ]
+        assert render.cleanup == prescale.outputs
+        assert variants.cleanup == [*render.outputs, render.outputs[0].parent]
+
+    def test_unknown_reference(
+        self, sample_effects_config: EffectsConfig, test_image_file: Path
+    ) -> None:
+        """Test items referencing unknown effects cannot be planned."""
+        sample_effects_config.presets["dark_blur"].composite = "missing"
+
+        with pytest.raises(ValueError, match="preset 'dark_blur'"):
+            build_plan(
+                sample_effects_config, test_image_file, Path("/out"), [ItemType.PRESET]
+            )
+
+    def test_reports_every_invalid_item(
+        self, sample_effects_config: EffectsConfig, test_image_file: Path
+    ) -> None:
+        """Test a plan is refused with all invalid items listed."""
+        sample_effects_config.presets["subtle_blur"].params = {"blur": "big"}
+        sample_effects_config.presets["dark_blur"].composite = "missing"
+
+        with pytest.raises(ValueError) as excinfo:
+            build_plan(
+                sample_effects_config, test_image_file, Path("/out"), [ItemType.PRESET]
+            )
+        assert "preset 'subtle_blur'" in str(excinfo.value)
+        assert "preset 'dark_blur'" in str(excinfo.value)
+
+
+class TestExecutionPlan:
+    """Tests for ExecutionPlan class."""
+
+    def test_write_read_round_trip(self, tmp_path: Path) -> None:
+        """Test a plan survives JSON serialization."""
+        plan = ExecutionPlan(
+            input_path=Path("/in.png"),
+            output_dir=Path("/out"),
+            jobs=[_job("a/0", "a", 1.0, [])],
+        )
+        path = tmp_path / "plans" / "plan.json"
+
+        plan.write(path)
+
+        assert ExecutionPlan.read(path) == plan
+
+    def test_read_rejects_other_versions(self, tmp_path: Path) -> None:
+        """Test plans from another format version are rejected."""
+        path = tmp_path / "plan.json"
+        ExecutionPlan(
+            version=PLAN_VERSION + 1, input_path=Path("/in"), output_dir=Path("/o")
+        ).write(path)
+
+        with pytest.raises(ValueError, match="Unsupported plan version"):
+            ExecutionPlan.read(path)
+
+    def test_split_keeps_dependencies_together(self) -> None:
+        """Test splitting balances cost without separating linked jobs."""
+        plan = ExecutionPlan(
+            input_path=Path("/in.png"),
+            output_dir=Path("/out"),
+            jobs=[
+                _job("a/0", "a", 2.0, []),
+                _job("a/1", "a", 2.0, ["a/0"]),
+                _job("b/0", "b", 3.0, []),
+                _job("c/0", "c", 1.0, []),
+            ],
+        )
+
+        first, second = plan.split(2)
+
+        assert [j.id for j in first.jobs] == ["a/0", "a/1"]
+        assert [j.id for j in second.jobs] == ["b/0", "c/0"]
+        assert first.cost == second.cost == 4.0
+
+
+class TestPlanExecutor:
+    """Tests for PlanExecutor class."""
+
+    def test_execute_plan(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test every item is produced and intermediates are removed."""
+        plan = build_plan(
+            sample_effects_config, test_image_file, tmp_path, list(ItemType)
+        )
+
+        result = PlanExecutor(parallel=True).execute(plan)
+
+        assert result.success is True
+        assert result.succeeded == result.total == len(plan.items())
+        for jobs in plan.items().values():
+            assert jobs[-1].outputs[0].exists()
+        assert not list(tmp_path.rglob("*.work"))
+
+    def test_execute_plan_with_sizes(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test planned size variants are written and the master removed."""
+        plan = build_plan(
+            sample_effects_config,
+            test_image_file,
+            tmp_path,
+            [ItemType.COMPOSITE],
+            geometries=[OutputGeometry(64, 64), OutputGeometry(32, 32)],
+        )
+
+        result = PlanExecutor(parallel=False).execute(plan)
+
+        assert result.success is True
+        composites_dir = tmp_path / "test_image" / "composites"
+        assert (composites_dir / "blur-brightness@64x64.png").exists()
+        assert not list(tmp_path.rglob("*.work"))
+
+    def test_failed_job_skips_dependents(self, tmp_path: Path) -> None:
+        """Test jobs after a failed step are skipped and cleaned up."""
+        work = tmp_path / "work"
+        work.mkdir()
+        (work / "step_0.png").write_text("partial")
+        plan = ExecutionPlan(
+            input_path=tmp_path / "in.png",
+            output_dir=tmp_path,
+            jobs=[
+                _job("a/0", "a", 1.0, []).model_copy(update={"command": "exit 3"}),
+                _job("a/1", "a", 1.0, ["a/0"]).model_copy(
+                    update={"command": "exit 0", "cleanup": [work]}
+                ),
+                _job("b/0", "b", 1.0, []),
+            ],
+        )
+
+        with patch("subprocess.Popen", _REAL_POPEN):
+            result = PlanExecutor(parallel=False, strict=False).execute(plan)
+
+        assert result.failed == 1
+        assert result.succeeded == 1
+        assert "Job a/0 failed" in result.results["a"].stderr
+        assert result.results["b"].success is True
+        assert not work.exists()
@@ -0,0 +1,253 @@
+"""Tests for engine plugins module (Python effects)."""
+
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import (
+    ChainStep,
+    Effect,
+    EffectsConfig,
+    ParameterDefinition,
+)
+from wallpaper_core.engine import plugins
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import BytesResult, CommandExecutor
+from wallpaper_core.engine.plan import build_plan
+from wallpaper_core.engine.plugins import PluginError, load_function
+from wallpaper_core.engine.sweep import build_grid
+
+np = pytest.importorskip("numpy")
+
+from wallpaper_core.engine import native  # noqa: E402
+
+# What each call of scale saw
+_calls: list[dict[str, Any]] = []
+
+
+def scale(pixels: "np.ndarray", factor: float = 1.0, flip: int = 0) -> Any:
+    """Python effect used by these tests."""
+    _calls.append({"writeable": pixels.flags.writeable, "factor": factor, "flip": flip})
+    result = pixels * factor
+    return result[::-1] if flip else result
+
+
+def bad_shape(pixels: "np.ndarray") -> Any:
+    """Python effect that drops the channel axis."""
+    return pixels[..., 0]
+
+
+def fails(pixels: "np.ndarray") -> Any:  # noqa: ARG001
+    """Python effect that raises."""
+    raise RuntimeError("nope")
+
+
+NOT_CALLABLE = 3
+
+
+@pytest.fixture
+def python_config(traits_effects_config: EffectsConfig) -> EffectsConfig:
+    """The traits config with a "scale" Python effect."""
+    traits_effects_config.effects["scale"] = Effect(
+        description="Scale",
+        python="test_engine_plugins:scale",
+        parameters={
+            "factor": ParameterDefinition(type="float", default=0.5),
+            "flip": ParameterDefinition(type="integer", default=0),
+        },
+    )
+    _calls.clear()
+    return traits_effects_config
+
+
+def _pixels() -> "np.ndarray":
+    return np.random.default_rng(0).random((6, 8, 3), dtype=np.float32)
+
+
+def _fake_magick(
+    _self: CommandExecutor, command: str, data: bytes, *_args: Any, **_kwargs: Any
+) -> BytesResult:
+    """Decode to fixed pixels; negate PAM for -negate; pass the rest through."""
+    if "-colorspace" in command:
+        output = native.encode_pam(_pixels())
+    elif "-negate" in command:
+        pixels, maxval = native.decode_pam(data)
+        output = native.encode_pam(1 - pixels, maxval)
+    else:
+        output = data
+    return BytesResult(
+        success=True, command=command, stdout="", stderr="", return_code=0, data=output
+    )
+
+
+class TestLoadFunction:
+    """Tests for importing Python effect functions."""
+
+    def test_module_function(self) -> None:
+        """Test "module:function" imports the function."""
+        assert load_function("test_engine_plugins:scale") is scale
+        assert load_function("os.path:join.__call__") is not None
+
+    def test_entry_point(self) -> None:
+        """Test a bare name loads an entry point of the group."""
+        entry = EntryPoint(
+            name="halftone",
+            value="test_engine_plugins:bad_shape",
+            group=plugins.ENTRY_POINT_GROUP,
+        )
+        with patch.object(plugins, "entry_points", return_value=[entry]) as found:
+            assert plugins.load_function.__wrapped__("halftone") is bad_shape
+        found.assert_called_once_with(group=plugins.ENTRY_POINT_GROUP, name="halftone")
+
+    @pytest.mark.parametrize(
+        ("spec", "error"),
+        [
+            ("no_such_module_xyz:f", "cannot load no_such_module_xyz:f"),
+            ("test_engine_plugins:missing", "cannot load"),
+            ("test_engine_plugins:NOT_CALLABLE", "is not callable"),
+            ("no-such-plugin", "no entry point 'no-such-plugin'"),
+        ],
+    )
+    def test_errors(self, spec: str, error: str) -> None:
+        """Test failures to load are PluginErrors."""
+        with pytest.raises(PluginError, match=error):
+            plugins.load_function.__wrapped__(spec)
+
+
+class TestSchema:
+    """Tests for python: in effect definitions."""
+
+    def test_python_drops_command(self) -> None:
+        """Test a Python function replaces a command (e.g. from a layer)."""
+        effect = Effect(
+            description="x", command='magick "$INPUT" "$OUTPUT"', python="pkg:f"
+        )
+        assert effect.command == ""
+
+    @pytest.mark.parametrize(
+        "fields", [{}, {"command": " "}, {"python": "pkg:f:g"}, {"python": "a b"}]
+    )
+    def test_invalid(self, fields: dict[str, str]) -> None:
+        """Test an effect needs a command or a well-formed function spec."""
+        with pytest.raises(ValidationError):
+            Effect(description="x", **fields)
+
+    def test_command_only_error(self, python_config: EffectsConfig) -> None:
+        """Test command-only runners name the Python effects they cannot run."""
+        chain = [ChainStep(effect="scale"), ChainStep(effect="negate")]
+        assert plugins.python_effects(python_config, chain) == ["scale"]
+        error = plugins.command_only_error(python_config, chain)
+        assert error is not None and "'scale'" in error
+        assert plugins.command_only_error(python_config, chain[1:]) is None
+
+
+class TestPythonOp:
+    """Tests for Python effects as NumPy operations."""
+
+    def test_typed_params_and_read_only_input(
+        self, python_config: EffectsConfig
+    ) -> None:
+        """Test params arrive converted to their types and pixels are read-only."""
+        op = native.step_op(
+            python_config,
+            ChainStep(effect="scale", params={"factor": "2", "flip": "1"}),
+        )
+        assert op is not None
+        pixels = _pixels()
+        result = op(pixels)
+        assert _calls == [{"writeable": False, "factor": 2.0, "flip": 1}]
+        assert np.allclose(result, np.clip(pixels[::-1] * 2, 0, 1))
+        assert pixels.flags.writeable
+
+    @pytest.mark.parametrize(
+        ("spec", "error"),
+        [
+            ("test_engine_plugins:bad_shape", r"returned shape \(6, 8\)"),
+            ("test_engine_plugins:fails", "raised RuntimeError: nope"),
+            ("numpy:sum", "returned float32, not an array"),
+        ],
+    )
+    def test_bad_functions(
+        self, python_config: EffectsConfig, spec: str, error: str
+    ) -> None:
+        """Test misbehaving functions fail the step with a BackendError."""
+        python_config.effects["bad"] = Effect(description="Bad", python=spec)
+        op = native.step_op(python_config, ChainStep(effect="bad"))
+        assert op is not None
+        with pytest.raises(native.BackendError, match=error):
+            op(_pixels())
+
+    def test_invalid_param(self, python_config: EffectsConfig) -> None:
+        """Test a value that does not fit its type fails before the call."""
+        op = native.step_op(
+            python_config, ChainStep(effect="scale", params={"factor": "big"})
+        )
+        assert op is not None
+        with pytest.raises(native.BackendError):
+            op(_pixels())
+        assert _calls == []
+
+
+class TestPythonChains:
+    """Tests for running chains that contain Python effects."""
+
+    def test_runs_in_numpy_whatever_the_backend(
+        self, python_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test magick steps of the chain run on PAM around the Python step."""
+        executor = ChainExecutor(python_config)
+        chain = [
+            ChainStep(effect="negate"),
+            ChainStep(effect="scale"),
+            ChainStep(effect="blur"),
+        ]
+        assert isinstance(executor.backend_for(chain), native.NativeBackend)
+        output = tmp_path / "out.pam"
+        with patch.object(CommandExecutor, "execute_bytes", _fake_magick):
+            result = executor.execute_chain(chain, test_image_file, output)
+
+        assert result.success, result.stderr
+        pixels, _ = native.decode_pam(output.read_bytes())
+        expected = native.gaussian_blur((1 - _pixels()) * 0.5, 8)
+        assert np.abs(pixels - expected).max() <= 1 / 255
+
+    def test_command_steps_must_stream(
+        self, python_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test a command that reads its input twice cannot join the chain."""
+        python_config.effects["twice"] = Effect(
+            description="Twice",
+            command='magick "$INPUT" "$INPUT" -append "$OUTPUT"',
+        )
+        executor = ChainExecutor(python_config)
+        chain = [ChainStep(effect="scale"), ChainStep(effect="twice")]
+        with patch.object(CommandExecutor, "execute_bytes", _fake_magick):
+            result = executor.execute_chain(chain, test_image_file, tmp_path / "o.png")
+        assert not result.success
+        assert "$INPUT and $OUTPUT exactly once" in result.stderr
+
+    def test_without_numpy(
+        self, python_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test chains with Python effects fail up front without NumPy."""
+        executor = ChainExecutor(python_config)
+        with patch("wallpaper_core.engine.chain.load_backend", return_value=None):
+            result = executor.execute_chain(
+                [ChainStep(effect="scale")], test_image_file, tmp_path / "o.png"
+            )
+        assert not result.success
+        assert "Python effect 'scale' needs" in result.stderr
+
+    def test_command_only_runners_refuse(
+        self, python_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test plans and sweeps reject Python effects."""
+        with pytest.raises(ValueError, match="effect 'scale': Python effect"):
+            build_plan(python_config, test_image_file, tmp_path, [ItemType.EFFECT])
+        with pytest.raises(ValueError, match="cannot run as a command"):
+            build_grid(python_config, "scale", {"factor": "1,2"})
@@ -0,0 +1,176 @@
+"""Tests for engine probe module."""
+
+import struct
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.manifest import MANIFEST_NAME, OutputManifest
+from wallpaper_core.engine.probe import ImageInfo, ImageProber, read_header
+
+
+def _png(width: int, height: int) -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+        + struct.pack(">II", width, height)
+        + b"\x08\x02\x00\x00\x00"
+    )
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\x00" * 10
+    return b"\xff\xd8" + app0 + sof + b"\xff\xda"
+
+
+def _write(tmp_path: Path, name: str, data: bytes) -> Path:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+class TestReadHeader:
+    """Tests for read_header function."""
+
+    def test_png(self, tmp_path: Path) -> None:
+        """Test PNG dimensions come from IHDR."""
+        path = _write(tmp_path, "a.png", _png(3840, 2160))
+        assert read_header(path) == ImageInfo("PNG", 3840, 2160)
+
+    def test_jpeg_skips_segments_before_frame(self, tmp_path: Path) -> None:
+        """Test JPEG dimensions come from the first SOF after APP segments."""
+        path = _write(tmp_path, "a.jpg", _jpeg(1920, 1080))
+        assert read_header(path) == ImageInfo("JPEG", 1920, 1080)
+
+    def test_gif(self, tmp_path: Path) -> None:
+        """Test GIF dimensions come from the logical screen descriptor."""
+        path = _write(tmp_path, "a.gif", b"GIF89a" + struct.pack("<HH", 640, 480))
+        assert read_header(path) == ImageInfo("GIF", 640, 480)
+
+    @pytest.mark.parametrize(
+        "chunk",
+        [
+            b"VP8 "
+            + b"\x00" * 4
+            + b"\x00\x00\x00\x9d\x01\x2a"
+            + struct.pack("<HH", 800, 600),
+            b"VP8L"
+            + b"\x00" * 4
+            + b"\x2f"
+            + struct.pack("<I", (800 - 1) | ((600 - 1) << 14)),
+            b"VP8X"
+            + b"\x00" * 8
+            + (799).to_bytes(3, "little")
+            + (599).to_bytes(3, "little"),
+        ],
+    )
+    def test_webp(self, tmp_path: Path, chunk: bytes) -> None:
+        """Test lossy, lossless and extended WebP headers."""
+        path = _write(tmp_path, "a.webp", b"RIFF\x00\x00\x00\x00WEBP" + chunk)
+        assert read_header(path) == ImageInfo("WEBP", 800, 600)
+
+    def test_unknown_format(self, tmp_path: Path) -> None:
+        """Test formats without a reader return None."""
+        path = _write(tmp_path, "a.tiff", b"II*\x00" + b"\x00" * 40)
+        assert read_header(path) is None
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIDAT",
+            b"\xff\xd8\xff\xe0\x00\x10JFIF",
+            b"\xff\xd8\xff\xda",
+            _png(0, 100),
+        ],
+    )
+    def test_corrupt_headers(self, tmp_path: Path, data: bytes) -> None:
+        """Test known signatures with broken headers are rejected."""
+        path = _write(tmp_path, "bad.img", data)
+        with pytest.raises(ValueError):
+            read_header(path)
+
+
+class TestImageProber:
+    """Tests for ImageProber."""
+
+    def test_cache_follows_file_changes(self, tmp_path: Path) -> None:
+        """Test results are cached until the file's size or mtime changes."""
+        path = _write(tmp_path, "a.png", _png(100, 100))
+        prober = ImageProber()
+        with patch(
+            "wallpaper_core.engine.probe.read_header", wraps=read_header
+        ) as reader:
+            assert prober.probe(path).width == 100
+            assert prober.probe(path).width == 100
+            assert reader.call_count == 1
+
+            path.write_bytes(_png(200, 100) + b"\x00")
+            assert prober.probe(path).width == 200
+            assert reader.call_count == 2
+
+    def test_identify_fallback(self, tmp_path: Path) -> None:
+        """Test unknown formats are probed with identify -ping."""
+        path = _write(tmp_path, "a.tiff", b"II*\x00")
+        completed = subprocess.CompletedProcess([], 0, "TIFF 1024 768", "")
+        with patch(
+            "wallpaper_core.engine.probe.subprocess.run", return_value=completed
+        ) as run:
+            info = ImageProber("/usr/bin/magick").probe(path)
+
+        assert info == ImageInfo("TIFF", 1024, 768)
+        command = run.call_args.args[0]
+        assert command[:3] == ["/usr/bin/magick", "identify", "-ping"]
+        assert command[-1] == f"{path}[0]"
+
+    def test_identify_failure(self, tmp_path: Path) -> None:
+        """Test a file identify cannot read is rejected."""
+        path = _write(tmp_path, "a.txt", b"not an image")
+        completed = subprocess.CompletedProcess([], 1, "", "no decode delegate")
+        with (
+            patch("wallpaper_core.engine.probe.subprocess.run", return_value=completed),
+            pytest.raises(ValueError, match="no decode delegate"),
+        ):
+            ImageProber("/usr/bin/magick").probe(path)
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        """Test a missing file raises ValueError."""
+        with pytest.raises(ValueError, match="Cannot read"):
+            ImageProber().probe(tmp_path / "missing.png")
+
+
+class TestBatchProbe:
+    """Tests for input probing in BatchGenerator."""
+
+    def test_corrupt_input_fails_fast(
+        self, sample_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a corrupt input fails every item without running commands."""
+        path = _write(tmp_path, "bad.png", b"\x89PNG\r\n\x1a\n")
+        generator = BatchGenerator(sample_effects_config)
+
+        with patch.object(generator, "_process_item") as process:
+            result = generator.generate_all_effects(path, tmp_path / "out")
+
+        process.assert_not_called()
+        assert result.failed == len(sample_effects_config.effects)
+        assert "Corrupt image" in result.results["blur"].stderr
+
+    def test_input_info_and_output_dimensions(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test input dimensions are reported and outputs get theirs in the manifest."""
+        generator = BatchGenerator(sample_effects_config, parallel=False)
+        result = generator.generate_all_effects(test_image_file, tmp_path / "out")
+
+        assert result.input_info == ImageInfo("PNG", 100, 100)
+        assert result.output_dir is not None
+        manifest = OutputManifest.read(result.output_dir / MANIFEST_NAME)
+        entry = manifest.entries["effects/blur.png"]
+        assert (entry.width, entry.height) == (100, 100)
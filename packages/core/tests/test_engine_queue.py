@@ -0,0 +1,198 @@
+"""Tests for engine queue module."""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import ItemType
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.plan import ExecutionPlan, PlanJob, build_plan
+from wallpaper_core.engine.queue import JobQueue, QueueWorker
+
+# Captured at import time, before the autouse fixture mocks Popen
+_REAL_POPEN = subprocess.Popen
+
+_WORKER_SCRIPT = """
+import sys
+from pathlib import Path
+from wallpaper_core.engine.queue import JobQueue, QueueWorker
+worker = QueueWorker(JobQueue(Path(sys.argv[1])), sys.argv[2], poll_interval=0.05)
+sys.exit(worker.run().failed)
+"""
+
+
+def _chain_plan(tmp_path: Path, command: str = "true") -> ExecutionPlan:
+    """Plan with one two-step chain and one independent job."""
+
+    def job(job_id: str, depends_on: list[str]) -> PlanJob:
+        return PlanJob(
+            id=job_id,
+            item=job_id.split("/")[0],
+            item_type=ItemType.COMPOSITE,
+            effect="blur",
+            command=command,
+            outputs=[tmp_path / f"{job_id.replace('/', '-')}.png"],
+            depends_on=depends_on,
+        )
+
+    return ExecutionPlan(
+        input_path=tmp_path / "in.png",
+        output_dir=tmp_path,
+        jobs=[job("a/0", []), job("a/1", ["a/0"]), job("b/0", [])],
+    )
+
+
+@pytest.fixture
+def fake_magick(tmp_path: Path) -> Path:
+    """Script that copies its first argument to its last."""
+    script = tmp_path / "magick"
+    script.write_text('#!/bin/sh\nfor last; do :; done\ncp "$1" "$last"\n')
+    script.chmod(0o755)
+    return script
+
+
+class TestJobQueue:
+    """Tests for JobQueue."""
+
+    def test_claim_respects_dependencies(self, tmp_path: Path) -> None:
+        """Test a job is only claimable once its dependency is done."""
+        queue = JobQueue(tmp_path / "queue.db")
+        plan_id = queue.add_plan(_chain_plan(tmp_path))
+
+        first = queue.claim("w1", 60)
+        second = queue.claim("w2", 60)
+        assert first is not None and second is not None
+        assert [first.id, second.id] == [f"{plan_id}:a/0", f"{plan_id}:b/0"]
+        assert queue.claim("w3", 60) is None
+
+        assert queue.complete(first.id, "w1")
+        third = queue.claim("w3", 60)
+        assert third is not None
+        assert third.id == f"{plan_id}:a/1"
+
+    def test_same_plan_twice(self, tmp_path: Path) -> None:
+        """Test enqueueing a plan twice keeps both copies."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path))
+        queue.add_plan(_chain_plan(tmp_path))
+        assert queue.counts()["pending"] == 6
+
+    def test_failure_retries_then_fails_dependents(self, tmp_path: Path) -> None:
+        """Test a job is retried up to max_attempts, then fails its chain."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path), max_attempts=2)
+
+        job = queue.claim("w1", 60)
+        assert job is not None
+        assert queue.fail(job.id, "w1", "boom") is True
+        retry = queue.claim("w1", 60)
+        assert retry is not None
+        assert retry.id == job.id
+        assert retry.attempt == 2
+        assert queue.fail(retry.id, "w1", "boom") is False
+
+        failures = queue.failures()
+        assert failures[job.id] == "boom"
+        assert "failed" in failures[job.id.replace("a/0", "a/1")]
+        assert queue.counts() == {"pending": 1, "running": 0, "done": 0, "failed": 2}
+
+    def test_expired_lease_is_reclaimed(self, tmp_path: Path) -> None:
+        """Test a job whose worker stopped heartbeating goes to another worker."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path))
+
+        job = queue.claim("dead", -1)
+        assert job is not None
+        reclaimed = queue.claim("alive", 60)
+        assert reclaimed is not None
+        assert reclaimed.id == job.id
+        assert reclaimed.attempt == 2
+        assert queue.heartbeat(job.id, "dead", 60) is False
+        assert queue.complete(job.id, "dead") is False
+        assert queue.heartbeat(job.id, "alive", 60) is True
+
+    def test_release_keeps_attempts(self, tmp_path: Path) -> None:
+        """Test an interrupted job returns to the queue without using an attempt."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path))
+
+        job = queue.claim("w1", 60)
+        assert job is not None
+        queue.release(job.id, "w1")
+        again = queue.claim("w2", 60)
+        assert again is not None
+        assert again.id == job.id
+        assert again.attempt == 1
+
+
+class TestQueueWorker:
+    """Tests for QueueWorker."""
+
+    def test_worker_drains_queue(self, tmp_path: Path) -> None:
+        """Test a worker runs every job and exits once the queue is empty."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path))
+
+        result = QueueWorker(queue, "w1", poll_interval=0.01).run()
+
+        assert result.succeeded == 3
+        assert not queue.active()
+        assert queue.counts()["done"] == 3
+
+    def test_worker_retries_failing_job(self, tmp_path: Path) -> None:
+        """Test a failing job is attempted max_attempts times."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path, "false"), max_attempts=2)
+
+        with patch("subprocess.Popen", _REAL_POPEN):
+            result = QueueWorker(queue, "w1", poll_interval=0.01).run()
+
+        assert result.retried == 2
+        assert result.failed == 2
+        assert queue.counts()["failed"] == 3
+
+    def test_max_jobs(self, tmp_path: Path) -> None:
+        """Test a worker stops after max_jobs jobs."""
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(_chain_plan(tmp_path))
+
+        result = QueueWorker(queue, "w1", max_jobs=1).run()
+
+        assert result.succeeded == 1
+        assert queue.counts()["pending"] == 2
+
+    def test_worker_processes_share_queue(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        fake_magick: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test several worker processes drain one queue without duplicates."""
+        plan = build_plan(
+            sample_effects_config,
+            test_image_file,
+            tmp_path / "out",
+            list(ItemType),
+            binary=str(fake_magick),
+        )
+        queue = JobQueue(tmp_path / "queue.db")
+        queue.add_plan(plan)
+
+        with patch("subprocess.Popen", _REAL_POPEN):
+            workers = [
+                subprocess.Popen(
+                    [sys.executable, "-c", _WORKER_SCRIPT, str(queue.path), f"w{i}"]
+                )
+                for i in range(3)
+            ]
+            codes = [worker.wait(timeout=60) for worker in workers]
+
+        assert codes == [0, 0, 0]
+        assert queue.counts()["done"] == len(plan.jobs)
+        for job in plan.jobs:
+            if not job.outputs[-1].name.startswith("step"):
+                assert job.outputs[-1].exists()
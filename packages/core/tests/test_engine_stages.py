@@ -0,0 +1,180 @@
+"""Tests for engine stages module (stage-pipelined execution)."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+from wallpaper_core.engine.backend import (
+    BackendCapabilities,
+    BackendError,
+    ImageBackend,
+)
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.stages import STAGES, StagedExecutor
+
+
+class CountingBackend(ImageBackend[list[str]]):
+    """Images are effect name lists; counts how many are alive at once."""
+
+    name = "counting"
+    label = "Counting"
+    capabilities = BackendCapabilities(
+        in_process=True, shares_inputs=False, any_command=False
+    )
+
+    def __init__(self, chain_executor: ChainExecutor) -> None:
+        super().__init__(chain_executor)
+        self.lock = threading.Lock()
+        self.alive = 0
+        self.peak = 0
+        self.encode_delay = 0.0
+        self.failing: set[str] = set()
+
+    def supports(self, steps: list[ChainStep]) -> bool:  # noqa: ARG002
+        return True
+
+    def load(self, data: bytes) -> list[str]:
+        with self.lock:
+            self.alive += 1
+            self.peak = max(self.peak, self.alive)
+        return [data.decode()]
+
+    def apply_effect(self, image: list[str], step: ChainStep) -> list[str]:
+        if image[0] in self.failing:
+            raise BackendError("boom")
+        with self.lock:
+            self.alive += 1
+            self.peak = max(self.peak, self.alive)
+        return [*image, step.effect]
+
+    def save(self, image: list[str], output_format: str, encode_command: str) -> bytes:
+        time.sleep(self.encode_delay)
+        return f"{output_format}:{'+'.join(image)}".encode()
+
+    def release(self, image: list[str]) -> None:  # noqa: ARG002
+        with self.lock:
+            self.alive -= 1
+
+
+def _inputs(tmp_path: Path, count: int) -> list[tuple[Path, Path]]:
+    jobs = []
+    for i in range(count):
+        source = tmp_path / f"in{i}.png"
+        source.write_bytes(f"img{i}".encode())
+        jobs.append((source, tmp_path / "out" / f"in{i}.webp"))
+    return jobs
+
+
+def _staged(
+    config: EffectsConfig, **kwargs: Any
+) -> tuple[StagedExecutor, CountingBackend]:
+    chain_executor = ChainExecutor(config)
+    backend = CountingBackend(chain_executor)
+    chain_executor.backend = backend
+    return StagedExecutor(chain_executor, **kwargs), backend
+
+
+class TestStagedExecutor:
+    """Tests for StagedExecutor."""
+
+    def test_every_image_goes_through_every_stage(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test outputs are written and each stage saw every image."""
+        staged, backend = _staged(
+            traits_effects_config, decoders=2, appliers=2, encoders=3
+        )
+        jobs = _inputs(tmp_path, 7)
+        chain = [ChainStep(effect="blur"), ChainStep(effect="negate")]
+        result = staged.execute(chain, jobs)
+
+        assert result.success
+        assert result.succeeded == result.total == 7
+        assert set(result.results) == {str(source) for source, _ in jobs}
+        for i, (_, output) in enumerate(jobs):
+            assert output.read_bytes() == f"webp:img{i}+blur+negate".encode()
+        assert [s.name for s in result.stages] == list(STAGES)
+        assert [s.workers for s in result.stages] == [2, 2, 3]
+        assert all(s.items == 7 for s in result.stages)
+        assert all(0 <= s.utilization(result.duration) <= 1 for s in result.stages)
+        assert backend.alive == 0
+
+    def test_backpressure_bounds_images_in_memory(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a slow encoder holds back decoding instead of queueing all."""
+        staged, backend = _staged(
+            traits_effects_config, decoders=1, appliers=1, encoders=1, queue_size=1
+        )
+        backend.encode_delay = 0.02
+        result = staged.execute([ChainStep(effect="negate")], _inputs(tmp_path, 12))
+
+        assert result.succeeded == 12
+        # decoders + queue + appliers + queue + encoders, plus the image
+        # being produced while its input is still held
+        assert backend.peak <= 6
+        encode = result.stages[-1]
+        decode = result.stages[0]
+        assert encode.utilization(result.duration) > 0.5
+        assert decode.blocked > 0
+
+    def test_failures_are_per_image(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a failing image and a missing input do not stop the others."""
+        staged, backend = _staged(traits_effects_config, appliers=2, encoders=2)
+        backend.failing = {"img1"}
+        jobs = _inputs(tmp_path, 4)
+        jobs.append((tmp_path / "missing.png", tmp_path / "out" / "missing.png"))
+        result = staged.execute([ChainStep(effect="negate")], jobs)
+
+        assert result.succeeded == 3
+        assert result.failed == 2
+        failed = result.results[str(jobs[1][0])]
+        assert failed.stderr == "Counting backend failed: step 1 (negate): boom"
+        assert "Cannot read" in result.results[str(tmp_path / "missing.png")].stderr
+        assert backend.alive == 0
+
+    def test_strict_cancels_remaining_images(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test strict mode stops after the first failure."""
+        staged, backend = _staged(
+            traits_effects_config, appliers=1, encoders=1, strict=True
+        )
+        backend.failing = {"img0"}
+        result = staged.execute([ChainStep(effect="negate")], _inputs(tmp_path, 6))
+
+        assert result.aborted
+        assert not result.cancelled
+        assert len(result.results) == 6
+        assert result.succeeded + result.failed == 6
+        not_run = [
+            r for r in result.results.values() if r.stderr == "Not run: earlier failure"
+        ]
+        assert not_run
+        assert result.failed == 1 + len(not_run)
+        assert not any(r.cancelled for r in result.results.values())
+        assert backend.alive == 0
+
+        # The abort belongs to that run: the next one processes every image
+        backend.failing = set()
+        result = staged.execute([ChainStep(effect="negate")], _inputs(tmp_path, 3))
+        assert result.succeeded == 3
+        assert not result.aborted
+
+    def test_cancelled_before_decode(
+        self, traits_effects_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test images cancelled in the decode queue report no duration."""
+        staged, backend = _staged(traits_effects_config)
+        staged.executor.cancel_token.cancel()
+        result = staged.execute([ChainStep(effect="negate")], _inputs(tmp_path, 3))
+
+        assert result.cancelled
+        assert len(result.results) == 3
+        assert all(r.cancelled for r in result.results.values())
+        assert all(r.duration == 0.0 for r in result.results.values())
+        assert backend.alive == 0
@@ -0,0 +1,159 @@
+"""Tests for engine sweep module."""
+
+from pathlib import Path
+
+import pytest
+
+from wallpaper_core.effects.schema import Effect, EffectsConfig, ParameterType
+from wallpaper_core.engine.sweep import (
+    SweepExecutor,
+    SweepPoint,
+    build_grid,
+    parse_values,
+)
+
+
+class TestParseValues:
+    """Tests for parse_values function."""
+
+    def test_integer_range(self) -> None:
+        """Test inclusive integer ranges with and without a step."""
+        percent = ParameterType(type="integer", min=-100, max=100, default=0)
+        assert parse_values(percent, "0:3") == [0, 1, 2, 3]
+        assert parse_values(percent, "-40:40:20") == [-40, -20, 0, 20, 40]
+        assert parse_values(percent, "10:0:-5") == [10, 5, 0]
+
+    def test_float_range(self) -> None:
+        """Test float ranges are rounded so names stay stable."""
+        opacity = ParameterType(type="float", min=0.0, max=1.0, default=0.5)
+        assert parse_values(opacity, "0.1:0.3:0.1") == [0.1, 0.2, 0.3]
+        with pytest.raises(ValueError, match="needs a step"):
+            parse_values(opacity, "0:1")
+
+    def test_list_deduplicates(self) -> None:
+        """Test lists keep their order and drop repeated values."""
+        geometry = ParameterType(type="string", pattern=r"^\d+x\d+$", default="0x8")
+        assert parse_values(geometry, "0x8, 0x2,0x8") == ["0x8", "0x2"]
+
+    @pytest.mark.parametrize("spec", ["0:200:50", "5:0:1", "a:b"])
+    def test_invalid_ranges(self, spec: str) -> None:
+        """Test out-of-range, unreachable and non-numeric ranges."""
+        percent = ParameterType(type="integer", min=-100, max=100, default=0)
+        with pytest.raises(ValueError):
+            parse_values(percent, spec)
+
+
+class TestBuildGrid:
+    """Tests for build_grid function."""
+
+    def test_cartesian_product(self) -> None:
+        """Test every combination is generated, last parameter fastest."""
+        percent = ParameterType(type="integer", min=-100, max=100, default=0)
+        config = EffectsConfig(
+            version="1.0",
+            parameter_types={"percent": percent},
+            effects={
+                "bc": Effect(
+                    description="Brightness/contrast",
+                    command='magick "$INPUT" -brightness-contrast "$B"x"$C" "$OUTPUT"',
+                    parameters={"b": {"type": "percent"}, "c": {"type": "percent"}},
+                )
+            },
+        )
+        points = build_grid(config, "bc", {"b": "0,10", "c": "-5:5:5"})
+        assert [p.name for p in points][:3] == [
+            "bc__b=0__c=-5",
+            "bc__b=0__c=0",
+            "bc__b=0__c=5",
+        ]
+        assert len(points) == 6
+
+    def test_reports_every_error(self, sample_effects_config: EffectsConfig) -> None:
+        """Test all invalid parameters are reported together."""
+        with pytest.raises(ValueError) as excinfo:
+            build_grid(
+                sample_effects_config,
+                "brightness",
+                {"brightness": "0,500", "sigma": "1"},
+            )
+        message = str(excinfo.value)
+        assert "brightness: 500 is above the maximum 100" in message
+        assert "sigma:" in message
+
+    def test_name_is_filesystem_safe(self) -> None:
+        """Test values are encoded into safe, deterministic names."""
+        point = SweepPoint("colorize", (("color", "#ff00aa"), ("opacity", 0.5)))
+        assert point.name == "colorize__color=_ff00aa__opacity=0.5"
+        assert point.label == "color=#ff00aa opacity=0.5"
+
+
+class TestSweepExecutor:
+    """Tests for SweepExecutor."""
+
+    def test_single_process_grid(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a simple effect renders every point from one magick command."""
+        points = build_grid(sample_effects_config, "blur", {"blur": "0x2,0x4,0x8"})
+        executor = SweepExecutor(sample_effects_config)
+
+        commands = executor.commands(points, test_image_file, tmp_path, ".png")
+        assert len(commands) == 1
+        assert commands[0].count("+clone") == 2
+        assert f'-write "{tmp_path / "blur__blur=0x2.png"}"' in commands[0]
+        assert commands[0].endswith(f'-blur "0x8" "{tmp_path / "blur__blur=0x8.png"}"')
+
+        result = executor.execute(points, test_image_file, tmp_path, ".png")
+        assert result.success
+        assert set(result.results) == {p.name for p in points}
+        assert (tmp_path / "blur__blur=0x8.png").exists()
+
+    def test_complex_command_runs_per_point(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test commands that are not a single magick call run once per point."""
+        config = EffectsConfig(
+            version="1.0",
+            parameter_types={
+                "percent": ParameterType(type="integer", min=0, max=100, default=0)
+            },
+            effects={
+                "two-step": Effect(
+                    description="Two commands",
+                    command='magick "$INPUT" -level "$LOW"% - | magick - "$OUTPUT"',
+                    parameters={"low": {"type": "percent"}},
+                )
+            },
+        )
+        points = build_grid(config, "two-step", {"low": "0,10,20"})
+        executor = SweepExecutor(config)
+
+        commands = executor.commands(points, test_image_file, tmp_path, ".png")
+        assert len(commands) == 3
+        assert '-level "10"%' in commands[1]
+
+        result = executor.execute(points, test_image_file, tmp_path, ".png")
+        assert result.total == 3
+        assert result.success
+
+    def test_contact_sheet(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test the contact sheet labels each tile with its parameters."""
+        points = build_grid(sample_effects_config, "brightness", {"brightness": "0,50"})
+        executor = SweepExecutor(sample_effects_config)
+        executor.execute(points, test_image_file, tmp_path, ".png")
+
+        sheet = tmp_path / "sheet.png"
+        result = executor.contact_sheet(points, tmp_path, ".png", sheet, 2, 160)
+        assert result.success
+        assert "montage" in result.command
+        assert "-label brightness=50" in result.command
+        assert "-tile 2x -geometry 160x160+4+4" in result.command
+        assert sheet.exists()
@@ -0,0 +1,53 @@
+"""Tests for engine tempdir module."""
+
+from contextlib import AbstractContextManager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.engine import tempdir
+from wallpaper_core.engine.tempdir import resolve_temp_dir
+
+
+@pytest.fixture
+def ram_dir(tmp_path: Path) -> Path:
+    """Stand-in for /dev/shm."""
+    path = tmp_path / "shm"
+    path.mkdir()
+    return path
+
+
+def _free(free: int) -> AbstractContextManager[Any]:
+    """Patch shutil.disk_usage to report the given free space."""
+    return patch(
+        "wallpaper_core.engine.tempdir.shutil.disk_usage",
+        return_value=SimpleNamespace(total=free * 2, used=free, free=free),
+    )
+
+
+class TestResolveTempDir:
+    """Tests for resolve_temp_dir."""
+
+    def test_configured_dir_wins(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test a configured temp_dir is created and used."""
+        configured = tmp_path / "custom" / "tmp"
+        assert resolve_temp_dir(configured, test_image_file) == configured
+        assert configured.is_dir()
+
+    def test_ram_dir_with_room(self, test_image_file: Path, ram_dir: Path) -> None:
+        """Test /dev/shm is used when it has room for the intermediates."""
+        with patch.object(tempdir, "RAM_TEMP_DIR", ram_dir), _free(1 << 40):
+            assert resolve_temp_dir(None, test_image_file) == ram_dir
+
+    def test_ram_dir_without_room(self, test_image_file: Path, ram_dir: Path) -> None:
+        """Test falling back to the system temp dir when /dev/shm is full."""
+        with patch.object(tempdir, "RAM_TEMP_DIR", ram_dir), _free(1024):
+            assert resolve_temp_dir(None, test_image_file) is None
+
+    def test_missing_ram_dir(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test falling back when there is no /dev/shm."""
+        with patch.object(tempdir, "RAM_TEMP_DIR", tmp_path / "missing"):
+            assert resolve_temp_dir(None, test_image_file) is None
@@ -0,0 +1,183 @@
+"""Tests for engine variants module."""
+
+import re
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wallpaper_core.config.schema import EncodingSettings
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import CommandExecutor, ExecutionResult
+from wallpaper_core.engine.variants import (
+    OutputGeometry,
+    VariantExecutor,
+    build_variants_command,
+    master_geometry,
+    parse_geometries,
+    variant_output_path,
+)
+
+
+class TestOutputGeometry:
+    """Tests for OutputGeometry parsing."""
+
+    def test_parse(self) -> None:
+        """Test parsing a WIDTHxHEIGHT string."""
+        geometry = OutputGeometry.parse("3840x2160")
+        assert geometry == OutputGeometry(3840, 2160)
+        assert str(geometry) == "3840x2160"
+
+    @pytest.mark.parametrize("value", ["1920", "0x1080", "axb", "1920x1080+0+0"])
+    def test_parse_invalid(self, value: str) -> None:
+        """Test invalid geometries are rejected."""
+        with pytest.raises(ValueError, match="Invalid output size"):
+            OutputGeometry.parse(value)
+
+    def test_parse_geometries_deduplicates(self) -> None:
+        """Test duplicate sizes are dropped while keeping order."""
+        geometries = parse_geometries(["1920x1080", "1080x1920", "1920x1080"])
+        assert geometries == [OutputGeometry(1920, 1080), OutputGeometry(1080, 1920)]
+
+    def test_master_geometry_covers_all(self) -> None:
+        """Test master geometry covers landscape and portrait sizes."""
+        master = master_geometry(
+            [OutputGeometry(3840, 2160), OutputGeometry(1080, 1920)]
+        )
+        assert master == OutputGeometry(3840, 2160)
+
+        master = master_geometry(
+            [OutputGeometry(1920, 1080), OutputGeometry(1080, 2400)]
+        )
+        assert master == OutputGeometry(1920, 2400)
+
+
+class TestVariantPaths:
+    """Tests for variant path and command building."""
+
+    def test_variant_output_path(self) -> None:
+        """Test size suffix is added to the file name."""
+        path = variant_output_path(
+            Path("/out/wall/effects/blur.jpg"), OutputGeometry(1920, 1080)
+        )
+        assert path == Path("/out/wall/effects/blur@1920x1080.jpg")
+
+    def test_build_variants_command_single_process(self) -> None:
+        """Test every variant is written from one magick invocation."""
+        command = build_variants_command(
+            Path("/out/blur.png"),
+            [OutputGeometry(3840, 2160), OutputGeometry(1920, 1080)],
+        )
+        assert command.startswith('magick "$INPUT"')
+        assert command.count("magick") == 1
+        assert '-write "/out/blur@3840x2160.png"' in command
+        assert "-extent 1920x1080" in command
+        assert command.endswith('"$OUTPUT"')
+
+
+class TestVariantExecutor:
+    """Tests for VariantExecutor class."""
+
+    def test_execute_renders_once(self, test_image_file: Path, tmp_path: Path) -> None:
+        """Test the render callable runs once for all sizes."""
+        executor = CommandExecutor()
+        calls: list[tuple[Path, Path]] = []
+
+        def render(source: Path, target: Path) -> ExecutionResult:
+            calls.append((source, target))
+            return executor.execute(
+                'magick "$INPUT" -blur 0x8 "$OUTPUT"', source, target
+            )
+
+        output_path = tmp_path / "out" / "blur.png"
+        geometries = [OutputGeometry(3840, 2160), OutputGeometry(1920, 1080)]
+        result = VariantExecutor(executor).execute(
+            render, test_image_file, output_path, geometries
+        )
+
+        assert result.success is True
+        assert len(calls) == 1
+        assert calls[0][0] != test_image_file
+        for geometry in geometries:
+            assert variant_output_path(output_path, geometry).exists()
+
+    def test_profile_encodes_variants_only(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test only the variants are encoded with the item's profile."""
+        profile = EncodingSettings(format="jpg", quality=70)
+        chain_executor = ChainExecutor(sample_effects_config, encoding=profile)
+        executor = chain_executor.executor
+        output_path = tmp_path / "blur.jpg"
+        geometries = [OutputGeometry(1920, 1080), OutputGeometry(800, 600)]
+        with patch.object(executor, "run", wraps=executor.run) as run:
+            result = VariantExecutor(executor).execute(
+                lambda source, target: chain_executor.execute_chain(
+                    [ChainStep(effect="blur")], source, target
+                ),
+                test_image_file,
+                output_path,
+                geometries,
+                profile,
+            )
+
+        assert result.success
+        prescale, render, resample = [call.args[0] for call in run.call_args_list]
+        assert re.search(r'source\.miff"$', prescale)
+        assert re.search(r'master\.miff"$', render)
+        assert "-quality" not in prescale + render
+        assert "master.miff" in resample
+        assert "-quality 70" in resample
+        assert variant_output_path(output_path, geometries[1]).exists()
+
+    def test_execute_without_geometries(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test no geometries renders straight to the output path."""
+        output_path = tmp_path / "blur.png"
+
+        def render(source: Path, target: Path) -> ExecutionResult:
+            return ExecutionResult(True, "render", "", "", 0)
+
+        result = VariantExecutor().execute(render, test_image_file, output_path, [])
+        assert result.command == "render"
+
+    def test_execute_render_failure(
+        self, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test render failure stops before resampling."""
+
+        def render(source: Path, target: Path) -> ExecutionResult:
+            return ExecutionResult(False, "render", "", "boom", 1)
+
+        result = VariantExecutor().execute(
+            render, test_image_file, tmp_path / "blur.png", [OutputGeometry(800, 600)]
+        )
+        assert result.success is False
+        assert "render failed" in result.stderr
+        assert "boom" in result.stderr
+
+    def test_batch_generator_with_geometries(
+        self,
+        sample_effects_config: EffectsConfig,
+        test_image_file: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test batch generation writes every size for every item."""
+        geometries = [OutputGeometry(1920, 1080), OutputGeometry(1080, 1920)]
+        generator = BatchGenerator(
+            config=sample_effects_config, parallel=False, geometries=geometries
+        )
+
+        result = generator.generate_all_effects(test_image_file, tmp_path)
+
+        assert result.success is True
+        effects_dir = tmp_path / test_image_file.stem / "effects"
+        for name in sample_effects_config.effects:
+            for geometry in geometries:
+                assert (effects_dir / f"{name}@{geometry}.png").exists()
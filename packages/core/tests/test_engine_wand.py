@@ -0,0 +1,136 @@
+"""Tests for engine wand module (the MagickWand backend)."""
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from wallpaper_core.effects.schema import ChainStep, Effect, EffectsConfig
+from wallpaper_core.engine import wand
+from wallpaper_core.engine.backend import ENCODE_COMMAND
+from wallpaper_core.engine.chain import ChainExecutor
+
+# Captured at import time, before the autouse fixture mocks Popen and which
+_REAL_POPEN = subprocess.Popen
+_REAL_MAGICK = shutil.which("magick")
+
+try:
+    wand.find_library()
+    _HAS_WAND = True
+except OSError:
+    _HAS_WAND = False
+
+
+class TestStepArgs:
+    """Tests for recognising steps the backend runs."""
+
+    def test_single_calls(self, traits_effects_config: EffectsConfig) -> None:
+        """Test operators are split into arguments with params substituted."""
+        step = ChainStep(effect="blur", params={"blur": "0x4"})
+        assert wand.step_args(traits_effects_config, step) == ["-blur", "0x4"]
+        grayscale = ChainStep(effect="blackwhite")
+        assert wand.step_args(traits_effects_config, grayscale) == [
+            "-grayscale",
+            "Average",
+        ]
+
+    def test_other_commands(self, traits_effects_config: EffectsConfig) -> None:
+        """Test shell pipelines and unknown effects are not supported."""
+        traits_effects_config.effects["piped"] = Effect(
+            description="Piped",
+            command='magick "$INPUT" -negate - | magick - -flip "$OUTPUT"',
+        )
+        assert wand.step_args(traits_effects_config, ChainStep(effect="piped")) is None
+        assert wand.step_args(traits_effects_config, ChainStep(effect="nope")) is None
+
+
+class TestLoading:
+    """Tests for loading the library."""
+
+    def test_missing_library_falls_back(
+        self, traits_effects_config: EffectsConfig
+    ) -> None:
+        """Test a missing libMagickWand warns and runs chains with magick."""
+        output = MagicMock()
+        with (
+            patch.object(wand, "_library", None),
+            patch("ctypes.util.find_library", return_value=None),
+        ):
+            executor = ChainExecutor(traits_effects_config, output, backend="wand")
+
+        assert executor.backend is None
+        assert executor.backend_for([ChainStep(effect="negate")]) is executor.magick
+        assert "libMagickWand not found" in output.warning.call_args.args[0]
+
+
+@pytest.mark.skipif(
+    not _HAS_WAND or _REAL_MAGICK is None,
+    reason="needs libMagickWand and the magick binary",
+)
+class TestWandLibrary:
+    """Run the backend against the installed ImageMagick."""
+
+    @pytest.fixture
+    def source(self, tmp_path: Path) -> Path:
+        """Small gradient image."""
+        source = tmp_path / "source.png"
+        subprocess.run(
+            [str(_REAL_MAGICK), "-size", "64x48", "gradient:red-blue", str(source)],
+            check=True,
+        )
+        return source
+
+    @pytest.fixture
+    def backend(self, traits_effects_config: EffectsConfig) -> wand.WandBackend:
+        """Backend for the traits config."""
+        return wand.WandBackend(ChainExecutor(traits_effects_config))
+
+    def _pixels(self, backend: wand.WandBackend, path: Path) -> bytes:
+        image = backend.load_file(path)
+        try:
+            return backend.save(image, "rgb", ENCODE_COMMAND)
+        finally:
+            backend.release(image)
+
+    def test_matches_magick(
+        self,
+        traits_effects_config: EffectsConfig,
+        backend: wand.WandBackend,
+        source: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Test a chain gives the same pixels as the magick processes."""
+        chain = [ChainStep(effect="blur"), ChainStep(effect="brightness")]
+        with patch("subprocess.Popen", _REAL_POPEN):
+            magick = ChainExecutor(traits_effects_config, fuse_pointwise=False)
+            magick.executor.binary = str(_REAL_MAGICK)
+            assert magick.execute_chain(chain, source, tmp_path / "magick.png").success
+        assert backend.run_file(chain, source, tmp_path / "wand.png").success
+
+        assert self._pixels(backend, tmp_path / "magick.png") == self._pixels(
+            backend, tmp_path / "wand.png"
+        )
+
+    def test_inputs_are_shared(self, backend: wand.WandBackend, source: Path) -> None:
+        """Test a file is decoded once until it changes."""
+        first = backend.load_file(source)
+        second = backend.load_file(source)
+        assert first.key == second.key
+        backend.release(first)
+        backend.release(second)
+
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        changed = backend.load_file(source)
+        assert changed.key != first.key
+        backend.release(changed)
+
+    def test_errors(self, backend: wand.WandBackend, tmp_path: Path) -> None:
+        """Test undecodable data raises BackendError."""
+        with pytest.raises(wand.BackendError):
+            backend.load(b"not an image")
+        with pytest.raises(wand.BackendError):
+            backend.load_file(tmp_path / "missing.png")
@@ -0,0 +1,218 @@
+"""Tests for engine workers module (NumPy worker processes)."""
+
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from wallpaper_core.effects import get_package_effects_file
+from wallpaper_core.effects.schema import ChainStep, Effect, EffectsConfig
+from wallpaper_core.engine.batch import BatchGenerator
+from wallpaper_core.engine.chain import ChainExecutor
+from wallpaper_core.engine.executor import BytesResult, CommandExecutor
+
+np = pytest.importorskip("numpy")
+
+from wallpaper_core.engine import native, workers  # noqa: E402
+
+# Captured at import time, before the autouse fixture mocks Popen and which
+_REAL_POPEN = subprocess.Popen
+_REAL_MAGICK = shutil.which("magick")
+
+
+@pytest.fixture
+def package_config() -> EffectsConfig:
+    """The packaged effects.yaml."""
+    return EffectsConfig(**yaml.safe_load(get_package_effects_file().read_text()))
+
+
+def _pixels() -> "np.ndarray":
+    return np.random.default_rng(0).random((12, 16, 3), dtype=np.float32)
+
+
+def _fake_magick(
+    _self: CommandExecutor, command: str, data: bytes, *_args: Any, **_kwargs: Any
+) -> BytesResult:
+    """Decode to fixed pixels, and "encode" by passing PAM through."""
+    output = native.encode_pam(_pixels()) if "-colorspace" in command else data
+    return BytesResult(
+        success=True, command=command, stdout="", stderr="", return_code=0, data=output
+    )
+
+
+def _thread_pool(max_workers: int | None, **kwargs: Any) -> ThreadPoolExecutor:
+    """Stand-in for the process pool that runs workers in this process."""
+    return ThreadPoolExecutor(
+        max_workers, initializer=kwargs["initializer"], initargs=kwargs["initargs"]
+    )
+
+
+class TestSharedInput:
+    """Tests for the shared decoded input."""
+
+    def test_workers_map_the_pixels(self, package_config: EffectsConfig) -> None:
+        """Test workers see the pixels read-only and closing frees them."""
+        executor = ChainExecutor(package_config, backend="numpy")
+        assert isinstance(executor.backend, native.NativeBackend)
+        with patch.object(workers, "ProcessPoolExecutor", _thread_pool):
+            shared = workers.SharedInput(executor, executor.backend, _pixels(), 255)
+        try:
+            mapped = workers._attach(shared.pixels)
+            assert np.array_equal(mapped, _pixels())
+            assert not mapped.flags.writeable
+        finally:
+            workers._attached.pop(shared.pixels.name)[0].close()
+            shared.close()
+        with pytest.raises(FileNotFoundError):
+            workers.SharedMemory(name=shared.pixels.name)
+
+    def test_render_in_worker(
+        self, package_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test a worker renders a chain from the shared input to a file."""
+        executor = ChainExecutor(package_config, backend="numpy")
+        assert isinstance(executor.backend, native.NativeBackend)
+        chain = [ChainStep(effect="negate"), ChainStep(effect="brightness")]
+        with (
+            patch.object(workers, "ProcessPoolExecutor", _thread_pool),
+            patch.object(CommandExecutor, "execute_bytes", _fake_magick),
+        ):
+            shared = workers.SharedInput(executor, executor.backend, _pixels(), 255)
+            try:
+                result = shared.render(chain, tmp_path / "out.png")
+            finally:
+                workers._attached.pop(shared.pixels.name)[0].close()
+                shared.close()
+
+        assert result.success, result.stderr
+        pixels, _ = native.decode_pam((tmp_path / "out.png").read_bytes())
+        expected = native.brightness_contrast(1 - _pixels(), -20, 0)
+        assert np.abs(pixels - expected).max() <= 1 / 255
+
+    def test_cancel_reaches_workers(
+        self, package_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test cancelling the batch cancels the worker's magick and the item."""
+        executor = ChainExecutor(package_config, backend="numpy")
+        assert isinstance(executor.backend, native.NativeBackend)
+        started = threading.Event()
+
+        def slow_magick(
+            self: CommandExecutor, command: str, *_args: Any, **_kwargs: Any
+        ) -> BytesResult:
+            started.set()
+            self.cancel_token.wait(10)
+            return BytesResult(
+                success=False,
+                command=command,
+                stdout="",
+                stderr="Cancelled",
+                return_code=-1,
+                cancelled=self.cancel_token.cancelled,
+            )
+
+        with (
+            patch.object(workers, "ProcessPoolExecutor", _thread_pool),
+            patch.object(CommandExecutor, "execute_bytes", slow_magick),
+        ):
+            shared = workers.SharedInput(executor, executor.backend, _pixels(), 255)
+            try:
+                with ThreadPoolExecutor(1) as pool:
+                    rendering = pool.submit(
+                        shared.render, [ChainStep(effect="negate")], tmp_path / "o.png"
+                    )
+                    assert started.wait(5)
+                    executor.executor.cancel_token.cancel()
+                    result = rendering.result(timeout=5)
+                assert workers._backend is not None
+                assert workers._backend.executor.cancel_token.cancelled
+            finally:
+                workers._attached.pop(shared.pixels.name)[0].close()
+                shared.close()
+
+        assert result.cancelled
+        assert shared.cancel_event.is_set()
+        cancelled = shared.render([ChainStep(effect="negate")], tmp_path / "p.png")
+        assert cancelled.cancelled
+
+
+class TestBatchWorkers:
+    """Tests for workers = "processes" in BatchGenerator."""
+
+    def test_numpy_items_go_to_workers(
+        self, package_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test supported items render in workers, the others on threads."""
+        package_config.effects["swirl"] = Effect(
+            description="Swirl", command='magick "$INPUT" -swirl 90 "$OUTPUT"'
+        )
+        generator = BatchGenerator(
+            package_config,
+            backend="numpy",
+            workers="processes",
+            cascade_blurs=False,
+            manifest=False,
+        )
+        render = workers.SharedInput.render
+        with (
+            patch.object(workers, "ProcessPoolExecutor", _thread_pool),
+            patch.object(CommandExecutor, "execute_bytes", _fake_magick),
+            patch.object(
+                workers.SharedInput, "render", autospec=True, side_effect=render
+            ) as rendered,
+        ):
+            result = generator.generate_all_effects(test_image_file, tmp_path)
+
+        assert result.succeeded == len(package_config.effects)
+        rendered = {call.args[1][0].effect for call in rendered.call_args_list}
+        assert rendered == set(package_config.effects) - {"swirl"}
+        workers._attached.clear()
+
+    def test_threads_by_default(
+        self, package_config: EffectsConfig, test_image_file: Path, tmp_path: Path
+    ) -> None:
+        """Test no workers start unless asked for."""
+        generator = BatchGenerator(package_config, backend="numpy", manifest=False)
+        with patch.object(workers, "SharedInput") as shared:
+            generator.generate_all_effects(test_image_file, tmp_path)
+        shared.open.assert_not_called()
+
+
+@pytest.mark.skipif(_REAL_MAGICK is None, reason="needs ImageMagick")
+class TestWorkerProcesses:
+    """Run real worker processes."""
+
+    def test_matches_threads(
+        self, package_config: EffectsConfig, tmp_path: Path
+    ) -> None:
+        """Test outputs from worker processes equal those from threads."""
+        source = tmp_path / "source.png"
+        subprocess.run(
+            [str(_REAL_MAGICK), "-size", "64x48", "gradient:red-blue", str(source)],
+            check=True,
+        )
+        outputs = {}
+        with patch("subprocess.Popen", _REAL_POPEN):
+            for mode in ("threads", "processes"):
+                generator = BatchGenerator(
+                    package_config,
+                    backend="numpy",
+                    workers=mode,
+                    manifest=False,
+                    probe=False,
+                )
+                generator.executor.binary = str(_REAL_MAGICK)
+                generator.chain_executor.executor.binary = str(_REAL_MAGICK)
+                result = generator.generate_all_composites(source, tmp_path / mode)
+                assert result.failed == 0
+                outputs[mode] = {
+                    path.name: path.read_bytes()
+                    for path in (tmp_path / mode).rglob("*.png")
+                }
+        assert outputs["threads"] == outputs["processes"]
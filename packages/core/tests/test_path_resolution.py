@@ -76,3 +76,18 @@ def test_resolve_output_path_preserves_extension():
         flat=False,
     )
     assert result == Path("/out/wall/effects/blur.png")
+
+
+def test_resolve_output_path_with_geometry():
+    """Resolve path for a size variant."""
+    from wallpaper_core.engine.variants import OutputGeometry
+
+    result = resolve_output_path(
+        output_dir=Path("/out"),
+        input_file=Path("wall.jpg"),
+        item_name="blur",
+        item_type=ItemType.EFFECT,
+        flat=False,
+        geometry=OutputGeometry(1920, 1080),
+    )
+    assert result == Path("/out/wall/effects/blur@1920x1080.jpg")
@@ -11,11 +11,14 @@ from layered_effects import load_effects
 from layered_settings import configure, get_config
 from layered_settings.constants import APP_NAME
 from wallpaper_core.cli import show as core_show_module
-from wallpaper_core.cli.batch import _resolve_batch_items
+from wallpaper_core.cli.batch import _batch_generator, _dry_run_items
 from wallpaper_core.cli.path_utils import resolve_output_path
-from wallpaper_core.config.schema import ItemType
+from wallpaper_core.cli.process import _chain_executor, _planned_commands
+from wallpaper_core.config.schema import CoreSettings, ItemType
 from wallpaper_core.dry_run import CoreDryRun
 from wallpaper_core.effects import get_package_effects_file
+from wallpaper_core.effects.schema import EffectsConfig
+from wallpaper_core.engine.batch import item_chain
 from wallpaper_orchestrator.cli.commands import install, uninstall
 from wallpaper_orchestrator.config.unified import UnifiedConfig
 from wallpaper_orchestrator.container.manager import ContainerManager
@@ -52,6 +55,29 @@ process_app = typer.Typer(
 )
 
 
+def _inner_command(
+    settings: CoreSettings,
+    effects_config: EffectsConfig,
+    name: str,
+    item_type: ItemType,
+    input_file: Path,
+    expected_output: Path,
+) -> str:
+    """Commands the container runs for an item, from its execution plan."""
+    chain = item_chain(effects_config, name, item_type)
+    if not chain:
+        return "<empty chain>" if chain == [] else f"<cannot resolve '{name}'>"
+    commands = _planned_commands(
+        _chain_executor(settings, effects_config),
+        name,
+        item_type,
+        chain,
+        Path(f"/input/{input_file.name}"),
+        expected_output,
+    )
+    return " && ".join(commands)
+
+
 @process_app.command("effect")
 def process_effect(
     input_file: Annotated[Path, typer.Argument(help="Input image file")],
@@ -129,11 +155,6 @@ def process_effect(
             effects_config = load_effects()
             effect_def = effects_config.effects.get(effect)
             if effect_def:
-                from wallpaper_core.cli.process import _resolve_command
-                from wallpaper_core.engine.chain import ChainExecutor
-
-                chain_exec = ChainExecutor(effects_config)
-                params = chain_exec._get_params_with_defaults(effect, {})
                 # Compute expected output path based on flat flag
                 if flat:
                     expected_output = Path(f"/output/{effect}{input_file.suffix}")
@@ -142,11 +163,13 @@ def process_effect(
                     expected_output = Path(
                         f"/output/{image_stem}/effects/{effect}{input_file.suffix}"
                     )
-                inner_command = _resolve_command(
-                    effect_def.command,
-                    Path(f"/input/{input_file.name}"),
+                inner_command = _inner_command(
+                    config.core,  # type: ignore[attr-defined]
+                    effects_config,
+                    effect,
+                    ItemType.EFFECT,
+                    input_file,
                     expected_output,
-                    params,
                 )
             else:
                 inner_command = f"<effect '{effect}' not found in config>"
@@ -291,8 +314,6 @@ def process_composite(
             effects_config = load_effects()
             composite_def = effects_config.composites.get(composite)
             if composite_def:
-                from wallpaper_core.cli.process import _resolve_chain_commands
-
                 # Compute expected output path based on flat flag
                 if flat:
                     expected_output = Path(f"/output/{composite}{input_file.suffix}")
@@ -302,15 +323,14 @@ def process_composite(
                         f"/output/{image_stem}/composites/{composite}{input_file.suffix}"
                     )
 
-                inner_commands = _resolve_chain_commands(
-                    composite_def.chain,
+                inner_command = _inner_command(
+                    config.core,  # type: ignore[attr-defined]
                     effects_config,
-                    Path(f"/input/{input_file.name}"),
+                    composite,
+                    ItemType.COMPOSITE,
+                    input_file,
                     expected_output,
                 )
-                inner_command = (
-                    " && ".join(inner_commands) if inner_commands else "<empty chain>"
-                )
             else:
                 inner_command = f"<composite '{composite}' not found in config>"
 
@@ -464,37 +484,27 @@ def process_preset(
                 if preset_def.effect:
                     effect_def = effects_config.effects.get(preset_def.effect)
                     if effect_def:
-                        from wallpaper_core.cli.process import _resolve_command
-                        from wallpaper_core.engine.chain import ChainExecutor
-
-                        chain_exec = ChainExecutor(effects_config)
-                        params = chain_exec._get_params_with_defaults(
-                            preset_def.effect, preset_def.params or {}
-                        )
-                        inner_command = _resolve_command(
-                            effect_def.command,
-                            Path(f"/input/{input_file.name}"),
+                        inner_command = _inner_command(
+                            config.core,  # type: ignore[attr-defined]
+                            effects_config,
+                            preset,
+                            ItemType.PRESET,
+                            input_file,
                             expected_output,
-                            params,
                         )
                     else:
                         inner_command = f"<effect '{preset_def.effect}' not found>"
                 elif preset_def.composite:
                     composite_def = effects_config.composites.get(preset_def.composite)
                     if composite_def:
-                        from wallpaper_core.cli.process import _resolve_chain_commands
-
-                        inner_commands = _resolve_chain_commands(
-                            composite_def.chain,
+                        inner_command = _inner_command(
+                            config.core,  # type: ignore[attr-defined]
                             effects_config,
-                            Path(f"/input/{input_file.name}"),
+                            preset,
+                            ItemType.PRESET,
+                            input_file,
                             expected_output,
                         )
-                        inner_command = (
-                            " && ".join(inner_commands)
-                            if inner_commands
-                            else "<empty chain>"
-                        )
                     else:
                         inner_command = (
                             f"<composite '{preset_def.composite}' not found>"
@@ -642,9 +652,14 @@ def _run_containerized_batch(
                 manager, batch_type, input_file, output_dir, flat, parallel, strict
             )
             effects_config = load_effects()
-            items = _resolve_batch_items(
-                effects_config, batch_type, input_file, output_dir, flat
+            generator = _batch_generator(
+                config.core,  # type: ignore[attr-defined]
+                effects_config,
+                None,
+                parallel,
+                strict,
             )
+            items = _dry_run_items(generator, batch_type, input_file, output_dir, flat)
             renderer.render_container_batch(
                 batch_type=batch_type,
                 input_path=input_file,
@@ -64,12 +64,48 @@ def _mock_subprocess_run(command, **kwargs):
     return mock_result
 
 
+class _MockPopen:
+    """
+    Mock subprocess.Popen built on _mock_subprocess_run.
+
+    The command "runs" as soon as it is spawned, so the process is already
+    finished when CommandExecutor registers it with its cancel token and
+    cancellation never signals a real process group.
+    """
+
+    pid = -1
+
+    def __init__(self, command, **kwargs):
+        self.args = command
+        result = _mock_subprocess_run(command, **kwargs)
+        self.returncode = result.returncode
+        self._output = (result.stdout, result.stderr)
+
+    def communicate(self, input=None, timeout=None):
+        return self._output
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def send_signal(self, sig):
+        pass
+
+    def terminate(self):
+        pass
+
+    def kill(self):
+        pass
+
+
 @pytest.fixture(autouse=True)
 def mock_subprocess_for_integration_tests():
     """
-    Auto-use fixture that mocks subprocess.run and shutil.which for all tests.
+    Auto-use fixture that mocks subprocess.Popen and shutil.which for all tests.
 
-    This mocks wallpaper_core.engine.executor.subprocess.run (the ImageMagick
+    This mocks wallpaper_core.engine.executor.subprocess.Popen (the ImageMagick
     execution path used by core's BatchGenerator and CommandExecutor). It applies
     to show, info, and any test that exercises core machinery directly.
 
@@ -86,8 +122,8 @@ def mock_subprocess_for_integration_tests():
 
     with (
         patch(
-            "wallpaper_core.engine.executor.subprocess.run",
-            side_effect=_mock_subprocess_run,
+            "wallpaper_core.engine.executor.subprocess.Popen",
+            side_effect=_MockPopen,
         ),
         patch("shutil.which", side_effect=mock_which),
     ):
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 
 from typer.testing import CliRunner
 
+from wallpaper_core.effects.schema import Effect, EffectsConfig
 from wallpaper_orchestrator.cli.main import app
 
 runner = CliRunner()
@@ -139,12 +140,15 @@ def test_process_effect_dry_run(tmp_path: Path) -> None:
         mock_manager.engine = "docker"
         mock_mgr.return_value = mock_manager
 
-        # Mock effects config
-        mock_effect = MagicMock()
-        mock_effect.command = 'magick "$INPUT" -blur 0x8 "$OUTPUT"'
-        mock_effects_config = MagicMock()
-        mock_effects_config.effects.get.return_value = mock_effect
-        mock_load.return_value = mock_effects_config
+        mock_load.return_value = EffectsConfig(
+            version="1.0",
+            effects={
+                "blur": Effect(
+                    description="Blur",
+                    command='magick "$INPUT" -blur 0x8 "$OUTPUT"',
+                )
+            },
+        )
 
         result = runner.invoke(
             app,
@@ -164,7 +168,7 @@ def test_process_effect_dry_run(tmp_path: Path) -> None:
         # Should not call run_process in dry-run mode
         mock_manager.run_process.assert_not_called()
         # Should display dry-run output
-        assert "blur" in result.output.lower()
+        assert "-blur 0x8" in result.output
 
 
 def test_process_composite_with_output_dir(tmp_path: Path) -> None:
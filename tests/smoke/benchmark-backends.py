@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Compare the magick backend with the in-process backends on a real image.
+
+Runs every packaged effect and composite with magick and with each
+in-process backend that is installed (numpy, wand), and reports the median
+wall time of each, the speed-up over magick, and the mean and largest
+per-channel difference from magick's output (0-1).
+
+Usage:
+    ./tests/smoke/benchmark-backends.py [--repeat N] [wallpaper]
+
+Requires ImageMagick and NumPy (pip install 'wallpaper-core[numpy]'); the
+wand backend is included when libMagickWand is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+from rich.console import Console
+from rich.table import Table
+
+from wallpaper_core.effects import get_package_effects_file
+from wallpaper_core.effects.schema import ChainStep, EffectsConfig
+from wallpaper_core.engine.chain import ChainExecutor
+
+DEFAULT_WALLPAPER = Path(__file__).parents[1] / "fixtures" / "test-wallpaper.jpg"
+
+
+def _time_chain(
+    backend: str,
+    executor: ChainExecutor,
+    chain: list[ChainStep],
+    source: Path,
+    output: Path,
+    repeat: int,
+) -> float:
+    """Median seconds one run of a chain takes."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = executor.execute_chain(chain, source, output)
+        times.append(time.perf_counter() - start)
+        if not result.success:
+            raise RuntimeError(f"{backend}: {result.stderr}")
+    return statistics.median(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wallpaper", nargs="?", type=Path, default=DEFAULT_WALLPAPER)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend")
+    args = parser.parse_args()
+
+    if shutil.which("magick") is None:
+        print("ImageMagick (magick) is required", file=sys.stderr)
+        return 1
+    try:
+        from wallpaper_core.engine import native
+    except ImportError:
+        print("NumPy is required: pip install 'wallpaper-core[numpy]'", file=sys.stderr)
+        return 1
+
+    config = EffectsConfig(**yaml.safe_load(get_package_effects_file().read_text()))
+    chains = {name: [ChainStep(effect=name)] for name in config.effects}
+    chains.update({name: c.chain for name, c in config.composites.items()})
+    executors = {"magick": ChainExecutor(config)}
+    for backend in ("numpy", "wand"):
+        executor = ChainExecutor(config, backend=backend)
+        if executor.backend is not None:
+            executors[backend] = executor
+        else:
+            print(f"Skipping {backend}: not installed", file=sys.stderr)
+    others = [backend for backend in executors if backend != "magick"]
+
+    table = Table(title=f"Backends on {args.wallpaper.name}")
+    table.add_column("Item")
+    table.add_column("magick (s)", justify="right")
+    for backend in others:
+        for column in ["(s)", "speed-up", "mean diff", "max diff"]:
+            table.add_column(f"{backend} {column}", justify="right")
+
+    with tempfile.TemporaryDirectory() as work:
+        for name, chain in chains.items():
+            times, pixels = {}, {}
+            for backend, executor in executors.items():
+                output = Path(work) / f"{name}.{backend}.png"
+                times[backend] = _time_chain(
+                    backend, executor, chain, args.wallpaper, output, args.repeat
+                )
+                decoded = executors["magick"].executor.execute_bytes(
+                    native.DECODE_COMMAND, output.read_bytes(), "pam"
+                )
+                pixels[backend] = native.decode_pam(decoded.data)[0]
+            row = [name, f"{times['magick']:.3f}"]
+            for backend in others:
+                mean, largest = native.pixel_difference(
+                    pixels["magick"], pixels[backend]
+                )
+                row += [
+                    f"{times[backend]:.3f}",
+                    f"{times['magick'] / times[backend]:.2f}x",
+                    f"{mean:.4f}",
+                    f"{largest:.4f}",
+                ]
+            table.add_row(*row)
+
+    Console().print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())